@@ -26,11 +26,11 @@ import webob.dec
 import webob.exc
 
 from nova.api.metadata import base
+from nova.compute import metadata_cache
 from nova import exception
 from nova.i18n import _
 from nova.i18n import _LE
 from nova.i18n import _LW
-from nova.openstack.common import memorycache
 from nova import utils
 from nova import wsgi
 
@@ -70,42 +70,68 @@ class MetadataRequestHandler(wsgi.Application):
     """Serve metadata."""
 
     def __init__(self):
-        self._cache = memorycache.get_client()
+        self._cache = metadata_cache.MetadataCache()
+        self._hits = 0
+        self._misses = 0
+
+    def get_cache_stats(self):
+        """Return the number of metadata cache hits and misses.
+
+        Only misses load the metadata from the database.
+        """
+        total = self._hits + self._misses
+        return {'hits': self._hits,
+                'misses': self._misses,
+                'hit_ratio': float(self._hits) / total if total else 0.0}
+
+    def _cache_hit(self, what):
+        self._hits += 1
+        LOG.debug("Using cached metadata for %(what)s, hits: %(hits)d, "
+                  "misses: %(misses)d",
+                  {'what': what, 'hits': self._hits, 'misses': self._misses})
+
+    def _cache_miss(self, what):
+        self._misses += 1
+        LOG.debug("Loading metadata for %(what)s, hits: %(hits)d, "
+                  "misses: %(misses)d",
+                  {'what': what, 'hits': self._hits, 'misses': self._misses})
 
     def get_metadata_by_remote_address(self, address):
         if not address:
             raise exception.FixedIpNotFoundForAddress(address=address)
 
-        cache_key = 'metadata-%s' % address
-        data = self._cache.get(cache_key)
+        data = self._cache.get_by_address(address)
         if data:
-            LOG.debug("Using cached metadata for %s", address)
+            self._cache_hit(address)
             return data
 
+        self._cache_miss(address)
         try:
             data = base.get_metadata_by_address(address)
         except exception.NotFound:
             return None
 
         if CONF.metadata_cache_expiration > 0:
-            self._cache.set(cache_key, data, CONF.metadata_cache_expiration)
+            self._cache.set(data.uuid, address, data,
+                            CONF.metadata_cache_expiration)
 
         return data
 
     def get_metadata_by_instance_id(self, instance_id, address):
-        cache_key = 'metadata-%s' % instance_id
-        data = self._cache.get(cache_key)
+        data = self._cache.get_by_instance_id(instance_id, address)
         if data:
-            LOG.debug("Using cached metadata for instance %s", instance_id)
+            self._cache_hit('instance %s' % instance_id)
             return data
 
+        self._cache_miss('instance %s' % instance_id)
         try:
             data = base.get_metadata_by_instance_id(instance_id, address)
         except exception.NotFound:
             return None
 
         if CONF.metadata_cache_expiration > 0:
-            self._cache.set(cache_key, data, CONF.metadata_cache_expiration)
+            self._cache.set(instance_id, address, data,
+                            CONF.metadata_cache_expiration)
 
         return data
 
@@ -25,6 +25,7 @@ import six.moves.urllib.parse as urlparse
 import webob
 from webob import exc
 
+from nova.api.openstack import wsgi
 from nova.api.validation import parameter_types
 from nova.compute import task_states
 from nova.compute import utils as compute_utils
@@ -46,6 +47,12 @@ osapi_opts = [
     cfg.StrOpt('osapi_glance_link_prefix',
                help='Base URL that will be presented to users in links '
                     'to glance resources'),
+    cfg.BoolOpt('osapi_stream_list_responses',
+                default=False,
+                help='Whether the JSON of list responses, like servers, '
+                     'flavors or hypervisors, is streamed to the client '
+                     'one item at a time instead of being serialized at '
+                     'once'),
 ]
 CONF = cfg.CONF
 CONF.register_opts(osapi_opts)
@@ -270,6 +277,18 @@ def limited(items, request, max_limit=CONF.osapi_max_limit):
     return items[offset:range_end]
 
 
+def list_view(func, items):
+    """Return the list of the views built by func for items.
+
+    If osapi_stream_list_responses is set, the JSON of the views is
+    streamed to the client.
+    """
+    views = [func(item) for item in items]
+    if CONF.osapi_stream_list_responses:
+        return wsgi.StreamedList(views)
+    return views
+
+
 def get_limit_and_marker(request, max_limit=CONF.osapi_max_limit):
     """get limited parameter from request."""
     params = get_pagination_params(request)
@@ -57,8 +57,7 @@ class ServiceController(object):
 
         return services
 
-    def _get_service_detail(self, svc, detailed):
-        alive = self.servicegroup_api.service_is_up(svc)
+    def _get_service_detail(self, svc, detailed, alive):
         state = (alive and "up") or "down"
         active = 'enabled'
         if svc['disabled']:
@@ -76,9 +75,10 @@ class ServiceController(object):
 
     def _get_services_list(self, req, detailed):
         services = self._get_services(req)
+        alive = self.servicegroup_api.services_are_up(services)
         svcs = []
-        for svc in services:
-            svcs.append(self._get_service_detail(svc, detailed))
+        for svc, svc_alive in zip(services, alive):
+            svcs.append(self._get_service_detail(svc, detailed, svc_alive))
 
         return svcs
 
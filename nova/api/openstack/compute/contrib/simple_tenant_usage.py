@@ -16,12 +16,14 @@
 import datetime
 
 import iso8601
+from oslo_serialization import jsonutils
 from oslo_utils import timeutils
 import six
 import six.moves.urllib.parse as urlparse
 from webob import exc
 
 from nova.api.openstack import extensions
+from nova import db
 from nova import exception
 from nova.i18n import _
 from nova import objects
@@ -39,20 +41,17 @@ def parse_strtime(dstr, fmt):
         raise exception.InvalidStrTime(reason=six.text_type(e))
 
 
-class SimpleTenantUsageController(object):
-    def _hours_for(self, instance, period_start, period_stop):
-        launched_at = instance.launched_at
-        terminated_at = instance.terminated_at
-        if terminated_at is not None:
-            if not isinstance(terminated_at, datetime.datetime):
-                # NOTE(mriedem): Instance object DateTime fields are
-                # timezone-aware so convert using isotime.
-                terminated_at = timeutils.parse_isotime(terminated_at)
-
-        if launched_at is not None:
-            if not isinstance(launched_at, datetime.datetime):
-                launched_at = timeutils.parse_isotime(launched_at)
+def _utc(value):
+    # NOTE: the database returns timezone-naive UTC datetimes, which are
+    # compared with the timezone-aware period of the request.
+    if value is not None and value.utcoffset() is None:
+        value = value.replace(tzinfo=iso8601.iso8601.Utc())
+    return value
+
 
+class SimpleTenantUsageController(object):
+    def _hours_for(self, launched_at, terminated_at, period_start,
+                   period_stop):
         if terminated_at and terminated_at < period_start:
             return 0
         # nothing if it started after the usage report ended
@@ -76,68 +75,98 @@ class SimpleTenantUsageController(object):
             # instance hasn't launched, so no charge
             return 0
 
-    def _get_flavor(self, context, instance, flavors_cache):
-        """Get flavor information from the instance's system_metadata,
-        allowing a fallback to lookup by-id for deleted instances only.
+    def _get_flavor_name(self, context, instance, flavors_cache):
+        """Get the flavor name of an instance usage row.
+
+        Non-deleted instances have their flavor in instance_extra or in
+        system_metadata, deleted ones get it by id.
         """
-        try:
-            return instance.get_flavor()
-        except exception.NotFound:
-            if not instance.deleted:
-                # Only support the fallback mechanism for deleted instances
-                # that would have been skipped by migration #153
-                raise
+        if not instance.deleted:
+            if instance.flavor is not None:
+                flavor = jsonutils.loads(instance.flavor)['cur']
+                return flavor['nova_object.data']['name']
+            if instance.flavor_name is not None:
+                return instance.flavor_name
+            # Only support the fallback mechanism for deleted instances
+            # that would have been skipped by migration #153
+            raise exception.FlavorNotFound(
+                flavor_id=instance.instance_type_id)
 
         flavor_type = instance.instance_type_id
-        if flavor_type in flavors_cache:
-            return flavors_cache[flavor_type]
-
-        try:
-            flavor_ref = objects.Flavor.get_by_id(context, flavor_type)
-            flavors_cache[flavor_type] = flavor_ref
-        except exception.FlavorNotFound:
-            # can't bill if there is no flavor
-            flavor_ref = None
+        if flavor_type not in flavors_cache:
+            try:
+                flavors_cache[flavor_type] = objects.Flavor.get_by_id(
+                    context, flavor_type)
+            except exception.FlavorNotFound:
+                # can't bill if there is no flavor
+                flavors_cache[flavor_type] = None
 
-        return flavor_ref
+        flavor_ref = flavors_cache[flavor_type]
+        return flavor_ref.name if flavor_ref else ''
 
     def _tenant_usages_for_period(self, context, period_start,
                                   period_stop, tenant_id=None, detailed=True):
 
-        instances = objects.InstanceList.get_active_by_window_joined(
-                        context, period_start, period_stop, tenant_id,
-                        expected_attrs=['system_metadata'])
+        # NOTE: only the columns needed for the usages are read, and the
+        # rows are streamed, so that only the summaries are kept in memory
+        # unless the usages of the servers are requested.
+        instances = db.instance_get_usages_by_window(
+                        context, period_start, period_stop, tenant_id)
         rval = {}
         flavors = {}
 
         for instance in instances:
+            launched_at = _utc(instance.launched_at)
+            terminated_at = _utc(instance.terminated_at)
+            hours = self._hours_for(launched_at, terminated_at,
+                                    period_start, period_stop)
+            project_id = instance.project_id
+
+            if project_id not in rval:
+                summary = {}
+                summary['tenant_id'] = project_id
+                if detailed:
+                    summary['server_usages'] = []
+                summary['total_local_gb_usage'] = 0
+                summary['total_vcpus_usage'] = 0
+                summary['total_memory_mb_usage'] = 0
+                summary['total_hours'] = 0
+                summary['start'] = timeutils.normalize_time(period_start)
+                summary['stop'] = timeutils.normalize_time(period_stop)
+                rval[project_id] = summary
+
+            summary = rval[project_id]
+            local_gb = instance.root_gb + instance.ephemeral_gb
+            summary['total_local_gb_usage'] += local_gb * hours
+            summary['total_vcpus_usage'] += instance.vcpus * hours
+            summary['total_memory_mb_usage'] += instance.memory_mb * hours
+            summary['total_hours'] += hours
+
+            if not detailed:
+                continue
+
             info = {}
-            info['hours'] = self._hours_for(instance,
-                                            period_start,
-                                            period_stop)
-            flavor = self._get_flavor(context, instance, flavors)
-            if not flavor:
-                info['flavor'] = ''
-            else:
-                info['flavor'] = flavor.name
+            info['hours'] = hours
+            info['flavor'] = self._get_flavor_name(context, instance,
+                                                   flavors)
 
             info['instance_id'] = instance.uuid
             info['name'] = instance.display_name
 
             info['memory_mb'] = instance.memory_mb
-            info['local_gb'] = instance.root_gb + instance.ephemeral_gb
+            info['local_gb'] = local_gb
             info['vcpus'] = instance.vcpus
 
-            info['tenant_id'] = instance.project_id
+            info['tenant_id'] = project_id
 
             # NOTE(mriedem): We need to normalize the start/end times back
             # to timezone-naive so the response doesn't change after the
             # conversion to objects.
-            info['started_at'] = timeutils.normalize_time(instance.launched_at)
+            info['started_at'] = timeutils.normalize_time(launched_at)
 
             info['ended_at'] = (
-                timeutils.normalize_time(instance.terminated_at) if
-                    instance.terminated_at else None)
+                timeutils.normalize_time(terminated_at) if
+                    terminated_at else None)
 
             if info['ended_at']:
                 info['state'] = 'terminated'
@@ -153,28 +182,7 @@ class SimpleTenantUsageController(object):
 
             info['uptime'] = delta.days * 24 * 3600 + delta.seconds
 
-            if info['tenant_id'] not in rval:
-                summary = {}
-                summary['tenant_id'] = info['tenant_id']
-                if detailed:
-                    summary['server_usages'] = []
-                summary['total_local_gb_usage'] = 0
-                summary['total_vcpus_usage'] = 0
-                summary['total_memory_mb_usage'] = 0
-                summary['total_hours'] = 0
-                summary['start'] = timeutils.normalize_time(period_start)
-                summary['stop'] = timeutils.normalize_time(period_stop)
-                rval[info['tenant_id']] = summary
-
-            summary = rval[info['tenant_id']]
-            summary['total_local_gb_usage'] += info['local_gb'] * info['hours']
-            summary['total_vcpus_usage'] += info['vcpus'] * info['hours']
-            summary['total_memory_mb_usage'] += (info['memory_mb'] *
-                                                 info['hours'])
-
-            summary['total_hours'] += info['hours']
-            if detailed:
-                summary['server_usages'].append(info)
+            summary['server_usages'].append(info)
 
         return rval.values()
 
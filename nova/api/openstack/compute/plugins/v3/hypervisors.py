@@ -17,6 +17,7 @@
 
 import webob.exc
 
+from nova.api.openstack import common
 from nova.api.openstack import extensions
 from nova.api.openstack import wsgi
 from nova import compute
@@ -38,8 +39,9 @@ class HypervisorsController(wsgi.Controller):
         super(HypervisorsController, self).__init__()
 
     def _view_hypervisor(self, hypervisor, service, detail, servers=None,
-                         **kwargs):
-        alive = self.servicegroup_api.service_is_up(service)
+                         alive=None, **kwargs):
+        if alive is None:
+            alive = self.servicegroup_api.service_is_up(service)
         hyp_dict = {
             'id': hypervisor.id,
             'hypervisor_hostname': hypervisor.hypervisor_hostname,
@@ -73,31 +75,44 @@ class HypervisorsController(wsgi.Controller):
 
         return hyp_dict
 
+    def _services_alive(self, services):
+        """Return whether each one of the services is up, by hostname.
+
+        The liveness of all the services is checked with a single call to
+        the servicegroup API rather than once per hypervisor.
+        """
+        hosts = list(services)
+        alive = self.servicegroup_api.services_are_up(
+            [services[host] for host in hosts])
+        return dict(zip(hosts, alive))
+
     @extensions.expected_errors(())
     def index(self, req):
         context = req.environ['nova.context']
         authorize(context)
-        compute_nodes = self.host_api.compute_node_get_all(context)
+        compute_nodes, services = (
+            self.host_api.compute_node_get_all_with_services(context))
         req.cache_db_compute_nodes(compute_nodes)
-        return dict(hypervisors=[self._view_hypervisor(
-                                 hyp,
-                                 self.host_api.service_get_by_compute_host(
-                                     context, hyp.host),
-                                 False)
-                                 for hyp in compute_nodes])
+        alive = self._services_alive(services)
+        return dict(hypervisors=common.list_view(
+            lambda hyp: self._view_hypervisor(hyp, services[hyp.host],
+                                              False,
+                                              alive=alive.get(hyp.host)),
+            compute_nodes))
 
     @extensions.expected_errors(())
     def detail(self, req):
         context = req.environ['nova.context']
         authorize(context)
-        compute_nodes = self.host_api.compute_node_get_all(context)
+        compute_nodes, services = (
+            self.host_api.compute_node_get_all_with_services(context))
         req.cache_db_compute_nodes(compute_nodes)
-        return dict(hypervisors=[self._view_hypervisor(
-                                 hyp,
-                                 self.host_api.service_get_by_compute_host(
-                                     context, hyp.host),
-                                 True)
-                                 for hyp in compute_nodes])
+        alive = self._services_alive(services)
+        return dict(hypervisors=common.list_view(
+            lambda hyp: self._view_hypervisor(hyp, services[hyp.host],
+                                              True,
+                                              alive=alive.get(hyp.host)),
+            compute_nodes))
 
     @extensions.expected_errors(404)
     def show(self, req, id):
@@ -143,11 +158,12 @@ class HypervisorsController(wsgi.Controller):
         hypervisors = self.host_api.compute_node_search_by_hypervisor(
                 context, id)
         if hypervisors:
+            services = self.host_api.service_get_by_compute_hosts(
+                context, [hyp.host for hyp in hypervisors])
+            alive = self._services_alive(services)
             return dict(hypervisors=[self._view_hypervisor(
-                                     hyp,
-                                     self.host_api.service_get_by_compute_host(
-                                         context, hyp.host),
-                                     False)
+                                     hyp, services[hyp.host], False,
+                                     alive=alive.get(hyp.host))
                                      for hyp in hypervisors])
         else:
             msg = _("No hypervisor matching '%s' could be found.") % id
@@ -162,14 +178,17 @@ class HypervisorsController(wsgi.Controller):
         if not compute_nodes:
             msg = _("No hypervisor matching '%s' could be found.") % id
             raise webob.exc.HTTPNotFound(explanation=msg)
+        services = self.host_api.service_get_by_compute_hosts(
+            context, [compute_node.host for compute_node in compute_nodes])
+        alive = self._services_alive(services)
         hypervisors = []
         for compute_node in compute_nodes:
             instances = self.host_api.instance_get_all_by_host(context,
                     compute_node.host)
-            service = self.host_api.service_get_by_compute_host(
-                context, compute_node.host)
-            hyp = self._view_hypervisor(compute_node, service, False,
-                                        instances)
+            hyp = self._view_hypervisor(compute_node,
+                                        services[compute_node.host], False,
+                                        instances,
+                                        alive=alive.get(compute_node.host))
             hypervisors.append(hyp)
         return dict(hypervisors=hypervisors)
 
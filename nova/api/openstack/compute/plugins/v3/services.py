@@ -52,8 +52,7 @@ class ServiceController(wsgi.Controller):
 
         return services
 
-    def _get_service_detail(self, svc):
-        alive = self.servicegroup_api.service_is_up(svc)
+    def _get_service_detail(self, svc, alive):
         state = (alive and "up") or "down"
         active = 'enabled'
         if svc['disabled']:
@@ -69,9 +68,10 @@ class ServiceController(wsgi.Controller):
 
     def _get_services_list(self, req):
         services = self._get_services(req)
+        alive = self.servicegroup_api.services_are_up(services)
         svcs = []
-        for svc in services:
-            svcs.append(self._get_service_detail(svc))
+        for svc, svc_alive in zip(services, alive):
+            svcs.append(self._get_service_detail(svc, svc_alive))
 
         return svcs
 
@@ -68,7 +68,8 @@ class ViewBuilder(common.ViewBuilder):
 
         :returns: Flavor reply data in dictionary format
         """
-        flavor_list = [func(request, flavor)["flavor"] for flavor in flavors]
+        flavor_list = common.list_view(
+            lambda flavor: func(request, flavor)["flavor"], flavors)
         flavors_links = self._get_collection_links(request,
                                                    flavors,
                                                    coll_name,
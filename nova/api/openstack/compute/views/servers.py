@@ -134,7 +134,8 @@ class ViewBuilder(common.ViewBuilder):
                           for a pagination query
         :returns: Server data in dictionary format
         """
-        server_list = [func(request, server)["server"] for server in servers]
+        server_list = common.list_view(
+            lambda server: func(request, server)["server"], servers)
         servers_links = self._get_collection_links(request,
                                                    servers,
                                                    coll_name)
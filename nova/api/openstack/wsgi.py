@@ -74,6 +74,9 @@ VER_METHOD_ATTR = 'versioned_methods'
 # of the REST API
 API_VERSION_REQUEST_HEADER = 'X-OpenStack-Nova-API-Version'
 
+# Size of the chunks in which streamed JSON responses are written
+STREAM_CHUNK_SIZE = 65536
+
 
 def get_supported_content_types():
     return _SUPPORTED_CONTENT_TYPES
@@ -284,12 +287,56 @@ class DictSerializer(ActionDispatcher):
         return ""
 
 
+class StreamedList(list):
+    """A list of views whose JSON is streamed when the response is written.
+
+    The views are built before the response starts, like those of a list,
+    so that errors building them are still returned as a fault. Only their
+    JSON encoding is written one view at a time.
+    """
+
+
 class JSONDictSerializer(DictSerializer):
     """Default JSON request body serialization."""
 
     def default(self, data):
+        if isinstance(data, dict) and any(isinstance(value, StreamedList)
+                                          for value in data.values()):
+            return self._stream(data)
         return jsonutils.dumps(data)
 
+    def _iter_json(self, data):
+        yield '{'
+        for i, (key, value) in enumerate(data.items()):
+            if i:
+                yield ', '
+            yield jsonutils.dumps(key)
+            yield ': '
+            if isinstance(value, StreamedList):
+                yield '['
+                for j, view in enumerate(value):
+                    if j:
+                        yield ', '
+                    yield jsonutils.dumps(view)
+                yield ']'
+            else:
+                yield jsonutils.dumps(value)
+        yield '}'
+
+    def _stream(self, data):
+        """Write the JSON of data in chunks of about STREAM_CHUNK_SIZE."""
+        chunk = []
+        size = 0
+        for part in self._iter_json(data):
+            chunk.append(part)
+            size += len(part)
+            if size >= STREAM_CHUNK_SIZE:
+                yield utils.utf8(''.join(chunk))
+                chunk = []
+                size = 0
+        if chunk:
+            yield utils.utf8(''.join(chunk))
+
 
 def serializers(**serializers):
     """Attaches serializers to a method.
@@ -454,7 +501,12 @@ class ResponseObject(object):
             response.headers[hdr] = utils.utf8(str(value))
         response.headers['Content-Type'] = utils.utf8(content_type)
         if self.obj is not None:
-            response.body = serializer.serialize(self.obj)
+            body = serializer.serialize(self.obj)
+            if isinstance(body, six.string_types):
+                response.body = body
+            else:
+                # NOTE: the body is streamed to the client
+                response.app_iter = body
 
         return response
 
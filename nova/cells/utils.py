@@ -103,6 +103,14 @@ class _CellProxy(object):
     def __getattr__(self, key):
         return getattr(self._obj, key)
 
+    # NOTE: copy and pickle look these up on the proxy itself, don't let
+    # __getattr__ get them from the proxied object.
+    def __getstate__(self):
+        return self.__dict__
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+
 
 class ComputeNodeProxy(_CellProxy):
     pass
@@ -115,6 +115,15 @@ compute_opts = [
                     'in a local image being created on the hypervisor node. '
                     'Setting this to 0 means nova will allow only '
                     'boot from volume. A negative number means unlimited.'),
+    cfg.IntOpt('hypervisor_cache_staleness',
+               default=0,
+               help='Time in seconds the hypervisor list, detail and '
+                    'statistics served by the API may be cached for. Each '
+                    'API worker then loads them at most once in this '
+                    'period, however often they are polled. This should be '
+                    'lower than service_down_time, as it also delays the '
+                    'reported state of the hypervisors. 0 disables the '
+                    'cache'),
 ]
 
 ephemeral_storage_encryption_group = cfg.OptGroup(
@@ -614,6 +623,11 @@ class API(base.Base):
         }
 
     def _apply_instance_name_template(self, context, instance, index):
+        self._populate_instance_name_from_template(instance, index)
+        instance.save()
+        return instance
+
+    def _populate_instance_name_from_template(self, instance, index):
         params = {
             'uuid': instance.uuid,
             'name': instance.display_name,
@@ -629,8 +643,6 @@ class API(base.Base):
         instance.display_name = new_name
         if not instance.get('hostname', None):
             instance.hostname = utils.sanitize_hostname(new_name)
-        instance.save()
-        return instance
 
     def _check_config_drive(self, config_drive):
         if config_drive:
@@ -913,30 +925,38 @@ class API(base.Base):
             for i in xrange(num_instances):
                 instance = objects.Instance(context=context)
                 instance.update(base_options)
-                instance = self.create_db_entry_for_new_instance(
-                        context, instance_type, boot_meta, instance,
-                        security_groups, block_device_mapping,
-                        num_instances, i, shutdown_terminate)
                 instances.append(instance)
-
-                if instance_group:
-                    if check_server_group_quota:
-                        count = objects.Quotas.count(context,
-                                             'server_group_members',
-                                             instance_group,
-                                             context.user_id)
-                        try:
-                            objects.Quotas.limit_check(context,
-                                               server_group_members=count + 1)
-                        except exception.OverQuota:
-                            msg = _("Quota exceeded, too many servers in "
-                                    "group")
-                            raise exception.QuotaError(msg)
-
-                    objects.InstanceGroup.add_members(context,
-                                                      instance_group.uuid,
-                                                      [instance.uuid])
-
+            if num_instances > 1:
+                instances = self._create_db_entries_for_new_instances(
+                        context, instance_type, boot_meta, instances,
+                        security_groups, block_device_mapping,
+                        shutdown_terminate)
+            else:
+                self.create_db_entry_for_new_instance(
+                        context, instance_type, boot_meta, instances[0],
+                        security_groups, block_device_mapping,
+                        num_instances, 0, shutdown_terminate)
+
+            if instance_group:
+                if check_server_group_quota:
+                    count = objects.Quotas.count(context,
+                                                 'server_group_members',
+                                                 instance_group,
+                                                 context.user_id)
+                    try:
+                        objects.Quotas.limit_check(context,
+                                server_group_members=count + num_instances)
+                    except exception.OverQuota:
+                        msg = _("Quota exceeded, too many servers in "
+                                "group")
+                        raise exception.QuotaError(msg)
+
+                objects.InstanceGroup.add_members(context,
+                                                  instance_group.uuid,
+                                                  [inst.uuid for inst
+                                                   in instances])
+
+            for instance in instances:
                 # send a state update notification for the initial create to
                 # show it going from non-existent to BUILDING
                 notifications.send_update_with_states(context, instance, None,
@@ -1207,6 +1227,22 @@ class API(base.Base):
             bdm.instance_uuid = instance_uuid
             bdm.update_or_create()
 
+    def _block_device_mapping_values(self, instance_type,
+                                     block_device_mapping):
+        """Return the database values of the block device mappings of a new
+        instance, as created by _create_block_device_mapping().
+        """
+        bdm_values = []
+        for bdm in block_device_mapping:
+            volume_size = self._volume_size(instance_type, bdm)
+            if volume_size == 0:
+                continue
+
+            bdm = copy.deepcopy(bdm)
+            bdm.volume_size = volume_size
+            bdm_values.append(bdm.obj_get_changes())
+        return bdm_values
+
     def _validate_bdm(self, context, instance, instance_type, all_mappings):
         def _subsequent_list(l):
             return all(el + 1 == l[i + 1] for i, el in enumerate(l[:-1]))
@@ -1399,6 +1435,43 @@ class API(base.Base):
 
         return instance
 
+    def _create_db_entries_for_new_instances(self, context, instance_type,
+            image, instances, security_group, block_device_mapping,
+            shutdown_terminate=False):
+        """Create the entries in the DB for several new instances at once.
+
+        This is the bulk version of create_db_entry_for_new_instance(): the
+        instances, their block device mappings and the related table
+        entries are all created in a single transaction. Returns the
+        created instances.
+        """
+        num_instances = len(instances)
+        for index, instance in enumerate(instances):
+            self._populate_instance_for_create(context, instance, image,
+                                               index, security_group,
+                                               instance_type)
+
+            self._populate_instance_names(instance, num_instances)
+
+            instance.shutdown_terminate = shutdown_terminate
+
+            if num_instances > 1:
+                # NOTE: the UUID of the instance is already set at this
+                # point, so the template can be applied before creating it.
+                self._populate_instance_name_from_template(instance, index)
+
+            # NOTE: nothing has been created yet, so there is nothing to
+            # clean up if the mappings are invalid.
+            self._validate_bdm(
+                context, instance, instance_type, block_device_mapping)
+
+        self.security_group_api.ensure_default(context)
+        inst_list = objects.InstanceList.create_multi(
+                context, instances,
+                block_device_mappings=self._block_device_mapping_values(
+                    instance_type, block_device_mapping))
+        return inst_list.objects
+
     def _check_create_policies(self, context, availability_zone,
             requested_networks, block_device_mapping):
         """Check policies for create()."""
@@ -3323,8 +3396,26 @@ class HostAPI(base.Base):
     def __init__(self, rpcapi=None):
         self.rpcapi = rpcapi or compute_rpcapi.ComputeAPI()
         self.servicegroup_api = servicegroup.API()
+        self._hypervisors_cache = {}
         super(HostAPI, self).__init__()
 
+    def _get_cached(self, key, load):
+        """Return the result of load(), cached for at most
+        hypervisor_cache_staleness seconds.
+
+        The result is shared by the requests of all the users, so load()
+        must only return primitives, not objects bound to its context.
+        """
+        staleness = CONF.hypervisor_cache_staleness
+        if staleness <= 0:
+            return load()
+        now = timeutils.utcnow_ts()
+        cached = self._hypervisors_cache.get(key)
+        if cached is None or now - cached[0] >= staleness:
+            cached = (now, load())
+            self._hypervisors_cache[key] = cached
+        return cached[1]
+
     def _assert_host_exists(self, context, host_name, must_be_up=False):
         """Raise HostNotFound if compute host doesn't exist."""
         service = objects.Service.get_by_compute_host(context, host_name)
@@ -3415,6 +3506,24 @@ class HostAPI(base.Base):
         """Get service entry for the given compute hostname."""
         return objects.Service.get_by_compute_host(context, host_name)
 
+    def service_get_by_compute_hosts(self, context, host_names):
+        """Get the service entries of the given compute hostnames.
+
+        The services are loaded together rather than one host at a time.
+        Returns a dict of the services by hostname.
+        """
+        services = {service.host: service for service in
+                    self.service_get_all(context, {'binary': 'nova-compute'})}
+        result = {}
+        for host_name in host_names:
+            service = services.get(host_name)
+            if service is None:
+                # NOTE: raises the same error as a lookup of the host alone
+                service = self.service_get_by_compute_host(context,
+                                                           host_name)
+            result[host_name] = service
+        return result
+
     def _service_update(self, context, host_name, binary, params_to_update):
         """Performs the actual service update operation."""
         service = objects.Service.get_by_args(context, host_name, binary)
@@ -3461,12 +3570,48 @@ class HostAPI(base.Base):
     def compute_node_get_all(self, context):
         return objects.ComputeNodeList.get_all(context)
 
+    def compute_node_get_all_with_services(self, context):
+        """Return all the compute nodes, and their services by hostname.
+
+        The result may be up to hypervisor_cache_staleness seconds old.
+        """
+        def _load():
+            compute_nodes = self.compute_node_get_all(context)
+            services = self.service_get_by_compute_hosts(
+                context, [node.host for node in compute_nodes])
+            return compute_nodes, services
+
+        if CONF.hypervisor_cache_staleness <= 0:
+            return _load()
+
+        def _load_primitives():
+            compute_nodes, services = _load()
+            return ([node.obj_to_primitive() for node in compute_nodes],
+                    {host: service.obj_to_primitive()
+                     for host, service in services.items()})
+
+        compute_nodes, services = self._get_cached('compute_nodes',
+                                                   _load_primitives)
+        compute_nodes = [obj_base.NovaObject.obj_from_primitive(
+                            node, context=context)
+                         for node in compute_nodes]
+        return (objects.ComputeNodeList(context=context,
+                                        objects=compute_nodes),
+                {host: obj_base.NovaObject.obj_from_primitive(
+                    service, context=context)
+                 for host, service in services.items()})
+
     def compute_node_search_by_hypervisor(self, context, hypervisor_match):
         return objects.ComputeNodeList.get_by_hypervisor(context,
                                                          hypervisor_match)
 
     def compute_node_statistics(self, context):
-        return self.db.compute_node_statistics(context)
+        """Return the totals of all compute nodes, which may be up to
+        hypervisor_cache_staleness seconds old.
+        """
+        return dict(self._get_cached(
+            'statistics',
+            lambda: dict(self.db.compute_node_statistics(context))))
 
 
 class InstanceActionAPI(base.Base):
@@ -205,6 +205,14 @@ class ComputeCellsAPI(compute_api.API):
         """
         pass
 
+    def _block_device_mapping_values(self, *args, **kwargs):
+        """Don't create block device mappings in the API cell.
+
+        The child cell will create them and propagate them up to the parent
+        cell.
+        """
+        return []
+
     def soft_delete(self, context, instance):
         self._handle_cell_delete(context, instance, 'soft_delete')
 
@@ -599,8 +607,20 @@ class HostAPI(compute_api.HostAPI):
         return self.cells_rpcapi.compute_node_get_all(context,
                 hypervisor_match=hypervisor_match)
 
+    def compute_node_get_all_with_services(self, context):
+        """Return all the compute nodes, and their services by hostname.
+
+        The compute nodes of the cells are proxies which are not cached.
+        """
+        compute_nodes = self.compute_node_get_all(context)
+        services = self.service_get_by_compute_hosts(
+            context, [node.host for node in compute_nodes])
+        return compute_nodes, services
+
     def compute_node_statistics(self, context):
-        return self.cells_rpcapi.compute_node_stats(context)
+        return dict(self._get_cached(
+            'statistics',
+            lambda: dict(self.cells_rpcapi.compute_node_stats(context))))
 
 
 class InstanceActionAPI(compute_api.InstanceActionAPI):
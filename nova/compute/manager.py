@@ -27,6 +27,7 @@ terminating it.
 
 import base64
 import contextlib
+import copy
 import functools
 import socket
 import sys
@@ -54,6 +55,7 @@ from nova.cells import rpcapi as cells_rpcapi
 from nova.cloudpipe import pipelib
 from nova import compute
 from nova.compute import build_results
+from nova.compute import metadata_cache
 from nova.compute import power_state
 from nova.compute import resource_tracker
 from nova.compute import rpcapi as compute_rpcapi
@@ -127,6 +129,12 @@ compute_opts = [
     cfg.IntOpt('max_concurrent_builds',
                default=10,
                help='Maximum number of instance builds to run concurrently'),
+    cfg.IntOpt('update_resources_concurrency',
+               default=1,
+               help='Maximum number of compute nodes whose resources are '
+                    'updated concurrently by the update_available_resource '
+                    'periodic task. Mostly useful for drivers managing many '
+                    'nodes, like the ironic one'),
     cfg.IntOpt('block_device_allocate_retries',
                default=60,
                help='Number of times to retry block device'
@@ -915,6 +923,7 @@ class ComputeManager(manager.Manager):
                 system_metadata=system_meta)
 
         self._clean_instance_console_tokens(context, instance)
+        metadata_cache.delete_instance_metadata(instance.uuid)
         self._delete_scheduler_instance_info(context, instance.uuid)
 
     def _init_instance(self, context, instance):
@@ -2203,6 +2212,35 @@ class ComputeManager(manager.Manager):
                       requested_networks, security_groups,
                       block_device_mapping, node, limits)
 
+    def build_and_run_instances(self, context, instances, image, request_spec,
+                                filter_properties, admin_password=None,
+                                injected_files=None, requested_networks=None,
+                                security_groups=None,
+                                block_device_mappings=None, node=None,
+                                limits=None):
+        """Build several instances scheduled to this host.
+
+        block_device_mappings holds the block device mappings of every
+        instance, in the same order as instances. Each instance is built
+        on its own, so an instance failing to build doesn't prevent the
+        others from being built.
+        """
+        for instance, bdms in six.moves.zip(instances, block_device_mappings):
+            try:
+                # NOTE: the filter properties are updated when an instance
+                # is rescheduled, so each instance needs its own copy.
+                self.build_and_run_instance(context, instance, image,
+                        request_spec, copy.deepcopy(filter_properties),
+                        admin_password=admin_password,
+                        injected_files=injected_files,
+                        requested_networks=requested_networks,
+                        security_groups=security_groups,
+                        block_device_mapping=bdms, node=node, limits=limits)
+            except Exception:
+                LOG.exception(_LE('Failed to build instance'),
+                              instance=instance)
+                self._set_instance_obj_error_state(context, instance)
+
     @hooks.add_hook('build_instance')
     @wrap_exception()
     @reverts_task_state
@@ -2402,6 +2440,7 @@ class ComputeManager(manager.Manager):
                     'create.end', fault=e)
 
         self._update_scheduler_instance_info(context, instance)
+        metadata_cache.update_instance_metadata(instance, network_info)
         self._notify_about_instance_usage(context, instance, 'create.end',
                 extra_usage_info={'message': _('Success')},
                 network_info=network_info)
@@ -3080,6 +3119,7 @@ class ComputeManager(manager.Manager):
                 instance.save()
                 self.stop_instance(context, instance)
             self._update_scheduler_instance_info(context, instance)
+            metadata_cache.update_instance_metadata(instance, network_info)
             self._notify_about_instance_usage(
                     context, instance, "rebuild.end",
                     network_info=network_info,
@@ -3567,6 +3607,7 @@ class ComputeManager(manager.Manager):
         LOG.debug("Changing instance metadata according to %r",
                   diff, instance=instance)
         self.driver.change_instance_metadata(context, instance, diff)
+        metadata_cache.update_instance_metadata(instance)
 
     def _cleanup_stored_instance_types(self, instance, restore_old=False):
         """Clean up "old" and "new" instance_type information stored in
@@ -6028,13 +6069,26 @@ class ComputeManager(manager.Manager):
                         {'num_db_instances': num_db_instances,
                          'num_vm_instances': num_vm_instances})
 
+        # NOTE: drivers which can list the power states of all their
+        # instances at once save a hypervisor call per instance. The others
+        # are queried one instance at a time.
+        try:
+            vm_power_states = self.driver.list_instance_power_states()
+        except NotImplementedError:
+            vm_power_states = None
+        except Exception:
+            LOG.exception(_LE("Failed to list the power states of all "
+                              "instances, querying them one at a time."))
+            vm_power_states = None
+
         def _sync(db_instance):
             # NOTE(melwitt): This must be synchronized as we query state from
             #                two separate sources, the driver and the database.
             #                They are set (in stop_instance) and read, in sync.
             @utils.synchronized(db_instance.uuid)
             def query_driver_power_state_and_sync():
-                self._query_driver_power_state_and_sync(context, db_instance)
+                self._query_driver_power_state_and_sync(context, db_instance,
+                                                        vm_power_states)
 
             try:
                 query_driver_power_state_and_sync()
@@ -6056,18 +6110,30 @@ class ComputeManager(manager.Manager):
                 self._syncs_in_progress[uuid] = True
                 self._sync_power_pool.spawn_n(_sync, db_instance)
 
-    def _query_driver_power_state_and_sync(self, context, db_instance):
+    def _query_driver_power_state_and_sync(self, context, db_instance,
+                                           vm_power_states=None):
         if db_instance.task_state is not None:
             LOG.info(_LI("During sync_power_state the instance has a "
                          "pending task (%(task)s). Skip."),
                      {'task': db_instance.task_state}, instance=db_instance)
             return
-        # No pending tasks. Now try to figure out the real vm_power_state.
-        try:
-            vm_instance = self.driver.get_info(db_instance)
-            vm_power_state = vm_instance.state
-        except exception.InstanceNotFound:
-            vm_power_state = power_state.NOSTATE
+        vm_power_state = None
+        if vm_power_states is not None:
+            # NOTE: the power states were listed before the instance was
+            # locked, so a listed state is only used if it still matches the
+            # database. A mismatch is confirmed with the driver below.
+            db_instance.refresh(use_slave=True)
+            listed_power_state = vm_power_states.get(db_instance.uuid,
+                                                     power_state.NOSTATE)
+            if listed_power_state == db_instance.power_state:
+                vm_power_state = listed_power_state
+        if vm_power_state is None:
+            # No pending tasks. Now try to figure out the real vm_power_state.
+            try:
+                vm_instance = self.driver.get_info(db_instance)
+                vm_power_state = vm_instance.state
+            except exception.InstanceNotFound:
+                vm_power_state = power_state.NOSTATE
         # Note(maoy): the above get_info call might take a long time,
         # for example, because of a broken libvirt driver.
         try:
@@ -6293,8 +6359,9 @@ class ComputeManager(manager.Manager):
         compute_nodes_in_db = self._get_compute_nodes_in_db(context,
                                                             use_slave=True)
         nodenames = set(self.driver.get_available_nodes())
-        for nodename in nodenames:
-            rt = self._get_resource_tracker(nodename)
+        rts = [self._get_resource_tracker(nodename) for nodename in nodenames]
+
+        def _update_rt(rt):
             try:
                 rt.update_available_resource(context)
             except exception.ComputeHostNotFound:
@@ -6305,13 +6372,20 @@ class ComputeManager(manager.Manager):
                 # Don't add this resource tracker to the new dict, so
                 # that this will resolve itself on the next run.
                 LOG.info(_LI("Compute node '%s' not found in "
-                             "update_available_resource."), nodename)
-                continue
+                             "update_available_resource."), rt.nodename)
+                return False
             except Exception as e:
                 LOG.error(_LE("Error updating resources for node "
                               "%(node)s: %(e)s"),
-                          {'node': nodename, 'e': e})
-            new_resource_tracker_dict[nodename] = rt
+                          {'node': rt.nodename, 'e': e})
+            return True
+
+        # NOTE: A driver may expose thousands of nodes (ironic), so their
+        # resource trackers can be updated concurrently.
+        pool = eventlet.GreenPool(CONF.update_resources_concurrency)
+        for rt, keep in zip(rts, pool.imap(_update_rt, rts)):
+            if keep:
+                new_resource_tracker_dict[rt.nodename] = rt
 
         # NOTE(comstud): Replace the RT cache before looping through
         # compute nodes to delete below, as we can end up doing greenthread
@@ -6518,7 +6592,10 @@ class ComputeManager(manager.Manager):
                       {'event': event.key},
                       instance=instance)
             if event.name == 'network-changed':
-                self.network_api.get_instance_nw_info(context, instance)
+                network_info = self.network_api.get_instance_nw_info(
+                    context, instance)
+                metadata_cache.update_instance_metadata(instance,
+                                                        network_info)
             else:
                 self._process_instance_event(instance, event)
 
@@ -6630,7 +6707,7 @@ class ComputeManager(manager.Manager):
 # present in Kilo so that we can receive v3.x and v4.0 messages
 class _ComputeV4Proxy(object):
 
-    target = messaging.Target(version='4.0')
+    target = messaging.Target(version='4.1')
 
     def __init__(self, manager):
         self.manager = manager
@@ -6930,6 +7007,20 @@ class _ComputeV4Proxy(object):
             block_device_mapping=block_device_mapping,
             node=node, limits=limits)
 
+    def build_and_run_instances(self, ctxt, instances, image, request_spec,
+                                filter_properties, admin_password=None,
+                                injected_files=None, requested_networks=None,
+                                security_groups=None,
+                                block_device_mappings=None, node=None,
+                                limits=None):
+        return self.manager.build_and_run_instances(
+            ctxt, instances, image, request_spec, filter_properties,
+            admin_password=admin_password, injected_files=injected_files,
+            requested_networks=requested_networks,
+            security_groups=security_groups,
+            block_device_mappings=block_device_mappings,
+            node=node, limits=limits)
+
     def quiesce_instance(self, ctxt, instance):
         return self.manager.quiesce_instance(ctxt, instance)
 
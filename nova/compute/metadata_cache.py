@@ -0,0 +1,185 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""Store of the metadata served to instances.
+
+The metadata of an instance is stored once per address it is served to,
+and can be looked up either by that address or by instance id. When
+memcached_servers is set the store is shared by all the metadata API
+workers and the compute services, which precompute the metadata of their
+instances and invalidate it when it changes.
+"""
+
+from oslo_config import cfg
+from oslo_log import log as logging
+from oslo_utils import uuidutils
+
+from nova import exception
+from nova.i18n import _LE
+from nova.openstack.common import memorycache
+
+metadata_cache_opts = [
+    cfg.BoolOpt('metadata_precompute',
+                default=False,
+                help='Whether compute services build the metadata of their '
+                     'instances when they are built, rebuilt, or when their '
+                     'network or metadata changes, and store it for the '
+                     'metadata API. This requires memcached_servers to be '
+                     'set, so that the store is shared by all the services'),
+    cfg.IntOpt('metadata_precompute_expiration',
+               default=3600,
+               help='Time in seconds to keep precomputed metadata. Changes '
+                    'which are not tracked, like security group updates, '
+                    'take at most this long to be served'),
+]
+
+CONF = cfg.CONF
+CONF.register_opts(metadata_cache_opts)
+
+LOG = logging.getLogger(__name__)
+
+
+class MetadataCache(object):
+    """Stores InstanceMetadata by address and instance id.
+
+    The data of an instance is keyed by a generation of the instance,
+    which is dropped to invalidate all of it at once. So there is no index
+    of the data of an instance to keep in sync, which couldn't be updated
+    atomically in memcached.
+    """
+
+    def __init__(self):
+        self._cache = memorycache.get_client()
+
+    def _get(self, key):
+        return self._cache.get(key.encode('UTF-8'))
+
+    def _set(self, key, value, expiration):
+        return self._cache.set(key.encode('UTF-8'), value, expiration)
+
+    def _add(self, key, value, expiration):
+        return self._cache.add(key.encode('UTF-8'), value, expiration)
+
+    def _delete(self, key):
+        self._cache.delete(key.encode('UTF-8'))
+
+    @staticmethod
+    def _data_key(instance_uuid, generation, address):
+        return 'metadata-%s-%s-%s' % (instance_uuid, generation, address)
+
+    @staticmethod
+    def _address_key(address):
+        return 'metadata-address-%s' % address
+
+    @staticmethod
+    def _generation_key(instance_uuid):
+        return 'metadata-generation-%s' % instance_uuid
+
+    def _get_generation(self, instance_uuid, expiration=None):
+        """Return the current generation of the data of an instance.
+
+        If there is none and an expiration is given, a new generation is
+        started, unless a concurrent request started one first.
+        """
+        key = self._generation_key(instance_uuid)
+        generation = self._get(key)
+        if generation is None and expiration is not None:
+            # NOTE: The generation must not expire before the data it
+            # points to.
+            expiration = max(expiration,
+                             CONF.metadata_precompute_expiration)
+            # NOTE: Concurrent requests can both find no generation, only
+            # one of them adds it and both then use that one.
+            self._add(key, uuidutils.generate_uuid(), expiration)
+            generation = self._get(key)
+        return generation
+
+    def get_by_address(self, address):
+        instance_uuid = self._get(self._address_key(address))
+        if instance_uuid is None:
+            return None
+        return self.get_by_instance_id(instance_uuid, address)
+
+    def get_by_instance_id(self, instance_id, address):
+        generation = self._get_generation(instance_id)
+        if generation is None:
+            return None
+        return self._get(self._data_key(instance_id, generation, address))
+
+    def set(self, instance_uuid, address, data, expiration):
+        """Store the metadata of an instance served to an address."""
+        generation = self._get_generation(instance_uuid, expiration)
+        if generation is None:
+            return
+        self._set(self._data_key(instance_uuid, generation, address), data,
+                  expiration)
+        if address:
+            self._set(self._address_key(address), instance_uuid, expiration)
+
+    def delete(self, instance_uuid):
+        """Drop the metadata of an instance for all its addresses.
+
+        The data itself is left to expire, it can't be looked up anymore.
+        """
+        self._delete(self._generation_key(instance_uuid))
+
+
+_CACHE = None
+
+
+def _get_cache():
+    global _CACHE
+    if _CACHE is None:
+        _CACHE = MetadataCache()
+    return _CACHE
+
+
+def delete_instance_metadata(instance_uuid):
+    """Invalidate the stored metadata of an instance."""
+    try:
+        _get_cache().delete(instance_uuid)
+    except Exception:
+        LOG.exception(_LE('Failed to invalidate the metadata of instance '
+                          '%s'), instance_uuid)
+
+
+def update_instance_metadata(instance, network_info=None):
+    """Invalidate the stored metadata of an instance, and precompute it for
+    its fixed IPs if metadata_precompute is set.
+
+    :param instance: nova.objects.instance.Instance object
+    :param network_info: the network info of the instance, defaults to its
+                         info cache
+    """
+    delete_instance_metadata(instance.uuid)
+    if not CONF.metadata_precompute:
+        return
+    # NOTE: Only import the metadata API when it's needed, compute
+    # services don't use it otherwise.
+    from nova.api.metadata import base
+    try:
+        if network_info is None:
+            network_info = instance.info_cache.network_info
+        cache = _get_cache()
+        for vif in network_info:
+            for ip in vif.fixed_ips():
+                if ip['version'] != 4:
+                    continue
+                data = base.get_metadata_by_instance_id(instance.uuid,
+                                                        ip['address'])
+                cache.set(instance.uuid, ip['address'], data,
+                          CONF.metadata_precompute_expiration)
+    except exception.InstanceNotFound:
+        pass
+    except Exception:
+        LOG.exception(_LE('Failed to precompute the metadata'),
+                      instance=instance)
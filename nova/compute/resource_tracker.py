@@ -19,7 +19,9 @@ scheduler with useful information about availability through the ComputeNode
 model.
 """
 import copy
+import functools
 
+from oslo_concurrency import lockutils
 from oslo_config import cfg
 from oslo_log import log as logging
 from oslo_serialization import jsonutils
@@ -55,6 +57,13 @@ resource_tracker_opts = [
     cfg.ListOpt('compute_resources',
                 default=['vcpu'],
                 help='The names of the extra resources to track.'),
+    cfg.BoolOpt('skip_unchanged_resource_audit',
+                default=False,
+                help='Skip the processing of the resources reported by the '
+                     'virt driver for a compute node, like its PCI devices, '
+                     'as long as they do not change. The usage of the '
+                     'instances and migrations of the node is still '
+                     'audited'),
 ]
 
 CONF = cfg.CONF
@@ -63,6 +72,20 @@ CONF.register_opts(resource_tracker_opts)
 LOG = logging.getLogger(__name__)
 COMPUTE_RESOURCE_SEMAPHORE = "compute_resources"
 
+
+def _synchronized_node(f):
+    """Serialize the calls changing the resources of the tracker's node.
+
+    Each node has its own resource tracker, which shares no state with the
+    trackers of the other nodes, so they only need a lock of their own.
+    """
+    @functools.wraps(f)
+    def inner(self, *args, **kwargs):
+        lock_name = '%s-%s' % (COMPUTE_RESOURCE_SEMAPHORE, self.nodename)
+        with lockutils.lock(lock_name, 'nova-'):
+            return f(self, *args, **kwargs)
+    return inner
+
 CONF.import_opt('my_ip', 'nova.netconf')
 
 
@@ -87,9 +110,10 @@ class ResourceTracker(object):
         self.ext_resources_handler = \
             ext_resources.ResourceHandler(CONF.compute_resources)
         self.old_resources = {}
+        self.old_hypervisor_resources = None
         self.scheduler_client = scheduler_client.SchedulerClient()
 
-    @utils.synchronized(COMPUTE_RESOURCE_SEMAPHORE)
+    @_synchronized_node
     def instance_claim(self, context, instance_ref, limits=None):
         """Indicate that some resources are needed for an upcoming compute
         instance build operation.
@@ -144,7 +168,7 @@ class ResourceTracker(object):
 
         return claim
 
-    @utils.synchronized(COMPUTE_RESOURCE_SEMAPHORE)
+    @_synchronized_node
     def resize_claim(self, context, instance, instance_type,
                      image_meta=None, limits=None):
         """Indicate that resources are needed for a resize operation to this
@@ -223,7 +247,7 @@ class ResourceTracker(object):
         instance_ref['launched_on'] = self.host
         instance_ref['node'] = self.nodename
 
-    @utils.synchronized(COMPUTE_RESOURCE_SEMAPHORE)
+    @_synchronized_node
     def abort_instance_claim(self, context, instance):
         """Remove usage from the given instance."""
         # flag the instance as deleted to revert the resource usage
@@ -233,7 +257,7 @@ class ResourceTracker(object):
 
         self._update(context.elevated(), self.compute_node)
 
-    @utils.synchronized(COMPUTE_RESOURCE_SEMAPHORE)
+    @_synchronized_node
     def drop_resize_claim(self, context, instance, instance_type=None,
                           image_meta=None, prefix='new_'):
         """Remove usage for an incoming/outgoing migration."""
@@ -263,7 +287,7 @@ class ResourceTracker(object):
                 ctxt = context.elevated()
                 self._update(ctxt, self.compute_node)
 
-    @utils.synchronized(COMPUTE_RESOURCE_SEMAPHORE)
+    @_synchronized_node
     def update_usage(self, context, instance):
         """Update the resource usage and stats after a change in an
         instance
@@ -381,6 +405,16 @@ class ResourceTracker(object):
                  "'get_available_resource'. Compute tracking is disabled."))
             self.compute_node = None
             return
+
+        hypervisor_unchanged = (CONF.skip_unchanged_resource_audit and
+                                not self.disabled and
+                                resources == self.old_hypervisor_resources)
+        if hypervisor_unchanged:
+            LOG.debug("Resources of node %s did not change, only auditing "
+                      "its usage", self.nodename)
+        else:
+            hypervisor_resources = copy.deepcopy(resources)
+
         resources['host_ip'] = CONF.my_ip
 
         # We want the 'cpu_info' to be None from the POV of the
@@ -395,14 +429,20 @@ class ResourceTracker(object):
         if "numa_topology" not in resources:
             resources["numa_topology"] = None
 
-        self._verify_resources(resources)
-
-        self._report_hypervisor_resource_view(resources)
+        if not hypervisor_unchanged:
+            self._verify_resources(resources)
+            self._report_hypervisor_resource_view(resources)
 
-        self._update_available_resource(context, resources)
+        self._update_available_resource(
+            context, resources, hypervisor_unchanged=hypervisor_unchanged)
+        if not hypervisor_unchanged:
+            # NOTE: only remember the resources once they have been audited
+            # successfully, so that a failed audit is retried next time.
+            self.old_hypervisor_resources = hypervisor_resources
 
-    @utils.synchronized(COMPUTE_RESOURCE_SEMAPHORE)
-    def _update_available_resource(self, context, resources):
+    @_synchronized_node
+    def _update_available_resource(self, context, resources,
+                                   hypervisor_unchanged=False):
 
         # initialise the compute node object, creating it
         # if it does not already exist.
@@ -413,7 +453,10 @@ class ResourceTracker(object):
         if self.disabled:
             return
 
-        if 'pci_passthrough_devices' in resources:
+        if hypervisor_unchanged:
+            # The PCI tracker is already in sync with these devices
+            resources.pop('pci_passthrough_devices', None)
+        elif 'pci_passthrough_devices' in resources:
             devs = []
             for dev in jsonutils.loads(resources.pop(
                 'pci_passthrough_devices')):
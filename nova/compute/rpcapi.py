@@ -16,6 +16,8 @@
 Client side of the compute RPC API.
 """
 
+import copy
+
 from oslo_config import cfg
 from oslo_log import log as logging
 import oslo_messaging as messaging
@@ -294,6 +296,7 @@ class ComputeAPI(object):
         can handle the version_cap being set to 3.40
 
         * 4.0  - Remove 3.x compatibility
+        * 4.1  - Add build_and_run_instances()
     '''
 
     VERSION_ALIASES = {
@@ -1041,6 +1044,43 @@ class ComputeAPI(object):
                 block_device_mapping=block_device_mapping, node=node,
                 limits=limits)
 
+    def build_and_run_instances(self, ctxt, instances, host, image,
+            request_spec, filter_properties, admin_password=None,
+            injected_files=None, requested_networks=None,
+            security_groups=None, block_device_mappings=None, node=None,
+            limits=None):
+        """Build several instances on the same host with a single cast.
+
+        block_device_mappings holds the block device mappings of every
+        instance, in the same order as instances. Older computes get one
+        build_and_run_instance() cast per instance instead.
+        """
+        version = '4.1'
+        if not self.client.can_send_version(version):
+            for instance, bdms in zip(instances, block_device_mappings):
+                # NOTE: build_and_run_instance() may convert the limits for
+                # older computes in place, so don't share them.
+                self.build_and_run_instance(ctxt, instance, host, image,
+                        request_spec, filter_properties,
+                        admin_password=admin_password,
+                        injected_files=injected_files,
+                        requested_networks=requested_networks,
+                        security_groups=security_groups,
+                        block_device_mapping=bdms, node=node,
+                        limits=copy.copy(limits))
+            return
+
+        cctxt = self.client.prepare(server=host, version=version)
+        cctxt.cast(ctxt, 'build_and_run_instances', instances=instances,
+                image=image, request_spec=request_spec,
+                filter_properties=filter_properties,
+                admin_password=admin_password,
+                injected_files=injected_files,
+                requested_networks=requested_networks,
+                security_groups=security_groups,
+                block_device_mappings=block_device_mappings, node=node,
+                limits=limits)
+
     def quiesce_instance(self, ctxt, instance):
         version = self._compat_ver('4.0', '3.39')
         cctxt = self.client.prepare(server=_compute_host(None, instance),
@@ -14,6 +14,7 @@
 
 """Handles database requests from other nova services."""
 
+import collections
 import copy
 import itertools
 
@@ -80,6 +81,10 @@ class ConductorManager(manager.Manager):
 
     target = messaging.Target(version='2.1')
 
+    # NOTE: Most objects only pass through the conductor, or are saved
+    # with the few fields that changed.
+    rpc_lazy_hydration = True
+
     def __init__(self, *args, **kwargs):
         super(ConductorManager, self).__init__(service_name='conductor',
                                                *args, **kwargs)
@@ -691,6 +696,10 @@ class ComputeTaskManager(base.Base):
                     exc, request_spec)
             return
 
+        # NOTE: the instances scheduled to the same node share the filter
+        # properties and are sent to it with a single cast.
+        builds = collections.OrderedDict()
+        instance_uuids = []
         for (instance, host) in itertools.izip(instances, hosts):
             try:
                 instance.refresh()
@@ -698,23 +707,36 @@ class ComputeTaskManager(base.Base):
                     exception.InstanceInfoCacheNotFound):
                 LOG.debug('Instance deleted during build', instance=instance)
                 continue
+            builds.setdefault((host['host'], host['nodename']),
+                              (host, []))[1].append(instance)
+            instance_uuids.append(instance.uuid)
+        if not builds:
+            return
+
+        # The block_device_mapping passed from the api doesn't contain
+        # instance specific information
+        bdms_by_instance = collections.defaultdict(list)
+        for bdm in objects.BlockDeviceMappingList.get_by_instance_uuids(
+                context, instance_uuids):
+            bdms_by_instance[bdm.instance_uuid].append(bdm)
+
+        for host, host_instances in builds.values():
             local_filter_props = copy.deepcopy(filter_properties)
             scheduler_utils.populate_filter_properties(local_filter_props,
                 host)
-            # The block_device_mapping passed from the api doesn't contain
-            # instance specific information
-            bdms = objects.BlockDeviceMappingList.get_by_instance_uuid(
-                    context, instance.uuid)
+            bdms = [objects.BlockDeviceMappingList(
+                        objects=bdms_by_instance[instance.uuid])
+                    for instance in host_instances]
 
-            self.compute_rpcapi.build_and_run_instance(context,
-                    instance=instance, host=host['host'], image=image,
+            self.compute_rpcapi.build_and_run_instances(context,
+                    instances=host_instances, host=host['host'], image=image,
                     request_spec=request_spec,
                     filter_properties=local_filter_props,
                     admin_password=admin_password,
                     injected_files=injected_files,
                     requested_networks=requested_networks,
                     security_groups=security_groups,
-                    block_device_mapping=bdms, node=host['nodename'],
+                    block_device_mappings=bdms, node=host['nodename'],
                     limits=host['limits'])
 
     def _delete_image(self, context, image_id):
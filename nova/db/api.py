@@ -633,6 +633,12 @@ def instance_create(context, values):
     return IMPL.instance_create(context, values)
 
 
+def instance_create_multi(context, values_list, block_device_mappings=None):
+    """Create several instances from a list of values dictionaries."""
+    return IMPL.instance_create_multi(context, values_list,
+                                      block_device_mappings)
+
+
 def instance_destroy(context, instance_uuid, constraint=None,
         update_cells=True):
     """Destroy the instance or raise if it does not exist."""
@@ -706,6 +712,19 @@ def instance_get_active_by_window_joined(context, begin, end=None,
                                               columns_to_join=columns_to_join)
 
 
+def instance_get_usages_by_window(context, begin, end=None, project_id=None,
+                                  use_slave=False):
+    """Get the usage columns of the instances active during a time window.
+
+    Each row holds the columns of an instance needed to compute its usage,
+    the flavor stored in its instance_extra and the flavor name stored in
+    its system_metadata. The rows are streamed from the database.
+    """
+    return IMPL.instance_get_usages_by_window(context, begin, end,
+                                              project_id,
+                                              use_slave=use_slave)
+
+
 def instance_get_all_by_host(context, host,
                              columns_to_join=None, use_slave=False):
     """Get all instances belonging to a host."""
@@ -721,6 +740,11 @@ def instance_get_all_by_host_and_node(context, host, node,
         context, host, node, columns_to_join=columns_to_join)
 
 
+def instance_get_all_brief_by_uuids(context, uuids):
+    """Get the id, uuid, hostname and display_name of the given instances."""
+    return IMPL.instance_get_all_brief_by_uuids(context, uuids)
+
+
 def instance_get_all_by_host_and_not_type(context, host, type_id=None):
     """Get all instances belonging to a host with a different type_id."""
     return IMPL.instance_get_all_by_host_and_not_type(context, host, type_id)
@@ -1127,6 +1151,15 @@ def quota_usage_get_all_by_project(context, project_id):
     return IMPL.quota_usage_get_all_by_project(context, project_id)
 
 
+def quota_usage_count(context, resources, project_id, user_id):
+    """Count the current usage of reservable resources from their records.
+
+    :returns: a tuple of two dicts, mapping the resource names to their
+              usage by the project and by the user.
+    """
+    return IMPL.quota_usage_count(context, resources, project_id, user_id)
+
+
 def quota_usage_update(context, project_id, user_id, resource, **kwargs):
     """Update a quota usage or raise if it does not exist."""
     return IMPL.quota_usage_update(context, project_id, user_id, resource,
@@ -1144,6 +1177,31 @@ def quota_reserve(context, resources, quotas, user_quotas, deltas, expire,
                               project_id=project_id, user_id=user_id)
 
 
+def quota_reserve_optimistic(context, resources, quotas, user_quotas, deltas,
+                             expire, until_refresh, max_age, project_id=None,
+                             user_id=None):
+    """Check quotas and create appropriate reservations without locking the
+    quota usages, falling back to quota_reserve() when needed.
+    """
+    return IMPL.quota_reserve_optimistic(context, resources, quotas,
+                                         user_quotas, deltas, expire,
+                                         until_refresh, max_age,
+                                         project_id=project_id,
+                                         user_id=user_id)
+
+
+def quota_check_counted(context, resources, quotas, user_quotas, deltas,
+                        project_id=None, user_id=None):
+    """Check quotas against the counted usages, without reserving.
+
+    The quota usages of the resources are reset, so that they are
+    refreshed if quota_reserve() is used again.
+    """
+    return IMPL.quota_check_counted(context, resources, quotas, user_quotas,
+                                    deltas, project_id=project_id,
+                                    user_id=user_id)
+
+
 def reservation_commit(context, reservations, project_id=None, user_id=None):
     """Commit quota reservations."""
     return IMPL.reservation_commit(context, reservations,
@@ -1230,6 +1288,13 @@ def block_device_mapping_get_all_by_instance(context, instance_uuid,
                                                          use_slave)
 
 
+def block_device_mapping_get_all_by_instance_uuids(context, instance_uuids,
+                                                   use_slave=False):
+    """Get all block device mapping belonging to a list of instances."""
+    return IMPL.block_device_mapping_get_all_by_instance_uuids(
+        context, instance_uuids, use_slave)
+
+
 def block_device_mapping_get_by_volume_id(context, volume_id,
         columns_to_join=None):
     """Get block device mapping for a given volume."""
@@ -1562,6 +1627,13 @@ def pci_device_update(context, node_id, address, value):
     return IMPL.pci_device_update(context, node_id, address, value)
 
 
+def pci_device_update_multi(context, node_id, values):
+    """Update many pci devices of a node, given a dict of their values by
+    address.
+    """
+    return IMPL.pci_device_update_multi(context, node_id, values)
+
+
 ###################
 
 def cell_create(context, values):
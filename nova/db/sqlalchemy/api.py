@@ -194,6 +194,9 @@ def get_api_session(**kwargs):
 _SHADOW_TABLE_PREFIX = 'shadow_'
 _DEFAULT_QUOTA_NAME = 'default'
 PER_PROJECT_QUOTAS = ['fixed_ips', 'floating_ips', 'networks']
+# Number of times an optimistic quota reservation is attempted before falling
+# back to the locking one.
+_QUOTA_RESERVE_OPTIMISTIC_ATTEMPTS = 3
 
 
 def get_backend():
@@ -363,6 +366,74 @@ QUOTA_SYNC_FUNCTIONS = {
     '_sync_server_groups': _sync_server_groups,
 }
 
+
+def _count_by_user(query, resource_names, user_id):
+    """Sum the per-user rows of query into project and user counts.
+
+    Every row of query is expected to be a user ID followed by one count
+    per resource name.
+    """
+    project_counts = dict.fromkeys(resource_names, 0)
+    user_counts = dict.fromkeys(resource_names, 0)
+    for row in query.all():
+        for name, count in zip(resource_names, row[1:]):
+            project_counts[name] += count or 0
+            if row[0] == user_id:
+                user_counts[name] += count or 0
+    return project_counts, user_counts
+
+
+def _count_instances(context, project_id, user_id, session):
+    query = model_query(context, models.Instance, (
+                            models.Instance.user_id,
+                            func.count(models.Instance.id),
+                            func.sum(models.Instance.vcpus),
+                            func.sum(models.Instance.memory_mb),
+                        ), session=session).\
+                    filter_by(project_id=project_id).\
+                    group_by(models.Instance.user_id)
+    return _count_by_user(query, ('instances', 'cores', 'ram'), user_id)
+
+
+def _count_security_groups(context, project_id, user_id, session):
+    nova.context.authorize_project_context(context, project_id)
+    query = model_query(context, models.SecurityGroup, (
+                            models.SecurityGroup.user_id,
+                            func.count(models.SecurityGroup.id),
+                        ), read_deleted="no", session=session).\
+                    filter_by(project_id=project_id).\
+                    group_by(models.SecurityGroup.user_id)
+    return _count_by_user(query, ('security_groups',), user_id)
+
+
+def _count_server_groups(context, project_id, user_id, session):
+    query = model_query(context, models.InstanceGroup, (
+                            models.InstanceGroup.user_id,
+                            func.count(models.InstanceGroup.id),
+                        ), read_deleted="no", session=session).\
+                    filter_by(project_id=project_id).\
+                    group_by(models.InstanceGroup.user_id)
+    return _count_by_user(query, ('server_groups',), user_id)
+
+
+def _count_per_project(sync):
+    """Wrap the sync function of a per-project resource into a count one."""
+    def count(context, project_id, user_id, session):
+        counts = sync(context, project_id, user_id, session)
+        return counts, counts
+    return count
+
+
+# NOTE: The count functions return the (project, user) usages of the
+# resources refreshed by the sync function they are registered for.
+QUOTA_COUNT_FUNCTIONS = {
+    '_sync_instances': _count_instances,
+    '_sync_floating_ips': _count_per_project(_sync_floating_ips),
+    '_sync_fixed_ips': _count_per_project(_sync_fixed_ips),
+    '_sync_security_groups': _count_security_groups,
+    '_sync_server_groups': _count_server_groups,
+}
+
 ###################
 
 
@@ -1635,24 +1706,12 @@ def instance_create(context, values):
     instance_ref['extra'].update(values.pop('extra', {}))
     instance_ref.update(values)
 
-    def _get_sec_group_models(session, security_groups):
-        models = []
-        default_group = _security_group_ensure_default(context, session)
-        if 'default' in security_groups:
-            models.append(default_group)
-            # Generate a new list, so we don't modify the original
-            security_groups = [x for x in security_groups if x != 'default']
-        if security_groups:
-            models.extend(_security_group_get_by_names(context,
-                    session, context.project_id, security_groups))
-        return models
-
     session = get_session()
     with session.begin():
         if 'hostname' in values:
             _validate_unique_server_name(context, session, values['hostname'])
-        instance_ref.security_groups = _get_sec_group_models(session,
-                security_groups)
+        instance_ref.security_groups = _instance_security_group_models(
+                context, session, security_groups)
         session.add(instance_ref)
 
     # create the instance uuid to ec2_id mapping entry for instance
@@ -1661,6 +1720,130 @@ def instance_create(context, values):
     return instance_ref
 
 
+def _instance_security_group_models(context, session, security_groups):
+    models = []
+    default_group = _security_group_ensure_default(context, session)
+    if 'default' in security_groups:
+        models.append(default_group)
+        # Generate a new list, so we don't modify the original
+        security_groups = [x for x in security_groups if x != 'default']
+    if security_groups:
+        models.extend(_security_group_get_by_names(context,
+                session, context.project_id, security_groups))
+    return models
+
+
+def _insert_multi(session, model, rows):
+    """Insert rows of a model with as few multi-row INSERTs as possible.
+
+    Rows are grouped by the set of columns they provide, so that the
+    column defaults still apply to the ones they leave out.
+    """
+    rows_by_columns = collections.defaultdict(list)
+    for row in rows:
+        rows_by_columns[tuple(sorted(row))].append(row)
+    for columns_rows in rows_by_columns.values():
+        session.execute(model.__table__.insert(), columns_rows)
+
+
+@require_context
+def instance_create_multi(context, values_list, block_device_mappings=None):
+    """Create several Instance records in the database at once.
+
+    This is equivalent to calling instance_create() for every dict of
+    values_list, except that all the records, including the related ones,
+    are written in a single transaction with one multi-row INSERT per
+    table. Every instance gets its own copy of the block_device_mappings
+    values.
+
+    Returns the created instances, in the order of values_list.
+    """
+    # NOTE: see instance_create() for why this is done in a separate
+    # transaction.
+    security_group_ensure_default(context)
+
+    instances = []
+    security_groups = {}
+    children = collections.defaultdict(list)
+    for values in values_list:
+        values = values.copy()
+        if not values.get('uuid'):
+            values['uuid'] = str(uuid.uuid4())
+        instance_uuid = values['uuid']
+        _handle_objects_related_type_conversions(values)
+
+        for key, model in (('metadata', models.InstanceMetadata),
+                           ('system_metadata',
+                            models.InstanceSystemMetadata)):
+            for k, v in six.iteritems(values.pop(key, None) or {}):
+                children[model].append(
+                    {'instance_uuid': instance_uuid, 'key': k, 'value': v})
+        info_cache = {'instance_uuid': instance_uuid}
+        info_cache.update(values.pop('info_cache', None) or {})
+        children[models.InstanceInfoCache].append(info_cache)
+        extra = {'instance_uuid': instance_uuid,
+                 'numa_topology': None,
+                 'pci_requests': None,
+                 'vcpu_model': None,
+                 }
+        extra.update(values.pop('extra', {}))
+        children[models.InstanceExtra].append(extra)
+        for bdm in block_device_mappings or []:
+            bdm = dict(bdm, instance_uuid=instance_uuid)
+            _scrub_empty_str_values(bdm, ['volume_size'])
+            children[models.BlockDeviceMapping].append(bdm)
+        children[models.InstanceIdMapping].append({'uuid': instance_uuid})
+        security_groups[instance_uuid] = tuple(
+            values.pop('security_groups', []))
+        instances.append(values)
+    uuids = [instance['uuid'] for instance in instances]
+
+    session = get_session()
+    with session.begin():
+        hostnames = set()
+        for instance in instances:
+            if 'hostname' not in instance:
+                continue
+            _validate_unique_server_name(context, session,
+                                         instance['hostname'])
+            # NOTE: the instances of the batch don't see each other in the
+            # database yet, so check their names against each other too.
+            lowername = instance['hostname'].lower()
+            if (CONF.osapi_compute_unique_server_name_scope and
+                    lowername in hostnames):
+                raise exception.InstanceExists(name=lowername)
+            hostnames.add(lowername)
+
+        group_ids = {}
+        for instance_uuid in uuids:
+            names = security_groups[instance_uuid]
+            if names not in group_ids:
+                group_ids[names] = [group.id for group in
+                    _instance_security_group_models(context, session,
+                                                    list(names))]
+            children[models.SecurityGroupInstanceAssociation].extend(
+                {'instance_uuid': instance_uuid, 'security_group_id': group_id}
+                for group_id in group_ids[names])
+
+        _insert_multi(session, models.Instance, instances)
+        for model, rows in six.iteritems(children):
+            _insert_multi(session, model, rows)
+
+        query = model_query(context, models.Instance, session=session).\
+                options(joinedload_all('security_groups.rules')).\
+                options(joinedload('info_cache')).\
+                options(joinedload('metadata')).\
+                options(joinedload('system_metadata')).\
+                options(joinedload('extra'))
+        for column in ('numa_topology', 'pci_requests', 'flavor',
+                       'vcpu_model'):
+            query = query.options(undefer('extra.%s' % column))
+        instance_refs = {instance_ref['uuid']: instance_ref for instance_ref
+                         in query.filter(models.Instance.uuid.in_(uuids))}
+
+    return [instance_refs[instance_uuid] for instance_uuid in uuids]
+
+
 def _instance_data_get_for_user(context, project_id, user_id, session=None):
     result = model_query(context,
                          models.Instance, (
@@ -2330,6 +2513,40 @@ def instance_get_active_by_window_joined(context, begin, end=None,
     return _instances_fill_metadata(context, query.all(), manual_joins)
 
 
+@require_context
+def instance_get_usages_by_window(context, begin, end=None, project_id=None,
+                                  use_slave=False):
+    """Return the usage columns of the instances active during window."""
+    session = get_session(use_slave=use_slave)
+    sys_meta = models.InstanceSystemMetadata
+    query = session.query(
+        models.Instance.uuid, models.Instance.display_name,
+        models.Instance.project_id, models.Instance.vm_state,
+        models.Instance.launched_at, models.Instance.terminated_at,
+        models.Instance.memory_mb, models.Instance.vcpus,
+        models.Instance.root_gb, models.Instance.ephemeral_gb,
+        models.Instance.instance_type_id, models.Instance.deleted,
+        models.InstanceExtra.flavor,
+        sys_meta.value.label('flavor_name')).\
+        outerjoin(models.InstanceExtra,
+                  models.InstanceExtra.instance_uuid ==
+                  models.Instance.uuid).\
+        outerjoin(sys_meta,
+                  and_(sys_meta.instance_uuid == models.Instance.uuid,
+                       sys_meta.key == 'instance_type_name',
+                       sys_meta.deleted == 0))
+
+    query = query.filter(or_(models.Instance.terminated_at == null(),
+                             models.Instance.terminated_at > begin))
+    if end:
+        query = query.filter(models.Instance.launched_at < end)
+    if project_id:
+        query = query.filter(models.Instance.project_id == project_id)
+
+    # NOTE: the rows are streamed, there can be a lot of them
+    return query.yield_per(1000)
+
+
 def _instance_get_all_query(context, project_only=False,
                             joins=None, use_slave=False):
     if joins is None:
@@ -2373,6 +2590,19 @@ def _instance_get_all_uuids_by_host(context, host, session=None):
     return uuids
 
 
+@require_context
+def instance_get_all_brief_by_uuids(context, uuids):
+    if not uuids:
+        return []
+    query = model_query(context, models.Instance,
+                        (models.Instance.id, models.Instance.uuid,
+                         models.Instance.hostname,
+                         models.Instance.display_name),
+                        read_deleted="no").\
+                filter(models.Instance.uuid.in_(uuids))
+    return [row._asdict() for row in query.all()]
+
+
 @require_admin_context
 def instance_get_all_by_host_and_node(context, host, node,
                                       columns_to_join=None):
@@ -3250,6 +3480,24 @@ def quota_usage_get_all_by_project(context, project_id):
     return _quota_usage_get_all(context, project_id)
 
 
+@require_context
+def quota_usage_count(context, resources, project_id, user_id):
+    return _quota_usage_count(context, resources, project_id, user_id,
+                              get_session())
+
+
+def _quota_usage_count(context, resources, project_id, user_id, session):
+    project_counts = {}
+    user_counts = {}
+    for sync in set(resource.sync for resource in resources.values()):
+        project, user = QUOTA_COUNT_FUNCTIONS[sync](
+            context, project_id, user_id, session)
+        project_counts.update(project)
+        user_counts.update(user)
+    return ({name: project_counts[name] for name in resources},
+            {name: user_counts[name] for name in resources})
+
+
 def _quota_usage_create(project_id, user_id, resource, in_use,
                         reserved, until_refresh, session=None):
     quota_usage_ref = models.QuotaUsage()
@@ -3312,13 +3560,16 @@ def _reservation_create(uuid, usage, project_id, user_id, resource,
 # on reservations.
 
 def _get_project_user_quota_usages(context, session, project_id,
-                                   user_id):
-    rows = model_query(context, models.QuotaUsage,
-                       read_deleted="no",
-                       session=session).\
-                   filter_by(project_id=project_id).\
-                   with_lockmode('update').\
-                   all()
+                                   user_id, lock=True, resources=None):
+    query = model_query(context, models.QuotaUsage,
+                        read_deleted="no",
+                        session=session).\
+                   filter_by(project_id=project_id)
+    if resources is not None:
+        query = query.filter(models.QuotaUsage.resource.in_(resources))
+    if lock:
+        query = query.with_lockmode('update')
+    rows = query.all()
     proj_result = dict()
     user_result = dict()
     # Get the total count of in_use,reserved
@@ -3455,11 +3706,50 @@ def _calculate_overquota(project_quotas, user_quotas, deltas,
     return overs
 
 
+def _raise_overquota(project_quotas, user_quotas, deltas, overs,
+                     project_usages, user_usages):
+    """Raise OverQuota for the resources the reservation would put over."""
+    if project_quotas == user_quotas:
+        usages = project_usages
+    else:
+        # NOTE(mriedem): user_usages is a dict of resource keys to
+        # QuotaUsage sqlalchemy dict-like objects and doen't log well
+        # so convert the user_usages values to something useful for
+        # logging. Remove this if we ever change how
+        # _get_project_user_quota_usages returns the user_usages values.
+        user_usages = {k: dict(in_use=v['in_use'], reserved=v['reserved'],
+                               total=v['total'])
+                       for k, v in user_usages.items()}
+        usages = user_usages
+    usages = {k: dict(in_use=v['in_use'], reserved=v['reserved'])
+              for k, v in usages.items()}
+    LOG.debug('Raise OverQuota exception because: '
+              'project_quotas: %(project_quotas)s, '
+              'user_quotas: %(user_quotas)s, deltas: %(deltas)s, '
+              'overs: %(overs)s, project_usages: %(project_usages)s, '
+              'user_usages: %(user_usages)s',
+              {'project_quotas': project_quotas,
+               'user_quotas': user_quotas,
+               'overs': overs, 'deltas': deltas,
+               'project_usages': project_usages,
+               'user_usages': user_usages})
+    raise exception.OverQuota(overs=sorted(overs), quotas=user_quotas,
+                              usages=usages)
+
+
 @require_context
 @oslo_db_api.wrap_db_retry(max_retries=5, retry_on_deadlock=True)
 def quota_reserve(context, resources, project_quotas, user_quotas, deltas,
                   expire, until_refresh, max_age, project_id=None,
                   user_id=None):
+    return _quota_reserve(context, resources, project_quotas, user_quotas,
+                          deltas, expire, until_refresh, max_age,
+                          project_id=project_id, user_id=user_id)
+
+
+def _quota_reserve(context, resources, project_quotas, user_quotas, deltas,
+                   expire, until_refresh, max_age, project_id=None,
+                   user_id=None, bump_generation=False):
     elevated = context.elevated()
     session = get_session()
     with session.begin():
@@ -3469,6 +3759,12 @@ def quota_reserve(context, resources, project_quotas, user_quotas, deltas,
         if user_id is None:
             user_id = context.user_id
 
+        # NOTE: Reservations of quota_reserve_optimistic() don't lock the
+        # usages, they swap the generation of the project instead, which
+        # must be bumped for them to see this reservation.
+        if bump_generation:
+            _project_quota_generation_bump(session, project_id)
+
         # Get the current usages
         project_usages, user_usages = _get_project_user_quota_usages(
                 context, session, project_id, user_id)
@@ -3575,36 +3871,228 @@ def quota_reserve(context, resources, project_quotas, user_quotas, deltas,
                         "resources: %s"), unders)
 
     if overs:
-        if project_quotas == user_quotas:
-            usages = project_usages
-        else:
-            # NOTE(mriedem): user_usages is a dict of resource keys to
-            # QuotaUsage sqlalchemy dict-like objects and doen't log well
-            # so convert the user_usages values to something useful for
-            # logging. Remove this if we ever change how
-            # _get_project_user_quota_usages returns the user_usages values.
-            user_usages = {k: dict(in_use=v['in_use'], reserved=v['reserved'],
-                                   total=v['total'])
-                      for k, v in user_usages.items()}
-            usages = user_usages
-        usages = {k: dict(in_use=v['in_use'], reserved=v['reserved'])
-                  for k, v in usages.items()}
-        LOG.debug('Raise OverQuota exception because: '
-                  'project_quotas: %(project_quotas)s, '
-                  'user_quotas: %(user_quotas)s, deltas: %(deltas)s, '
-                  'overs: %(overs)s, project_usages: %(project_usages)s, '
-                  'user_usages: %(user_usages)s',
-                  {'project_quotas': project_quotas,
-                   'user_quotas': user_quotas,
-                   'overs': overs, 'deltas': deltas,
-                   'project_usages': project_usages,
-                   'user_usages': user_usages})
-        raise exception.OverQuota(overs=sorted(overs), quotas=user_quotas,
-                                  usages=usages)
+        _raise_overquota(project_quotas, user_quotas, deltas, overs,
+                         project_usages, user_usages)
 
     return reservations
 
 
+class _QuotaUsageChanged(Exception):
+    """A quota usage changed under an optimistic reservation."""
+
+
+def _is_quota_refresh_due(quota_usage, max_age):
+    """Like _is_quota_refresh_needed(), without updating quota_usage.
+
+    The until_refresh countdown is decremented by _quota_usage_reserve()
+    instead, so a refresh is only due when it would reach 0.
+    """
+    return (quota_usage.in_use < 0 or
+            (quota_usage.until_refresh is not None and
+             quota_usage.until_refresh <= 1) or
+            bool(max_age and (timeutils.utcnow() -
+                              quota_usage.updated_at).seconds >= max_age))
+
+
+def _project_quota_generation_get(session, project_id):
+    return session.query(models.ProjectQuotaGeneration.generation).\
+                   filter_by(project_id=project_id).\
+                   scalar()
+
+
+def _project_quota_generation_create(project_id):
+    session = get_session()
+
+    generation_ref = models.ProjectQuotaGeneration()
+    generation_ref.project_id = project_id
+    generation_ref.generation = 0
+
+    try:
+        with session.begin():
+            session.add(generation_ref)
+    except db_exc.DBDuplicateEntry:
+        # NOTE: Created by a concurrent reservation
+        pass
+
+
+def _project_quota_generation_swap(session, project_id, generation):
+    """Increase the generation of a project if it is still generation.
+
+    The UPDATE only matches if no other reservation swapped or bumped the
+    generation since it was read, in which case the usages read with it
+    may be stale.
+    """
+    return session.query(models.ProjectQuotaGeneration).\
+                   filter_by(project_id=project_id).\
+                   filter_by(generation=generation).\
+                   update({'generation': generation + 1},
+                          synchronize_session=False)
+
+
+def _project_quota_generation_bump(session, project_id):
+    return session.query(models.ProjectQuotaGeneration).\
+                   filter_by(project_id=project_id).\
+                   update({'generation':
+                           models.ProjectQuotaGeneration.generation + 1},
+                          synchronize_session=False)
+
+
+def _quota_usage_reserve(context, session, usage, delta, user_limit):
+    """Add delta to the reserved count of a usage if still within limits.
+
+    The user limit is checked by the UPDATE statement itself, so that it
+    only matches if the usage still leaves room for delta when it is
+    executed. The until_refresh countdown of the usage is decremented as
+    well, as long as it does not reach 0.
+    """
+    query = model_query(context, models.QuotaUsage, read_deleted="no",
+                        session=session).\
+                    filter_by(id=usage.id)
+    values = {'updated_at': timeutils.utcnow()}
+    if usage.until_refresh is not None:
+        query = query.filter(models.QuotaUsage.until_refresh > 1)
+        values['until_refresh'] = models.QuotaUsage.until_refresh - 1
+    if delta <= 0:
+        # NOTE(Vek): We are only concerned about positive increments,
+        #            see quota_reserve().
+        return query.update(values, synchronize_session=False)
+    values['reserved'] = models.QuotaUsage.reserved + delta
+    if user_limit >= 0:
+        query = query.filter(models.QuotaUsage.in_use +
+                             models.QuotaUsage.reserved + delta <= user_limit)
+    return query.update(values, synchronize_session=False)
+
+
+@require_context
+@oslo_db_api.wrap_db_retry(max_retries=5, retry_on_deadlock=True)
+def quota_reserve_optimistic(context, resources, project_quotas, user_quotas,
+                             deltas, expire, until_refresh, max_age,
+                             project_id=None, user_id=None):
+    if project_id is None:
+        project_id = context.project_id
+    if user_id is None:
+        user_id = context.user_id
+
+    # NOTE: The conditional UPDATE of a usage only sees the latest values
+    # of that usage row. A project limit depends on the usages of the other
+    # users of the project as well, which may be reserving at the same time,
+    # so the generation of the project is swapped when one applies: only one
+    # of the reservations which read the same usages can succeed, the others
+    # are retried with the new usages.
+    swap = any(delta > 0 and user_quotas[res] >= 0 and
+               project_quotas[res] >= 0 for res, delta in deltas.items())
+
+    attempt = 0
+    while attempt < _QUOTA_RESERVE_OPTIMISTIC_ATTEMPTS:
+        session = get_session()
+        generation = None
+        try:
+            with session.begin():
+                if swap:
+                    generation = _project_quota_generation_get(session,
+                                                               project_id)
+                    if generation is None:
+                        raise _QuotaUsageChanged()
+                project_usages, user_usages = _get_project_user_quota_usages(
+                        context, session, project_id, user_id, lock=False,
+                        resources=list(deltas))
+
+                # NOTE: Creating or refreshing usages requires the sync
+                # functions, which are left to the locking path.
+                if any(res not in user_usages or
+                       _is_quota_refresh_due(user_usages[res], max_age)
+                       for res in deltas):
+                    break
+
+                overs = _calculate_overquota(project_quotas, user_quotas,
+                                             deltas, project_usages,
+                                             user_usages)
+                if overs:
+                    _raise_overquota(project_quotas, user_quotas, deltas,
+                                     overs, project_usages, user_usages)
+
+                if swap and not _project_quota_generation_swap(
+                        session, project_id, generation):
+                    raise _QuotaUsageChanged()
+
+                reservations = []
+                for res, delta in deltas.items():
+                    usage = user_usages[res]
+                    if ((delta > 0 or usage.until_refresh is not None) and
+                            not _quota_usage_reserve(context, session, usage,
+                                                     delta,
+                                                     user_quotas[res])):
+                        raise _QuotaUsageChanged()
+                    reservations.append(
+                        {'uuid': str(uuid.uuid4()),
+                         'usage_id': usage.id,
+                         'project_id': project_id,
+                         'user_id': user_id,
+                         'resource': res,
+                         'delta': delta,
+                         'expire': expire})
+                if reservations:
+                    session.execute(models.Reservation.__table__.insert(),
+                                    reservations)
+        except _QuotaUsageChanged:
+            if swap and generation is None:
+                _project_quota_generation_create(project_id)
+                continue
+            attempt += 1
+            LOG.debug('Quota usages of project %(project_id)s changed '
+                      'during an optimistic reservation, retrying '
+                      '(attempt %(attempt)d)',
+                      {'project_id': project_id, 'attempt': attempt})
+            continue
+
+        unders = [res for res, delta in deltas.items()
+                  if delta < 0 and delta + user_usages[res].in_use < 0]
+        if unders:
+            LOG.warning(_LW("Change will make usage less than 0 for the "
+                            "following resources: %s"), unders)
+        return [reservation['uuid'] for reservation in reservations]
+
+    return _quota_reserve(context, resources, project_quotas, user_quotas,
+                          deltas, expire, until_refresh, max_age,
+                          project_id=project_id, user_id=user_id,
+                          bump_generation=swap)
+
+
+@require_context
+@oslo_db_api.wrap_db_retry(max_retries=5, retry_on_deadlock=True)
+def quota_check_counted(context, resources, project_quotas, user_quotas,
+                        deltas, project_id=None, user_id=None):
+    if project_id is None:
+        project_id = context.project_id
+    if user_id is None:
+        user_id = context.user_id
+
+    session = get_session()
+    with session.begin():
+        # NOTE: The usages tracked in quota_usages are not maintained while
+        # they are counted, force quota_reserve() to refresh them. This
+        # only matches the usages left by DbQuotaDriver.
+        model_query(context, models.QuotaUsage, read_deleted="no",
+                    session=session).\
+                filter_by(project_id=project_id).\
+                filter(models.QuotaUsage.resource.in_(list(deltas))).\
+                filter(models.QuotaUsage.in_use >= 0).\
+                update({'in_use': -1}, synchronize_session=False)
+        project_counts, user_counts = _quota_usage_count(
+                context, {k: v for k, v in resources.items() if k in deltas},
+                project_id, user_id, session)
+
+    project_usages = {res: dict(in_use=count, reserved=0, total=count)
+                      for res, count in project_counts.items()}
+    user_usages = {res: dict(in_use=count, reserved=0, total=count)
+                   for res, count in user_counts.items()}
+    overs = _calculate_overquota(project_quotas, user_quotas, deltas,
+                                 project_usages, user_usages)
+    if overs:
+        _raise_overquota(project_quotas, user_quotas, deltas, overs,
+                         project_usages, user_usages)
+
+
 def _quota_reservations_query(session, context, reservations):
     """Return the relevant reservations."""
 
@@ -3899,6 +4387,17 @@ def block_device_mapping_get_all_by_instance(context, instance_uuid,
                  all()
 
 
+@require_context
+def block_device_mapping_get_all_by_instance_uuids(context, instance_uuids,
+                                                   use_slave=False):
+    if not instance_uuids:
+        return []
+    return _block_device_mapping_get_query(context, use_slave=use_slave).\
+                 filter(models.BlockDeviceMapping.instance_uuid.in_(
+                     instance_uuids)).\
+                 all()
+
+
 @require_context
 def block_device_mapping_get_by_volume_id(context, volume_id,
         columns_to_join=None):
@@ -6422,6 +6921,26 @@ def pci_device_update(context, node_id, address, values):
         return query.one()
 
 
+def pci_device_update_multi(context, node_id, values):
+    session = get_session()
+    with session.begin():
+        devices = {device.address: device for device in
+                   model_query(context, models.PciDevice, session=session,
+                               read_deleted="no").
+                   filter_by(compute_node_id=node_id).
+                   filter(models.PciDevice.address.in_(list(values)))}
+        for address, dev_values in six.iteritems(values):
+            device = devices.get(address)
+            if device is None:
+                device = models.PciDevice()
+                device.update({'compute_node_id': node_id,
+                               'address': address})
+                session.add(device)
+                devices[address] = device
+            device.update(dev_values)
+        return [devices[address] for address in values]
+
+
 ####################
 
 
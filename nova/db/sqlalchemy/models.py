@@ -487,6 +487,18 @@ class QuotaUsage(BASE, NovaBase):
     until_refresh = Column(Integer)
 
 
+class ProjectQuotaGeneration(BASE, models.ModelBase):
+    """Represents the generation of the quota usages of a project.
+
+    Reservations checking the project limits swap it, so that concurrent
+    reservations of a project conflict without locking its usages.
+    """
+
+    __tablename__ = 'project_quota_generations'
+    project_id = Column(String(255), primary_key=True, nullable=False)
+    generation = Column(Integer, nullable=False, default=0)
+
+
 class Reservation(BASE, NovaBase):
     """Represents a resource reservation for quotas."""
 
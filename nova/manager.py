@@ -66,6 +66,11 @@ LOG = logging.getLogger(__name__)
 
 class Manager(base.Base, periodic_task.PeriodicTasks):
 
+    # Managers which mostly pass on the objects they receive over RPC can
+    # set this to only hydrate their sub-objects when first accessed, see
+    # NovaObject.obj_lazy_hydration.
+    rpc_lazy_hydration = False
+
     def __init__(self, host=None, db_driver=None, service_name='undefined'):
         if not host:
             host = CONF.host
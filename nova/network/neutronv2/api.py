@@ -15,9 +15,11 @@
 #    under the License.
 #
 
+import sys
 import time
 import uuid
 
+import eventlet
 from keystoneclient import auth
 from keystoneclient.auth.identity import v2 as v2_auth
 from keystoneclient.auth import token_endpoint
@@ -109,6 +111,14 @@ neutron_opts = [
                      'be to always allow multiple ports from the same network '
                      'to be attached to an instance.',
                 deprecated_for_removal=True),
+    cfg.IntOpt('port_create_concurrency',
+               default=1,
+               help='Maximum number of ports created or updated in '
+                    'parallel when allocating networks for a single '
+                    'instance. Raising this shortens the boot time of '
+                    'instances with many vNICs at the cost of more '
+                    'concurrent requests to neutron. 1 allocates the '
+                    'ports one after the other.'),
    ]
 
 NEUTRON_GROUP = 'neutron'
@@ -554,9 +564,9 @@ class API(base_api.NetworkAPI):
         # calls.
         neutron = get_client(context)
         # Requires admin creds to set port bindings
-        port_client = (neutron if not
-                       self._has_port_binding_extension(context,
-                           refresh_cache=True, neutron=neutron) else
+        has_port_binding = self._has_port_binding_extension(
+            context, refresh_cache=True, neutron=neutron)
+        port_client = (neutron if not has_port_binding else
                        get_client(context, admin=True))
         # Store the admin client - this is used later
         admin_client = port_client if neutron != port_client else None
@@ -609,10 +619,8 @@ class API(base_api.NetworkAPI):
         security_group_ids = self._process_security_groups(
                                     instance, neutron, security_groups)
 
-        preexisting_port_ids = []
-        created_port_ids = []
-        ports_in_requested_order = []
         nets_in_requested_order = []
+        requests_in_order = []
         for request in ordered_networks:
             # Network lookup for available network_id
             network = None
@@ -625,7 +633,6 @@ class API(base_api.NetworkAPI):
             else:
                 continue
 
-            nets_in_requested_order.append(network)
             # If security groups are requested on an instance then the
             # network must has a subnet associated with it. Some plugins
             # implement the port-security extension which requires
@@ -638,33 +645,63 @@ class API(base_api.NetworkAPI):
 
                 raise exception.SecurityGroupCannotBeApplied()
             request.network_id = network['id']
-            zone = 'compute:%s' % instance.availability_zone
-            port_req_body = {'port': {'device_id': instance.uuid,
-                                      'device_owner': zone}}
+            nets_in_requested_order.append(network)
+            requests_in_order.append(request)
+
+        # NOTE: The ports are created or updated in green threads so
+        # that instances with many vNICs do not pay for one neutron round
+        # trip per port in sequence. As soon as one of them fails the ones
+        # which have not started yet are skipped, and everything that was
+        # done by the others is rolled back once they have all finished.
+        pool = eventlet.GreenPool(CONF.neutron.port_create_concurrency)
+        failed = []
+
+        def _allocate_port(request):
+            if failed:
+                return None, None
+            # NOTE: A neutron client, with its HTTP connection and auth
+            # state, must not be shared between green threads, so each one
+            # gets its own clients.
             try:
-                self._populate_neutron_extension_values(context,
-                                                        instance,
-                                                        request.pci_request_id,
-                                                        port_req_body,
-                                                        neutron=neutron)
-                if request.port_id:
-                    port = ports[request.port_id]
-                    port_client.update_port(port['id'], port_req_body)
-                    preexisting_port_ids.append(port['id'])
-                    ports_in_requested_order.append(port['id'])
-                else:
-                    created_port = self._create_port(
-                            port_client, instance, request.network_id,
-                            port_req_body, request.address,
-                            security_group_ids, available_macs, dhcp_opts)
-                    created_port_ids.append(created_port)
-                    ports_in_requested_order.append(created_port)
+                thread_neutron = get_client(context)
+                thread_port_client = (thread_neutron if not has_port_binding
+                                      else get_client(context, admin=True))
+                port_id = self._create_or_update_port(
+                    context, instance, request, ports, thread_neutron,
+                    thread_port_client, security_group_ids, available_macs,
+                    dhcp_opts)
+                return port_id, None
+            except Exception:
+                failed.append(request)
+                return None, sys.exc_info()
+
+        threads = [pool.spawn(_allocate_port, request)
+                   for request in requests_in_order]
+        results = [thread.wait() for thread in threads]
+
+        preexisting_port_ids = []
+        created_port_ids = []
+        ports_in_requested_order = []
+        for request, (port_id, exc_info) in zip(requests_in_order, results):
+            if port_id is None:
+                continue
+            if request.port_id:
+                preexisting_port_ids.append(port_id)
+            else:
+                created_port_ids.append(port_id)
+            ports_in_requested_order.append(port_id)
+
+        errors = [exc_info for port_id, exc_info in results if exc_info]
+        if errors:
+            try:
+                six.reraise(*errors[0])
             except Exception:
                 with excutils.save_and_reraise_exception():
                     self._unbind_ports(context,
                                        preexisting_port_ids,
                                        neutron, port_client)
                     self._delete_ports(neutron, instance, created_port_ids)
+
         nw_info = self.get_instance_nw_info(
             context, instance, networks=nets_in_requested_order,
             port_ids=ports_in_requested_order,
@@ -679,6 +716,33 @@ class API(base_api.NetworkAPI):
                                           if vif['id'] in created_port_ids +
                                           preexisting_port_ids])
 
+    def _create_or_update_port(self, context, instance, request, ports,
+                               neutron, port_client, security_group_ids,
+                               available_macs, dhcp_opts):
+        """Create a new port or update a requested one for the instance.
+
+        :param request: The NetworkRequest the port is allocated for.
+        :param ports: Dict of the pre-existing ports requested by the user,
+            keyed by port ID.
+        :returns: ID of the created or updated port.
+        """
+        zone = 'compute:%s' % instance.availability_zone
+        port_req_body = {'port': {'device_id': instance.uuid,
+                                  'device_owner': zone}}
+        self._populate_neutron_extension_values(context,
+                                                instance,
+                                                request.pci_request_id,
+                                                port_req_body,
+                                                neutron=neutron)
+        if request.port_id:
+            port = ports[request.port_id]
+            port_client.update_port(port['id'], port_req_body)
+            return port['id']
+        return self._create_port(
+                port_client, instance, request.network_id,
+                port_req_body, request.address,
+                security_group_ids, available_macs, dhcp_opts)
+
     def _refresh_neutron_extensions_cache(self, context, neutron=None):
         """Refresh the neutron extensions cache when necessary."""
         if (not self.last_neutron_extension_sync or
@@ -688,7 +752,6 @@ class API(base_api.NetworkAPI):
                 neutron = get_client(context)
             extensions_list = neutron.list_extensions()['extensions']
             self.last_neutron_extension_sync = time.time()
-            self.extensions.clear()
             self.extensions = {ext['name']: ext for ext in extensions_list}
 
     def _has_port_binding_extension(self, context, refresh_cache=False,
@@ -69,11 +69,16 @@ def make_class_properties(cls):
         def getter(self, name=name):
             attrname = get_attrname(name)
             if not hasattr(self, attrname):
-                self.obj_load_attr(name)
+                if self._obj_lazy_data and name in self._obj_lazy_data:
+                    self._obj_hydrate_field(name)
+                else:
+                    self.obj_load_attr(name)
             return getattr(self, attrname)
 
         def setter(self, value, name=name, field=field):
             attrname = get_attrname(name)
+            if self._obj_lazy_data and name in self._obj_lazy_data:
+                self._obj_hydrate_field(name)
             field_value = field.coerce(self, name, value)
             if field.read_only and hasattr(self, attrname):
                 # Note(yjiang5): _from_db_object() may iterate
@@ -93,12 +98,71 @@ def make_class_properties(cls):
 
         def deleter(self, name=name):
             attrname = get_attrname(name)
+            if self._obj_lazy_data and name in self._obj_lazy_data:
+                del self._obj_lazy_data[name]
+                return
             if not hasattr(self, attrname):
                 raise AttributeError('No such attribute `%s' % name)
             delattr(self, get_attrname(name))
 
         setattr(cls, name, property(getter, setter, deleter))
 
+    # NOTE: Serializing and hydrating objects is on the hot path
+    # of every RPC call, so work out once per class (and thus per version)
+    # the name of the storage attribute behind every field, instead of for
+    # every field of every object we (de)serialize.
+    cls._obj_field_plan = tuple((name, get_attrname(name), field)
+                                for name, field in cls.fields.items())
+
+
+def _compact_storage_slots(bases, dict_):
+    """Return the __slots__ of a class with obj_compact_storage set.
+
+    That is a slot for the storage attribute of each field of the class,
+    except for those that a base class already has a slot for.
+    """
+    names = set(dict_.get('fields', {}))
+    slotted = set()
+    for base in bases:
+        for cls in base.mro():
+            names.update(cls.__dict__.get('fields', {}))
+            slotted.update(cls.__dict__.get('__slots__', ()))
+    slots = set(dict_.get('__slots__', ()))
+    slots.update(get_attrname(name) for name in names)
+    # NOTE: Every object has these, keeping them in slots too spares the
+    # object its __dict__ unless something else is set on it.
+    slots.update(['_context', '_changed_fields'])
+    # NOTE: A slot can't shadow a class attribute of the same name.
+    return tuple(sorted(slot for slot in slots
+                        if slot not in slotted and slot not in dict_))
+
+
+def _obj_field_objname(field):
+    """Return the name of the objects held by a field, or None if the
+    field doesn't hold objects.
+    """
+    if isinstance(field, obj_fields.ObjectField):
+        return field._type._obj_name
+    if isinstance(field, obj_fields.ListOfObjectsField):
+        return field._type._element_type._type._obj_name
+    return None
+
+
+def _compact_storage_getstate(self):
+    # NOTE: pickle only knows about the instance __dict__, so add the
+    # attributes we keep in __slots__ to it.
+    state = dict(self.__dict__)
+    for cls in type(self).__mro__:
+        for slot in cls.__dict__.get('__slots__', ()):
+            if hasattr(self, slot):
+                state[slot] = getattr(self, slot)
+    return state
+
+
+def _compact_storage_setstate(self, state):
+    for key, value in state.items():
+        setattr(self, key, value)
+
 
 class NovaObjectMetaclass(type):
     """Metaclass that allows tracking of object classes."""
@@ -107,6 +171,18 @@ class NovaObjectMetaclass(type):
     # remoted. If this is not None, use it to remote things over RPC.
     indirection_api = None
 
+    def __new__(mcs, name, bases, dict_):
+        compact = dict_.get('obj_compact_storage',
+                            any(getattr(base, 'obj_compact_storage', False)
+                                for base in bases))
+        if compact:
+            dict_ = dict(dict_)
+            dict_['__slots__'] = _compact_storage_slots(bases, dict_)
+            dict_.setdefault('__getstate__', _compact_storage_getstate)
+            dict_.setdefault('__setstate__', _compact_storage_setstate)
+        return super(NovaObjectMetaclass, mcs).__new__(mcs, name, bases,
+                                                       dict_)
+
     def __init__(cls, names, bases, dict_):
         if not hasattr(cls, '_obj_classes'):
             # This means this is a base class using the metaclass. I.e.,
@@ -271,6 +347,26 @@ class NovaObject(object):
     #   since they were not added until version 1.2.
     obj_relationships = {}
 
+    # (name, storage attribute, field) for each of our fields, computed
+    # by make_class_properties()
+    _obj_field_plan = ()
+
+    # Objects that are held in large numbers (by the scheduler or the
+    # conductor for example) can set this to store their fields in
+    # __slots__ rather than in a per-instance __dict__, which takes much
+    # less memory. It is inherited by subclasses, and the object keeps
+    # the very same API, pickle included.
+    obj_compact_storage = False
+
+    # Objects that are sent over RPC in large numbers, but of which the
+    # receiver often only looks at a few fields, can set this to allow
+    # their sub-objects to only be hydrated when they are first accessed,
+    # when the receiver asks for it (see NovaObjectSerializer). Until
+    # then, the primitives of the sub-objects are kept in _obj_lazy_data
+    # and are sent back as they are if the object is serialized again.
+    obj_lazy_hydration = False
+    _obj_lazy_data = None
+
     def __init__(self, context=None, **kwargs):
         self._changed_fields = set()
         self._context = context
@@ -324,22 +420,89 @@ class NovaObject(object):
                                                   supported=latest_ver)
 
     @classmethod
-    def _obj_from_primitive(cls, context, objver, primitive):
+    def _obj_from_primitive(cls, context, objver, primitive,
+                            lazy_hydration=False):
         self = cls()
         self._context = context
-        self.VERSION = objver
+        # NOTE: Only keep the version on the object when it differs from
+        # the one of its class, so that compact objects don't get a
+        # __dict__ for it.
+        if objver != cls.VERSION:
+            self.VERSION = objver
         objdata = primitive['nova_object.data']
         changes = primitive.get('nova_object.changes', [])
-        for name, field in self.fields.items():
-            if name in objdata:
-                setattr(self, name, field.from_primitive(self, name,
-                                                         objdata[name]))
+        lazy_hydration = lazy_hydration and cls.obj_lazy_hydration
+        lazy_data = {}
+        for name, attrname, field in cls._obj_field_plan:
+            if name not in objdata:
+                continue
+            if lazy_hydration and cls._obj_check_lazy_primitive(
+                    name, field, objdata[name]):
+                lazy_data[name] = objdata[name]
+                continue
+            # NOTE: This is a brand new object, so there is
+            # no need to go through the property setter (read-only
+            # checks and change tracking): store the coerced value.
+            value = field.from_primitive(self, name, objdata[name])
+            setattr(self, attrname, field.coerce(self, name, value))
+        if lazy_data:
+            self._obj_lazy_data = lazy_data
         self._changed_fields = set([x for x in changes if x in self.fields])
         return self
 
     @classmethod
-    def obj_from_primitive(cls, primitive, context=None):
-        """Object field-by-field hydration."""
+    def _obj_check_lazy_primitive(cls, name, field, value):
+        """Check whether a field can be left as a primitive for now.
+
+        Only the sub-objects are worth hydrating lazily. Their type and
+        version are checked right away, like they would be if hydrating
+        them now, so that a bad type is still rejected and a backport can
+        still be requested.
+        """
+        objname = _obj_field_objname(field)
+        if objname is None:
+            return False
+        if isinstance(field, obj_fields.ListOfObjectsField):
+            items = value
+        else:
+            items = [value]
+        if not isinstance(items, list) or not all(
+                isinstance(item, dict) and 'nova_object.name' in item
+                for item in items):
+            # NOTE: Let the hydration deal with anything else right away.
+            return False
+        versions = set()
+        for item in items:
+            if item['nova_object.name'] != objname:
+                raise ValueError(_('An object of type %(type)s is required '
+                                   'in field %(attr)s') %
+                                 {'type': objname, 'attr': name})
+            versions.add(item['nova_object.version'])
+        for version in versions:
+            cls.obj_class_from_name(objname, version)
+        return True
+
+    def _obj_hydrate_field(self, name):
+        """Hydrate a field which was left as a primitive."""
+        field = self.fields[name]
+        value = field.from_primitive(self, name,
+                                     self._obj_lazy_data.pop(name))
+        setattr(self, get_attrname(name), field.coerce(self, name, value))
+
+    def _obj_hydrate_fields(self):
+        if self._obj_lazy_data:
+            for name in list(self._obj_lazy_data):
+                self._obj_hydrate_field(name)
+
+    @classmethod
+    def obj_from_primitive(cls, primitive, context=None,
+                           lazy_hydration=False):
+        """Object field-by-field hydration.
+
+        If lazy_hydration is True, the sub-objects of the objects which
+        support it (see obj_lazy_hydration) are only hydrated when first
+        accessed.
+        """
         if primitive['nova_object.namespace'] != 'nova':
             # NOTE(danms): We don't do anything with this now, but it's
             # there for "the future"
@@ -349,7 +512,8 @@ class NovaObject(object):
         objname = primitive['nova_object.name']
         objver = primitive['nova_object.version']
         objclass = cls.obj_class_from_name(objname, objver)
-        return objclass._obj_from_primitive(context, objver, primitive)
+        return objclass._obj_from_primitive(context, objver, primitive,
+                                            lazy_hydration=lazy_hydration)
 
     def __deepcopy__(self, memo):
         """Efficiently make a deep copy of this object."""
@@ -447,6 +611,46 @@ class NovaObject(object):
         else:
             _do_backport(child_version)
 
+    @classmethod
+    def _obj_pinned_children(cls):
+        """Return the (object name, version) of the children of our latest
+        version, as pinned by obj_relationships.
+        """
+        version = utils.convert_version_to_tuple(cls.VERSION)
+        for key, field in cls.fields.items():
+            objname = _obj_field_objname(field)
+            if objname is None:
+                continue
+            child_version = None
+            for my_version, pinned in cls.obj_relationships.get(key, []):
+                if utils.convert_version_to_tuple(my_version) <= version:
+                    child_version = pinned
+            yield objname, child_version
+
+    @classmethod
+    def _obj_latest_is_compatible(cls):
+        """Return whether the primitive of an object is already compatible
+        with the latest version of its class.
+
+        That is the case unless a child, or a child of a child, is pinned
+        to an older version than the latest one of its class. The result
+        is computed once per class.
+        """
+        compatible = cls.__dict__.get('_obj_latest_compatible')
+        if compatible is None:
+            # NOTE: Guard against the cycles of the object graph.
+            cls._obj_latest_compatible = True
+            compatible = True
+            for objname, child_version in cls._obj_pinned_children():
+                child_classes = NovaObject._obj_classes.get(objname)
+                if (not child_classes or
+                        child_version != child_classes[0].VERSION or
+                        not child_classes[0]._obj_latest_is_compatible()):
+                    compatible = False
+                    break
+            cls._obj_latest_compatible = compatible
+        return compatible
+
     def obj_make_compatible(self, primitive, target_version):
         """Make an object representation compatible with a target version.
 
@@ -492,19 +696,32 @@ class NovaObject(object):
 
         This calls to_primitive() for each item in fields.
         """
+        # NOTE: Our own primitive is usually compatible with the latest
+        # version of this class already, no need to walk it again then.
+        make_compatible = target_version and (
+            target_version != self.__class__.VERSION or
+            not self._obj_latest_is_compatible())
+        if make_compatible:
+            # NOTE: obj_make_compatible() may change the primitives of
+            # our fields in place, so don't hand it those we were given.
+            self._obj_hydrate_fields()
+        lazy_data = self._obj_lazy_data or {}
         primitive = dict()
-        for name, field in self.fields.items():
-            if self.obj_attr_is_set(name):
+        for name, attrname, field in self._obj_field_plan:
+            if hasattr(self, attrname):
                 primitive[name] = field.to_primitive(self, name,
-                                                     getattr(self, name))
-        if target_version:
+                                                     getattr(self, attrname))
+            elif name in lazy_data:
+                primitive[name] = lazy_data[name]
+        if make_compatible:
             self.obj_make_compatible(primitive, target_version)
         obj = {'nova_object.name': self.obj_name(),
                'nova_object.namespace': 'nova',
                'nova_object.version': target_version or self.VERSION,
                'nova_object.data': primitive}
-        if self.obj_what_changed():
-            obj['nova_object.changes'] = list(self.obj_what_changed())
+        changes = self.obj_what_changed()
+        if changes:
+            obj['nova_object.changes'] = list(changes)
         return obj
 
     def obj_set_defaults(self, *attrs):
@@ -541,11 +758,16 @@ class NovaObject(object):
     def obj_what_changed(self):
         """Returns a set of fields that have been modified."""
         changes = set(self._changed_fields)
-        for field in self.fields:
-            if (self.obj_attr_is_set(field) and
-                    isinstance(getattr(self, field), NovaObject) and
-                    getattr(self, field).obj_what_changed()):
-                changes.add(field)
+        lazy_data = self._obj_lazy_data or {}
+        for name, attrname, field in self._obj_field_plan:
+            value = getattr(self, attrname, None)
+            if isinstance(value, NovaObject) and value.obj_what_changed():
+                changes.add(name)
+            elif (name in lazy_data and isinstance(lazy_data[name], dict) and
+                    lazy_data[name].get('nova_object.changes')):
+                # NOTE: A sub-object which has not been hydrated yet can
+                # only have the changes it was sent with.
+                changes.add(name)
         return changes
 
     def obj_get_changes(self):
@@ -605,11 +827,14 @@ class NovaObject(object):
         False if not. Raises AttributeError if attrname is not
         a valid attribute for this object.
         """
-        if attrname not in self.obj_fields:
+        if attrname not in self.fields and (
+                attrname not in self.obj_extra_fields):
             raise AttributeError(
                 _("%(objname)s object has no attribute '%(attrname)s'") %
                 {'objname': self.obj_name(), 'attrname': attrname})
-        return hasattr(self, get_attrname(attrname))
+        return (hasattr(self, get_attrname(attrname)) or
+                bool(self._obj_lazy_data and
+                     attrname in self._obj_lazy_data))
 
     @property
     def obj_fields(self):
@@ -802,13 +1027,58 @@ class ObjectListBase(object):
     def sort(self, cmp=None, key=None, reverse=False):
         self.objects.sort(cmp=cmp, key=key, reverse=reverse)
 
+    @classmethod
+    def _obj_from_primitive(cls, context, objver, primitive,
+                            lazy_hydration=False):
+        objdata = primitive['nova_object.data']
+        if objdata.get('objects'):
+            # NOTE: The items of a list are nearly always of the same type
+            # and version, so only look their class up once for all of
+            # them rather than once per item.
+            objdata = dict(objdata, objects=cls._obj_items_from_primitive(
+                context, objdata['objects'], lazy_hydration))
+            primitive = dict(primitive)
+            primitive['nova_object.data'] = objdata
+        return super(ObjectListBase, cls)._obj_from_primitive(
+            context, objver, primitive)
+
+    @staticmethod
+    def _obj_items_from_primitive(context, primitives, lazy_hydration):
+        objclasses = {}
+        items = []
+        for item in primitives:
+            if (isinstance(item, NovaObject) or
+                    item['nova_object.namespace'] != 'nova'):
+                # NOTE: Leave these to the objects field to pass through
+                # or reject.
+                items.append(item)
+                continue
+            objname = item['nova_object.name']
+            objver = item['nova_object.version']
+            objclass = objclasses.get((objname, objver))
+            if objclass is None:
+                objclass = NovaObject.obj_class_from_name(objname, objver)
+                objclasses[(objname, objver)] = objclass
+            items.append(objclass._obj_from_primitive(
+                context, objver, item, lazy_hydration=lazy_hydration))
+        return items
+
+    @classmethod
+    def _obj_pinned_children(cls):
+        yield (_obj_field_objname(cls.fields['objects']),
+               cls.child_versions.get(cls.VERSION, '1.0'))
+
     def obj_make_compatible(self, primitive, target_version):
         primitives = primitive['objects']
         child_target_version = self.child_versions.get(target_version, '1.0')
         for index, item in enumerate(self.objects):
-            self.objects[index].obj_make_compatible(
-                primitives[index]['nova_object.data'],
-                child_target_version)
+            # NOTE: See NovaObject.obj_to_primitive(), an item is usually
+            # compatible with the latest version of its class already.
+            if (child_target_version != item.__class__.VERSION or
+                    not item._obj_latest_is_compatible()):
+                item.obj_make_compatible(
+                    primitives[index]['nova_object.data'],
+                    child_target_version)
             primitives[index]['nova_object.version'] = child_target_version
 
     def obj_what_changed(self):
@@ -835,9 +1105,18 @@ class NovaObjectSerializer(messaging.NoOpSerializer):
             self._conductor = conductor.API()
         return self._conductor
 
+    def __init__(self, lazy_hydration=False):
+        super(NovaObjectSerializer, self).__init__()
+        # NOTE: Services which mostly pass the objects they receive on, or
+        # only look at a few of their fields, can ask for their sub-objects
+        # to be hydrated lazily.
+        self.lazy_hydration = lazy_hydration
+
     def _process_object(self, context, objprim):
         try:
-            objinst = NovaObject.obj_from_primitive(objprim, context=context)
+            objinst = NovaObject.obj_from_primitive(
+                objprim, context=context,
+                lazy_hydration=self.lazy_hydration)
         except exception.IncompatibleObjectVersion as e:
             objver = objprim['nova_object.version']
             if objver.count('.') == 2:
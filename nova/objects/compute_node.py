@@ -40,6 +40,8 @@ class ComputeNode(base.NovaPersistentObject, base.NovaObject,
     # Version 1.11: PciDevicePoolList version 1.1
     VERSION = '1.11'
 
+    obj_compact_storage = True
+
     fields = {
         'id': fields.IntegerField(read_only=True),
         'service_id': fields.IntegerField(),
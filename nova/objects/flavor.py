@@ -110,9 +110,10 @@ class Flavor(base.NovaPersistentObject, base.NovaObject,
         return changes
 
     @classmethod
-    def _obj_from_primitive(cls, context, objver, primitive):
-        self = super(Flavor, cls)._obj_from_primitive(context, objver,
-                                                      primitive)
+    def _obj_from_primitive(cls, context, objver, primitive,
+                            lazy_hydration=False):
+        self = super(Flavor, cls)._obj_from_primitive(
+            context, objver, primitive, lazy_hydration=lazy_hydration)
         changes = self.obj_what_changed()
         if 'extra_specs' not in changes:
             # This call left extra_specs "clean" so update our tracker
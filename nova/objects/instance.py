@@ -156,7 +156,13 @@ class Instance(base.NovaPersistentObject, base.NovaObject,
     # Version 1.18: Added flavor, old_flavor, new_flavor
     # Version 1.19: Added vcpu_model
     # Version 1.20: Added ec2_ids
-    VERSION = '1.20'
+    # Version 1.21: PciDeviceList 1.2
+    VERSION = '1.21'
+
+    obj_compact_storage = True
+    obj_lazy_hydration = True
+    # NOTE: Every instance has these, see _reset_metadata_tracking()
+    __slots__ = ('_orig_metadata', '_orig_system_metadata')
 
     fields = {
         'id': fields.IntegerField(),
@@ -260,7 +266,7 @@ class Instance(base.NovaPersistentObject, base.NovaObject,
         'fault': [('1.0', '1.0')],
         'info_cache': [('1.1', '1.0'), ('1.9', '1.4'), ('1.10', '1.5')],
         'security_groups': [('1.2', '1.0')],
-        'pci_devices': [('1.6', '1.0'), ('1.15', '1.1')],
+        'pci_devices': [('1.6', '1.0'), ('1.15', '1.1'), ('1.21', '1.2')],
         'numa_topology': [('1.14', '1.0')],
         'pci_requests': [('1.16', '1.1')],
         'tags': [('1.17', '1.0')],
@@ -297,9 +303,10 @@ class Instance(base.NovaPersistentObject, base.NovaObject,
         return changes
 
     @classmethod
-    def _obj_from_primitive(cls, context, objver, primitive):
-        self = super(Instance, cls)._obj_from_primitive(context, objver,
-                                                        primitive)
+    def _obj_from_primitive(cls, context, objver, primitive,
+                            lazy_hydration=False):
+        self = super(Instance, cls)._obj_from_primitive(
+            context, objver, primitive, lazy_hydration=lazy_hydration)
         self._reset_metadata_tracking()
         return self
 
@@ -577,8 +584,10 @@ class Instance(base.NovaPersistentObject, base.NovaObject,
         return cls._from_db_object(context, cls(), db_inst,
                                    expected_attrs)
 
-    @base.remotable
-    def create(self):
+    def _get_create_updates(self):
+        """Return the database values of a new instance and the attributes
+        expected back from the created record.
+        """
         if self.obj_attr_is_set('id'):
             raise exception.ObjectActionError(action='create',
                                               reason='already created')
@@ -622,6 +631,11 @@ class Instance(base.NovaPersistentObject, base.NovaObject,
             expected_attrs.append('vcpu_model')
             updates['extra']['vcpu_model'] = (
                 jsonutils.dumps(vcpu_model.obj_to_primitive()))
+        return updates, expected_attrs
+
+    @base.remotable
+    def create(self):
+        updates, expected_attrs = self._get_create_updates()
         db_inst = db.instance_create(self._context, updates)
         self._from_db_object(self._context, self, db_inst, expected_attrs)
 
@@ -1163,7 +1177,10 @@ class InstanceList(base.ObjectListBase, base.NovaObject):
     # Version 1.15: Instance <= version 1.19
     # Version 1.16: Added get_all() method
     # Version 1.17: Instance <= version 1.20
-    VERSION = '1.17'
+    # Version 1.18: Instance <= version 1.21
+    # Version 1.19: Added create_multi() method
+    # Version 1.20: Added get_brief_by_uuids() method
+    VERSION = '1.20'
 
     fields = {
         'objects': fields.ListOfObjectsField('Instance'),
@@ -1187,6 +1204,9 @@ class InstanceList(base.ObjectListBase, base.NovaObject):
         '1.15': '1.19',
         '1.16': '1.19',
         '1.17': '1.20',
+        '1.18': '1.21',
+        '1.19': '1.21',
+        '1.20': '1.21',
         }
 
     @base.remotable_classmethod
@@ -1231,6 +1251,21 @@ class InstanceList(base.ObjectListBase, base.NovaObject):
         return _make_instance_list(context, cls(), db_inst_list,
                                    expected_attrs)
 
+    @base.remotable_classmethod
+    def get_brief_by_uuids(cls, context, uuids):
+        """Returns the instances with the given uuids, brief version.
+
+        Only the fields the name of an instance is built from are loaded:
+        id, uuid, hostname and display_name.
+        """
+        inst_list = cls(context=context, objects=[])
+        for db_inst in db.instance_get_all_brief_by_uuids(context, uuids):
+            inst = objects.Instance(context=context, **db_inst)
+            inst.obj_reset_changes()
+            inst_list.objects.append(inst)
+        inst_list.obj_reset_changes()
+        return inst_list
+
     @base.remotable_classmethod
     def get_all(cls, context, expected_attrs=None):
         """Returns all instances on all nodes."""
@@ -1239,6 +1274,31 @@ class InstanceList(base.ObjectListBase, base.NovaObject):
         return _make_instance_list(context, cls(), db_instances,
                                    expected_attrs)
 
+    @base.remotable_classmethod
+    def create_multi(cls, context, instances, block_device_mappings=None):
+        """Create several new instances in the database at once.
+
+        This is the bulk version of Instance.create(), the returned list
+        holds the created instances. Every instance also gets a copy of the
+        block_device_mappings values.
+        """
+        values_list = []
+        all_expected_attrs = []
+        for instance in instances:
+            updates, expected_attrs = instance._get_create_updates()
+            values_list.append(updates)
+            all_expected_attrs.append(expected_attrs)
+        db_instances = db.instance_create_multi(
+                context, values_list,
+                block_device_mappings=block_device_mappings)
+        for instance, db_inst, expected_attrs in zip(
+                instances, db_instances, all_expected_attrs):
+            instance._from_db_object(context, instance, db_inst,
+                                     expected_attrs)
+        inst_list = cls(context=context, objects=list(instances))
+        inst_list.obj_reset_changes()
+        return inst_list
+
     @base.remotable_classmethod
     def get_hung_in_rebooting(cls, context, reboot_window,
                               expected_attrs=None):
@@ -89,6 +89,8 @@ class PciDevice(base.NovaPersistentObject, base.NovaObject,
     # Version 1.3: Added field to represent PCI device NUMA node
     VERSION = '1.3'
 
+    obj_compact_storage = True
+
     fields = {
         'id': fields.IntegerField(),
         # Note(yjiang5): the compute_node_id may be None because the pci
@@ -183,6 +185,13 @@ class PciDevice(base.NovaPersistentObject, base.NovaObject,
         pci_device.status = 'available'
         return pci_device
 
+    def obj_get_db_changes(self):
+        """Return the changed fields, as written to the database."""
+        updates = self.obj_get_changes()
+        if 'extra_info' in updates:
+            updates['extra_info'] = jsonutils.dumps(updates['extra_info'])
+        return updates
+
     @base.remotable
     def save(self):
         if self.status == 'removed':
@@ -190,9 +199,7 @@ class PciDevice(base.NovaPersistentObject, base.NovaObject,
             db.pci_device_destroy(self._context, self.compute_node_id,
                                   self.address)
         elif self.status != 'deleted':
-            updates = self.obj_get_changes()
-            if 'extra_info' in updates:
-                updates['extra_info'] = jsonutils.dumps(updates['extra_info'])
+            updates = self.obj_get_db_changes()
             if updates:
                 db_pci = db.pci_device_update(self._context,
                                               self.compute_node_id,
@@ -204,7 +211,8 @@ class PciDeviceList(base.ObjectListBase, base.NovaObject):
     # Version 1.0: Initial version
     #              PciDevice <= 1.1
     # Version 1.1: PciDevice 1.2
-    VERSION = '1.1'
+    # Version 1.2: PciDevice 1.3, added update_by_addresses()
+    VERSION = '1.2'
 
     fields = {
         'objects': fields.ListOfObjectsField('PciDevice'),
@@ -232,3 +240,15 @@ class PciDeviceList(base.ObjectListBase, base.NovaObject):
         db_dev_list = db.pci_device_get_all_by_instance_uuid(context, uuid)
         return base.obj_make_list(context, cls(context), objects.PciDevice,
                                   db_dev_list)
+
+    @base.remotable_classmethod
+    def update_by_addresses(cls, context, node_id, updates):
+        """Write the changes of many devices of a node in one transaction.
+
+        :param updates: a dict of the changes of the devices, as returned by
+                        PciDevice.obj_get_db_changes(), by address
+        :returns: a PciDeviceList of the updated devices
+        """
+        db_dev_list = db.pci_device_update_multi(context, node_id, updates)
+        return base.obj_make_list(context, cls(context), objects.PciDevice,
+                                  db_dev_list)
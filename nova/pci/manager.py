@@ -17,6 +17,7 @@
 import collections
 
 from oslo_log import log as logging
+import six
 
 from nova.compute import task_states
 from nova.compute import vm_states
@@ -30,6 +31,29 @@ from nova.virt import hardware
 LOG = logging.getLogger(__name__)
 
 
+def _is_device_changed(dev, dev_dict):
+    """Check if the hypervisor information differs from a device object.
+
+    Only the values which PciDevice.update_device() would sync are
+    compared.
+    """
+    for k, v in six.iteritems(dev_dict):
+        if k in ('status', 'instance_uuid', 'id', 'extra_info'):
+            continue
+        if k in dev.fields:
+            if not dev.obj_attr_is_set(k) or dev[k] != v:
+                return True
+        elif dev.extra_info.get(k) != v:
+            return True
+    return False
+
+
+def _hv_fingerprint(dev_dict):
+    """Return a compact, comparable form of the hypervisor device data."""
+    return tuple(sorted((k, v) for k, v in six.iteritems(dev_dict)
+                        if k != 'compute_node_id'))
+
+
 class PciDevTracker(object):
     """Manage pci devices in a compute node.
 
@@ -52,6 +76,10 @@ class PciDevTracker(object):
 
         super(PciDevTracker, self).__init__()
         self.stale = {}
+        # NOTE: The hypervisor data last synced into each device, by address.
+        # Comparing these tuples is much cheaper than comparing the thousands
+        # of PciDevice objects of an SR-IOV host on every periodic task.
+        self._hv_state = {}
         self.node_id = node_id
         self.stats = stats.PciDeviceStats()
         if node_id:
@@ -78,10 +106,32 @@ class PciDevTracker(object):
         return self.pci_devs
 
     def save(self, context):
+        updates = collections.defaultdict(dict)
+        changed_devs = {}
         for dev in self.pci_devs:
-            if dev.obj_what_changed():
+            if not dev.obj_what_changed():
+                continue
+            if dev['status'] in ('removed', 'deleted'):
                 with dev.obj_alternate_context(context):
                     dev.save()
+            else:
+                updates[dev['compute_node_id']][dev['address']] = (
+                    dev.obj_get_db_changes())
+                changed_devs[dev['address']] = dev
+
+        # NOTE: Write the changed devices of a node in a single call. The
+        # PciDevice objects are shared with the stats pools and the claims,
+        # so the database values are copied into them rather than replacing
+        # them.
+        for node_id, node_updates in six.iteritems(updates):
+            db_devs = objects.PciDeviceList.update_by_addresses(
+                context, node_id, node_updates)
+            for db_dev in db_devs:
+                changed = changed_devs[db_dev.address]
+                for field in changed.fields:
+                    if db_dev.obj_attr_is_set(field):
+                        changed[field] = db_dev[field]
+                changed.obj_reset_changes()
 
         self.pci_devs = [dev for dev in self.pci_devs
                          if dev['status'] != 'deleted']
@@ -104,10 +154,15 @@ class PciDevTracker(object):
         """
 
         exist_addrs = set([dev['address'] for dev in self.pci_devs])
-        new_addrs = set([dev['address'] for dev in devices])
+        # NOTE: An SR-IOV host may report thousands of virtual functions,
+        # index them by address so that syncing is linear in their number.
+        new_devs = {dev['address']: dev for dev in devices}
+        new_addrs = set(new_devs)
+        removed_addrs = exist_addrs - new_addrs
 
         for existed in self.pci_devs:
-            if existed['address'] in exist_addrs - new_addrs:
+            if existed['address'] in removed_addrs:
+                self._hv_state.pop(existed['address'], None)
                 try:
                     device.remove(existed)
                 except exception.PciDeviceInvalidStatus as e:
@@ -125,9 +180,16 @@ class PciDevTracker(object):
                     # device is hot removed.
                     self.stats.remove_device(existed)
             else:
-                new_value = next((dev for dev in devices if
-                    dev['address'] == existed['address']))
+                new_value = new_devs[existed['address']]
                 new_value['compute_node_id'] = self.node_id
+                fingerprint = _hv_fingerprint(new_value)
+                if (self._hv_state.get(existed['address']) == fingerprint or
+                        not _is_device_changed(existed, new_value)):
+                    # Nothing to sync, this also prevents the device from
+                    # being written to the database by the next save().
+                    self.stale.pop(existed['address'], None)
+                    self._hv_state[existed['address']] = fingerprint
+                    continue
                 if existed['status'] in ('claimed', 'allocated'):
                     # Pci properties may change while assigned because of
                     # hotplug or config changes. Although normally this should
@@ -142,15 +204,18 @@ class PciDevTracker(object):
                     # we can add more action like killing the instance
                     # by force in future.
                     self.stale[new_value['address']] = new_value
+                    self._hv_state.pop(existed['address'], None)
                 else:
                     existed.update_device(new_value)
+                    self._hv_state[existed['address']] = fingerprint
 
-        for dev in [dev for dev in devices if
-                    dev['address'] in new_addrs - exist_addrs]:
+        for address in new_addrs - exist_addrs:
+            dev = new_devs[address]
             dev['compute_node_id'] = self.node_id
             # NOTE(danms): These devices are created with no context
             dev_obj = objects.PciDevice.create(dev)
             self.pci_devs.append(dev_obj)
+            self._hv_state[address] = _hv_fingerprint(dev)
             self.stats.add_device(dev_obj)
 
     def _claim_instance(self, context, instance, prefix=''):
@@ -14,13 +14,13 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 
-import copy
+import collections
 
 from oslo_log import log as logging
+import six
 
 from nova import exception
 from nova.i18n import _LE
-from nova.pci import utils
 from nova.pci import whitelist
 
 
@@ -59,20 +59,43 @@ class PciDeviceStats(object):
         self.pools = [pci_pool.to_dict()
                       for pci_pool in stats] if stats else []
         self.pools.sort(self.pool_cmp)
+        self._build_pool_index()
 
-    def _equal_properties(self, dev, entry, matching_keys):
-        return all(dev.get(prop) == entry.get(prop)
-                   for prop in matching_keys)
+    @staticmethod
+    def _pool_index_key(pool):
+        """Return the hashable identity of a pool.
+
+        Two pools are the same if they have exactly the same properties
+        (product_id, vendor_id, numa_node and the devspec tags such as
+        physical_network), regardless of their count and devices.
+        """
+        return frozenset((k, v) for k, v in six.iteritems(pool)
+                         if k not in ('count', 'devices'))
+
+    def _build_pool_index(self):
+        """Index the pools by their properties.
+
+        On SR-IOV hosts every virtual function is added to and removed from
+        the stats individually, and every request is matched against the
+        pools, so neither must depend on the number of pools or devices.
+        The index maps the identity of a pool to the pool, each of its
+        (key, value) properties to the identities of the pools having it,
+        and the identity of a pool to its position in self.pools. It is
+        only rebuilt when pools are created or dropped.
+        """
+        self._pool_index = {}
+        self._prop_index = collections.defaultdict(set)
+        self._pool_pos = {}
+        for pos, pool in enumerate(self.pools):
+            key = self._pool_index_key(pool)
+            self._pool_index[key] = pool
+            self._pool_pos[key] = pos
+            for prop in key:
+                self._prop_index[prop].add(key)
 
     def _find_pool(self, dev_pool):
-        """Return the first pool that matches dev."""
-        for pool in self.pools:
-            pool_keys = pool.copy()
-            del pool_keys['count']
-            del pool_keys['devices']
-            if (len(pool_keys.keys()) == len(dev_pool.keys()) and
-                self._equal_properties(dev_pool, pool_keys, dev_pool.keys())):
-                return pool
+        """Return the pool that matches dev."""
+        return self._pool_index.get(self._pool_index_key(dev_pool))
 
     def _create_pool_keys_from_dev(self, dev):
         """create a stats pool dict that this dev is supposed to be part of
@@ -98,12 +121,16 @@ class PciDeviceStats(object):
             pool = self._find_pool(dev_pool)
             if not pool:
                 dev_pool['count'] = 0
-                dev_pool['devices'] = []
+                # NOTE: the devices of a pool are indexed by their address,
+                # so that removing one of them does not scan the pool.
+                dev_pool['devices'] = collections.OrderedDict()
                 self.pools.append(dev_pool)
                 self.pools.sort(self.pool_cmp)
+                self._build_pool_index()
                 pool = dev_pool
             pool['count'] += 1
-            pool['devices'].append(dev)
+            pool.setdefault('devices', collections.OrderedDict())
+            pool['devices'][dev['address']] = dev
 
     @staticmethod
     def _decrease_pool_count(pool_list, pool, count=1):
@@ -127,25 +154,27 @@ class PciDeviceStats(object):
             if not pool:
                 raise exception.PciDevicePoolEmpty(
                     compute_node_id=dev.compute_node_id, address=dev.address)
-            pool['devices'].remove(dev)
-            self._decrease_pool_count(self.pools, pool)
+            del pool['devices'][dev['address']]
+            if pool['count'] <= 1:
+                self._decrease_pool_count(self.pools, pool)
+                self._build_pool_index()
+            else:
+                pool['count'] -= 1
 
     def get_free_devs(self):
         free_devs = []
         for pool in self.pools:
-            free_devs.extend(pool['devices'])
+            free_devs.extend(pool['devices'].values())
         return free_devs
 
     def consume_requests(self, pci_requests, numa_cells=None):
         alloc_devices = []
         for request in pci_requests:
             count = request.count
-            spec = request.spec
             # For now, keep the same algorithm as during scheduling:
             # a spec may be able to match multiple pools.
-            pools = self._filter_pools_for_spec(self.pools, spec)
-            if numa_cells:
-                pools = self._filter_pools_for_numa_cells(pools, numa_cells)
+            pools = [self._pool_index[key] for key in
+                     self._match_pools(request.spec, numa_cells)]
             # Failed to allocate the required number of devices
             # Return the devices already allocated back to their pools
             if sum([pool['count'] for pool in pools]) < count:
@@ -167,43 +196,67 @@ class PciDeviceStats(object):
                 count -= num_alloc
                 pool['count'] -= num_alloc
                 for d in range(num_alloc):
-                    pci_dev = pool['devices'].pop()
+                    pci_dev = pool['devices'].popitem()[1]
                     pci_dev.request_id = request.request_id
                     alloc_devices.append(pci_dev)
                 if count == 0:
                     break
         return alloc_devices
 
-    @staticmethod
-    def _filter_pools_for_spec(pools, request_specs):
-        return [pool for pool in pools
-                if utils.pci_device_prop_match(pool, request_specs)]
+    def _match_pools(self, request_specs, numa_cells=None):
+        """Return the identities of the pools matching any of the specs of a
+        request, in the order of self.pools.
 
-    @staticmethod
-    def _filter_pools_for_numa_cells(pools, numa_cells):
-        # Some systems don't report numa node info for pci devices, in
-        # that case None is reported in pci_device.numa_node, by adding None
-        # to numa_cells we allow assigning those devices to instances with
-        # numa topology
-        numa_cells = [None] + [cell.id for cell in numa_cells]
-        # filter out pools which numa_node is not included in numa_cells
-        return [pool for pool in pools if any(utils.pci_device_prop_match(
-                                pool, [{'numa_node': cell}])
-                                              for cell in numa_cells)]
-
-    def _apply_request(self, pools, request, numa_cells=None):
-        count = request.count
-        matching_pools = self._filter_pools_for_spec(pools, request.spec)
+        The pools having all the properties of a spec are found by
+        intersecting the sets of the property index rather than by
+        comparing the spec with every pool.
+        """
+        keys = set()
+        for spec in request_specs:
+            matching = None
+            unset = []
+            for prop in six.iteritems(spec):
+                # NOTE: a pool lacking a property matches a spec asking for
+                # it to be None, like pool.get(k) == v would.
+                if prop[1] is None:
+                    unset.append(prop[0])
+                    continue
+                found = self._prop_index.get(prop, set())
+                matching = found if matching is None else matching & found
+                if not matching:
+                    break
+            if matching is None:
+                matching = set(self._pool_index)
+            keys.update(key for key in matching
+                        if all(self._pool_index[key].get(k) is None
+                               for k in unset))
         if numa_cells:
-            matching_pools = self._filter_pools_for_numa_cells(matching_pools,
-                                                          numa_cells)
-        if sum([pool['count'] for pool in matching_pools]) < count:
+            # Some systems don't report numa node info for pci devices, in
+            # that case None is reported in pci_device.numa_node, by adding
+            # None to numa_cells we allow assigning those devices to
+            # instances with numa topology
+            numa_nodes = set([None] + [cell.id for cell in numa_cells])
+            keys = [key for key in keys
+                    if self._pool_index[key].get('numa_node') in numa_nodes]
+        return sorted(keys, key=self._pool_pos.get)
+
+    def _apply_request(self, counts, request, numa_cells=None):
+        """Take the devices of a request from the pools.
+
+        The counts of the pools are only updated in counts, a dict of the
+        counts by pool identity defaulting to those of the pools.
+        """
+        count = request.count
+        matching = [(key, counts.get(key, self._pool_index[key]['count']))
+                    for key in self._match_pools(request.spec, numa_cells)]
+        if sum(available for key, available in matching) < count:
             return False
-        else:
-            for pool in matching_pools:
-                count = self._decrease_pool_count(pools, pool, count)
-                if not count:
-                    break
+        for key, available in matching:
+            taken = min(available, count)
+            counts[key] = available - taken
+            count -= taken
+            if not count:
+                break
         return True
 
     def support_requests(self, requests, numa_cells=None):
@@ -217,8 +270,10 @@ class PciDeviceStats(object):
         """
         # note (yjiang5): this function has high possibility to fail,
         # so no exception should be triggered for performance reason.
-        pools = copy.deepcopy(self.pools)
-        return all([self._apply_request(pools, r, numa_cells)
+        # Only the counts of the pools matching the requests are tracked,
+        # the pools and their devices are not copied.
+        counts = {}
+        return all([self._apply_request(counts, r, numa_cells)
                         for r in requests])
 
     def apply_requests(self, requests, numa_cells=None):
@@ -229,8 +284,19 @@ class PciDeviceStats(object):
         If numa_cells is provided then only devices contained in
         those nodes are considered.
         """
-        if not all([self._apply_request(self.pools, r, numa_cells)
-                                            for r in requests]):
+        counts = {}
+        applied = all([self._apply_request(counts, r, numa_cells)
+                       for r in requests])
+        for key, count in six.iteritems(counts):
+            pool = self._pool_index[key]
+            if count:
+                pool['count'] = count
+            else:
+                self.pools.remove(pool)
+        if not all(counts.values()):
+            # Pools have been emptied and dropped from the list
+            self._build_pool_index()
+        if not applied:
             raise exception.PciDeviceRequestFailed(requests=requests)
 
     @staticmethod
@@ -248,6 +314,7 @@ class PciDeviceStats(object):
     def clear(self):
         """Clear all the stats maintained."""
         self.pools = []
+        self._build_pool_index()
 
     def __eq__(self, other):
         return cmp(self.pools, other.pools) == 0
@@ -15,17 +15,258 @@
 
 """Policy Engine For Nova."""
 
+import ast
+import itertools
 import logging
+import re
+import time
 
+from oslo_config import cfg
 from oslo_utils import excutils
 
 from nova import exception
 from nova.openstack.common import policy
 
 
+policy_opts = [
+    cfg.IntOpt('policy_reload_interval',
+               default=1,
+               help='Number of seconds between two checks of the policy '
+                    'files for changes. 0 checks them before every policy '
+                    'enforcement'),
+    ]
+
+CONF = cfg.CONF
+CONF.register_opts(policy_opts)
+
 LOG = logging.getLogger(__name__)
 _ENFORCER = None
 
+_TARGET_KEY_RE = re.compile(r'%\(([^)]*)\)')
+_MISSING = object()
+# Maximum number of policy results cached in a request context
+_MAX_CACHED_RESULTS = 256
+
+
+def _always(result):
+    def check(target, creds, enforcer):
+        return result
+    return check, (frozenset(), frozenset())
+
+
+def _merge_keys(compiled_checks):
+    """Merge the (creds keys, target keys) the compiled checks depend on."""
+    creds_keys = set()
+    target_keys = set()
+    for check, keys in compiled_checks:
+        if keys is None:
+            return None
+        creds_keys.update(keys[0])
+        target_keys.update(keys[1])
+    return frozenset(creds_keys), frozenset(target_keys)
+
+
+class Enforcer(policy.Enforcer):
+    """Policy enforcer evaluating compiled rules.
+
+    The check tree of every rule is compiled, the first time the rule is
+    enforced, into nested functions in which the references to other
+    rules are resolved, along with the credentials and target keys the
+    result of the rule depends on. This is what allows check() to cache
+    the result of a rule for a given set of credentials and target.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super(Enforcer, self).__init__(*args, **kwargs)
+        self._compiled = {}
+        self._generations = itertools.count()
+        self._generation = next(self._generations)
+        self._last_loaded = None
+
+    def set_rules(self, rules, overwrite=True, use_conf=False):
+        super(Enforcer, self).set_rules(rules, overwrite, use_conf)
+        self._compiled = {}
+        self._generation = next(self._generations)
+
+    def clear(self):
+        super(Enforcer, self).clear()
+        self._last_loaded = None
+
+    def load_rules(self, force_reload=False):
+        # NOTE: Looking for changes of the policy files means a stat() of
+        # every one of them, only do it every policy_reload_interval
+        # seconds rather than for every policy check.
+        now = time.time()
+        if (force_reload or self._last_loaded is None or
+                now - self._last_loaded >= CONF.policy_reload_interval):
+            super(Enforcer, self).load_rules(force_reload)
+            self._last_loaded = now
+
+    def _compile_rule(self, name):
+        compiled = self._compiled.get(name)
+        if compiled is None:
+            try:
+                check = self.rules[name]
+            except KeyError:
+                # NOTE: A missing rule fails closed
+                compiled = _always(False)
+            else:
+                # NOTE: Leave the rules referring to themselves to the
+                # check tree, which is what would have been used anyway.
+                self._compiled[name] = (check, None)
+                compiled = self._compile(check)
+            self._compiled[name] = compiled
+        return compiled
+
+    def _compile(self, check):
+        """Compile a check tree.
+
+        :returns: a (check function, keys) tuple. keys is the (credentials
+                  keys, target keys) tuple of the keys the result of the
+                  check depends on, or None if it may depend on something
+                  else.
+        """
+        check_type = type(check)
+        if check_type is policy.TrueCheck:
+            return _always(True)
+        elif check_type is policy.FalseCheck:
+            return _always(False)
+        elif check_type is policy.RuleCheck:
+            return self._compile_rule(check.match)
+        elif check_type is policy.NotCheck:
+            rule, keys = self._compile(check.rule)
+
+            def not_check(target, creds, enforcer):
+                return not rule(target, creds, enforcer)
+            return not_check, keys
+        elif check_type in (policy.AndCheck, policy.OrCheck):
+            compiled = [self._compile(rule) for rule in check.rules]
+            rules = tuple(rule for rule, keys in compiled)
+            if check_type is policy.AndCheck:
+                def and_check(target, creds, enforcer):
+                    for rule in rules:
+                        if not rule(target, creds, enforcer):
+                            return False
+                    return True
+                return and_check, _merge_keys(compiled)
+
+            def or_check(target, creds, enforcer):
+                for rule in rules:
+                    if rule(target, creds, enforcer):
+                        return True
+                return False
+            return or_check, _merge_keys(compiled)
+        elif check_type is policy.RoleCheck:
+            role = check.match.lower()
+
+            def role_check(target, creds, enforcer):
+                return role in [x.lower() for x in creds['roles']]
+            return role_check, (frozenset(['roles']), frozenset())
+        elif check_type is IsAdminCheck:
+            return check, (frozenset(['is_admin']), frozenset())
+        elif check_type is policy.GenericCheck:
+            target_keys = frozenset(_TARGET_KEY_RE.findall(check.match))
+            try:
+                ast.literal_eval(check.kind)
+            except ValueError:
+                creds_keys = frozenset([check.kind.split('.')[0]])
+            else:
+                creds_keys = frozenset()
+            return check, (creds_keys, target_keys)
+        # NOTE: We don't know what other checks (http: for example)
+        # depend on, so their results can't be cached.
+        return check, None
+
+    def check(self, rule, target, creds, results=None):
+        """Check a rule against the target and credentials.
+
+        :param rule: The name of the rule to evaluate.
+        :param target: As much information about the object being operated
+                       on as possible, as a dictionary.
+        :param creds: As much information about the user performing the
+                      action as possible, as a dictionary.
+        :param results: A dictionary in which to cache the result of the
+                        rule. It must be dropped along with the
+                        credentials, typically at the end of a request,
+                        and holds at most _MAX_CACHED_RESULTS results.
+        :returns: the result of the rule, False if it doesn't exist.
+        """
+        self.load_rules()
+        if not self.rules:
+            # No rules to reference means we're going to fail closed
+            return False
+        try:
+            check, keys = self._compile_rule(rule)
+            key = None
+            if results is not None and keys is not None:
+                key = self._get_results_key(rule, keys, target, creds)
+                if key is not None and key in results:
+                    return results[key]
+            result = check(target, creds, self)
+            if key is not None:
+                if len(results) >= _MAX_CACHED_RESULTS:
+                    # NOTE: A long lived context, such as the one of a
+                    # periodic task, may check ever new targets: start
+                    # over rather than let the cache grow without bound.
+                    results.clear()
+                results[key] = result
+            return result
+        except KeyError:
+            LOG.debug("Rule [%s] doesn't exist or is missing values", rule)
+            return False
+
+    def _get_results_key(self, rule, keys, target, creds):
+        try:
+            key = (self._generation, rule,
+                   tuple(_freeze(creds.get(k, _MISSING))
+                         for k in sorted(keys[0])),
+                   tuple(_freeze(_get_target_value(target, k))
+                         for k in sorted(keys[1])))
+            hash(key)
+        except Exception:
+            # NOTE: The target is not a dictionary, or one of the values
+            # is not hashable: don't cache the result.
+            return None
+        return key
+
+    def enforce(self, rule, target, creds, do_raise=False,
+                exc=None, *args, **kwargs):
+        if isinstance(rule, policy.BaseCheck):
+            return super(Enforcer, self).enforce(rule, target, creds,
+                                                 do_raise, exc, *args,
+                                                 **kwargs)
+        result = self.check(rule, target, creds)
+        if do_raise and not result:
+            if exc:
+                raise exc(*args, **kwargs)
+            raise policy.PolicyNotAuthorized(rule)
+        return result
+
+
+def _freeze(value):
+    if isinstance(value, list):
+        return tuple(value)
+    return value
+
+
+def _get_target_value(target, key):
+    try:
+        return target[key]
+    except KeyError:
+        return _MISSING
+
+
+def _get_results(context):
+    """Return the policy results cache of a request context."""
+    results = getattr(context, '_policy_results', None)
+    if results is None:
+        results = {}
+        try:
+            context._policy_results = results
+        except AttributeError:
+            return None
+    return results if isinstance(results, dict) else None
+
 
 def reset():
     global _ENFORCER
@@ -48,10 +289,10 @@ def init(policy_file=None, rules=None, default_rule=None, use_conf=True):
 
     global _ENFORCER
     if not _ENFORCER:
-        _ENFORCER = policy.Enforcer(policy_file=policy_file,
-                                    rules=rules,
-                                    default_rule=default_rule,
-                                    use_conf=use_conf)
+        _ENFORCER = Enforcer(policy_file=policy_file,
+                             rules=rules,
+                             default_rule=default_rule,
+                             use_conf=use_conf)
 
 
 def set_rules(rules, overwrite=True, use_conf=False):
@@ -94,8 +335,10 @@ def enforce(context, action, target, do_raise=True, exc=None):
     if not exc:
         exc = exception.PolicyNotAuthorized
     try:
-        result = _ENFORCER.enforce(action, target, credentials,
-                                   do_raise=do_raise, exc=exc, action=action)
+        result = _ENFORCER.check(action, target, credentials,
+                                 results=_get_results(context))
+        if do_raise and not result:
+            raise exc(action=action)
     except Exception:
         credentials.pop('auth_token', None)
         with excutils.save_and_reraise_exception():
@@ -28,6 +28,7 @@ from nova import db
 from nova import exception
 from nova.i18n import _LE
 from nova import objects
+from nova import utils
 
 LOG = logging.getLogger(__name__)
 
@@ -252,9 +253,8 @@ class DbQuotaDriver(object):
                 user_quotas[key] = value
         user_usages = None
         if usages:
-            user_usages = db.quota_usage_get_all_by_project_and_user(context,
-                                                         project_id,
-                                                         user_id)
+            user_usages = self._get_usages(context, resources, project_id,
+                                           user_id=user_id)
         return self._process_quotas(context, resources, project_id,
                                     user_quotas, quota_class,
                                     defaults=defaults, usages=user_usages)
@@ -288,13 +288,20 @@ class DbQuotaDriver(object):
         project_usages = None
         if usages:
             LOG.debug('Getting all quota usages for project: %s', project_id)
-            project_usages = db.quota_usage_get_all_by_project(context,
-                                                               project_id)
+            project_usages = self._get_usages(context, resources, project_id)
         return self._process_quotas(context, resources, project_id,
                                     project_quotas, quota_class,
                                     defaults=defaults, usages=project_usages,
                                     remains=remains)
 
+    def _get_usages(self, context, resources, project_id, user_id=None):
+        """Return the usages of a project, or of one of its users."""
+        if user_id:
+            return db.quota_usage_get_all_by_project_and_user(context,
+                                                              project_id,
+                                                              user_id)
+        return db.quota_usage_get_all_by_project(context, project_id)
+
     def _is_unlimited_value(self, v):
         """A helper method to check for unlimited value.
         """
@@ -577,6 +584,11 @@ class DbQuotaDriver(object):
         #            which means access to the session.  Since the
         #            session isn't available outside the DBAPI, we
         #            have to do the work there.
+        return self._quota_reserve(context, resources, quotas, user_quotas,
+                                   deltas, expire, project_id, user_id)
+
+    def _quota_reserve(self, context, resources, quotas, user_quotas, deltas,
+                       expire, project_id, user_id):
         return db.quota_reserve(context, resources, quotas, user_quotas,
                                 deltas, expire,
                                 CONF.until_refresh, CONF.max_age,
@@ -690,6 +702,78 @@ class DbQuotaDriver(object):
         db.reservation_expire(context)
 
 
+class OptimisticDbQuotaDriver(DbQuotaDriver):
+    """Database quota driver reserving resources with conditional updates.
+
+    Instead of locking all the quota usages of a project, reservations
+    add their deltas with a conditional UPDATE which only matches if the
+    usage is still within its limits, and are retried if it no longer
+    does. Creating or refreshing usages (see until_refresh and max_age)
+    still goes through the locking path of DbQuotaDriver.
+
+    Per-user limits are enforced atomically by the UPDATE. As project
+    limits depend on the usages of all the users of the project, a
+    reservation which checks them also swaps a generation of the project
+    with a conditional UPDATE, so that only one of the reservations which
+    read the same usages succeeds; the others are retried.
+    """
+
+    def _quota_reserve(self, context, resources, quotas, user_quotas, deltas,
+                       expire, project_id, user_id):
+        return db.quota_reserve_optimistic(context, resources, quotas,
+                                           user_quotas, deltas, expire,
+                                           CONF.until_refresh, CONF.max_age,
+                                           project_id=project_id,
+                                           user_id=user_id)
+
+
+class CountingQuotaDriver(DbQuotaDriver):
+    """Database quota driver counting usages instead of tracking them.
+
+    The usage of reservable resources is counted from their own records
+    when needed, instead of being tracked in the quota_usages table, so
+    the usages can't drift from the actual resources.
+
+    Reserving only checks the deltas against the counted usages, under a
+    per-project lock, and creates no reservations; committing and rolling
+    back are no-ops. Resources are only counted once they are created, so
+    requests of a project which are checked at the same time can together
+    go over its limits by the size of the other in-flight requests.
+
+    The quota usages tracked by DbQuotaDriver are not maintained by this
+    driver. The usages of the project are reset when it reserves, so that
+    DbQuotaDriver refreshes them if it is used again.
+    """
+
+    def _get_usages(self, context, resources, project_id, user_id=None):
+        resources = {k: v for k, v in resources.items()
+                     if hasattr(v, 'sync')}
+        project_counts, user_counts = db.quota_usage_count(
+            context, resources, project_id, user_id)
+        counts = user_counts if user_id else project_counts
+        return {name: dict(in_use=in_use, reserved=0)
+                for name, in_use in counts.items()}
+
+    def _quota_reserve(self, context, resources, quotas, user_quotas, deltas,
+                       expire, project_id, user_id):
+        @utils.synchronized('quota-%s' % project_id)
+        def _check_counted():
+            db.quota_check_counted(context, resources, quotas, user_quotas,
+                                   deltas, project_id=project_id,
+                                   user_id=user_id)
+
+        _check_counted()
+        return []
+
+    def commit(self, context, reservations, project_id=None, user_id=None):
+        """Commit reservations, which is a no-op for this driver."""
+        pass
+
+    def rollback(self, context, reservations, project_id=None, user_id=None):
+        """Roll back reservations, which is a no-op for this driver."""
+        pass
+
+
 class NoopQuotaDriver(object):
     """Driver that turns quotas calls into no-ops and pretends that quotas
     for all resources are unlimited.  This can be used if you do not
@@ -52,9 +52,10 @@ class Scheduler(object):
         """Return the list of hosts that have a running service for topic."""
 
         services = db.service_get_all_by_topic(context, topic)
+        alive = self.servicegroup_api.services_are_up(services)
         return [service['host']
-                for service in services
-                if self.servicegroup_api.service_is_up(service)]
+                for service, is_up in zip(services, alive)
+                if is_up]
 
     def select_destinations(self, context, request_spec, filter_properties):
         """Must override select_destinations method.
@@ -34,17 +34,40 @@ class ComputeFilter(filters.BaseHostFilter):
     # Host state does not change within a request
     run_filter_once_per_request = True
 
-    def host_passes(self, host_state, filter_properties):
-        """Returns True for only active compute nodes."""
+    def _is_enabled(self, host_state):
         service = host_state.service
         if service['disabled']:
             LOG.debug("%(host_state)s is disabled, reason: %(reason)s",
                       {'host_state': host_state,
                        'reason': service.get('disabled_reason')})
             return False
-        else:
-            if not self.servicegroup_api.service_is_up(service):
-                LOG.warning(_LW("%(host_state)s has not been heard from in a "
-                                "while"), {'host_state': host_state})
-                return False
         return True
+
+    def _warn_down(self, host_state):
+        LOG.warning(_LW("%(host_state)s has not been heard from in a "
+                        "while"), {'host_state': host_state})
+
+    def host_passes(self, host_state, filter_properties):
+        """Returns True for only active compute nodes."""
+        if not self._is_enabled(host_state):
+            return False
+        if not self.servicegroup_api.service_is_up(host_state.service):
+            self._warn_down(host_state)
+            return False
+        return True
+
+    def filter_all(self, filter_obj_list, filter_properties):
+        """Yield only the active compute nodes.
+
+        The liveness of the services of all the enabled hosts is checked
+        with a single call to the servicegroup API.
+        """
+        host_states = [host_state for host_state in filter_obj_list
+                       if self._is_enabled(host_state)]
+        alive = self.servicegroup_api.services_are_up(
+            [host_state.service for host_state in host_states])
+        for host_state, is_up in zip(host_states, alive):
+            if is_up:
+                yield host_state
+            else:
+                self._warn_down(host_state)
@@ -185,7 +185,8 @@ class Service(service.Service):
         ]
         endpoints.extend(self.manager.additional_endpoints)
 
-        serializer = objects_base.NovaObjectSerializer()
+        serializer = objects_base.NovaObjectSerializer(
+            lazy_hydration=self.manager.rpc_lazy_hydration)
 
         self.rpcserver = rpc.get_server(target, endpoints, serializer)
         self.rpcserver.start()
@@ -287,6 +288,8 @@ class Service(service.Service):
             LOG.exception(_LE('Service error occurred during cleanup_host'))
             pass
 
+        self.servicegroup_api.stop()
+
         super(Service, self).stop()
 
     def periodic_tasks(self, raise_on_error=False):
@@ -318,6 +321,9 @@ class WSGIService(object):
         """
         self.name = name
         self.manager = self._get_manager()
+        # NOTE: the API workers query the servicegroup drivers, which may
+        # keep watchers running in the worker process.
+        self.servicegroup_api = servicegroup.API()
         self.loader = loader or wsgi.Loader()
         self.app = self.loader.load_app(name)
         # inherit all compute_api worker counts from osapi_compute
@@ -401,6 +407,7 @@ class WSGIService(object):
 
         """
         self.server.stop()
+        self.servicegroup_api.stop()
 
     def wait(self):
         """Wait for the service to stop serving this API.
@@ -19,6 +19,7 @@
 from oslo_config import cfg
 from oslo_log import log as logging
 from oslo_utils import importutils
+from oslo_utils import timeutils
 
 from nova.i18n import _, _LW
 
@@ -27,17 +28,27 @@ LOG = logging.getLogger(__name__)
 _driver_name_class_mapping = {
     'db': 'nova.servicegroup.drivers.db.DbDriver',
     'zk': 'nova.servicegroup.drivers.zk.ZooKeeperDriver',
-    'mc': 'nova.servicegroup.drivers.mc.MemcachedDriver'
+    'mc': 'nova.servicegroup.drivers.mc.MemcachedDriver',
+    'file': 'nova.servicegroup.drivers.file.FileDriver'
 }
 _default_driver = 'db'
 servicegroup_driver_opt = cfg.StrOpt('servicegroup_driver',
                                      default=_default_driver,
                                      help='The driver for servicegroup '
                                           'service (valid options are: '
-                                          'db, zk, mc)')
+                                          'db, zk, mc, file)')
+
+servicegroup_cache_opt = cfg.IntOpt('servicegroup_cache_time',
+                                    default=0,
+                                    help='Number of seconds the liveness of '
+                                         'a service is cached in-process '
+                                         'once it has been checked with the '
+                                         'servicegroup driver. 0 disables '
+                                         'the cache.')
 
 CONF = cfg.CONF
 CONF.register_opt(servicegroup_driver_opt)
+CONF.register_opt(servicegroup_cache_opt)
 
 # NOTE(geekinutah): By default drivers wait 5 seconds before reporting
 INITIAL_REPORTING_DELAY = 5
@@ -74,6 +85,8 @@ class API(object):
                             % driver_name)
         self._driver = importutils.import_object(driver_class,
                                                  *args, **kwargs)
+        # (topic, host) -> (is_up, time it was checked)
+        self._liveness_cache = {}
 
     def join(self, member, group, service=None):
         """Add a new member to a service group.
@@ -84,14 +97,56 @@ class API(object):
         """
         return self._driver.join(member, group, service)
 
+    def _get_cached_liveness(self, member):
+        if not CONF.servicegroup_cache_time:
+            return None
+        cached = self._liveness_cache.get((member['topic'], member['host']))
+        if cached is None:
+            return None
+        is_up, checked_at = cached
+        if timeutils.is_older_than(checked_at,
+                                   CONF.servicegroup_cache_time):
+            return None
+        return is_up
+
+    def _cache_liveness(self, member, is_up):
+        if CONF.servicegroup_cache_time:
+            self._liveness_cache[(member['topic'], member['host'])] = (
+                is_up, timeutils.utcnow())
+
     def service_is_up(self, member):
         """Check if the given member is up."""
         # NOTE(johngarbutt) no logging in this method,
         # so this doesn't slow down the scheduler
-        return self._driver.is_up(member)
+        is_up = self._get_cached_liveness(member)
+        if is_up is None:
+            is_up = self._driver.is_up(member)
+            self._cache_liveness(member, is_up)
+        return is_up
+
+    def services_are_up(self, members):
+        """Check which ones of the given members are up.
+
+        The liveness of all the members not found in the cache is checked
+        with a single call to the driver.
+
+        :returns: a list of booleans, in the same order as members
+        """
+        results = [self._get_cached_liveness(member) for member in members]
+        unknown = [i for i, is_up in enumerate(results) if is_up is None]
+        if unknown:
+            checked = self._driver.are_up([members[i] for i in unknown])
+            for i, is_up in zip(unknown, checked):
+                results[i] = is_up
+                self._cache_liveness(members[i], is_up)
+        return results
 
     def get_all(self, group_id):
         """Returns ALL members of the given group."""
         LOG.debug('Returns ALL members of the [%s] '
                   'ServiceGroup', group_id)
         return self._driver.get_all(group_id)
+
+    def stop(self):
+        """Release the resources held by the servicegroup driver."""
+        self._driver.stop()
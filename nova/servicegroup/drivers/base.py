@@ -28,6 +28,19 @@ class Driver(object):
         """Check whether the given member is up."""
         raise NotImplementedError()
 
+    def are_up(self, members):
+        """Check whether each one of the given members is up.
+
+        Drivers able to check several members at once should override this.
+
+        :returns: a list of booleans, in the same order as members
+        """
+        return [self.is_up(member) for member in members]
+
     def get_all(self, group_id):
         """Returns ALL members of the given group."""
         raise NotImplementedError()
+
+    def stop(self):
+        """Release the resources held by the driver, if any."""
+        pass
@@ -0,0 +1,323 @@
+# Copyright 2015 OpenStack Foundation
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or
+# implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""File based ServiceGroup driver.
+
+Every member of a group owns a heartbeat file named after it under
+``<path>/<group>/``; the file modification time is the last heartbeat.
+Each process watches the groups it has been queried about and keeps an
+in-memory view of their membership, so that ``is_up`` and ``get_all``
+never hit the store.
+
+With ``use_inotify``, the groups are watched with inotify and only the
+member which changed is read again. Otherwise, or when pyinotify is not
+available, their directory is rescanned every ``watch_interval`` seconds.
+inotify is not enabled by default: the directory is shared between the
+hosts, typically over NFS, and inotify does not report the changes made
+by the other hosts there.
+"""
+
+import errno
+import functools
+import os
+
+import eventlet
+from eventlet import hubs
+from oslo_config import cfg
+from oslo_log import log as logging
+from oslo_utils import importutils
+from oslo_utils import timeutils
+
+from nova.i18n import _, _LE, _LW
+from nova.openstack.common import fileutils
+from nova.openstack.common import loopingcall
+from nova import paths
+from nova.servicegroup import api
+from nova.servicegroup.drivers import base
+
+pyinotify = importutils.try_import('pyinotify')
+
+file_driver_opts = [
+    cfg.StrOpt('path',
+               default=paths.state_path_def('servicegroups'),
+               help='Directory holding the service heartbeat files. It must '
+                    'be shared by all the hosts using the file servicegroup '
+                    'driver'),
+    cfg.IntOpt('watch_interval',
+               default=1,
+               help='Number of seconds between two rescans of the '
+                    'directory of a group which is not watched with '
+                    'inotify'),
+    cfg.BoolOpt('use_inotify',
+                default=False,
+                help='Watch the groups with inotify instead of rescanning '
+                     'their directory. Requires pyinotify. Only enable it '
+                     'if inotify reports the heartbeats written by all the '
+                     'hosts, which is not the case over NFS'),
+    ]
+
+CONF = cfg.CONF
+CONF.register_opts(file_driver_opts, group='file_servicegroup')
+CONF.import_opt('service_down_time', 'nova.service')
+
+LOG = logging.getLogger(__name__)
+
+
+def _group_path(group):
+    return os.path.join(CONF.file_servicegroup.path, group)
+
+
+def _scan(group):
+    """Read the last heartbeat of every member of a group."""
+    group_path = _group_path(group)
+    try:
+        members = os.listdir(group_path)
+    except OSError as e:
+        if e.errno != errno.ENOENT:
+            raise
+        return {}
+    view = {}
+    for member in members:
+        try:
+            view[member] = os.stat(os.path.join(group_path,
+                                                member)).st_mtime
+        except OSError as e:
+            # NOTE: the member may have been removed since listdir()
+            if e.errno != errno.ENOENT:
+                raise
+    return view
+
+
+class _GroupWatcher(object):
+    """Keeps the membership views of the groups watched by a process.
+
+    Nova creates a servicegroup API, hence a driver, in many places of a
+    process. They all share this watcher, so that each group is watched
+    once per process.
+    """
+
+    def __init__(self):
+        # NOTE: maps a group to a {member: last heartbeat} dict. Views are
+        # only updated by the watcher, and readers do not yield to another
+        # green thread while they read one, so they don't need any locking.
+        self.views = {}
+        # NOTE: the groups which are rescanned rather than watched with
+        # inotify.
+        self._polled = set()
+        self._timer = None
+        self._watch_manager = None
+        self._notifier = None
+        self._reader = None
+
+    def get_view(self, group):
+        """Return the membership view of a group, watching it if needed."""
+        if group not in self.views:
+            # NOTE: the first query of a group loads its view synchronously,
+            # later changes are picked up in the background by the watcher.
+            # The group is watched before its first scan, so that no change
+            # is missed in between, and a failed first scan does not watch
+            # it again on the next query.
+            self.views[group] = {}
+            self._watch(group)
+            self.refresh_view(group)
+        return self.views[group]
+
+    def _watch(self, group):
+        if CONF.file_servicegroup.use_inotify:
+            if pyinotify is None:
+                LOG.warning(_LW('pyinotify is not available, the %s group '
+                                'is watched by rescanning its directory'),
+                            group)
+            elif self._watch_with_inotify(group):
+                return
+        self._polled.add(group)
+        if self._timer is None:
+            self._timer = loopingcall.FixedIntervalLoopingCall(
+                self._refresh_polled_views)
+            interval = CONF.file_servicegroup.watch_interval
+            self._timer.start(interval, initial_delay=interval)
+
+    def _watch_with_inotify(self, group):
+        if self._notifier is None:
+            self._watch_manager = pyinotify.WatchManager()
+            # NOTE: the events which are not bound to a watched group, the
+            # queue overflows, go to the default processing function.
+            self._notifier = pyinotify.Notifier(
+                self._watch_manager,
+                default_proc_fun=self._process_overflow)
+            self._reader = eventlet.spawn(self._read_events)
+        try:
+            group_path = _group_path(group)
+            fileutils.ensure_tree(group_path)
+            self._watch_manager.add_watch(
+                group_path,
+                (pyinotify.IN_CREATE | pyinotify.IN_ATTRIB |
+                 pyinotify.IN_DELETE | pyinotify.IN_MOVED_FROM |
+                 pyinotify.IN_MOVED_TO),
+                proc_fun=functools.partial(self._process_event, group),
+                quiet=False)
+        except Exception:
+            LOG.exception(_LE('Failed to watch the %s group with inotify, '
+                              'rescanning its directory instead'), group)
+            return False
+        return True
+
+    def _read_events(self):
+        while True:
+            hubs.trampoline(self._watch_manager.get_fd(), read=True)
+            try:
+                self._notifier.read_events()
+                self._notifier.process_events()
+            except Exception:
+                LOG.exception(_LE('Failed to process the servicegroup '
+                                  'inotify events'))
+
+    def _process_event(self, group, event):
+        view = self.views.get(group)
+        if view is None or event.dir:
+            return
+        if event.mask & pyinotify.IN_IGNORED:
+            # NOTE: the group directory is gone, its watch with it.
+            self.views[group] = {}
+            self._watch(group)
+        elif event.mask & (pyinotify.IN_DELETE | pyinotify.IN_MOVED_FROM):
+            view.pop(event.name, None)
+        else:
+            try:
+                view[event.name] = os.stat(event.pathname).st_mtime
+            except OSError as e:
+                if e.errno != errno.ENOENT:
+                    LOG.exception(_LE('Failed to read the heartbeat of '
+                                      '%(member)s in the %(group)s group'),
+                                  {'member': event.name, 'group': group})
+                view.pop(event.name, None)
+
+    def _process_overflow(self, event):
+        # NOTE: some events have been lost, every watched group is read
+        # again.
+        for group in set(self.views) - self._polled:
+            self.refresh_view(group)
+
+    def _refresh_polled_views(self):
+        for group in list(self._polled):
+            self.refresh_view(group)
+
+    def refresh_view(self, group):
+        try:
+            view = _scan(group)
+        except OSError:
+            LOG.exception(_LE('Failed to refresh the members of the %s '
+                              'group'), group)
+            return
+        old_view = self.views.get(group, {})
+        joined = set(view) - set(old_view)
+        left = set(old_view) - set(view)
+        if joined or left:
+            LOG.debug('File_Driver: members of the %(group)s group changed, '
+                      'joined: %(joined)s, left: %(left)s',
+                      {'group': group, 'joined': sorted(joined),
+                       'left': sorted(left)})
+        self.views[group] = view
+
+    def stop(self):
+        """Stop watching the groups and drop their membership views."""
+        if self._timer is not None:
+            self._timer.stop()
+            self._timer = None
+        if self._notifier is not None:
+            self._reader.kill()
+            self._notifier.stop()
+            self._reader = None
+            self._notifier = None
+            self._watch_manager = None
+        self._polled = set()
+        self.views = {}
+
+
+_WATCHER = _GroupWatcher()
+
+
+class FileDriver(base.Driver):
+    """File based driver for the service group API."""
+
+    def __init__(self, *args, **kwargs):
+        self._watcher = _WATCHER
+
+    def _member_path(self, member, group):
+        return os.path.join(_group_path(group), member)
+
+    def join(self, member, group, service=None):
+        """Add a new member to a service group.
+
+        :param member: the joined member ID/name
+        :param group: the group ID/name, of the joined member
+        :param service: a `nova.service.Service` object
+        """
+        LOG.debug('File_Driver: join new ServiceGroup member %(member)s to '
+                  'the %(group)s group, service = %(service)s',
+                  {'member': member, 'group': group,
+                   'service': service})
+        if service is None:
+            raise RuntimeError(_('service is a mandatory argument for File '
+                                 'based ServiceGroup driver'))
+        report_interval = service.report_interval
+        if report_interval:
+            service.tg.add_timer(report_interval, self._report_state,
+                                 api.INITIAL_REPORTING_DELAY, service)
+
+    def stop(self):
+        """Stop watching the groups and drop their membership views."""
+        self._watcher.stop()
+
+    def _is_alive(self, last_heartbeat):
+        if last_heartbeat is None:
+            return False
+        elapsed = timeutils.utcnow_ts() - last_heartbeat
+        return abs(elapsed) <= CONF.service_down_time
+
+    def is_up(self, service_ref):
+        """Check whether a service is up based on last heartbeat."""
+        view = self._watcher.get_view(service_ref['topic'])
+        is_up = self._is_alive(view.get(service_ref['host']))
+        if not is_up:
+            LOG.debug('Seems service %(topic)s:%(host)s is down',
+                      {'topic': service_ref['topic'],
+                       'host': service_ref['host']})
+        return is_up
+
+    def get_all(self, group_id):
+        """Returns ALL members of the given group."""
+        LOG.debug('File_Driver: get_all members of the %s group', group_id)
+        view = self._watcher.get_view(group_id)
+        return [member for member, last_heartbeat in view.items()
+                if self._is_alive(last_heartbeat)]
+
+    def _report_state(self, service):
+        """Update the state of this service in the datastore."""
+        try:
+            member_path = self._member_path(service.host, service.topic)
+            fileutils.ensure_tree(os.path.dirname(member_path))
+            with open(member_path, 'a'):
+                now = timeutils.utcnow_ts()
+                os.utime(member_path, (now, now))
+
+            if getattr(service, 'model_disconnected', False):
+                service.model_disconnected = False
+                LOG.error(_LE('Recovered model server connection!'))
+
+        except Exception:
+            if not getattr(service, 'model_disconnected', False):
+                service.model_disconnected = True
+                LOG.exception(_LE('model server went away'))
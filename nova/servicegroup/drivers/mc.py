@@ -71,6 +71,17 @@ class MemcachedDriver(base.Driver):
 
         return is_up
 
+    def are_up(self, service_refs):
+        """Check the heartbeats of several services in one round trip."""
+        get_multi = getattr(self.mc, 'get_multi', None)
+        if get_multi is None:
+            # NOTE: The in-process fallback client has no get_multi()
+            return super(MemcachedDriver, self).are_up(service_refs)
+        keys = [str("%(topic)s:%(host)s" % service_ref)
+                for service_ref in service_refs]
+        heartbeats = get_multi(keys)
+        return [heartbeats.get(key) is not None for key in keys]
+
     def get_all(self, group_id):
         """Returns ALL members of the given group
         """
@@ -140,6 +140,17 @@ class ZooKeeperDriver(base.Driver):
         all_members = self.get_all(group_id)
         return member_id in all_members
 
+    def are_up(self, service_refs):
+        """Check several services, listing each group only once."""
+        members_by_group = {}
+        results = []
+        for service_ref in service_refs:
+            group_id = service_ref['topic']
+            if group_id not in members_by_group:
+                members_by_group[group_id] = set(self.get_all(group_id))
+            results.append(service_ref['host'] in members_by_group[group_id])
+        return results
+
     def get_all(self, group_id):
         """Return all members in a list, or a ServiceGroupUnavailable
         exception.
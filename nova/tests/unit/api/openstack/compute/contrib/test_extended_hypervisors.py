@@ -64,6 +64,8 @@ class ExtendedHypervisorsTestV21(test.NoDBTestCase):
         self.controller = hypervisors_v21.HypervisorsController()
         self.controller.servicegroup_api.service_is_up = mock.MagicMock(
             return_value=True)
+        self.controller.servicegroup_api.services_are_up = mock.MagicMock(
+            side_effect=lambda services: [True] * len(services))
 
     def _get_request(self):
         return fakes.HTTPRequest.blank('/v2/fake/os-hypervisors/detail',
@@ -79,6 +81,8 @@ class ExtendedHypervisorsTestV21(test.NoDBTestCase):
                        fake_compute_node_get)
         self.stubs.Set(objects.Service, 'get_by_compute_host',
                        fake_service_get_by_compute_host)
+        self.stubs.Set(self.controller.host_api, 'service_get_all',
+                       test_hypervisors.fake_service_get_all)
 
     def test_view_hypervisor_detail_noservers(self):
         result = self.controller._view_hypervisor(
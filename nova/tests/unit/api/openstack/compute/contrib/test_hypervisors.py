@@ -17,12 +17,14 @@ import contextlib
 import copy
 import mock
 import netaddr
+from oslo_serialization import jsonutils
 from webob import exc
 
 from nova.api.openstack.compute.contrib import hypervisors as hypervisors_v2
 from nova.api.openstack.compute.plugins.v3 import hypervisors \
     as hypervisors_v21
 from nova.api.openstack import extensions
+from nova.api.openstack import wsgi
 from nova.cells import utils as cells_utils
 from nova import context
 from nova import db
@@ -124,6 +126,10 @@ def fake_service_get_by_compute_host(context, host):
             return service
 
 
+def fake_service_get_all(context, filters=None, set_zones=False):
+    return TEST_SERVICES
+
+
 def fake_compute_node_statistics(context):
     result = dict(
         count=0,
@@ -191,6 +197,8 @@ class HypervisorsTestV21(test.NoDBTestCase):
         self.controller = hypervisors_v21.HypervisorsController()
         self.controller.servicegroup_api.service_is_up = mock.MagicMock(
             return_value=True)
+        self.controller.servicegroup_api.services_are_up = mock.MagicMock(
+            side_effect=lambda services: [True] * len(services))
 
     def setUp(self):
         super(HypervisorsTestV21, self).setUp()
@@ -200,6 +208,8 @@ class HypervisorsTestV21(test.NoDBTestCase):
                        fake_compute_node_get_all)
         self.stubs.Set(self.controller.host_api, 'service_get_by_compute_host',
                        fake_service_get_by_compute_host)
+        self.stubs.Set(self.controller.host_api, 'service_get_all',
+                       fake_service_get_all)
         self.stubs.Set(self.controller.host_api,
                        'compute_node_search_by_hypervisor',
                        fake_compute_node_search_by_hypervisor)
@@ -252,6 +262,50 @@ class HypervisorsTestV21(test.NoDBTestCase):
 
         self.assertEqual(result, dict(hypervisors=self.DETAIL_HYPERS_DICTS))
 
+    def test_detail_streamed(self):
+        self.flags(osapi_stream_list_responses=True)
+        req = self._get_request(True)
+        result = self.controller.detail(req)
+
+        self.assertIsInstance(result['hypervisors'], wsgi.StreamedList)
+        self.assertEqual(
+            jsonutils.loads(jsonutils.dumps(
+                dict(hypervisors=self.DETAIL_HYPERS_DICTS))),
+            jsonutils.loads(''.join(
+                wsgi.JSONDictSerializer().serialize(result))))
+
+    def test_detail_loads_services_together(self):
+        req = self._get_request(True)
+        with mock.patch.object(self.controller.host_api,
+                               'service_get_by_compute_host') as get_service:
+            result = self.controller.detail(req)
+        self.assertEqual(dict(hypervisors=self.DETAIL_HYPERS_DICTS), result)
+        self.assertFalse(get_service.called)
+
+    def test_index_checks_services_together(self):
+        req = self._get_request(True)
+        sg_api = self.controller.servicegroup_api
+        with contextlib.nested(
+            mock.patch.object(sg_api, 'service_is_up'),
+            mock.patch.object(sg_api, 'services_are_up',
+                              side_effect=lambda svcs: [True] * len(svcs))
+        ) as (service_is_up, services_are_up):
+            self.controller.index(req)
+        self.assertEqual(1, services_are_up.call_count)
+        self.assertFalse(service_is_up.called)
+
+    def test_detail_cached(self):
+        self.flags(hypervisor_cache_staleness=60)
+        req = self._get_request(True)
+        with mock.patch.object(self.controller.host_api,
+                               'compute_node_get_all',
+                               return_value=self.TEST_HYPERS_OBJ) as get_all:
+            self.controller.detail(req)
+            self.controller.index(req)
+            result = self.controller.detail(req)
+        self.assertEqual(dict(hypervisors=self.DETAIL_HYPERS_DICTS), result)
+        self.assertEqual(1, get_all.call_count)
+
     def test_detail_non_admin(self):
         req = self._get_request(False)
         self.assertRaises(exception.PolicyNotAuthorized,
@@ -464,6 +518,10 @@ class HypervisorsTestV2(HypervisorsTestV21):
         self.ext_mgr.extensions = {}
         self.controller = hypervisors_v2.HypervisorsController(self.ext_mgr)
 
+    def test_index_checks_services_together(self):
+        self.ext_mgr.extensions['os-hypervisor-status'] = True
+        super(HypervisorsTestV2, self).test_index_checks_services_together()
+
 
 class CellHypervisorsTestV21(HypervisorsTestV21):
     cell_path = 'cell1'
@@ -515,6 +573,10 @@ class CellHypervisorsTestV21(HypervisorsTestV21):
             if service.host == host:
                 return service
 
+    @classmethod
+    def fake_service_get_all(cls, context, filters=None, set_zones=False):
+        return cls.TEST_SERVICES
+
     @classmethod
     def fake_instance_get_all_by_host(cls, context, host):
         results = []
@@ -533,6 +595,8 @@ class CellHypervisorsTestV21(HypervisorsTestV21):
                        self.fake_compute_node_get_all)
         self.stubs.Set(self.controller.host_api, 'service_get_by_compute_host',
                        self.fake_service_get_by_compute_host)
+        self.stubs.Set(self.controller.host_api, 'service_get_all',
+                       self.fake_service_get_all)
         self.stubs.Set(self.controller.host_api,
                        'compute_node_search_by_hypervisor',
                        self.fake_compute_node_search_by_hypervisor)
@@ -543,6 +607,18 @@ class CellHypervisorsTestV21(HypervisorsTestV21):
         self.stubs.Set(self.controller.host_api, 'instance_get_all_by_host',
                        self.fake_instance_get_all_by_host)
 
+    def test_detail_cached(self):
+        # The compute nodes of the cells are not cached
+        self.flags(hypervisor_cache_staleness=60)
+        req = self._get_request(True)
+        with mock.patch.object(self.controller.host_api,
+                               'compute_node_get_all',
+                               return_value=self.TEST_HYPERS_OBJ) as get_all:
+            self.controller.detail(req)
+            result = self.controller.detail(req)
+        self.assertEqual(dict(hypervisors=self.DETAIL_HYPERS_DICTS), result)
+        self.assertEqual(2, get_all.call_count)
+
 
 class CellHypervisorsTestV2(HypervisorsTestV2, CellHypervisorsTestV21):
     cell_path = 'cell1'
@@ -122,6 +122,11 @@ class MultiCreateExtensionTestV21(test.TestCase):
         def project_get_networks(context, user_id):
             return dict(id='1', host='localhost')
 
+        def instance_create_multi(context, values_list,
+                                  block_device_mappings=None):
+            return [instance_create(context, values)
+                    for values in values_list]
+
         fakes.stub_out_rate_limiting(self.stubs)
         fakes.stub_out_key_pair_funcs(self.stubs)
         fake.stub_out_image_service(self.stubs)
@@ -132,6 +137,7 @@ class MultiCreateExtensionTestV21(test.TestCase):
         self.stubs.Set(db, 'project_get_networks',
                        project_get_networks)
         self.stubs.Set(db, 'instance_create', instance_create)
+        self.stubs.Set(db, 'instance_create_multi', instance_create_multi)
         self.stubs.Set(db, 'instance_system_metadata_update',
                        fake_method)
         self.stubs.Set(db, 'instance_get', instance_get)
@@ -575,11 +581,17 @@ class MultiCreateExtensionTestV2(MultiCreateExtensionTestV21):
             """
             return self.instance_cache_by_id[instance_id]
 
+        def instance_create_multi(context, values_list,
+                                  block_device_mappings=None):
+            return [instance_create(context, values)
+                    for values in values_list]
+
         fakes.stub_out_rate_limiting(self.stubs)
         fakes.stub_out_key_pair_funcs(self.stubs)
         fake.stub_out_image_service(self.stubs)
         self.stubs.Set(uuid, 'uuid4', fake_gen_uuid)
         self.stubs.Set(db, 'instance_create', instance_create)
+        self.stubs.Set(db, 'instance_create_multi', instance_create_multi)
         self.stubs.Set(db, 'instance_get', instance_get)
 
     def _check_multiple_create_extension_disabled(self, **kwargs):
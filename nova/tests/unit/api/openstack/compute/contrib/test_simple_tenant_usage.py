@@ -13,9 +13,11 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 
+import collections
 import datetime
 
 import mock
+from oslo_serialization import jsonutils
 from oslo_utils import timeutils
 import webob
 
@@ -23,7 +25,6 @@ from nova.api.openstack.compute.contrib import simple_tenant_usage as \
     simple_tenant_usage_v2
 from nova.api.openstack.compute.plugins.v3 import simple_tenant_usage as \
     simple_tenant_usage_v21
-from nova.compute import flavors
 from nova.compute import vm_states
 from nova import context
 from nova import db
@@ -33,7 +34,6 @@ from nova.openstack.common import policy as common_policy
 from nova import policy
 from nova import test
 from nova.tests.unit.api.openstack import fakes
-from nova import utils
 
 SERVERS = 5
 TENANTS = 2
@@ -66,44 +66,41 @@ FAKE_INST_TYPE = {'id': 1,
                   'extra_specs': {'foo': 'bar'}}
 
 
-def get_fake_db_instance(start, end, instance_id, tenant_id,
-                         vm_state=vm_states.ACTIVE):
-    sys_meta = utils.dict_to_metadata(
-        flavors.save_flavor_info({}, FAKE_INST_TYPE))
-    # NOTE(mriedem): We use fakes.stub_instance since it sets the fields
-    # needed on the db instance for converting it to an object, but we still
-    # need to override system_metadata to use our fake flavor.
-    inst = fakes.stub_instance(
-            id=instance_id,
-            uuid='00000000-0000-0000-0000-00000000000000%02d' % instance_id,
-            image_ref='1',
-            project_id=tenant_id,
-            user_id='fakeuser',
-            display_name='name',
-            flavor_id=FAKE_INST_TYPE['id'],
-            launched_at=start,
-            terminated_at=end,
-            vm_state=vm_state,
-            memory_mb=MEMORY_MB,
-            vcpus=VCPUS,
-            root_gb=ROOT_GB,
-            ephemeral_gb=EPHEMERAL_GB,)
-    inst['system_metadata'] = sys_meta
-    return inst
-
-
-def fake_instance_get_active_by_window_joined(context, begin, end,
-        project_id, host, columns_to_join):
-            return [get_fake_db_instance(START,
-                                         STOP,
-                                         x,
-                                         project_id if project_id else
-                                         "faketenant_%s" % (x / SERVERS))
-                                         for x in xrange(TENANTS * SERVERS)]
-
-
-@mock.patch.object(db, 'instance_get_active_by_window_joined',
-                   fake_instance_get_active_by_window_joined)
+UsageRow = collections.namedtuple('UsageRow', [
+    'uuid', 'display_name', 'project_id', 'vm_state', 'launched_at',
+    'terminated_at', 'memory_mb', 'vcpus', 'root_gb', 'ephemeral_gb',
+    'instance_type_id', 'deleted', 'flavor', 'flavor_name'])
+
+
+def get_fake_usage_row(start, end, instance_id, tenant_id,
+                       vm_state=vm_states.ACTIVE, deleted=0, flavor=None,
+                       flavor_name=FAKE_INST_TYPE['name']):
+    return UsageRow(
+        uuid='00000000-0000-0000-0000-00000000000000%02d' % instance_id,
+        display_name='name',
+        project_id=tenant_id,
+        vm_state=vm_state,
+        launched_at=start,
+        terminated_at=end,
+        memory_mb=MEMORY_MB,
+        vcpus=VCPUS,
+        root_gb=ROOT_GB,
+        ephemeral_gb=EPHEMERAL_GB,
+        instance_type_id=FAKE_INST_TYPE['id'],
+        deleted=deleted,
+        flavor=flavor,
+        flavor_name=flavor_name)
+
+
+def fake_instance_get_usages_by_window(context, begin, end, project_id):
+    for x in xrange(TENANTS * SERVERS):
+        yield get_fake_usage_row(START, STOP, x,
+                                 project_id if project_id else
+                                 "faketenant_%s" % (x / SERVERS))
+
+
+@mock.patch.object(db, 'instance_get_usages_by_window',
+                   fake_instance_get_usages_by_window)
 class SimpleTenantUsageTestV21(test.TestCase):
     policy_rule_prefix = "os_compute_api:os-simple-tenant-usage"
     controller = simple_tenant_usage_v21.SimpleTenantUsageController()
@@ -155,26 +152,8 @@ class SimpleTenantUsageTestV21(test.TestCase):
         req = fakes.HTTPRequest.blank('?detailed=%s&start=%s&end=%s' %
                     (detailed, START.isoformat(), STOP.isoformat()))
         req.environ['nova.context'] = self.admin_context
-
-        # Make sure that get_active_by_window_joined is only called with
-        # expected_attrs=['system_metadata'].
-        orig_get_active_by_window_joined = (
-            objects.InstanceList.get_active_by_window_joined)
-
-        def fake_get_active_by_window_joined(context, begin, end=None,
-                                    project_id=None, host=None,
-                                    expected_attrs=None,
-                                    use_slave=False):
-            self.assertEqual(['system_metadata'], expected_attrs)
-            return orig_get_active_by_window_joined(context, begin, end,
-                                                    project_id, host,
-                                                    expected_attrs, use_slave)
-
-        with mock.patch.object(objects.InstanceList,
-                               'get_active_by_window_joined',
-                               side_effect=fake_get_active_by_window_joined):
-            res_dict = self.controller.index(req)
-            return res_dict['tenant_usages']
+        res_dict = self.controller.index(req)
+        return res_dict['tenant_usages']
 
     def test_verify_detailed_index(self):
         usages = self._get_tenant_usages('1')
@@ -182,6 +161,13 @@ class SimpleTenantUsageTestV21(test.TestCase):
             servers = usages[i]['server_usages']
             for j in xrange(SERVERS):
                 self.assertEqual(int(servers[j]['hours']), HOURS)
+                self.assertEqual(FAKE_INST_TYPE['name'],
+                                 servers[j]['flavor'])
+                self.assertEqual(ROOT_GB + EPHEMERAL_GB,
+                                 servers[j]['local_gb'])
+                self.assertEqual(START, servers[j]['started_at'])
+                self.assertEqual(STOP, servers[j]['ended_at'])
+                self.assertEqual('terminated', servers[j]['state'])
 
     def test_verify_simple_index(self):
         usages = self._get_tenant_usages(detailed='0')
@@ -275,58 +261,55 @@ class SimpleTenantUsageControllerTestV21(test.TestCase):
         super(SimpleTenantUsageControllerTestV21, self).setUp()
 
         self.context = context.RequestContext('fakeuser', 'fake-project')
-
-        self.baseinst = get_fake_db_instance(START, STOP, instance_id=1,
-                                             tenant_id=self.context.project_id,
-                                             vm_state=vm_states.DELETED)
-        # convert the fake instance dict to an object
-        self.inst_obj = objects.Instance._from_db_object(
-            self.context, objects.Instance(), self.baseinst)
-
-    def test_get_flavor_from_sys_meta(self):
-        # Non-deleted instances get their type information from their
-        # system_metadata
-        with mock.patch.object(db, 'instance_get_by_uuid',
-                               return_value=self.baseinst):
-            flavor = self.controller._get_flavor(self.context,
-                                                 self.inst_obj, {})
-        self.assertEqual(objects.Flavor, type(flavor))
-        self.assertEqual(FAKE_INST_TYPE['id'], flavor.id)
-
-    def test_get_flavor_from_non_deleted_with_id_fails(self):
+        self.flavor = objects.Flavor.get_by_id(self.context,
+                                               FAKE_INST_TYPE['id'])
+
+    def _get_flavor_name(self, **kwargs):
+        row = get_fake_usage_row(START, STOP, 1, self.context.project_id,
+                                 **kwargs)
+        return self.controller._get_flavor_name(self.context, row, {})
+
+    def test_get_flavor_name_from_extra(self):
+        flavor = objects.Flavor(name='extraflavor')
+        db_flavor = jsonutils.dumps({'cur': flavor.obj_to_primitive(),
+                                     'old': None, 'new': None})
+        self.assertEqual('extraflavor',
+                         self._get_flavor_name(flavor=db_flavor))
+
+    def test_get_flavor_name_from_sys_meta(self):
+        # Non-deleted instances which flavor is not yet migrated to
+        # instance_extra get it from their system_metadata
+        self.assertEqual(FAKE_INST_TYPE['name'], self._get_flavor_name())
+
+    def test_get_flavor_name_from_non_deleted_with_id_fails(self):
         # If an instance is not deleted and missing type information from
         # system_metadata, then that's a bug
-        self.inst_obj.system_metadata = {}
         self.assertRaises(exception.NotFound,
-                          self.controller._get_flavor, self.context,
-                          self.inst_obj, {})
-
-    @mock.patch('nova.objects.Instance.get_flavor',
-                side_effect=exception.NotFound())
-    def test_get_flavor_from_deleted_with_notfound(self, fake_get_flavor):
-        self.inst_obj.deleted = 1
-        flavor = self.controller._get_flavor(self.context, self.inst_obj, {})
-        self.assertEqual(objects.Flavor, type(flavor))
-        self.assertEqual(FAKE_INST_TYPE['id'], flavor.id)
-
-    def test_get_flavor_from_deleted_with_id(self):
-        # Deleted instances may not have type info in system_metadata,
-        # so verify that they get their type from a lookup of their
+                          self._get_flavor_name, flavor_name=None)
+
+    def test_get_flavor_name_from_deleted_with_id(self):
+        # Deleted instances get their type from a lookup of their
         # instance_type_id
-        self.inst_obj.system_metadata = {}
-        self.inst_obj.deleted = 1
-        flavor = self.controller._get_flavor(self.context, self.inst_obj, {})
-        self.assertEqual(objects.Flavor, type(flavor))
-        self.assertEqual(FAKE_INST_TYPE['id'], flavor.id)
+        self.assertEqual(self.flavor.name, self._get_flavor_name(deleted=1))
 
-    def test_get_flavor_from_deleted_with_id_of_deleted(self):
+    def test_get_flavor_name_from_deleted_with_id_of_deleted(self):
         # Verify the legacy behavior of instance_type_id pointing to a
         # missing type being non-fatal
-        self.inst_obj.system_metadata = {}
-        self.inst_obj.deleted = 1
-        self.inst_obj.instance_type_id = 99
-        flavor = self.controller._get_flavor(self.context, self.inst_obj, {})
-        self.assertIsNone(flavor)
+        row = get_fake_usage_row(START, STOP, 1, self.context.project_id,
+                                 deleted=1)._replace(instance_type_id=99)
+        self.assertEqual('', self.controller._get_flavor_name(self.context,
+                                                              row, {}))
+
+    @mock.patch.object(objects.Flavor, 'get_by_id')
+    def test_get_flavor_name_cached(self, get_by_id):
+        flavors_cache = {}
+        for i in range(2):
+            row = get_fake_usage_row(START, STOP, i, self.context.project_id,
+                                     deleted=1)
+            self.assertEqual(get_by_id.return_value.name,
+                             self.controller._get_flavor_name(
+                                 self.context, row, flavors_cache))
+        get_by_id.assert_called_once_with(self.context, FAKE_INST_TYPE['id'])
 
 
 class SimpleTenantUsageControllerTestV2(SimpleTenantUsageControllerTestV21):
@@ -43,6 +43,7 @@ from nova.api.openstack.compute.schemas.v3 import disk_config as \
 from nova.api.openstack.compute.schemas.v3 import servers as servers_schema
 from nova.api.openstack.compute import views
 from nova.api.openstack import extensions
+from nova.api.openstack import wsgi
 from nova.compute import api as compute_api
 from nova.compute import flavors
 from nova.compute import task_states
@@ -623,6 +624,17 @@ class ServersControllerTest(ControllerTest):
         expected = {'limit': ['3'], 'marker': [fakes.get_fake_uuid(2)]}
         self.assertThat(params, matchers.DictMatches(expected))
 
+    def test_get_server_details_streamed(self):
+        self.flags(osapi_stream_list_responses=True)
+        req = fakes.HTTPRequestV3.blank('/servers/detail?limit=3')
+        res = self.controller.detail(req)
+
+        self.assertIsInstance(res['servers'], wsgi.StreamedList)
+        servers = jsonutils.loads(''.join(
+            wsgi.JSONDictSerializer().serialize(res)))['servers']
+        self.assertEqual([fakes.get_fake_uuid(i) for i in xrange(3)],
+                         [s['id'] for s in servers])
+
     def test_get_server_details_with_limit_bad_value(self):
         req = fakes.HTTPRequestV3.blank('/servers/detail?limit=aaa')
         self.assertRaises(webob.exc.HTTPBadRequest,
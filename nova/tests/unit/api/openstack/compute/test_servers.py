@@ -1916,6 +1916,11 @@ class ServersControllerCreateTest(test.TestCase):
         def project_get_networks(context, user_id):
             return dict(id='1', host='localhost')
 
+        def instance_create_multi(context, values_list,
+                                  block_device_mappings=None):
+            return [instance_create(context, values)
+                    for values in values_list]
+
         fakes.stub_out_rate_limiting(self.stubs)
         fakes.stub_out_key_pair_funcs(self.stubs)
         fake.stub_out_image_service(self.stubs)
@@ -1925,6 +1930,7 @@ class ServersControllerCreateTest(test.TestCase):
         self.stubs.Set(db, 'project_get_networks',
                        project_get_networks)
         self.stubs.Set(db, 'instance_create', instance_create)
+        self.stubs.Set(db, 'instance_create_multi', instance_create_multi)
         self.stubs.Set(db, 'instance_system_metadata_update',
                        fake_method)
         self.stubs.Set(db, 'instance_get', instance_get)
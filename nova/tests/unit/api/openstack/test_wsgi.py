@@ -219,6 +219,29 @@ class JSONDictSerializerTest(test.NoDBTestCase):
         result = result.replace('\n', '').replace(' ', '')
         self.assertEqual(result, expected_json)
 
+    def test_json_streamed_list(self):
+        views = [{'id': i, 'name': u'\u00e9%d' % i} for i in range(3)]
+        input_dict = dict(servers=wsgi.StreamedList(views),
+                          servers_links=[{'rel': 'next'}])
+        serializer = wsgi.JSONDictSerializer()
+        result = serializer.serialize(input_dict)
+        self.assertNotIsInstance(result, basestring)
+
+        self.assertEqual(jsonutils.dumps(dict(
+            servers=views, servers_links=[{'rel': 'next'}])),
+            ''.join(result))
+
+    def test_json_streamed_list_chunks(self):
+        self.stubs.Set(wsgi, 'STREAM_CHUNK_SIZE', 100)
+        input_dict = dict(servers=wsgi.StreamedList(
+            [{'id': 'x' * 40}] * 10))
+        serializer = wsgi.JSONDictSerializer()
+        chunks = list(serializer.serialize(input_dict))
+        self.assertTrue(len(chunks) > 1)
+        for chunk in chunks[:-1]:
+            self.assertTrue(100 <= len(chunk) < 160)
+        self.assertEqual(10, len(jsonutils.loads(''.join(chunks))['servers']))
+
 
 class TextDeserializerTest(test.NoDBTestCase):
     def test_dispatch_default(self):
@@ -1141,6 +1164,16 @@ class ResponseObjectTest(test.NoDBTestCase):
             self.assertEqual(response.status_int, 202)
             self.assertEqual(response.body, mtype)
 
+    def test_serialize_streamed(self):
+        robj = wsgi.ResponseObject(
+            {'servers': wsgi.StreamedList([{'id': 1}, {'id': 2}])})
+        request = wsgi.Request.blank('/tests/123')
+        response = robj.serialize(request, 'application/json',
+                                  {'json': wsgi.JSONDictSerializer})
+        self.assertIsNone(response.content_length)
+        self.assertEqual({'servers': [{'id': 1}, {'id': 2}]},
+                         jsonutils.loads(response.body))
+
 
 class ValidBodyTest(test.NoDBTestCase):
 
@@ -15,6 +15,7 @@
 """
 Tests For Cells Utility methods
 """
+import copy
 import inspect
 import mock
 import random
@@ -166,6 +167,16 @@ class CellsUtilsTestCase(test.NoDBTestCase):
         self.assertRaises(AttributeError,
                           getattr, proxy, 'compute_node')
 
+    def test_copy_proxy(self):
+        obj = objects.ComputeNode(id=1, host='fake')
+        obj_proxy = cells_utils.ComputeNodeProxy(obj, 'fake_path')
+
+        proxy = copy.copy(obj_proxy)
+        self.assertIsInstance(proxy, cells_utils.ComputeNodeProxy)
+        self.assertIs(obj, proxy._obj)
+        self.assertEqual(cells_utils.cell_with_item('fake_path', 'fake'),
+                         proxy.host)
+
     def test_proxy_object_serializer_to_primitive(self):
         obj = objects.ComputeNode(id=1, host='fake')
         obj_proxy = cells_utils.ComputeNodeProxy(obj, 'fake_path')
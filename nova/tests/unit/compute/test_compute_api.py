@@ -2579,6 +2579,50 @@ class _ComputeAPIUnitTestMixIn(object):
         self._test_create_db_entry_for_new_instance_with_cinder_error(
             expected_exception=exception.InvalidVolume)
 
+    @mock.patch.object(objects.InstanceList, 'create_multi')
+    @mock.patch.object(compute_api.SecurityGroupAPI, 'ensure_default')
+    @mock.patch.object(compute_api.API, '_validate_bdm')
+    def test_create_db_entries_for_new_instances(self, mock_validate,
+                                                 mock_ensure, mock_create):
+        self.flags(multi_instance_display_name_template='%(name)s-%(count)d')
+        instance_type = self._create_flavor()
+        fake_image = {'id': 'fake-image-id', 'properties': {}}
+        instances = []
+        for i in range(3):
+            instance = objects.Instance(context=self.context)
+            instance.update({'image_ref': 'fake-image-id',
+                             'display_name': 'foo'})
+            instances.append(instance)
+        bdms = [objects.BlockDeviceMapping(volume_id='1',
+                                           source_type='volume',
+                                           destination_type='volume',
+                                           device_name='vda',
+                                           boot_index=0,
+                                           volume_size=None)]
+
+        created = self.compute_api._create_db_entries_for_new_instances(
+            self.context, instance_type, fake_image, instances, None, bdms,
+            shutdown_terminate=True)
+
+        self.assertEqual(['foo-1', 'foo-2', 'foo-3'],
+                         [inst.display_name for inst in instances])
+        self.assertEqual(['foo-1', 'foo-2', 'foo-3'],
+                         [inst.hostname for inst in instances])
+        self.assertEqual([0, 1, 2], [inst.launch_index for inst in instances])
+        self.assertTrue(all(inst.shutdown_terminate for inst in instances))
+        self.assertEqual(3, mock_validate.call_count)
+        mock_ensure.assert_called_once_with(self.context)
+        if self.cell_type == 'api':
+            # The child cell creates the block device mappings
+            bdm_values = []
+        else:
+            bdm_values = [{'volume_id': '1', 'source_type': 'volume',
+                           'destination_type': 'volume', 'device_name': 'vda',
+                           'boot_index': 0, 'volume_size': None}]
+        mock_create.assert_called_once_with(
+            self.context, instances, block_device_mappings=bdm_values)
+        self.assertEqual(mock_create.return_value.objects, created)
+
     def _test_rescue(self, vm_state=vm_states.ACTIVE, rescue_password=None,
                      rescue_image=None, clean_shutdown=True):
         instance = self._create_instance_obj(params={'vm_state': vm_state})
@@ -18,6 +18,7 @@ import uuid
 
 from cinderclient import exceptions as cinder_exception
 from eventlet import event as eventlet_event
+from eventlet import greenthread
 import mock
 from mox3 import mox
 from oslo_config import cfg
@@ -29,6 +30,7 @@ from oslo_utils import uuidutils
 import nova
 from nova.compute import build_results
 from nova.compute import manager
+from nova.compute import metadata_cache
 from nova.compute import power_state
 from nova.compute import task_states
 from nova.compute import utils as compute_utils
@@ -186,6 +188,43 @@ class ComputeManagerUnitTestCase(test.NoDBTestCase):
             else:
                 self.assertFalse(db_node.destroy.called)
 
+    @mock.patch.object(manager.ComputeManager, '_get_resource_tracker')
+    @mock.patch.object(fake_driver.FakeDriver, 'get_available_nodes')
+    @mock.patch.object(manager.ComputeManager, '_get_compute_nodes_in_db')
+    def test_update_available_resource_concurrently(self, get_db_nodes,
+                                                    get_avail_nodes, get_rt):
+        self.flags(update_resources_concurrency=3)
+        info = {'in_flight': 0, 'max_in_flight': 0}
+
+        def _update_available_resource(ctxt):
+            info['in_flight'] += 1
+            info['max_in_flight'] = max(info['max_in_flight'],
+                                        info['in_flight'])
+            greenthread.sleep(0)
+            info['in_flight'] -= 1
+
+        def _make_rt(node):
+            rt = mock.Mock(spec_set=['update_available_resource',
+                                     'nodename'])
+            rt.nodename = node
+            rt.update_available_resource.side_effect = (
+                _update_available_resource)
+            return rt
+
+        nodenames = ['node%d' % i for i in range(10)]
+        get_db_nodes.return_value = []
+        get_avail_nodes.return_value = nodenames
+        get_rt.side_effect = _make_rt
+        self.compute.update_available_resource(mock.sentinel.ctxt)
+
+        self.assertEqual(3, info['max_in_flight'])
+        self.assertEqual(sorted(nodenames),
+                         sorted(self.compute._resource_tracker_dict))
+        for nodename, rt in self.compute._resource_tracker_dict.items():
+            self.assertEqual(nodename, rt.nodename)
+            rt.update_available_resource.assert_called_once_with(
+                mock.sentinel.ctxt)
+
     def test_allocate_network_succeeds_after_retries(self):
         self.flags(network_allocate_retries=8)
 
@@ -1237,6 +1276,39 @@ class ComputeManagerUnitTestCase(test.NoDBTestCase):
                                         use_slave=True)
             mock_spawn.assert_called_once_with(mock.ANY, instance)
 
+    @mock.patch.object(objects.InstanceList, 'get_by_host')
+    def test_sync_power_states_listed(self, mock_get):
+        instance = objects.Instance(uuid='fake-uuid')
+        mock_get.return_value = [instance]
+        states = {'fake-uuid': power_state.RUNNING}
+        with contextlib.nested(
+            mock.patch.object(self.compute.driver,
+                              'list_instance_power_states',
+                              return_value=states),
+            mock.patch.object(self.compute,
+                              '_query_driver_power_state_and_sync'),
+            mock.patch.object(self.compute._sync_power_pool, 'spawn_n',
+                              side_effect=lambda f, *args: f(*args))
+        ) as (mock_list, mock_query, mock_spawn):
+            self.compute._sync_power_states(self.context)
+        mock_query.assert_called_once_with(self.context, instance, states)
+
+    @mock.patch.object(objects.InstanceList, 'get_by_host')
+    def test_sync_power_states_list_failed(self, mock_get):
+        instance = objects.Instance(uuid='fake-uuid')
+        mock_get.return_value = [instance]
+        with contextlib.nested(
+            mock.patch.object(self.compute.driver,
+                              'list_instance_power_states',
+                              side_effect=test.TestingException),
+            mock.patch.object(self.compute,
+                              '_query_driver_power_state_and_sync'),
+            mock.patch.object(self.compute._sync_power_pool, 'spawn_n',
+                              side_effect=lambda f, *args: f(*args))
+        ) as (mock_list, mock_query, mock_spawn):
+            self.compute._sync_power_states(self.context)
+        mock_query.assert_called_once_with(self.context, instance, None)
+
     def _get_sync_instance(self, power_state, vm_state, task_state=None,
                            shutdown_terminate=False):
         instance = objects.Instance()
@@ -1345,6 +1417,48 @@ class ComputeManagerUnitTestCase(test.NoDBTestCase):
                                                           power_state.NOSTATE,
                                                           use_slave=True)
 
+    @mock.patch('nova.compute.manager.ComputeManager.'
+                '_sync_instance_power_state')
+    def test_query_driver_power_state_and_sync_listed(
+            self, mock_sync_power_state):
+        db_instance = objects.Instance(uuid='fake-uuid', task_state=None,
+                                       power_state=power_state.SHUTDOWN)
+        with contextlib.nested(
+            mock.patch.object(self.compute.driver, 'get_info'),
+            mock.patch.object(db_instance, 'refresh')
+        ) as (mock_get_info, mock_refresh):
+            self.compute._query_driver_power_state_and_sync(
+                self.context, db_instance,
+                {'fake-uuid': power_state.SHUTDOWN})
+        mock_refresh.assert_called_once_with(use_slave=True)
+        self.assertFalse(mock_get_info.called)
+        mock_sync_power_state.assert_called_once_with(self.context,
+                                                      db_instance,
+                                                      power_state.SHUTDOWN,
+                                                      use_slave=True)
+
+    @mock.patch('nova.compute.manager.ComputeManager.'
+                '_sync_instance_power_state')
+    def test_query_driver_power_state_and_sync_listed_mismatch(
+            self, mock_sync_power_state):
+        db_instance = objects.Instance(uuid='fake-uuid', task_state=None,
+                                       power_state=power_state.RUNNING)
+        info = hardware.InstanceInfo(state=power_state.RUNNING)
+        with contextlib.nested(
+            mock.patch.object(self.compute.driver, 'get_info',
+                              return_value=info),
+            mock.patch.object(db_instance, 'refresh')
+        ) as (mock_get_info, mock_refresh):
+            # A mismatch, or an instance missing from the listing, is
+            # confirmed with the driver
+            self.compute._query_driver_power_state_and_sync(
+                self.context, db_instance, {})
+        mock_get_info.assert_called_once_with(db_instance)
+        mock_sync_power_state.assert_called_once_with(self.context,
+                                                      db_instance,
+                                                      power_state.RUNNING,
+                                                      use_slave=True)
+
     def test_run_pending_deletes(self):
         self.flags(instance_delete_interval=10)
 
@@ -1732,13 +1846,17 @@ class ComputeManagerUnitTestCase(test.NoDBTestCase):
             objects.InstanceExternalEvent(name='foo', instance_uuid='uuid2',
                                           tag='tag2')]
 
+        @mock.patch.object(metadata_cache, 'update_instance_metadata')
         @mock.patch.object(self.compute.network_api, 'get_instance_nw_info')
         @mock.patch.object(self.compute, '_process_instance_event')
-        def do_test(_process_instance_event, get_instance_nw_info):
+        def do_test(_process_instance_event, get_instance_nw_info,
+                    update_instance_metadata):
             self.compute.external_instance_event(self.context,
                                                  instances, events)
             get_instance_nw_info.assert_called_once_with(self.context,
                                                          instances[0])
+            update_instance_metadata.assert_called_once_with(
+                instances[0], get_instance_nw_info.return_value)
             _process_instance_event.assert_called_once_with(instances[1],
                                                             events[1])
         do_test()
@@ -2641,6 +2759,60 @@ class ComputeManagerBuildInstanceTestCase(test.NoDBTestCase):
         self._assert_build_instance_hook_called(mock_hooks,
                                                 build_results.ACTIVE)
 
+    @mock.patch.object(manager.ComputeManager, 'build_and_run_instance')
+    def test_build_and_run_instances(self, mock_build):
+        instances = [self.instance, fake_instance.fake_instance_obj(
+            self.context)]
+        bdms = [objects.BlockDeviceMappingList(),
+                objects.BlockDeviceMappingList()]
+
+        self.compute.build_and_run_instances(self.context, instances,
+                self.image, request_spec={},
+                filter_properties=self.filter_properties,
+                injected_files=self.injected_files,
+                admin_password=self.admin_pass,
+                requested_networks=self.requested_networks,
+                security_groups=self.security_groups,
+                block_device_mappings=bdms, node=self.node,
+                limits=self.limits)
+
+        self.assertEqual(
+            [mock.call(self.context, instance, self.image, {},
+                       self.filter_properties,
+                       admin_password=self.admin_pass,
+                       injected_files=self.injected_files,
+                       requested_networks=self.requested_networks,
+                       security_groups=self.security_groups,
+                       block_device_mapping=instance_bdms, node=self.node,
+                       limits=self.limits)
+             for instance, instance_bdms in zip(instances, bdms)],
+            mock_build.call_args_list)
+        # Rescheduling updates the filter properties of an instance
+        filter_properties = [call[0][4] for call in mock_build.call_args_list]
+        self.assertIsNot(filter_properties[0], filter_properties[1])
+        self.assertIsNot(self.filter_properties, filter_properties[0])
+
+    @mock.patch.object(manager.ComputeManager,
+                       '_set_instance_obj_error_state')
+    @mock.patch.object(manager.ComputeManager, 'build_and_run_instance')
+    def test_build_and_run_instances_first_fails(self, mock_build,
+                                                 mock_set_error):
+        instances = [self.instance, fake_instance.fake_instance_obj(
+            self.context)]
+        bdms = [objects.BlockDeviceMappingList(),
+                objects.BlockDeviceMappingList()]
+        mock_build.side_effect = [test.TestingException(), None]
+
+        self.compute.build_and_run_instances(self.context, instances,
+                self.image, request_spec={},
+                filter_properties=self.filter_properties,
+                block_device_mappings=bdms, node=self.node,
+                limits=self.limits)
+
+        self.assertEqual(2, mock_build.call_count)
+        self.assertEqual(instances[1], mock_build.call_args[0][1])
+        mock_set_error.assert_called_once_with(self.context, instances[0])
+
     # This test when sending an icehouse compatible rpc call to juno compute
     # node, NetworkRequest object can load from three items tuple.
     @mock.patch('nova.objects.Instance.save')
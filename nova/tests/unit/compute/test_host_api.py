@@ -268,6 +268,94 @@ class ComputeHostAPITestCase(test.TestCase):
                                                            'fake-host')
         self.assertEqual(test_service.fake_service['id'], result.id)
 
+    def test_service_get_by_compute_hosts(self):
+        services = [objects.Service(id=1, host='host1'),
+                    objects.Service(id=2, host='host2')]
+        with contextlib.nested(
+            mock.patch.object(self.host_api, 'service_get_all',
+                              return_value=services),
+            mock.patch.object(self.host_api, 'service_get_by_compute_host',
+                              return_value='fake-service')
+        ) as (service_get_all, service_get_by_compute_host):
+            result = self.host_api.service_get_by_compute_hosts(
+                self.ctxt, ['host2', 'host3'])
+        self.assertEqual({'host2': services[1], 'host3': 'fake-service'},
+                         result)
+        service_get_all.assert_called_once_with(
+            self.ctxt, {'binary': 'nova-compute'})
+        # Only the host missing from the bulk lookup is looked up alone
+        service_get_by_compute_host.assert_called_once_with(self.ctxt,
+                                                            'host3')
+
+    def test_compute_node_get_all_with_services(self):
+        nodes = [objects.ComputeNode(id=1, host='host1')]
+        services = {'host1': objects.Service(id=1, host='host1')}
+        with contextlib.nested(
+            mock.patch.object(self.host_api, 'compute_node_get_all',
+                              return_value=nodes),
+            mock.patch.object(self.host_api, 'service_get_by_compute_hosts',
+                              return_value=services)
+        ) as (compute_node_get_all, service_get_by_compute_hosts):
+            for i in range(2):
+                result = self.host_api.compute_node_get_all_with_services(
+                    self.ctxt)
+                self.assertEqual((nodes, services), result)
+        self.assertEqual(2, compute_node_get_all.call_count)
+        service_get_by_compute_hosts.assert_called_with(self.ctxt, ['host1'])
+
+    @mock.patch('oslo_utils.timeutils.utcnow_ts')
+    def test_compute_node_get_all_with_services_cached(self, mock_now):
+        self.flags(hypervisor_cache_staleness=10)
+        mock_now.return_value = 100
+        nodes = [objects.ComputeNode(id=1, host='host1')]
+        services = {'host1': objects.Service(id=1, host='host1')}
+        other_ctxt = context.RequestContext('fake', 'other')
+        with contextlib.nested(
+            mock.patch.object(self.host_api, 'compute_node_get_all',
+                              return_value=nodes),
+            mock.patch.object(self.host_api, 'service_get_by_compute_hosts',
+                              return_value=services)
+        ) as (compute_node_get_all, service_get_by_compute_hosts):
+            self.host_api.compute_node_get_all_with_services(self.ctxt)
+            mock_now.return_value = 109
+            result_nodes, result_services = (
+                self.host_api.compute_node_get_all_with_services(other_ctxt))
+            self.assertEqual(1, compute_node_get_all.call_count)
+            mock_now.return_value = 110
+            self.host_api.compute_node_get_all_with_services(self.ctxt)
+            self.assertEqual(2, compute_node_get_all.call_count)
+
+        # Only primitives are cached, the objects of each request are bound
+        # to its own context
+        self.assertEqual(nodes[0].obj_to_primitive(),
+                         result_nodes[0].obj_to_primitive())
+        self.assertIs(other_ctxt, result_nodes[0]._context)
+        self.assertEqual(services['host1'].obj_to_primitive(),
+                         result_services['host1'].obj_to_primitive())
+        self.assertIs(other_ctxt, result_services['host1']._context)
+
+    def _stub_compute_node_statistics(self):
+        return mock.patch.object(self.host_api.db, 'compute_node_statistics',
+                                 return_value={'count': 1})
+
+    @mock.patch('oslo_utils.timeutils.utcnow_ts')
+    def test_compute_node_statistics_cached(self, mock_now):
+        self.flags(hypervisor_cache_staleness=10)
+        mock_now.return_value = 100
+        with self._stub_compute_node_statistics() as statistics:
+            for now in (100, 105, 110):
+                mock_now.return_value = now
+                self.assertEqual(
+                    {'count': 1},
+                    self.host_api.compute_node_statistics(self.ctxt))
+        self.assertEqual(2, statistics.call_count)
+
+    def test_compute_node_statistics_not_cached(self):
+        with self._stub_compute_node_statistics() as statistics:
+            self.host_api.compute_node_statistics(self.ctxt)
+            self.host_api.compute_node_statistics(self.ctxt)
+        self.assertEqual(2, statistics.call_count)
+
     def test_service_update(self):
         host_name = 'fake-host'
         binary = 'nova-compute'
@@ -419,6 +507,24 @@ class ComputeHostAPICellsTestCase(ComputeHostAPITestCase):
                                                            'fake-host')
         self.assertEqual(fake_service, result)
 
+    def _stub_compute_node_statistics(self):
+        return mock.patch.object(self.host_api.cells_rpcapi,
+                                 'compute_node_stats',
+                                 return_value={'count': 1})
+
+    def test_compute_node_get_all_with_services_cached(self):
+        # The proxies of the compute nodes of the cells are never cached
+        self.flags(hypervisor_cache_staleness=10)
+        with contextlib.nested(
+            mock.patch.object(self.host_api, 'compute_node_get_all',
+                              return_value=[]),
+            mock.patch.object(self.host_api, 'service_get_by_compute_hosts',
+                              return_value={})
+        ) as (compute_node_get_all, service_get_by_compute_hosts):
+            self.host_api.compute_node_get_all_with_services(self.ctxt)
+            self.host_api.compute_node_get_all_with_services(self.ctxt)
+        self.assertEqual(2, compute_node_get_all.call_count)
+
     def test_service_update(self):
         host_name = 'fake-host'
         binary = 'nova-compute'
@@ -15,6 +15,7 @@
 
 """Tests for compute resource tracking."""
 
+import contextlib
 import uuid
 
 import mock
@@ -1342,6 +1343,46 @@ class TrackerPeriodicTestCase(BaseTrackerTestCase):
         self.tracker.update_available_resource(self.context)
         self.assertEqual(2, self.update_call_count)
 
+    def test_periodic_skip_unchanged(self):
+        self.flags(skip_unchanged_resource_audit=True)
+        with contextlib.nested(
+            mock.patch.object(self.tracker, '_update_available_resource',
+                              wraps=self.tracker._update_available_resource),
+            mock.patch.object(self.tracker, '_verify_resources'),
+            mock.patch.object(objects.InstanceList, 'get_by_host_and_node',
+                              return_value=[])
+        ) as (mock_uar, mock_verify, mock_get_instances):
+            # the driver reports the resources audited at instantiation
+            self.tracker.update_available_resource(self.context)
+            self.assertFalse(mock_verify.called)
+            self.assertTrue(mock_uar.call_args[1]['hypervisor_unchanged'])
+            # the usage of the instances is still audited
+            self.assertEqual(1, mock_get_instances.call_count)
+
+            driver = self.tracker.driver
+            driver.memory_mb += 1
+            self.tracker.update_available_resource(self.context)
+            self.assertEqual(1, mock_verify.call_count)
+            self.assertFalse(mock_uar.call_args[1]['hypervisor_unchanged'])
+
+            self.tracker.update_available_resource(self.context)
+            self.assertEqual(1, mock_verify.call_count)
+            self.assertTrue(mock_uar.call_args[1]['hypervisor_unchanged'])
+            self.assertEqual(3, mock_get_instances.call_count)
+
+    def test_periodic_skip_unchanged_retries_failed_audit(self):
+        self.flags(skip_unchanged_resource_audit=True)
+        self.tracker.driver.memory_mb += 1
+        with mock.patch.object(self.tracker, '_update_available_resource',
+                               side_effect=test.TestingException):
+            self.assertRaises(test.TestingException,
+                              self.tracker.update_available_resource,
+                              self.context)
+        with mock.patch.object(self.tracker,
+                               '_update_available_resource') as mock_uar:
+            self.tracker.update_available_resource(self.context)
+            self.assertEqual(1, mock_uar.call_count)
+
     def test_update_available_resource_calls_locked_inner(self):
         @mock.patch.object(self.tracker, 'driver')
         @mock.patch.object(self.tracker,
@@ -1352,10 +1393,17 @@ class TrackerPeriodicTestCase(BaseTrackerTestCase):
             resources = {'there is someone in my head': 'but it\'s not me'}
             mock_driver.get_available_resource.return_value = resources
             self.tracker.update_available_resource(self.context)
-            mock_uar.assert_called_once_with(self.context, resources)
+            mock_uar.assert_called_once_with(self.context, resources,
+                                             hypervisor_unchanged=False)
 
         _test()
 
+    @mock.patch('oslo_concurrency.lockutils.lock')
+    def test_claims_lock_the_node_only(self, mock_lock):
+        self.tracker.update_usage(self.context, self._fake_instance())
+        mock_lock.assert_called_once_with(
+            'compute_resources-%s' % self.tracker.nodename, 'nova-')
+
 
 class StatsDictTestCase(BaseTrackerTestCase):
     """Test stats handling for a virt driver that provides
@@ -940,6 +940,42 @@ class ComputeRpcAPITestCase(test.NoDBTestCase):
                 block_device_mapping=None, node='node', limits=[],
                 version='3.40')
 
+    def test_build_and_run_instances(self):
+        self._test_compute_api('build_and_run_instances', 'cast',
+                instances=[self.fake_instance_obj], host='host',
+                image='image', request_spec={'request': 'spec'},
+                filter_properties=[], admin_password='passwd',
+                injected_files=None, requested_networks=['network1'],
+                security_groups=None, block_device_mappings=[None],
+                node='node', limits=[], version='4.1')
+
+    def test_build_and_run_instances_kilo_compat(self):
+        self.flags(compute='kilo', group='upgrade_levels')
+        ctxt = context.RequestContext('fake_user', 'fake_project')
+        rpcapi = compute_rpcapi.ComputeAPI()
+        instances = [self.fake_instance_obj, self.fake_instance_obj]
+        limits = {'memory_mb': 1024}
+
+        with mock.patch.object(rpcapi, 'build_and_run_instance') as build:
+            rpcapi.build_and_run_instances(ctxt, instances=instances,
+                    host='host', image='image',
+                    request_spec={'request': 'spec'}, filter_properties={},
+                    admin_password='passwd', injected_files=None,
+                    requested_networks=None, security_groups=None,
+                    block_device_mappings=['bdms1', 'bdms2'], node='node',
+                    limits=limits)
+
+        self.assertEqual(
+            [mock.call(ctxt, instance, 'host', 'image', {'request': 'spec'},
+                       {}, admin_password='passwd', injected_files=None,
+                       requested_networks=None, security_groups=None,
+                       block_device_mapping=bdms, node='node', limits=limits)
+             for instance, bdms in zip(instances, ['bdms1', 'bdms2'])],
+            build.call_args_list)
+        # Every cast gets its own copy of the limits
+        self.assertIsNot(build.call_args_list[0][1]['limits'],
+                         build.call_args_list[1][1]['limits'])
+
     @mock.patch('nova.utils.is_neutron', return_value=True)
     def test_build_and_run_instance_icehouse_compat(self, is_neutron):
         self.flags(compute='icehouse', group='upgrade_levels')
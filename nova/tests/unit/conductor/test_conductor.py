@@ -1021,9 +1021,9 @@ class _BaseTaskTestCase(object):
         self.mox.StubOutWithMock(self.conductor_manager.scheduler_client,
                                  'select_destinations')
         self.mox.StubOutWithMock(db,
-                                 'block_device_mapping_get_all_by_instance')
+                'block_device_mapping_get_all_by_instance_uuids')
         self.mox.StubOutWithMock(self.conductor_manager.compute_rpcapi,
-                                 'build_and_run_instance')
+                                 'build_and_run_instances')
 
         spec = {'image': {'fake_data': 'should_pass_silently'},
                 'instance_properties': instance_properties,
@@ -1035,11 +1035,12 @@ class _BaseTaskTestCase(object):
                 {'retry': {'num_attempts': 1, 'hosts': []}}).AndReturn(
                         [{'host': 'host1', 'nodename': 'node1', 'limits': []},
                          {'host': 'host2', 'nodename': 'node2', 'limits': []}])
-        db.block_device_mapping_get_all_by_instance(self.context,
-                instances[0].uuid, use_slave=False).AndReturn([])
-        self.conductor_manager.compute_rpcapi.build_and_run_instance(
+        db.block_device_mapping_get_all_by_instance_uuids(self.context,
+                [instances[0].uuid, instances[1].uuid],
+                use_slave=False).AndReturn([])
+        self.conductor_manager.compute_rpcapi.build_and_run_instances(
                 self.context,
-                instance=mox.IgnoreArg(),
+                instances=mox.IgnoreArg(),
                 host='host1',
                 image={'fake_data': 'should_pass_silently'},
                 request_spec={
@@ -1054,13 +1055,11 @@ class _BaseTaskTestCase(object):
                 injected_files='injected_files',
                 requested_networks=None,
                 security_groups='security_groups',
-                block_device_mapping=mox.IgnoreArg(),
+                block_device_mappings=mox.IgnoreArg(),
                 node='node1', limits=[])
-        db.block_device_mapping_get_all_by_instance(self.context,
-                instances[1].uuid, use_slave=False).AndReturn([])
-        self.conductor_manager.compute_rpcapi.build_and_run_instance(
+        self.conductor_manager.compute_rpcapi.build_and_run_instances(
                 self.context,
-                instance=mox.IgnoreArg(),
+                instances=mox.IgnoreArg(),
                 host='host2',
                 image={'fake_data': 'should_pass_silently'},
                 request_spec={
@@ -1075,7 +1074,7 @@ class _BaseTaskTestCase(object):
                 injected_files='injected_files',
                 requested_networks=None,
                 security_groups='security_groups',
-                block_device_mapping=mox.IgnoreArg(),
+                block_device_mappings=mox.IgnoreArg(),
                 node='node2', limits=[])
         self.mox.ReplayAll()
 
@@ -1942,7 +1941,7 @@ class ConductorTaskTestCase(_BaseTaskTestCase, test_compute.BaseTestCase):
         self.mox.StubOutWithMock(self.conductor_manager.scheduler_client,
                 'select_destinations')
         self.mox.StubOutWithMock(self.conductor_manager.compute_rpcapi,
-                'build_and_run_instance')
+                'build_and_run_instances')
 
         scheduler_utils.build_request_spec(self.context, image,
                 mox.IgnoreArg()).AndReturn(spec)
@@ -1955,8 +1954,8 @@ class ConductorTaskTestCase(_BaseTaskTestCase, test_compute.BaseTestCase):
         instances[0].refresh().AndRaise(
                 exc.InstanceNotFound(instance_id=instances[0].uuid))
         instances[1].refresh()
-        self.conductor_manager.compute_rpcapi.build_and_run_instance(
-                self.context, instance=instances[1], host='host2',
+        self.conductor_manager.compute_rpcapi.build_and_run_instances(
+                self.context, instances=[instances[1]], host='host2',
                 image={'fake-data': 'should_pass_silently'}, request_spec=spec,
                 filter_properties={'limits': [],
                                    'retry': {'num_attempts': 1,
@@ -1966,7 +1965,8 @@ class ConductorTaskTestCase(_BaseTaskTestCase, test_compute.BaseTestCase):
                 injected_files='injected_files',
                 requested_networks=None,
                 security_groups='security_groups',
-                block_device_mapping=mox.IsA(objects.BlockDeviceMappingList),
+                block_device_mappings=[
+                    mox.IsA(objects.BlockDeviceMappingList)],
                 node='node2', limits=[])
         self.mox.ReplayAll()
 
@@ -2004,9 +2004,9 @@ class ConductorTaskTestCase(_BaseTaskTestCase, test_compute.BaseTestCase):
                 mock.patch.object(self.conductor_manager.scheduler_client,
                     'select_destinations', return_value=destinations),
                 mock.patch.object(self.conductor_manager.compute_rpcapi,
-                    'build_and_run_instance')
+                    'build_and_run_instances')
                 ) as (inst1_refresh, inst2_refresh, select_destinations,
-                        build_and_run_instance):
+                        build_and_run_instances):
 
             # build_instances() is a cast, we need to wait for it to complete
             self.useFixture(cast_as_call.CastAsCall(self.stubs))
@@ -2027,8 +2027,8 @@ class ConductorTaskTestCase(_BaseTaskTestCase, test_compute.BaseTestCase):
             setup_instance_group.assert_called_once_with(
                 self.context, spec, {'retry': {'num_attempts': 1,
                                                'hosts': []}})
-            build_and_run_instance.assert_called_once_with(self.context,
-                    instance=instances[1], host='host2', image={'fake-data':
+            build_and_run_instances.assert_called_once_with(self.context,
+                    instances=[instances[1]], host='host2', image={'fake-data':
                         'should_pass_silently'}, request_spec=spec,
                     filter_properties={'limits': [],
                                        'retry': {'num_attempts': 1,
@@ -2038,9 +2038,61 @@ class ConductorTaskTestCase(_BaseTaskTestCase, test_compute.BaseTestCase):
                     injected_files='injected_files',
                     requested_networks=None,
                     security_groups='security_groups',
-                    block_device_mapping=mock.ANY,
+                    block_device_mappings=mock.ANY,
                     node='node2', limits=[])
 
+    @mock.patch.object(objects.BlockDeviceMappingList,
+                       'get_by_instance_uuids')
+    @mock.patch.object(scheduler_utils, 'setup_instance_group')
+    @mock.patch.object(scheduler_utils, 'build_request_spec')
+    def test_build_instances_groups_by_node(self, build_request_spec,
+                                            setup_instance_group,
+                                            get_bdms):
+        instances = [fake_instance.fake_instance_obj(self.context)
+                for i in xrange(3)]
+        bdms = [objects.BlockDeviceMapping(instance_uuid=instance.uuid)
+                for instance in instances]
+        get_bdms.return_value = objects.BlockDeviceMappingList(objects=bdms)
+        destinations = [{'host': 'host1', 'nodename': 'node1', 'limits': []},
+                {'host': 'host2', 'nodename': 'node2', 'limits': []},
+                {'host': 'host1', 'nodename': 'node1', 'limits': []}]
+        spec = {'fake': 'specs',
+                'instance_properties': instances[0]}
+        build_request_spec.return_value = spec
+        with contextlib.nested(
+                mock.patch.object(objects.Instance, 'refresh'),
+                mock.patch.object(self.conductor_manager.scheduler_client,
+                    'select_destinations', return_value=destinations),
+                mock.patch.object(self.conductor_manager.compute_rpcapi,
+                    'build_and_run_instances')
+                ) as (refresh, select_destinations, build_and_run_instances):
+
+            self.conductor_manager.build_instances(self.context,
+                    instances=instances,
+                    image='image',
+                    filter_properties={},
+                    admin_password='admin_password',
+                    injected_files='injected_files',
+                    requested_networks=None,
+                    security_groups='security_groups')
+
+        get_bdms.assert_called_once_with(
+            self.context, [inst.uuid for inst in instances])
+        self.assertEqual(2, build_and_run_instances.call_count)
+        calls = build_and_run_instances.call_args_list
+        self.assertEqual('host1', calls[0][1]['host'])
+        self.assertEqual([instances[0], instances[2]],
+                         calls[0][1]['instances'])
+        self.assertEqual([[bdms[0]], [bdms[2]]],
+                         [bdm_list.objects for bdm_list
+                          in calls[0][1]['block_device_mappings']])
+        self.assertEqual({'limits': [],
+                          'retry': {'num_attempts': 1,
+                                    'hosts': [['host1', 'node1']]}},
+                         calls[0][1]['filter_properties'])
+        self.assertEqual('host2', calls[1][1]['host'])
+        self.assertEqual([instances[1]], calls[1][1]['instances'])
+
 
 class ConductorTaskRPCAPITestCase(_BaseTaskTestCase,
         test_compute.BaseTestCase):
@@ -1076,6 +1076,48 @@ class SqlAlchemyDbApiTestCase(DbTestCase):
         self.assertIn('info_cache', result[0])
         self.assertEqual(network_info, result[0]['info_cache']['network_info'])
 
+    def test_instance_get_usages_by_window(self):
+        now = datetime.datetime(2013, 10, 10, 17, 16, 37, 156701)
+        now1 = now + datetime.timedelta(minutes=1)
+        now2 = now + datetime.timedelta(minutes=2)
+        ctxt = context.get_admin_context()
+        inst1 = self.create_instance_with_args(
+            launched_at=now, memory_mb=512, vcpus=2, root_gb=1,
+            ephemeral_gb=2, instance_type_id=3,
+            system_metadata={'instance_type_name': 'sysmeta-flavor',
+                             'other': 'value'})
+        db.instance_extra_update_by_uuid(ctxt, inst1['uuid'],
+                                         {'flavor': 'extra-flavor'})
+        inst2 = self.create_instance_with_args(launched_at=now1,
+                                               terminated_at=now2,
+                                               project_id='other')
+        self.create_instance_with_args(launched_at=now2)
+
+        rows = list(sqlalchemy_api.instance_get_usages_by_window(
+            ctxt, begin=now, end=now2))
+        self.assertEqual(2, len(rows))
+        rows = {row.uuid: row for row in rows}
+        row1 = rows[inst1['uuid']]
+        self.assertEqual((self.project_id, now, None, 512, 2, 1, 2, 3, 0),
+                         (row1.project_id, row1.launched_at,
+                          row1.terminated_at, row1.memory_mb, row1.vcpus,
+                          row1.root_gb, row1.ephemeral_gb,
+                          row1.instance_type_id, row1.deleted))
+        self.assertEqual('extra-flavor', row1.flavor)
+        self.assertEqual('sysmeta-flavor', row1.flavor_name)
+        row2 = rows[inst2['uuid']]
+        self.assertEqual(now2, row2.terminated_at)
+        self.assertIsNone(row2.flavor)
+        self.assertIsNone(row2.flavor_name)
+
+        rows = list(sqlalchemy_api.instance_get_usages_by_window(
+            ctxt, begin=now, end=now2, project_id='other'))
+        self.assertEqual([inst2['uuid']], [row.uuid for row in rows])
+
+        rows = list(sqlalchemy_api.instance_get_usages_by_window(
+            ctxt, begin=now2))
+        self.assertEqual(2, len(rows))
+
     @mock.patch('nova.db.sqlalchemy.api.instance_get_all_by_filters_sort')
     def test_instance_get_all_by_filters_calls_sort(self,
                                                     mock_get_all_filters_sort):
@@ -1999,6 +2041,71 @@ class InstanceTestCase(test.TestCase, ModelsObjectComparatorMixin):
         self.create_instance_with_args(context=context2, hostname='h2')
         self.flags(osapi_compute_unique_server_name_scope=None)
 
+    def test_instance_create_multi(self):
+        values_list = []
+        for i in range(3):
+            values = self.sample_data.copy()
+            values.update(hostname='h%d' % i,
+                          security_groups=['default'],
+                          info_cache={'network_info': '[]'},
+                          access_ip_v4=netaddr.IPAddress('1.2.3.%d' % i))
+            values_list.append(values)
+        values_list[1]['extra'] = {'numa_topology': 'fake-numa'}
+
+        instances = db.instance_create_multi(self.ctxt, values_list)
+
+        self.assertEqual(['h0', 'h1', 'h2'],
+                         [inst['hostname'] for inst in instances])
+        for i, inst in enumerate(instances):
+            self.assertTrue(uuidutils.is_uuid_like(inst['uuid']))
+            self.assertEqual('1.2.3.%d' % i, inst['access_ip_v4'])
+            self.assertEqual(self.sample_data['metadata'],
+                             utils.metadata_to_dict(inst['metadata']))
+            self.assertEqual(self.sample_data['system_metadata'],
+                             utils.metadata_to_dict(inst['system_metadata']))
+            self.assertEqual(['default'],
+                             [group['name'] for group in
+                              inst['security_groups']])
+            self._assertEqualObjects(
+                inst, db.instance_get_by_uuid(self.ctxt, inst['uuid']),
+                ignored_keys=['metadata', 'system_metadata', 'info_cache',
+                              'extra', 'security_groups'])
+            self.assertIsNotNone(
+                db.ec2_instance_get_by_uuid(self.ctxt, inst['uuid']))
+            info_cache = db.instance_info_cache_get(self.ctxt, inst['uuid'])
+            self.assertEqual('[]', info_cache['network_info'])
+        self.assertIsNone(instances[0]['extra']['numa_topology'])
+        self.assertEqual('fake-numa', instances[1]['extra']['numa_topology'])
+
+    def test_instance_create_multi_block_device_mappings(self):
+        bdms = [{'device_name': '/dev/vda', 'source_type': 'image',
+                 'destination_type': 'local', 'boot_index': 0,
+                 'volume_size': ''}]
+
+        instances = db.instance_create_multi(self.ctxt, [{}, {}],
+                                             block_device_mappings=bdms)
+
+        for inst in instances:
+            inst_bdms = db.block_device_mapping_get_all_by_instance(
+                self.ctxt, inst['uuid'])
+            self.assertEqual(['/dev/vda'],
+                             [bdm['device_name'] for bdm in inst_bdms])
+            self.assertIsNone(inst_bdms[0]['volume_size'])
+
+    def test_instance_create_multi_unique_hostname(self):
+        self.flags(osapi_compute_unique_server_name_scope='global')
+        self.create_instance_with_args(hostname='h1')
+
+        self.assertRaises(exception.InstanceExists,
+                          db.instance_create_multi, self.ctxt,
+                          [{'hostname': 'h0'}, {'hostname': 'h1'}])
+        # The instances of the batch must not share a name either
+        self.assertRaises(exception.InstanceExists,
+                          db.instance_create_multi, self.ctxt,
+                          [{'hostname': 'h2'}, {'hostname': 'H2'}])
+        self.assertEqual(['h1'], [inst['hostname'] for inst in
+                                  db.instance_get_all(self.ctxt)])
+
     @mock.patch('nova.db.sqlalchemy.api.undefer')
     @mock.patch('nova.db.sqlalchemy.api.joinedload')
     def test_instance_get_all_by_filters_extra_columns(self,
@@ -2369,6 +2476,28 @@ class InstanceTestCase(test.TestCase, ModelsObjectComparatorMixin):
         self.assertEqual(result[0]['uuid'], instance['uuid'])
         self.assertEqual(result[0]['system_metadata'], [])
 
+    def test_instance_get_all_brief_by_uuids(self):
+        instance1 = self.create_instance_with_args(hostname='h1',
+                                                   display_name='i1')
+        instance2 = self.create_instance_with_args()
+        deleted = self.create_instance_with_args()
+        db.instance_destroy(self.ctxt, deleted['uuid'])
+        self.create_instance_with_args()
+
+        result = db.instance_get_all_brief_by_uuids(
+            self.ctxt, [instance1['uuid'], instance2['uuid'],
+                        deleted['uuid']])
+        self.assertEqual(sorted([instance1['uuid'], instance2['uuid']]),
+                         sorted(row['uuid'] for row in result))
+        row = [r for r in result if r['uuid'] == instance1['uuid']][0]
+        self.assertEqual({'id': instance1['id'], 'uuid': instance1['uuid'],
+                          'hostname': 'h1', 'display_name': 'i1'}, row)
+
+    def test_instance_get_all_brief_by_uuids_empty(self):
+        self.create_instance_with_args()
+        self.assertEqual([], db.instance_get_all_brief_by_uuids(self.ctxt,
+                                                                []))
+
     def test_instance_get_all_by_host_and_node(self):
         instance = self.create_instance_with_args(
             system_metadata={'foo': 'bar'})
@@ -5446,6 +5575,29 @@ class BlockDeviceMappingTestCase(test.TestCase):
         bmd = db.block_device_mapping_get_all_by_instance(self.ctxt, uuid2)
         self.assertEqual(len(bmd), 2)
 
+    def test_block_device_mapping_get_all_by_instance_uuids(self):
+        uuid1 = self.instance['uuid']
+        uuid2 = db.instance_create(self.ctxt, {})['uuid']
+        uuid3 = db.instance_create(self.ctxt, {})['uuid']
+
+        bmds_values = [{'instance_uuid': uuid1,
+                        'device_name': '/dev/vda'},
+                       {'instance_uuid': uuid2,
+                        'device_name': '/dev/vdb'},
+                       {'instance_uuid': uuid3,
+                        'device_name': '/dev/vdc'}]
+
+        for bdm in bmds_values:
+            self._create_bdm(bdm)
+
+        bmd = db.block_device_mapping_get_all_by_instance_uuids(
+            self.ctxt, [uuid1, uuid2])
+        self.assertEqual(['/dev/vda', '/dev/vdb'],
+                         sorted(bdm['device_name'] for bdm in bmd))
+        self.assertEqual(
+            [], db.block_device_mapping_get_all_by_instance_uuids(self.ctxt,
+                                                                  []))
+
     def test_block_device_mapping_destroy(self):
         bdm = self._create_bdm({})
         db.block_device_mapping_destroy(self.ctxt, bdm['id'])
@@ -6217,6 +6369,289 @@ class QuotaTestCase(test.TestCase, ModelsObjectComparatorMixin):
             resources_names.remove(reservation.resource)
         self.assertEqual(len(resources_names), 0)
 
+    def _create_quota_usages(self, usages, project_id='project1',
+                             user_id='user1', until_refresh=None):
+        for resource, in_use in usages.items():
+            sqlalchemy_api._quota_usage_create(project_id, user_id, resource,
+                                               in_use, 0, until_refresh)
+
+    def _quota_reserve_optimistic(self, quotas, deltas,
+                                  project_quotas=None, user_id='user1'):
+        return db.quota_reserve_optimistic(
+            self.ctxt, {}, project_quotas or quotas, quotas, deltas,
+            timeutils.utcnow() + datetime.timedelta(hours=1), 0, 0,
+            'project1', user_id)
+
+    @mock.patch.object(sqlalchemy_api, '_quota_reserve')
+    def test_quota_reserve_optimistic(self, mock_reserve):
+        self._create_quota_usages({'instances': 3, 'cores': 6})
+
+        reservations = self._quota_reserve_optimistic(
+            {'instances': 10, 'cores': 20}, {'instances': 2, 'cores': -4})
+
+        self.assertFalse(mock_reserve.called)
+        self.assertEqual(2, len(reservations))
+        deltas = {}
+        for reservation_uuid in reservations:
+            reservation = _reservation_get(self.ctxt, reservation_uuid)
+            self.assertEqual('project1', reservation.project_id)
+            self.assertEqual('user1', reservation.user_id)
+            deltas[reservation.resource] = reservation.delta
+        self.assertEqual({'instances': 2, 'cores': -4}, deltas)
+        self.assertEqual(
+            {'project_id': 'project1', 'user_id': 'user1',
+             'instances': {'in_use': 3, 'reserved': 2},
+             'cores': {'in_use': 6, 'reserved': 0}},
+            db.quota_usage_get_all_by_project_and_user(self.ctxt,
+                                                       'project1', 'user1'))
+
+        db.reservation_commit(self.ctxt, reservations, 'project1', 'user1')
+        self.assertEqual(
+            {'project_id': 'project1', 'user_id': 'user1',
+             'instances': {'in_use': 5, 'reserved': 0},
+             'cores': {'in_use': 2, 'reserved': 0}},
+            db.quota_usage_get_all_by_project_and_user(self.ctxt,
+                                                       'project1', 'user1'))
+
+    def test_quota_reserve_optimistic_over_user_quota(self):
+        self._create_quota_usages({'instances': 9})
+
+        self.assertRaises(exception.OverQuota,
+                          self._quota_reserve_optimistic,
+                          {'instances': 10}, {'instances': 2})
+        self.assertEqual(
+            {'project_id': 'project1', 'user_id': 'user1',
+             'instances': {'in_use': 9, 'reserved': 0}},
+            db.quota_usage_get_all_by_project_and_user(self.ctxt,
+                                                       'project1', 'user1'))
+
+    def test_quota_reserve_optimistic_over_project_quota(self):
+        self._create_quota_usages({'instances': 1})
+        self._create_quota_usages({'instances': 8}, user_id='user2')
+
+        self.assertRaises(exception.OverQuota,
+                          self._quota_reserve_optimistic,
+                          {'instances': 10}, {'instances': 2},
+                          project_quotas={'instances': 10})
+
+    def test_quota_usage_reserve_checks_limits(self):
+        self._create_quota_usages({'instances': 1})
+        usage = db.quota_usage_get(self.ctxt, 'project1', 'instances',
+                                   'user1')
+        session = sqlalchemy_api.get_session()
+
+        # over the user limit
+        self.assertEqual(0, sqlalchemy_api._quota_usage_reserve(
+            self.ctxt, session, usage, 2, 2))
+        # unlimited
+        self.assertEqual(1, sqlalchemy_api._quota_usage_reserve(
+            self.ctxt, session, usage, 2, -1))
+        self.assertEqual(1, sqlalchemy_api._quota_usage_reserve(
+            self.ctxt, session, usage, 2, 5))
+        usage = db.quota_usage_get(self.ctxt, 'project1', 'instances',
+                                   'user1')
+        self.assertEqual(4, usage.reserved)
+
+    def test_quota_reserve_optimistic_retries(self):
+        self._create_quota_usages({'instances': 3})
+        reserve = sqlalchemy_api._quota_usage_reserve
+        attempts = []
+
+        def _reserve(*args, **kwargs):
+            # the usage changed under the first attempt
+            attempts.append(args)
+            if len(attempts) == 1:
+                return 0
+            return reserve(*args, **kwargs)
+
+        with mock.patch.object(sqlalchemy_api, '_quota_usage_reserve',
+                               side_effect=_reserve):
+            reservations = self._quota_reserve_optimistic({'instances': 10},
+                                                          {'instances': 2})
+        self.assertEqual(2, len(attempts))
+        self.assertEqual(1, len(reservations))
+        usage = db.quota_usage_get(self.ctxt, 'project1', 'instances',
+                                   'user1')
+        self.assertEqual(2, usage.reserved)
+
+    @mock.patch.object(sqlalchemy_api, '_quota_reserve')
+    @mock.patch.object(sqlalchemy_api, '_quota_usage_reserve',
+                       return_value=0)
+    def test_quota_reserve_optimistic_falls_back(self, mock_usage_reserve,
+                                                 mock_reserve):
+        self._create_quota_usages({'instances': 3})
+
+        self.assertEqual(mock_reserve.return_value,
+                         self._quota_reserve_optimistic({'instances': 10},
+                                                        {'instances': 2}))
+        self.assertEqual(sqlalchemy_api._QUOTA_RESERVE_OPTIMISTIC_ATTEMPTS,
+                         mock_usage_reserve.call_count)
+        self.assertEqual(1, mock_reserve.call_count)
+
+    def test_quota_reserve_optimistic_concurrent_users(self):
+        self._create_quota_usages({'instances': 4})
+        self._create_quota_usages({'instances': 4}, user_id='user2')
+        get_usages = sqlalchemy_api._get_project_user_quota_usages
+        swap = sqlalchemy_api._project_quota_generation_swap
+        concurrent = []
+
+        def _swap(*args, **kwargs):
+            if not concurrent:
+                # user2 reserves between the read and the swap of user1
+                concurrent.append(None)
+                concurrent[0] = self._quota_reserve_optimistic(
+                    {'instances': 10}, {'instances': 2}, user_id='user2')
+            return swap(*args, **kwargs)
+
+        with mock.patch.object(sqlalchemy_api,
+                               '_get_project_user_quota_usages',
+                               side_effect=get_usages) as mock_get:
+            with mock.patch.object(sqlalchemy_api,
+                                   '_project_quota_generation_swap',
+                                   side_effect=_swap) as mock_swap:
+                # user1 read the usages before the reservation of user2,
+                # but fails to swap the generation and retries with the
+                # new ones
+                self.assertRaises(exception.OverQuota,
+                                  self._quota_reserve_optimistic,
+                                  {'instances': 10}, {'instances': 2})
+        self.assertEqual(2, mock_swap.call_count)
+        self.assertEqual(3, mock_get.call_count)
+        for call in mock_get.call_args_list:
+            self.assertFalse(call[1]['lock'])
+        self.assertEqual(1, len(concurrent[0]))
+        usages = [db.quota_usage_get(self.ctxt, 'project1', 'instances',
+                                     user_id)
+                  for user_id in ('user1', 'user2')]
+        self.assertEqual([0, 2], [usage.reserved for usage in usages])
+
+    def test_quota_reserve_optimistic_unlimited(self):
+        self._create_quota_usages({'instances': 3})
+
+        with mock.patch.object(sqlalchemy_api,
+                               '_project_quota_generation_swap') as mock_swap:
+            self._quota_reserve_optimistic({'instances': -1},
+                                           {'instances': 1})
+        self.assertFalse(mock_swap.called)
+        self.assertIsNone(sqlalchemy_api._project_quota_generation_get(
+            sqlalchemy_api.get_session(), 'project1'))
+
+    @mock.patch.object(sqlalchemy_api, '_quota_reserve')
+    def test_quota_reserve_optimistic_until_refresh(self, mock_reserve):
+        self._create_quota_usages({'instances': 3}, until_refresh=2)
+
+        self._quota_reserve_optimistic({'instances': 10}, {'instances': 1})
+        self.assertFalse(mock_reserve.called)
+        usage = db.quota_usage_get(self.ctxt, 'project1', 'instances',
+                                   'user1')
+        self.assertEqual(1, usage.until_refresh)
+        self.assertEqual(1, usage.reserved)
+
+        # the next reservation refreshes the usage
+        self._quota_reserve_optimistic({'instances': 10}, {'instances': 1})
+        self.assertEqual(1, mock_reserve.call_count)
+
+    @mock.patch.object(sqlalchemy_api, '_quota_reserve')
+    def test_quota_reserve_optimistic_missing_usage(self, mock_reserve):
+        self._create_quota_usages({'instances': 3})
+
+        self.assertEqual(mock_reserve.return_value,
+                         self._quota_reserve_optimistic(
+                             {'instances': 10, 'cores': 20},
+                             {'instances': 2, 'cores': 4}))
+        mock_reserve.assert_called_once_with(
+            self.ctxt, {}, {'instances': 10, 'cores': 20},
+            {'instances': 10, 'cores': 20}, {'instances': 2, 'cores': 4},
+            mock.ANY, 0, 0, project_id='project1', user_id='user1',
+            bump_generation=True)
+        usage = db.quota_usage_get(self.ctxt, 'project1', 'instances',
+                                   'user1')
+        self.assertEqual(0, usage.reserved)
+
+    def test_quota_reserve_optimistic_fallback_bumps_generation(self):
+        resources = {res.name: res for res in quota.resources
+                     if res.name in ('instances', 'cores')}
+        quotas = {'instances': 10, 'cores': 20}
+
+        db.quota_reserve_optimistic(
+            self.ctxt, resources, quotas, quotas, {'instances': 1},
+            timeutils.utcnow(), 0, 0, 'project1', 'user1')
+        session = sqlalchemy_api.get_session()
+        # created, then bumped by the locking reservation of the missing
+        # usage
+        self.assertEqual(1, sqlalchemy_api._project_quota_generation_get(
+            session, 'project1'))
+
+        db.quota_reserve_optimistic(
+            self.ctxt, resources, quotas, quotas, {'instances': 1},
+            timeutils.utcnow(), 0, 0, 'project1', 'user1')
+        self.assertEqual(2, sqlalchemy_api._project_quota_generation_get(
+            session, 'project1'))
+
+    def test_quota_usage_count(self):
+        for project_id, user_id, vcpus in (('project1', 'user1', 1),
+                                           ('project1', 'user1', 2),
+                                           ('project1', 'user2', 4),
+                                           ('project2', 'user1', 8)):
+            db.instance_create(self.ctxt, {'project_id': project_id,
+                                           'user_id': user_id,
+                                           'vcpus': vcpus,
+                                           'memory_mb': vcpus * 512})
+        deleted = db.instance_create(self.ctxt, {'project_id': 'project1',
+                                                 'user_id': 'user1',
+                                                 'vcpus': 16})
+        db.instance_destroy(self.ctxt, deleted['uuid'])
+        for user_id in ('user1', 'user2', 'user2'):
+            db.security_group_create(self.ctxt, {'project_id': 'project1',
+                                                 'user_id': user_id})
+        db.floating_ip_create(self.ctxt, {'project_id': 'project1'})
+        resources = {res.name: res for res in quota.resources
+                     if isinstance(res, quota.ReservableResource)}
+
+        project_usages, user_usages = db.quota_usage_count(
+            self.ctxt, resources, 'project1', 'user1')
+        self.assertEqual({'instances': 3, 'cores': 7, 'ram': 7 * 512,
+                          'security_groups': 3, 'floating_ips': 1,
+                          'fixed_ips': 0, 'server_groups': 0},
+                         project_usages)
+        self.assertEqual({'instances': 2, 'cores': 3, 'ram': 3 * 512,
+                          'security_groups': 1, 'floating_ips': 1,
+                          'fixed_ips': 0, 'server_groups': 0},
+                         user_usages)
+
+        project_usages, user_usages = db.quota_usage_count(
+            self.ctxt, {'cores': resources['cores']}, 'project2', 'user2')
+        self.assertEqual({'cores': 8}, project_usages)
+        self.assertEqual({'cores': 0}, user_usages)
+
+    def test_quota_check_counted(self):
+        db.instance_create(self.ctxt, {'project_id': 'project1',
+                                       'user_id': 'user1', 'vcpus': 2})
+        sqlalchemy_api._quota_usage_create('project1', 'user1', 'instances',
+                                           1, 0, None)
+        resources = {res.name: res for res in quota.resources
+                     if res.name in ('instances', 'cores')}
+        quotas = {'instances': 3, 'cores': 10}
+
+        db.quota_check_counted(self.ctxt, resources, quotas, quotas,
+                               {'instances': 2}, project_id='project1',
+                               user_id='user2')
+        # the usage left by DbQuotaDriver is reset to be refreshed
+        usage = db.quota_usage_get(self.ctxt, 'project1', 'instances',
+                                   'user1')
+        self.assertEqual(-1, usage.in_use)
+        self.assertEqual(0, sqlalchemy_api.model_query(
+            self.ctxt, models.Reservation).count())
+
+        exc = self.assertRaises(exception.OverQuota,
+                                db.quota_check_counted, self.ctxt,
+                                resources, quotas, quotas,
+                                {'instances': 3, 'cores': 1},
+                                project_id='project1', user_id='user2')
+        self.assertEqual(['instances'], exc.kwargs['overs'])
+        self.assertEqual({'in_use': 1, 'reserved': 0},
+                         exc.kwargs['usages']['instances'])
+
     def test_quota_destroy_all_by_project(self):
         reservations = _quota_reserve(self.ctxt, 'project1', 'user1')
         db.quota_destroy_all_by_project(self.ctxt, 'project1')
@@ -7726,6 +8161,11 @@ class ArchiveTestCase(test.TestCase):
             if table_name == 'tags':
                 continue
 
+            # NOTE: migration 293 introduced project_quota_generations, which
+            #       holds no deleted rows to archive
+            if table_name == 'project_quota_generations':
+                continue
+
             if table_name.startswith("shadow_"):
                 self.assertIn(table_name[7:], metadata.tables)
                 continue
@@ -8425,6 +8865,21 @@ class PciDeviceDBApiTestCase(test.TestCase, ModelsObjectComparatorMixin):
             self.admin_context, 1, '0000:0f:08.7')
         self._assertEqualObjects(v1, result, self.ignored_keys)
 
+    def test_pci_device_update_multi(self):
+        v1, v2 = self._create_fake_pci_devs()
+        node_id = self.compute_node['id']
+        v3 = dict(v2, id=3357, address='0000:0f:03.8')
+        results = db.pci_device_update_multi(
+            self.admin_context, node_id,
+            {v1['address']: {'status': 'allocated'},
+             v3['address']: v3})
+        self.assertEqual(set([v1['address'], v3['address']]),
+                         set(result['address'] for result in results))
+        v1['status'] = 'allocated'
+        results = db.pci_device_get_all_by_node(self.admin_context, node_id)
+        self._assertEqualListsOfObjects(results, [v1, v2, v3],
+                                        self.ignored_keys)
+
     def test_pci_device_destroy(self):
         v1, v2 = self._create_fake_pci_devs()
         results = db.pci_device_get_all_by_node(self.admin_context,
@@ -680,6 +680,12 @@ class NovaMigrationsCheckers(test_migrations.ModelsMigrationsSync,
         self.assertTableNotExists(engine, 'shadow_iscsi_targets')
         self.assertTableNotExists(engine, 'shadow_volumes')
 
+    def _check_293(self, engine, data):
+        self.assertColumnExists(engine, 'project_quota_generations',
+                                'generation')
+        self.assertTableNotExists(engine,
+                                  'shadow_project_quota_generations')
+
 
 class TestNovaMigrationsSQLite(NovaMigrationsCheckers,
                                test_base.DbTestCase,
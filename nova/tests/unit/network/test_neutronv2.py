@@ -19,6 +19,7 @@ import contextlib
 import copy
 import uuid
 
+import eventlet
 import mock
 from mox3 import mox
 from neutronclient.common import exceptions
@@ -381,10 +382,11 @@ class TestNeutronv2Base(test.TestCase):
             has_portbinding = True
             api.extensions[constants.PORTBINDING_EXT] = 1
             self.mox.StubOutWithMock(api, '_refresh_neutron_extensions_cache')
-            neutronapi.get_client(mox.IgnoreArg()).AndReturn(
+            # NOTE: the ports are allocated with clients of their own
+            neutronapi.get_client(mox.IgnoreArg()).MultipleTimes().AndReturn(
                 self.moxed_client)
             neutronapi.get_client(
-                mox.IgnoreArg(), admin=True).AndReturn(
+                mox.IgnoreArg(), admin=True).MultipleTimes().AndReturn(
                 self.moxed_client)
             api._refresh_neutron_extensions_cache(mox.IgnoreArg(),
                 neutron=self.moxed_client)
@@ -3309,6 +3311,127 @@ class TestNeutronv2WithMock(test.TestCase):
                                             mock.ANY,
                                             mock.ANY)
 
+    def _test_allocate_for_instance_concurrently(self, mock_ntrn,
+                                                 mock_avail_nets,
+                                                 create_port):
+        self.flags(port_create_concurrency=3, group='neutron')
+        nets = [{'id': 'net-%d' % i, 'subnets': []} for i in range(6)]
+        mock_avail_nets.return_value = nets
+        clients = []
+
+        def get_client(context, admin=False):
+            mock_nc = mock.Mock()
+            mock_nc.create_port.side_effect = create_port
+            clients.append(mock_nc)
+            return mock_nc
+        mock_ntrn.side_effect = get_client
+
+        mock_inst = mock.Mock(project_id="proj-1",
+                              availability_zone='zone-1',
+                              uuid='inst-1')
+        nw_req = objects.NetworkRequestList(
+            objects=[objects.NetworkRequest(network_id=net['id'])
+                     for net in nets])
+        self.api.allocate_for_instance(self.context, mock_inst,
+                                       requested_networks=nw_req)
+        return nets, clients
+
+    @mock.patch('nova.network.neutronv2.api.API.get_instance_nw_info')
+    @mock.patch('nova.network.neutronv2.api.API.'
+                '_check_external_network_attach')
+    @mock.patch('nova.network.neutronv2.api.API._has_port_binding_extension',
+                return_value=False)
+    @mock.patch('nova.network.neutronv2.api.API.'
+                '_populate_neutron_extension_values')
+    @mock.patch('nova.network.neutronv2.api.API._get_available_networks')
+    @mock.patch('nova.network.neutronv2.api.get_client')
+    def test_allocate_for_instance_creates_ports_concurrently(
+            self, mock_ntrn, mock_avail_nets, mock_ext_vals, mock_has_pbe,
+            mock_cena, mock_giwn):
+        in_flight = []
+        max_in_flight = [0]
+
+        def create_port(body):
+            net_id = body['port']['network_id']
+            in_flight.append(net_id)
+            max_in_flight[0] = max(max_in_flight[0], len(in_flight))
+            # let the other green threads run while this one "waits" for
+            # neutron
+            eventlet.sleep(0)
+            in_flight.remove(net_id)
+            return {'port': {'id': 'port-%s' % net_id}}
+
+        nets, clients = self._test_allocate_for_instance_concurrently(
+            mock_ntrn, mock_avail_nets, create_port)
+
+        self.assertEqual(3, max_in_flight[0])
+        mock_giwn.assert_called_once_with(
+            self.context, mock.ANY, networks=nets,
+            port_ids=['port-%s' % net['id'] for net in nets],
+            admin_client=None, preexisting_port_ids=[])
+
+    @mock.patch('nova.network.neutronv2.api.API.get_instance_nw_info')
+    @mock.patch('nova.network.neutronv2.api.API.'
+                '_check_external_network_attach')
+    @mock.patch('nova.network.neutronv2.api.API._has_port_binding_extension',
+                return_value=True)
+    @mock.patch('nova.network.neutronv2.api.API.'
+                '_populate_neutron_extension_values')
+    @mock.patch('nova.network.neutronv2.api.API._get_available_networks')
+    @mock.patch('nova.network.neutronv2.api.get_client')
+    def test_allocate_for_instance_client_per_green_thread(
+            self, mock_ntrn, mock_avail_nets, mock_ext_vals, mock_has_pbe,
+            mock_cena, mock_giwn):
+        def create_port(body):
+            eventlet.sleep(0)
+            return {'port': {'id': 'port-%s' % body['port']['network_id']}}
+
+        nets, clients = self._test_allocate_for_instance_concurrently(
+            mock_ntrn, mock_avail_nets, create_port)
+
+        # allocate_for_instance() gets a tenant and an admin client, then
+        # each green thread gets its own pair and creates its port with its
+        # admin client.
+        self.assertEqual(
+            [mock.call(self.context), mock.call(self.context, admin=True)] *
+            (1 + len(nets)), mock_ntrn.call_args_list)
+        self.assertFalse(clients[1].create_port.called)
+        for admin_client in clients[3::2]:
+            self.assertEqual(1, admin_client.create_port.call_count)
+
+    @mock.patch('nova.network.neutronv2.api.API.get_instance_nw_info')
+    @mock.patch('nova.network.neutronv2.api.API._delete_ports')
+    @mock.patch('nova.network.neutronv2.api.API.'
+                '_check_external_network_attach')
+    @mock.patch('nova.network.neutronv2.api.API._unbind_ports')
+    @mock.patch('nova.network.neutronv2.api.API._has_port_binding_extension',
+                return_value=False)
+    @mock.patch('nova.network.neutronv2.api.API.'
+                '_populate_neutron_extension_values')
+    @mock.patch('nova.network.neutronv2.api.API._get_available_networks')
+    @mock.patch('nova.network.neutronv2.api.get_client')
+    def test_allocate_for_instance_concurrent_failure_rolls_back(
+            self, mock_ntrn, mock_avail_nets, mock_ext_vals, mock_has_pbe,
+            mock_unbind, mock_cena, mock_del_ports, mock_giwn):
+        def create_port(body):
+            net_id = body['port']['network_id']
+            eventlet.sleep(0)
+            if net_id == 'net-1':
+                raise exceptions.OverQuotaClient()
+            return {'port': {'id': 'port-%s' % net_id}}
+
+        self.assertRaises(exception.PortLimitExceeded,
+                          self._test_allocate_for_instance_concurrently,
+                          mock_ntrn, mock_avail_nets, create_port)
+
+        # net-0 and net-2 were in flight alongside net-1, the remaining
+        # ones must not have been started at all.
+        mock_del_ports.assert_called_once_with(
+            mock.ANY, mock.ANY, ['port-net-0', 'port-net-2'])
+        mock_unbind.assert_called_once_with(
+            self.context, [], mock.ANY, mock.ANY)
+        self.assertFalse(mock_giwn.called)
+
     @mock.patch('nova.objects.network_request.utils')
     @mock.patch('nova.network.neutronv2.api.LOG')
     @mock.patch('nova.network.neutronv2.api.base_api')
@@ -295,6 +295,19 @@ class _TestBlockDeviceMappingListObject(object):
             self.assertIsInstance(got, objects.BlockDeviceMapping)
             self.assertEqual(faked['id'], got.id)
 
+    @mock.patch.object(db, 'block_device_mapping_get_all_by_instance_uuids')
+    def test_get_by_instance_uuids(self, get_all_by_insts):
+        fakes = [self.fake_bdm(123), self.fake_bdm(456)]
+        get_all_by_insts.return_value = fakes
+        bdm_list = (
+                objects.BlockDeviceMappingList.get_by_instance_uuids(
+                    self.context, ['fake_instance_uuid']))
+        get_all_by_insts.assert_called_once_with(
+            self.context, ['fake_instance_uuid'], use_slave=False)
+        for faked, got in zip(fakes, bdm_list):
+            self.assertIsInstance(got, objects.BlockDeviceMapping)
+            self.assertEqual(faked['id'], got.id)
+
     @mock.patch.object(db, 'block_device_mapping_get_all_by_instance')
     def test_get_by_instance_uuid_no_result(self, get_all_by_inst):
         get_all_by_inst.return_value = None
@@ -106,6 +106,18 @@ class _TestInstanceObject(object):
         self.assertEqual(inst2.access_ip_v4, netaddr.IPAddress('1.2.3.4'))
         self.assertEqual(inst2.access_ip_v6, netaddr.IPAddress('::1'))
 
+    def test_deserialization_no_dict(self):
+        inst = instance.Instance(uuid='fake-uuid', host='fake-host',
+                                 metadata={'foo': 'bar'},
+                                 system_metadata={})
+        inst.obj_reset_changes()
+        primitive = inst.obj_to_primitive()
+        inst2 = instance.Instance.obj_from_primitive(primitive,
+                                                     context=self.context)
+        self.assertEqual({}, inst2.__dict__)
+        self.assertEqual({'foo': 'bar'}, inst2._orig_metadata)
+        self.assertEqual(set(), inst2.obj_what_changed())
+
     def test_get_without_expected(self):
         self.mox.StubOutWithMock(db, 'instance_get_by_uuid')
         db.instance_get_by_uuid(self.context, 'uuid',
@@ -1487,6 +1499,49 @@ class _TestInstanceListObject(object):
             self.assertEqual(inst_list.objects[i].uuid, fakes[i]['uuid'])
         self.assertRemotes()
 
+    @mock.patch('nova.db.instance_get_all_brief_by_uuids')
+    def test_get_brief_by_uuids(self, mock_get_brief):
+        mock_get_brief.return_value = [
+            {'id': 1, 'uuid': 'fake-uuid1', 'hostname': 'host1',
+             'display_name': 'name1'},
+            {'id': 2, 'uuid': 'fake-uuid2', 'hostname': None,
+             'display_name': None}]
+        inst_list = instance.InstanceList.get_brief_by_uuids(
+            self.context, ['fake-uuid1', 'fake-uuid2'])
+        mock_get_brief.assert_called_once_with(
+            self.context, ['fake-uuid1', 'fake-uuid2'])
+        self.assertEqual(['fake-uuid1', 'fake-uuid2'],
+                         [inst.uuid for inst in inst_list])
+        self.assertEqual(['instance-00000001', 'instance-00000002'],
+                         [inst.name for inst in inst_list])
+        self.assertEqual('host1', inst_list[0].hostname)
+        self.assertFalse(inst_list[0].obj_attr_is_set('host'))
+        self.assertRemotes()
+
+    def test_create_multi(self):
+        instances = [instance.Instance(context=self.context,
+                                       user_id=self.context.user_id,
+                                       project_id=self.context.project_id,
+                                       host='foo-host',
+                                       system_metadata={'foo': str(i)},
+                                       vcpu_model=(
+                                           test_vcpu_model.fake_vcpumodel))
+                     for i in range(2)]
+        inst_list = instance.InstanceList.create_multi(self.context,
+                                                       instances)
+        self.assertEqual(2, len(inst_list))
+        for i, inst in enumerate(inst_list):
+            self.assertTrue(inst.obj_attr_is_set('id'))
+            self.assertEqual('fake-model', inst.vcpu_model.model)
+            got = instance.Instance.get_by_uuid(
+                self.context, inst.uuid, expected_attrs=['system_metadata'])
+            self.assertEqual(inst.id, got.id)
+            self.assertEqual({'foo': str(i)}, got.system_metadata)
+        self.assertRaises(exception.ObjectActionError,
+                          instance.InstanceList.create_multi, self.context,
+                          inst_list.objects)
+        self.assertRemotes()
+
     def test_get_hung_in_rebooting(self):
         fakes = [self.fake_instance(1),
                  self.fake_instance(2)]
@@ -1609,6 +1664,34 @@ class _TestInstanceListObject(object):
         self.assertTrue(instances[0].obj_attr_is_set('system_metadata'))
         self.assertEqual({'foo': 'bar'}, instances[0].system_metadata)
 
+    def test_lazy_hydration(self):
+        inst_list = instance.InstanceList(objects=[
+            instance.Instance(uuid='fake-uuid%i' % i, host='fake-host',
+                              info_cache=objects.InstanceInfoCache(
+                                  instance_uuid='fake-uuid%i' % i,
+                                  network_info=network_model.NetworkInfo()))
+            for i in range(100)])
+        for inst in inst_list:
+            inst.info_cache.obj_reset_changes()
+            inst.obj_reset_changes()
+        inst_list.obj_reset_changes()
+        primitive = inst_list.obj_to_primitive()
+
+        with mock.patch.object(objects.InstanceInfoCache,
+                               '_obj_from_primitive') as ofp:
+            inst_list2 = instance.InstanceList.obj_from_primitive(
+                primitive, self.context, lazy_hydration=True)
+            self.assertEqual(['fake-uuid%i' % i for i in range(100)],
+                             [inst.uuid for inst in inst_list2])
+            self.assertEqual(set(), inst_list2.obj_what_changed())
+            self.assertEqual(primitive, inst_list2.obj_to_primitive())
+            self.assertFalse(ofp.called)
+
+        self.assertEqual('fake-uuid0',
+                         inst_list2[0].info_cache.instance_uuid)
+        self.assertTrue(inst_list2[1].obj_attr_is_set('info_cache'))
+        self.assertIn('info_cache', inst_list2[1]._obj_lazy_data)
+
 
 class TestInstanceListObject(test_objects._LocalTest,
                              _TestInstanceListObject):
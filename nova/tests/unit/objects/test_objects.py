@@ -19,8 +19,11 @@ import datetime
 import hashlib
 import inspect
 import os
+import pickle
 import pprint
+import sys
 
+import fixtures
 import mock
 from oslo_log import log
 from oslo_serialization import jsonutils
@@ -206,6 +209,215 @@ class TestMetaclass(test.NoDBTestCase):
                           create_class, int)
 
 
+class TestCompactStorage(test.NoDBTestCase):
+    def setUp(self):
+        super(TestCompactStorage, self).setUp()
+
+        class MyCompactObj(base.NovaPersistentObject, base.NovaObject):
+            VERSION = '1.1'
+            obj_compact_storage = True
+            fields = {'foo': fields.IntegerField(),
+                      'bar': fields.StringField(nullable=True)}
+
+        self.obj_class = MyCompactObj
+
+    def test_slots(self):
+        self.assertEqual(('_bar', '_changed_fields', '_context',
+                          '_created_at', '_deleted', '_deleted_at', '_foo',
+                          '_updated_at'),
+                         self.obj_class.__slots__)
+        obj = self.obj_class(foo=1, bar='bar', deleted=False)
+        self.assertEqual({}, obj.__dict__)
+
+    def test_obj_from_primitive(self):
+        primitive = self.obj_class(foo=1).obj_to_primitive()
+        obj = self.obj_class._obj_from_primitive(None, '1.1', primitive)
+        self.assertEqual(1, obj.foo)
+        self.assertEqual('1.1', obj.VERSION)
+        self.assertEqual({}, obj.__dict__)
+
+    def test_obj_from_primitive_other_version(self):
+        primitive = self.obj_class(foo=1).obj_to_primitive()
+        obj = self.obj_class._obj_from_primitive(None, '1.0', primitive)
+        self.assertEqual('1.0', obj.VERSION)
+        self.assertEqual('1.1', self.obj_class.VERSION)
+
+    def test_subclass_slots(self):
+        class MyCompactObjSubclass(self.obj_class):
+            fields = {'baz': fields.IntegerField()}
+
+        self.assertTrue(MyCompactObjSubclass.obj_compact_storage)
+        self.assertEqual(('_baz',), MyCompactObjSubclass.__slots__)
+        obj = MyCompactObjSubclass(foo=1, baz=2)
+        self.assertEqual((1, 2), (obj.foo, obj.baz))
+        self.assertEqual({}, obj.__dict__)
+
+    def test_object_api(self):
+        obj = self.obj_class(foo=1)
+        self.assertTrue(obj.obj_attr_is_set('foo'))
+        self.assertFalse(obj.obj_attr_is_set('bar'))
+        self.assertEqual(set(['foo']), obj.obj_what_changed())
+        obj.obj_reset_changes()
+        obj.bar = None
+        self.assertEqual(set(['bar']), obj.obj_what_changed())
+        self.assertIsNone(obj.bar)
+        del obj.bar
+        self.assertFalse(obj.obj_attr_is_set('bar'))
+        self.assertRaises(AttributeError, delattr, obj, 'bar')
+        self.assertRaises(NotImplementedError, getattr, obj, 'deleted')
+
+    def test_serialization(self):
+        obj = self.obj_class(foo=1, bar='bar')
+        obj2 = base.NovaObject.obj_from_primitive(obj.obj_to_primitive())
+        self.assertIsInstance(obj2, self.obj_class)
+        self.assertEqual((1, 'bar'), (obj2.foo, obj2.bar))
+        self.assertEqual(set(['foo', 'bar']), obj2.obj_what_changed())
+
+        obj3 = copy.deepcopy(obj)
+        self.assertEqual((1, 'bar'), (obj3.foo, obj3.bar))
+        self.assertEqual(set(['foo', 'bar']), obj3.obj_what_changed())
+
+    def test_pickle(self):
+        # NOTE: pickle looks the class up by its module and name
+        self.useFixture(fixtures.MonkeyPatch(
+            '%s.MyCompactObj' % __name__, self.obj_class))
+        obj = self.obj_class(context='foo', foo=1)
+        obj.extra = 'extra'
+        for protocol in range(pickle.HIGHEST_PROTOCOL + 1):
+            obj2 = pickle.loads(pickle.dumps(obj, protocol))
+            self.assertEqual(1, obj2.foo)
+            self.assertFalse(obj2.obj_attr_is_set('bar'))
+            self.assertEqual(set(['foo']), obj2.obj_what_changed())
+            self.assertEqual('foo', obj2._context)
+            self.assertEqual({'extra': 'extra'}, obj2.__dict__)
+
+    def test_no_state_methods_without_compact_storage(self):
+        self.assertFalse(hasattr(MyObj, '__getstate__'))
+        self.assertFalse(hasattr(MyObj, '__setstate__'))
+
+    def test_memory(self):
+        class MyDictObj(base.NovaPersistentObject, base.NovaObject):
+            fields = self.obj_class.fields
+
+        def _size(obj):
+            # NOTE: The size of an object includes its slots, but not its
+            # __dict__ which is a separate object.
+            return sys.getsizeof(obj) + sys.getsizeof(obj.__dict__)
+
+        values = dict(foo=1, bar='bar', deleted=False, created_at=None,
+                      updated_at=None, deleted_at=None)
+        self.assertLess(_size(self.obj_class(**values)),
+                        _size(MyDictObj(**values)))
+
+
+class TestLazyHydration(test.NoDBTestCase):
+    def setUp(self):
+        super(TestLazyHydration, self).setUp()
+
+        class MyLazyObj(base.NovaObject):
+            obj_lazy_hydration = True
+            fields = {'foo': fields.IntegerField(),
+                      'bar': fields.StringField(nullable=True),
+                      'readonly': fields.IntegerField(read_only=True),
+                      'rel_object': fields.ObjectField('MyOwnedObject',
+                                                       nullable=True)}
+            obj_relationships = {'rel_object': [('1.0', '1.0')]}
+
+        self.obj_class = MyLazyObj
+        obj = MyLazyObj(foo=1, bar='bar', readonly=2,
+                        rel_object=MyOwnedObject(baz=3))
+        obj.obj_reset_changes(recursive=True)
+        self.primitive = obj.obj_to_primitive()
+
+    def _from_primitive(self, lazy_hydration=True):
+        return base.NovaObject.obj_from_primitive(
+            copy.deepcopy(self.primitive), lazy_hydration=lazy_hydration)
+
+    def test_hydrate_on_access(self):
+        obj = self._from_primitive()
+        self.assertEqual(set(['rel_object']), set(obj._obj_lazy_data))
+        self.assertTrue(obj.obj_attr_is_set('rel_object'))
+        self.assertEqual(1, obj.foo)
+        self.assertEqual(3, obj.rel_object.baz)
+        self.assertFalse(obj._obj_lazy_data)
+        self.assertEqual(set(), obj.obj_what_changed())
+
+    def test_hydrate_without_lazy_hydration(self):
+        obj = self._from_primitive(lazy_hydration=False)
+        self.assertIsNone(obj._obj_lazy_data)
+        self.assertEqual(3, obj.rel_object.baz)
+
+    def test_serializer_lazy_hydration(self):
+        obj = base.NovaObjectSerializer(lazy_hydration=True).\
+            deserialize_entity(None, copy.deepcopy(self.primitive))
+        self.assertIn('rel_object', obj._obj_lazy_data)
+        obj = base.NovaObjectSerializer().deserialize_entity(
+            None, copy.deepcopy(self.primitive))
+        self.assertFalse(obj._obj_lazy_data)
+
+    def test_set_and_delete(self):
+        obj = self._from_primitive()
+        obj.bar = 'baz'
+        self.assertEqual('baz', obj.bar)
+        self.assertEqual(set(['bar']), obj.obj_what_changed())
+        self.assertRaises(exception.ReadOnlyFieldError,
+                          setattr, obj, 'readonly', 3)
+        del obj.rel_object
+        self.assertFalse(obj.obj_attr_is_set('rel_object'))
+        self.assertNotIn('rel_object',
+                         obj.obj_to_primitive()['nova_object.data'])
+        obj.rel_object = None
+        self.assertIsNone(obj.rel_object)
+        self.assertEqual(set(['bar', 'rel_object']), obj.obj_what_changed())
+
+    def test_bad_types(self):
+        self.primitive['nova_object.data']['foo'] = 'foo'
+        self.assertRaises(ValueError, self._from_primitive)
+
+    def test_bad_sub_object_type(self):
+        self.primitive['nova_object.data']['rel_object'] = (
+            MyObj(foo=1).obj_to_primitive())
+        self.assertRaises(ValueError, self._from_primitive)
+
+    def test_serialize_without_hydrating(self):
+        obj = self._from_primitive()
+        with mock.patch.object(fields.Field, 'from_primitive') as fp:
+            self.assertEqual(self.primitive, obj.obj_to_primitive())
+            self.assertFalse(fp.called)
+
+    def test_serialize_backport(self):
+        obj = self._from_primitive()
+        with mock.patch.object(obj, 'obj_make_compatible') as compat:
+            primitive = obj.obj_to_primitive(target_version='0.9')
+            compat.assert_called_once_with(primitive['nova_object.data'],
+                                           '0.9')
+        self.assertFalse(obj._obj_lazy_data)
+        self.assertEqual(self.primitive['nova_object.data'],
+                         primitive['nova_object.data'])
+
+    def test_changes_of_sub_object(self):
+        self.primitive['nova_object.data']['rel_object'][
+            'nova_object.changes'] = ['baz']
+        obj = self._from_primitive()
+        self.assertEqual(set(['rel_object']), obj.obj_what_changed())
+        self.assertIn('rel_object', obj._obj_lazy_data)
+        self.assertEqual(set(['baz']), obj.rel_object.obj_what_changed())
+
+    def test_unsupported_sub_object(self):
+        real_method = base.NovaObject.obj_class_from_name
+
+        def obj_class_from_name(objname, objver):
+            if objname == 'MyOwnedObject':
+                raise exception.IncompatibleObjectVersion(
+                    objname=objname, objver=objver, supported='0.9')
+            return real_method(objname, objver)
+
+        with mock.patch.object(base.NovaObject, 'obj_class_from_name',
+                               side_effect=obj_class_from_name):
+            self.assertRaises(exception.IncompatibleObjectVersion,
+                              self._from_primitive)
+
+
 class TestObjToPrimitive(test.NoDBTestCase):
 
     def test_obj_to_primitive_list(self):
@@ -436,13 +648,14 @@ class _TestObject(object):
                      'nova_object.data': {'foo': 1}}
         real_method = MyObj._obj_from_primitive
 
-        def _obj_from_primitive(*args):
-            return real_method(*args)
+        def _obj_from_primitive(*args, **kwargs):
+            return real_method(*args, **kwargs)
 
         with mock.patch.object(MyObj, '_obj_from_primitive') as ofp:
             ofp.side_effect = _obj_from_primitive
             obj = MyObj.obj_from_primitive(primitive)
-            ofp.assert_called_once_with(None, '1.5', primitive)
+            ofp.assert_called_once_with(None, '1.5', primitive,
+                                        lazy_hydration=False)
         self.assertEqual(obj.foo, 1)
 
     def test_hydration_version_different(self):
@@ -530,6 +743,35 @@ class _TestObject(object):
                                          'bar': 'loaded!'}}
         self.assertEqual(obj.obj_to_primitive(), expected)
 
+    def test_obj_to_primitive_latest_version_is_compatible(self):
+        class MyPinnedObj(base.NovaObject):
+            VERSION = '1.1'
+            fields = {'foo': fields.IntegerField(),
+                      'rel_object': fields.ObjectField('MyOwnedObject')}
+            obj_relationships = {'rel_object': [('1.0', '1.0')]}
+
+        obj = MyPinnedObj(foo=1, rel_object=MyOwnedObject(baz=2))
+        with mock.patch.object(obj, 'obj_make_compatible') as compat:
+            primitive = obj.obj_to_primitive(target_version=obj.VERSION)
+            self.assertFalse(compat.called)
+            obj.obj_to_primitive(target_version='1.0')
+            compat.assert_called_once_with(mock.ANY, '1.0')
+        self.assertEqual(obj.obj_to_primitive(), primitive)
+
+    def test_obj_to_primitive_latest_version_backports_children(self):
+        inst = objects.Instance(uuid='fake-uuid',
+                                fault=objects.InstanceFault(message='foo'))
+        primitive = inst.obj_to_primitive(target_version=inst.VERSION)
+        self.assertEqual(inst.VERSION, primitive['nova_object.version'])
+        fault = primitive['nova_object.data']['fault']
+        self.assertEqual('1.0', fault['nova_object.version'])
+
+        events = objects.InstanceActionEventList(
+            objects=[objects.InstanceActionEvent(event='foo')])
+        primitive = events.obj_to_primitive(target_version=events.VERSION)
+        event = primitive['nova_object.data']['objects'][0]
+        self.assertEqual('1.0', event['nova_object.version'])
+
     def test_changes_in_primitive(self):
         obj = MyObj(foo=123)
         self.assertEqual(obj.obj_what_changed(), set(['foo']))
@@ -1023,6 +1265,44 @@ class TestObjectListBase(test.NoDBTestCase):
         self.assertEqual([x.foo for x in obj],
                          [y.foo for y in obj2])
 
+    def test_serialization_large_list(self):
+        class Foo(base.ObjectListBase, base.NovaObject):
+            fields = {'objects': fields.ListOfObjectsField('Bar')}
+
+        class Bar(base.NovaObject):
+            fields = {'foo': fields.IntegerField(),
+                      'bar': fields.StringField(nullable=True)}
+
+        obj = Foo(objects=[Bar(foo=i) for i in range(1000)])
+        for bar in obj.objects[::2]:
+            bar.obj_reset_changes()
+        real_method = base.NovaObject.obj_class_from_name
+
+        with mock.patch.object(base.NovaObject, 'obj_class_from_name',
+                               side_effect=real_method) as ocfn:
+            obj2 = base.NovaObject.obj_from_primitive(obj.obj_to_primitive())
+
+        # The class of the items is only looked up once for the whole list
+        self.assertEqual(2, ocfn.call_count)
+        self.assertEqual(range(1000), [x.foo for x in obj2])
+        self.assertFalse(any(x.obj_attr_is_set('bar') for x in obj2))
+        self.assertEqual([set(['foo']) if i % 2 else set()
+                          for i in range(1000)],
+                         [x.obj_what_changed() for x in obj2])
+
+    def test_serialization_mixed_versions(self):
+        class Foo(base.ObjectListBase, base.NovaObject):
+            fields = {'objects': fields.ListOfObjectsField('MyObj')}
+
+        obj = Foo(objects=[MyObj(foo=1), MyObj(foo=2)])
+        primitive = obj.obj_to_primitive()
+        primitive['nova_object.data']['objects'][1][
+            'nova_object.version'] = '1.5'
+
+        obj = base.NovaObject.obj_from_primitive(primitive)
+        self.assertEqual(['1.6', '1.5'], [x.VERSION for x in obj])
+        self.assertEqual([1, 2], [x.foo for x in obj])
+
     def _test_object_list_version_mappings(self, list_obj_class):
         # Figure out what sort of object this list is for
         list_field = list_obj_class.fields['objects']
@@ -1225,8 +1505,8 @@ object_data = {
     'AggregateList': '1.2-13a2dfb67f9cb9aee815e233bc89f34c',
     'BandwidthUsage': '1.2-e7d3b3a5c3950cc67c99bc26a1075a70',
     'BandwidthUsageList': '1.2-fe73c30369dd23c41619c9c19f27a562',
-    'BlockDeviceMapping': '1.9-c87e9c7e5cfd6a402f32727aa74aca95',
-    'BlockDeviceMappingList': '1.10-44b9818d5e90a7396eb807540cbe42c0',
+    'BlockDeviceMapping': '1.10-c87e9c7e5cfd6a402f32727aa74aca95',
+    'BlockDeviceMappingList': '1.12-76073ed236d72e1f476681a8dec0a9a0',
     'CellMapping': '1.0-4b1616970814c3c819e10c7ef6b9c3d5',
     'ComputeNode': '1.11-5f8cd6948ad98fcc0c39b79d49acc4b6',
     'ComputeNodeList': '1.11-f09b7f64339350b4296ac85c07e3a573',
@@ -1236,14 +1516,14 @@ object_data = {
     'EC2InstanceMapping': '1.0-e9c3257badcc3aa14089b0a62f163108',
     'EC2SnapshotMapping': '1.0-a545acd0d1519d4316b9b00f30e59b4d',
     'EC2VolumeMapping': '1.0-15710aa212b5cbfdb155fdc81cce4ede',
-    'FixedIP': '1.10-4e8060f91f6c94ae73d557708ec62f56',
-    'FixedIPList': '1.10-724a59f2446d917d0bd13d6aa33edf8a',
+    'FixedIP': '1.11-4e8060f91f6c94ae73d557708ec62f56',
+    'FixedIPList': '1.11-1ad603035cfd9c5356ebdd8c3d17bf7f',
     'Flavor': '1.1-01ed47361fbe76bf728edf667d3f45d3',
     'FlavorList': '1.1-ab3f242e0db21db87285f2ac2ddc5c72',
     'FloatingIP': '1.6-24c614d2c3d4887254a679be65c11de5',
     'FloatingIPList': '1.7-e61a470ab21d7422f6bb703f86d99b53',
     'HVSpec': '1.0-c4d8377cc4fe519930e60c1d8265a142',
-    'Instance': '1.20-0991d6bd300ebf35ec19d7d68922e69b',
+    'Instance': '1.21-0991d6bd300ebf35ec19d7d68922e69b',
     'InstanceAction': '1.1-866fb0235d45ab51cc299b8726303d9c',
     'InstanceActionEvent': '1.1-538698f30974064543134784c5da6056',
     'InstanceActionEventList': '1.0-3510dc5bc494bcf2468f54249366164f',
@@ -1254,7 +1534,7 @@ object_data = {
     'InstanceGroup': '1.9-a77a59735d62790dcaa413a21acfaa73',
     'InstanceGroupList': '1.6-4642a730448b2336dfbf0f410f9c0cab',
     'InstanceInfoCache': '1.5-ef7394dae46cff2dd560324555cb85cf',
-    'InstanceList': '1.17-d453df4d1e7e1ec3b5b8b089672a870f',
+    'InstanceList': '1.20-4093f5c4f36fb29cdbcc43065d36cdf7',
     'InstanceMapping': '1.0-d7cfc251f16c93df612af2b9de59e5b7',
     'InstanceMappingList': '1.0-1e388f466f8a306ab3c0a0bb26479435',
     'InstanceNUMACell': '1.2-5d2dfa36e9ecca9b63f24bf3bc958ea4',
@@ -1276,7 +1556,7 @@ object_data = {
     'NetworkRequest': '1.1-f31192f5a725017707f989585e12d7dc',
     'NetworkRequestList': '1.1-46ff51f691dde5cf96b4c37b0953a516',
     'PciDevice': '1.3-6d37f795ee934e7db75b5a6a1926def0',
-    'PciDeviceList': '1.1-0aedd5a49b4a9f30da37cf275cd98cf7',
+    'PciDeviceList': '1.2-65b58d48afe0505e612ba022596c6f8f',
     'PciDevicePool': '1.1-2f352e08e128ec5bc84bc3007936cc6d',
     'PciDevicePoolList': '1.1-46ff51f691dde5cf96b4c37b0953a516',
     'Quotas': '1.2-615ed622082c92d938119fd49e6d84ee',
@@ -1300,16 +1580,16 @@ object_data = {
 
 
 object_relationships = {
-    'BlockDeviceMapping': {'Instance': '1.20'},
+    'BlockDeviceMapping': {'Instance': '1.21'},
     'ComputeNode': {'HVSpec': '1.0', 'PciDevicePoolList': '1.1'},
-    'FixedIP': {'Instance': '1.20', 'Network': '1.2',
+    'FixedIP': {'Instance': '1.21', 'Network': '1.2',
                 'VirtualInterface': '1.0',
                 'FloatingIPList': '1.7'},
-    'FloatingIP': {'FixedIP': '1.10'},
+    'FloatingIP': {'FixedIP': '1.11'},
     'Instance': {'InstanceFault': '1.2',
                  'InstanceInfoCache': '1.5',
                  'InstanceNUMATopology': '1.1',
-                 'PciDeviceList': '1.1',
+                 'PciDeviceList': '1.2',
                  'TagList': '1.0',
                  'SecurityGroupList': '1.0',
                  'Flavor': '1.1',
@@ -290,6 +290,22 @@ class _TestPciDeviceListObject(object):
         self.assertEqual(devs[1].vendor_id, 'v')
         self.assertRemotes()
 
+    def test_update_by_addresses(self):
+        ctxt = context.get_admin_context()
+        updates = {'a1': {'status': 'allocated', 'instance_uuid': '1'},
+                   'a2': {'label': 'l2'}}
+        self.mox.StubOutWithMock(db, 'pci_device_update_multi')
+        db.pci_device_update_multi(ctxt, 1, updates).AndReturn(
+            [dict(fake_db_dev, address='a1', status='allocated',
+                  instance_uuid='1'),
+             dict(fake_db_dev, address='a2', label='l2')])
+        self.mox.ReplayAll()
+        devs = pci_device.PciDeviceList.update_by_addresses(ctxt, 1, updates)
+        self.assertEqual(['a1', 'a2'], [dev.address for dev in devs])
+        self.assertEqual('allocated', devs[0].status)
+        self.assertEqual('l2', devs[1].label)
+        self.assertRemotes()
+
 
 class TestPciDeviceListObject(test_objects._LocalTest,
                                   _TestPciDeviceListObject):
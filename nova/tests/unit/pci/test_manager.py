@@ -91,11 +91,10 @@ class PciDevTrackerTestCase(test.NoDBTestCase):
     def _fake_get_pci_devices(self, ctxt, node_id):
         return fake_db_devs[:]
 
-    def _fake_pci_device_update(self, ctxt, node_id, address, value):
+    def _fake_pci_device_update_multi(self, ctxt, node_id, values):
         self.update_called += 1
-        self.called_values = value
-        fake_return = copy.deepcopy(fake_db_dev)
-        return fake_return
+        self.called_values = values
+        return [dict(fake_db_dev, address=address) for address in values]
 
     def _fake_pci_device_destroy(self, ctxt, node_id, address):
         self.destroy_called += 1
@@ -286,17 +285,66 @@ class PciDevTrackerTestCase(test.NoDBTestCase):
                          set(['v', 'v1']))
 
     def test_save(self):
-        self.stubs.Set(db, "pci_device_update", self._fake_pci_device_update)
+        self.stubs.Set(db, "pci_device_update_multi",
+                       self._fake_pci_device_update_multi)
         fake_pci_v3 = dict(fake_pci, address='0000:00:00.2', vendor_id='v3')
         fake_pci_devs = [copy.deepcopy(fake_pci), copy.deepcopy(fake_pci_2),
                          copy.deepcopy(fake_pci_v3)]
         self.tracker.set_hvdevs(fake_pci_devs)
         self.update_called = 0
         self.tracker.save(self.fake_context)
-        self.assertEqual(self.update_called, 3)
+        self.assertEqual(1, self.update_called)
+        self.assertEqual(set(['0000:00:00.1', '0000:00:00.2', '0000:00:00.3']),
+                         set(self.called_values))
+        self.assertEqual('v3', self.called_values['0000:00:00.2']['vendor_id'])
+        for dev in self.tracker.pci_devs:
+            self.assertEqual(set(), dev.obj_what_changed())
+
+    def _fake_hvdevs_from_db(self):
+        hvdevs = []
+        for db_dev in fake_db_devs:
+            hvdev = {k: db_dev[k] for k in fake_pci}
+            hvdev['dev_type'] = db_dev['dev_type']
+            hvdevs.append(hvdev)
+        return hvdevs
+
+    def test_set_hvdev_unchanged(self):
+        self.stubs.Set(db, "pci_device_update_multi",
+                       self._fake_pci_device_update_multi)
+        self.tracker.set_hvdevs(self._fake_hvdevs_from_db())
+        self.update_called = 0
+        self.tracker.save(self.fake_context)
+        self.assertEqual(0, self.update_called)
+
+    @mock.patch.object(manager, '_is_device_changed', return_value=False)
+    def test_set_hvdev_compares_synced_state(self, mock_changed):
+        self.tracker.set_hvdevs(self._fake_hvdevs_from_db())
+        self.assertEqual(3, mock_changed.call_count)
+        mock_changed.reset_mock()
+        hvdevs = self._fake_hvdevs_from_db()
+        hvdevs[1]['label'] = 'new-label'
+        self.tracker.set_hvdevs(hvdevs)
+        # only the device which the hypervisor reports differently is
+        # compared with its object
+        self.assertEqual(1, mock_changed.call_count)
+        self.assertEqual('0000:00:00.2', mock_changed.call_args[0][0].address)
+
+    @mock.patch('nova.objects.InstancePCIRequests.get_by_instance')
+    def test_set_hvdev_unchanged_drops_stale(self, mock_get):
+        self._create_pci_requests_object(mock_get,
+            [{'count': 1, 'spec': [{'vendor_id': 'v1'}]}])
+        self.tracker._claim_instance(mock.sentinel.context, self.inst)
+        hvdevs = self._fake_hvdevs_from_db()
+        hvdevs[1]['vendor_id'] = 'v2'
+        self.tracker.set_hvdevs(copy.deepcopy(hvdevs))
+        self.assertEqual(['0000:00:00.2'], self.tracker.stale.keys())
+        # the change is reverted before the device is freed
+        self.tracker.set_hvdevs(self._fake_hvdevs_from_db())
+        self.assertEqual({}, self.tracker.stale)
 
     def test_save_removed(self):
-        self.stubs.Set(db, "pci_device_update", self._fake_pci_device_update)
+        self.stubs.Set(db, "pci_device_update_multi",
+                       self._fake_pci_device_update_multi)
         self.stubs.Set(db, "pci_device_destroy", self._fake_pci_device_destroy)
         self.destroy_called = 0
         self.assertEqual(len(self.tracker.pci_devs), 3)
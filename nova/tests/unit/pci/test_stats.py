@@ -135,6 +135,14 @@ class PciDeviceStatsTestCase(test.NoDBTestCase):
         self.assertEqual(set([d['count'] for d in self.pci_stats]),
                          set([1, 2]))
 
+    def test_support_requests_unset_property(self):
+        requests = [objects.InstancePCIRequest(count=2,
+                        spec=[{'vendor_id': 'v1', 'physical_network': None}])]
+        self.assertTrue(self.pci_stats.support_requests(requests))
+        requests = [objects.InstancePCIRequest(count=1,
+                        spec=[{'vendor_id': 'v1', 'numa_node': None}])]
+        self.assertFalse(self.pci_stats.support_requests(requests))
+
     def test_apply_requests(self):
         self.pci_stats.apply_requests(pci_requests)
         self.assertEqual(len(self.pci_stats.pools), 2)
@@ -261,12 +269,12 @@ class PciDeviceStatsWithTagsTestCase(test.NoDBTestCase):
         self._assertPoolContent(self.pci_stats.pools[0], '1137', '0072',
                                 len(self.pci_untagged_devices))
         self.assertEqual(self.pci_untagged_devices,
-                         self.pci_stats.pools[0]['devices'])
+                         self.pci_stats.pools[0]['devices'].values())
         self._assertPoolContent(self.pci_stats.pools[1], '1137', '0071',
                                 len(self.pci_tagged_devices),
                                 physical_network='physnet1')
         self.assertEqual(self.pci_tagged_devices,
-                         self.pci_stats.pools[1]['devices'])
+                         self.pci_stats.pools[1]['devices'].values())
 
     def test_add_devices(self, mock_get_dev_filter):
         mock_get_dev_filter.return_value = self.pci_wlist
@@ -329,3 +337,107 @@ class PciDeviceStatsWithTagsTestCase(test.NoDBTestCase):
         dev2 = self.pci_tagged_devices.pop()
         self.pci_stats.remove_device(dev2)
         self._assertPools()
+
+
+class PciDeviceStatsScaleTestCase(test.NoDBTestCase):
+    """SR-IOV host exposing 16 PFs with 256 VFs each."""
+
+    num_pfs = 16
+    num_vfs = 256
+
+    def setUp(self):
+        super(PciDeviceStatsScaleTestCase, self).setUp()
+        patcher = mock.patch.object(whitelist, 'get_pci_device_devspec',
+                                    side_effect=self._fake_devspec)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.pci_stats = stats.PciDeviceStats()
+        self.devs = []
+        for pf in range(self.num_pfs):
+            for vf in range(self.num_vfs):
+                self.devs.append(objects.PciDevice.create({
+                    'compute_node_id': 1,
+                    'address': '0000:%02x:%02x.%d' % (pf, vf / 8, vf % 8),
+                    'vendor_id': '8086',
+                    'product_id': '10ed',
+                    'status': 'available',
+                    'request_id': None,
+                    'numa_node': pf % 2}))
+        map(self.pci_stats.add_device, self.devs)
+
+    @staticmethod
+    def _fake_devspec(dev):
+        devspec = mock.Mock()
+        # one physical network per PF
+        devspec.get_tags.return_value = {
+            'physical_network': 'physnet%s' % dev.address.split(':')[1]}
+        return devspec
+
+    def _physnet_request(self, pf, count=1):
+        return objects.InstancePCIRequest(count=count,
+            spec=[{'vendor_id': '8086',
+                   'physical_network': 'physnet%02x' % pf}])
+
+    def test_add_device(self):
+        self.assertEqual(self.num_pfs, len(self.pci_stats.pools))
+        for pool in self.pci_stats.pools:
+            self.assertEqual(self.num_vfs, pool['count'])
+            self.assertEqual(self.num_vfs, len(pool['devices']))
+
+    def test_remove_device(self):
+        for dev in self.devs[:self.num_vfs]:
+            self.pci_stats.remove_device(dev)
+        self.assertEqual(self.num_pfs - 1, len(self.pci_stats.pools))
+        self.assertRaises(exception.PciDevicePoolEmpty,
+                          self.pci_stats.remove_device, self.devs[0])
+        # the emptied pool is created again when its device comes back
+        self.pci_stats.add_device(self.devs[0])
+        self.assertEqual(self.num_pfs, len(self.pci_stats.pools))
+
+    def test_remove_device_by_address(self):
+        dev = self.devs[self.num_vfs + 5]
+        self.pci_stats.remove_device(dev)
+        pool = self.pci_stats.pools[1]
+        self.assertEqual(self.num_vfs - 1, pool['count'])
+        self.assertNotIn(dev.address, pool['devices'])
+        expected = [d for d in self.devs[self.num_vfs:2 * self.num_vfs]
+                    if d is not dev]
+        self.assertEqual(expected, pool['devices'].values())
+
+    def test_match_pools(self):
+        keys = self.pci_stats._match_pools(
+            [{'vendor_id': '8086', 'physical_network': 'physnet03'}])
+        self.assertEqual([self.pci_stats.pools[3]],
+                         [self.pci_stats._pool_index[key] for key in keys])
+        keys = self.pci_stats._match_pools([{'vendor_id': '8086'}])
+        self.assertEqual(self.pci_stats.pools,
+                         [self.pci_stats._pool_index[key] for key in keys])
+        self.assertEqual([], self.pci_stats._match_pools(
+            [{'vendor_id': '8086', 'physical_network': 'physnet99'}]))
+
+    def test_support_requests(self):
+        requests = [self._physnet_request(pf, count=self.num_vfs)
+                    for pf in range(self.num_pfs)]
+        self.assertTrue(self.pci_stats.support_requests(requests))
+        requests.append(self._physnet_request(0))
+        self.assertFalse(self.pci_stats.support_requests(requests))
+        # the devices are neither copied nor consumed
+        for pool in self.pci_stats.pools:
+            self.assertEqual(self.num_vfs, pool['count'])
+            self.assertEqual(self.num_vfs, len(pool['devices']))
+
+    def test_support_requests_numa(self):
+        cells = [objects.NUMACell(id=1, cpuset=set(), memory=0)]
+        self.assertTrue(self.pci_stats.support_requests(
+            [self._physnet_request(1)], cells))
+        self.assertFalse(self.pci_stats.support_requests(
+            [self._physnet_request(2)], cells))
+
+    def test_apply_requests(self):
+        self.pci_stats.apply_requests(
+            [self._physnet_request(3, count=self.num_vfs)])
+        self.assertEqual(self.num_pfs - 1, len(self.pci_stats.pools))
+        # the pool dropped by the request must not be found any more
+        self.assertRaises(exception.PciDevicePoolEmpty,
+                          self.pci_stats.remove_device,
+                          self.devs[3 * self.num_vfs])
@@ -48,3 +48,20 @@ class TestComputeFilter(test.NoDBTestCase):
         service_up_mock.return_value = False
         self.assertFalse(filt_cls.host_passes(host, filter_properties))
         service_up_mock.assert_called_once_with(service)
+
+    @mock.patch('nova.servicegroup.API.services_are_up')
+    def test_compute_filter_all(self, services_up_mock, service_up_mock):
+        filt_cls = compute_filter.ComputeFilter()
+        filter_properties = {'instance_type': {'memory_mb': 1024}}
+        services = [{'disabled': False}, {'disabled': True},
+                    {'disabled': False}, {'disabled': False}]
+        hosts = [fakes.FakeHostState('host%d' % i, 'node%d' % i,
+                                     {'free_ram_mb': 1024,
+                                      'service': service})
+                 for i, service in enumerate(services)]
+        services_up_mock.return_value = [True, False, True]
+        self.assertEqual([hosts[0], hosts[3]],
+                         list(filt_cls.filter_all(hosts, filter_properties)))
+        services_up_mock.assert_called_once_with(
+            [services[0], services[2], services[3]])
+        self.assertFalse(service_up_mock.called)
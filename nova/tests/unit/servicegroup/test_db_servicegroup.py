@@ -58,6 +58,42 @@ class DBServiceGroupTestCase(test.NoDBTestCase):
         result = self.servicegroup_api.service_is_up(service_ref)
         self.assertFalse(result)
 
+    @mock.patch('oslo_utils.timeutils.utcnow')
+    def test_services_are_up(self, now_mock):
+        fts_func = datetime.datetime.fromtimestamp
+        fake_now = 1000
+        now_mock.return_value = fts_func(fake_now)
+        service_refs = [
+            {'host': 'fake-host%d' % i, 'topic': 'compute',
+             'updated_at': fts_func(fake_now - self.down_time + offset),
+             'created_at': fts_func(fake_now - self.down_time + offset)}
+            for i, offset in enumerate((0, -1, 1))]
+
+        result = self.servicegroup_api.services_are_up(service_refs)
+        self.assertEqual([True, False, True], result)
+
+    @mock.patch('oslo_utils.timeutils.utcnow')
+    def test_is_up_cached(self, now_mock):
+        self.flags(servicegroup_cache_time=10)
+        fts_func = datetime.datetime.fromtimestamp
+        fake_now = 1000
+        now_mock.return_value = fts_func(fake_now)
+        service_ref = {'host': 'fake-host', 'topic': 'compute',
+                       'updated_at': fts_func(fake_now),
+                       'created_at': fts_func(fake_now)}
+        driver = self.servicegroup_api._driver
+        with mock.patch.object(driver, 'is_up',
+                               wraps=driver.is_up) as is_up_mock:
+            self.assertTrue(self.servicegroup_api.service_is_up(service_ref))
+            self.assertEqual([True], self.servicegroup_api.services_are_up(
+                [service_ref]))
+            self.assertEqual(1, is_up_mock.call_count)
+
+            # the cached answer expires
+            now_mock.return_value = fts_func(fake_now + self.down_time + 1)
+            self.assertFalse(self.servicegroup_api.service_is_up(service_ref))
+            self.assertEqual(2, is_up_mock.call_count)
+
     @mock.patch.object(objects.ServiceList, 'get_by_topic')
     def test_get_all(self, ga_mock):
         hosts = ['fake-host1', 'fake-host2', 'fake-host3']
@@ -0,0 +1,291 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import os
+
+import fixtures
+import mock
+from oslo_config import cfg
+from oslo_utils import timeutils
+
+from nova import servicegroup
+from nova.servicegroup.drivers import file as file_driver
+from nova import test
+
+CONF = cfg.CONF
+CONF.import_opt('path', 'nova.servicegroup.drivers.file',
+                group='file_servicegroup')
+
+
+class FileServiceGroupTestCase(test.NoDBTestCase):
+
+    def setUp(self):
+        super(FileServiceGroupTestCase, self).setUp()
+        self.path = self.useFixture(fixtures.TempDir()).path
+        self.flags(servicegroup_driver='file', service_down_time=15)
+        self.flags(path=self.path, group='file_servicegroup')
+        self.servicegroup_api = servicegroup.API()
+        self.driver = self.servicegroup_api._driver
+        self.watcher = file_driver._WATCHER
+        self.addCleanup(self.watcher.stop)
+        patcher = mock.patch('nova.openstack.common.loopingcall.'
+                             'FixedIntervalLoopingCall.start')
+        self.start_mock = patcher.start()
+        self.addCleanup(patcher.stop)
+        timeutils.set_time_override()
+        self.addCleanup(timeutils.clear_time_override)
+
+    def _report(self, host, topic='compute'):
+        service = mock.MagicMock(host=host, topic=topic,
+                                 model_disconnected=False)
+        self.driver._report_state(service)
+        self.assertFalse(service.model_disconnected)
+
+    def _refresh(self, topic='compute'):
+        self.watcher.refresh_view(topic)
+
+    def test_join(self):
+        service = mock.MagicMock(report_interval=1)
+
+        self.servicegroup_api.join('fake-host', 'compute', service)
+        fn = self.driver._report_state
+        service.tg.add_timer.assert_called_once_with(1, fn, 5, service)
+
+    def test_report_state(self):
+        self._report('fake-host')
+
+        self.assertTrue(os.path.exists(
+            os.path.join(self.path, 'compute', 'fake-host')))
+
+    def test_is_up(self):
+        service_ref = {'host': 'fake-host', 'topic': 'compute'}
+        self.assertFalse(self.servicegroup_api.service_is_up(service_ref))
+        self.assertEqual(1, self.start_mock.call_count)
+
+        self._report('fake-host')
+        self._refresh()
+        self.assertTrue(self.servicegroup_api.service_is_up(service_ref))
+
+        timeutils.advance_time_seconds(16)
+        self.assertFalse(self.servicegroup_api.service_is_up(service_ref))
+        # The group is only watched once
+        self.assertEqual(1, self.start_mock.call_count)
+
+    def test_is_up_loads_view_on_first_query(self):
+        self._report('fake-host')
+
+        self.assertTrue(self.servicegroup_api.service_is_up(
+            {'host': 'fake-host', 'topic': 'compute'}))
+
+    def test_is_up_does_not_hit_the_store(self):
+        self._report('fake-host')
+        self.assertEqual(['fake-host'], self.driver.get_all('compute'))
+
+        with mock.patch.object(os, 'stat') as stat_mock:
+            with mock.patch.object(os, 'listdir') as listdir_mock:
+                for i in range(100):
+                    self.assertTrue(self.driver.is_up(
+                        {'host': 'fake-host', 'topic': 'compute'}))
+        self.assertFalse(stat_mock.called)
+        self.assertFalse(listdir_mock.called)
+
+    def test_get_all(self):
+        for host in ('fake-host1', 'fake-host2', 'fake-host3'):
+            self._report(host)
+        self._report('fake-host4', topic='scheduler')
+        timeutils.advance_time_seconds(10)
+        self._report('fake-host2')
+        self._refresh()
+
+        self.assertEqual(['fake-host1', 'fake-host2', 'fake-host3'],
+                         sorted(self.servicegroup_api.get_all('compute')))
+
+        timeutils.advance_time_seconds(10)
+        self.assertEqual(['fake-host2'],
+                         self.servicegroup_api.get_all('compute'))
+
+    def test_failover(self):
+        service_ref = {'host': 'fake-host', 'topic': 'compute'}
+        self._report('fake-host')
+        self._refresh()
+        self.assertTrue(self.servicegroup_api.service_is_up(service_ref))
+
+        # The member is reported down as soon as its heartbeat is older than
+        # service_down_time, and back up after its next report is watched.
+        timeutils.advance_time_seconds(15)
+        self.assertTrue(self.servicegroup_api.service_is_up(service_ref))
+        timeutils.advance_time_seconds(1)
+        self.assertFalse(self.servicegroup_api.service_is_up(service_ref))
+
+        self._report('fake-host')
+        self.assertFalse(self.servicegroup_api.service_is_up(service_ref))
+        self._refresh()
+        self.assertTrue(self.servicegroup_api.service_is_up(service_ref))
+
+    def test_refresh_drops_removed_members(self):
+        self._report('fake-host')
+        self._refresh()
+        self.assertEqual(['fake-host'], self.driver.get_all('compute'))
+
+        os.unlink(os.path.join(self.path, 'compute', 'fake-host'))
+        self._refresh()
+        self.assertEqual([], self.driver.get_all('compute'))
+
+    def test_refresh_keeps_view_on_error(self):
+        self._report('fake-host')
+        self._refresh()
+
+        with mock.patch.object(os, 'listdir', side_effect=OSError()):
+            self._refresh()
+        self.assertEqual(['fake-host'], self.driver.get_all('compute'))
+
+    def test_failed_first_scan_watches_group_once(self):
+        service_ref = {'host': 'fake-host', 'topic': 'compute'}
+        with mock.patch.object(os, 'listdir', side_effect=OSError()):
+            self.assertFalse(self.driver.is_up(service_ref))
+            self.assertFalse(self.driver.is_up(service_ref))
+        self.assertEqual(1, self.start_mock.call_count)
+
+        self._report('fake-host')
+        self._refresh()
+        self.assertTrue(self.driver.is_up(service_ref))
+        self.assertEqual(1, self.start_mock.call_count)
+
+    def test_groups_are_watched_once_per_process(self):
+        other_driver = servicegroup.API()._driver
+        self._report('fake-host')
+
+        self.assertEqual(['fake-host'], self.driver.get_all('compute'))
+        self.assertEqual(['fake-host'], other_driver.get_all('compute'))
+        self.driver.get_all('scheduler')
+        # A single watcher rescans all the groups of the process
+        self.assertEqual(1, self.start_mock.call_count)
+        self.assertEqual(set(['compute', 'scheduler']), self.watcher._polled)
+
+    def test_stop(self):
+        self.driver.get_all('compute')
+        self.driver.get_all('scheduler')
+
+        with mock.patch('nova.openstack.common.loopingcall.'
+                        'FixedIntervalLoopingCall.stop') as stop_mock:
+            self.servicegroup_api.stop()
+        self.assertEqual(1, stop_mock.call_count)
+        self.assertIsNone(self.watcher._timer)
+        self.assertEqual(set(), self.watcher._polled)
+        self.assertEqual({}, self.watcher.views)
+
+
+class FileServiceGroupInotifyTestCase(test.NoDBTestCase):
+
+    def setUp(self):
+        super(FileServiceGroupInotifyTestCase, self).setUp()
+        self.path = self.useFixture(fixtures.TempDir()).path
+        self.flags(servicegroup_driver='file', service_down_time=15)
+        self.flags(path=self.path, use_inotify=True,
+                   group='file_servicegroup')
+        self.pyinotify = mock.Mock(IN_CREATE=0x100, IN_ATTRIB=0x4,
+                                   IN_DELETE=0x200, IN_MOVED_FROM=0x40,
+                                   IN_MOVED_TO=0x80, IN_IGNORED=0x8000)
+        self.useFixture(fixtures.MonkeyPatch(
+            'nova.servicegroup.drivers.file.pyinotify', self.pyinotify))
+        patcher = mock.patch('eventlet.spawn')
+        self.spawn_mock = patcher.start()
+        self.addCleanup(patcher.stop)
+        patcher = mock.patch('nova.openstack.common.loopingcall.'
+                             'FixedIntervalLoopingCall.start')
+        self.start_mock = patcher.start()
+        self.addCleanup(patcher.stop)
+        self.servicegroup_api = servicegroup.API()
+        self.driver = self.servicegroup_api._driver
+        self.watcher = file_driver._WATCHER
+        self.addCleanup(self.watcher.stop)
+        timeutils.set_time_override()
+        self.addCleanup(timeutils.clear_time_override)
+        self.watch_manager = self.pyinotify.WatchManager.return_value
+
+    def _report(self, host, topic='compute'):
+        service = mock.MagicMock(host=host, topic=topic,
+                                 model_disconnected=False)
+        self.driver._report_state(service)
+
+    def _notify(self, mask, host, topic='compute'):
+        proc_fun = self.watch_manager.add_watch.call_args[1]['proc_fun']
+        event = mock.Mock(mask=mask, dir=False,
+                          pathname=os.path.join(self.path, topic, host))
+        event.name = host
+        proc_fun(event)
+
+    def test_watch(self):
+        self._report('fake-host')
+        self.assertEqual(['fake-host'], self.driver.get_all('compute'))
+        self.driver.get_all('scheduler')
+
+        self.assertEqual(1, self.spawn_mock.call_count)
+        self.assertEqual(
+            [os.path.join(self.path, 'compute'),
+             os.path.join(self.path, 'scheduler')],
+            [c[0][0] for c in self.watch_manager.add_watch.call_args_list])
+        self.assertFalse(self.start_mock.called)
+
+    def test_events_update_the_member_only(self):
+        service_ref = {'host': 'fake-host', 'topic': 'compute'}
+        self.assertFalse(self.driver.is_up(service_ref))
+
+        self._report('fake-host')
+        with mock.patch.object(os, 'listdir') as listdir_mock:
+            self._notify(self.pyinotify.IN_CREATE, 'fake-host')
+            self.assertTrue(self.driver.is_up(service_ref))
+
+            timeutils.advance_time_seconds(16)
+            self.assertFalse(self.driver.is_up(service_ref))
+            self._report('fake-host')
+            self._notify(self.pyinotify.IN_ATTRIB, 'fake-host')
+            self.assertTrue(self.driver.is_up(service_ref))
+
+            os.unlink(os.path.join(self.path, 'compute', 'fake-host'))
+            self._notify(self.pyinotify.IN_DELETE, 'fake-host')
+            self.assertEqual([], self.driver.get_all('compute'))
+        self.assertFalse(listdir_mock.called)
+
+    def test_overflow_rescans_the_groups(self):
+        self.driver.get_all('compute')
+        self._report('fake-host')
+
+        default_proc_fun = self.pyinotify.Notifier.call_args[1][
+            'default_proc_fun']
+        default_proc_fun(mock.Mock())
+        self.assertEqual(['fake-host'], self.driver.get_all('compute'))
+
+    def test_fall_back_to_rescan_if_watch_fails(self):
+        self.watch_manager.add_watch.side_effect = OSError()
+        self._report('fake-host')
+
+        self.assertEqual(['fake-host'], self.driver.get_all('compute'))
+        self.assertEqual(1, self.start_mock.call_count)
+        self.assertEqual(set(['compute']), self.watcher._polled)
+
+    def test_fall_back_to_rescan_without_pyinotify(self):
+        self.useFixture(fixtures.MonkeyPatch(
+            'nova.servicegroup.drivers.file.pyinotify', None))
+
+        self.driver.get_all('compute')
+        self.assertEqual(1, self.start_mock.call_count)
+        self.assertFalse(self.spawn_mock.called)
+
+    def test_stop(self):
+        self.driver.get_all('compute')
+
+        self.servicegroup_api.stop()
+        self.spawn_mock.return_value.kill.assert_called_once_with()
+        self.pyinotify.Notifier.return_value.stop.assert_called_once_with()
+        self.assertIsNone(self.watcher._notifier)
+        self.assertEqual({}, self.watcher.views)
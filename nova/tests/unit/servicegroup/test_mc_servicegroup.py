@@ -47,6 +47,17 @@ class MemcachedServiceGroupTestCase(test.NoDBTestCase):
         self.assertTrue(self.servicegroup_api.service_is_up(service_ref))
         self.mc_client.get.assert_called_once_with('compute:fake-host')
 
+    def test_services_are_up(self):
+        service_refs = [{'host': host, 'topic': 'compute'}
+                        for host in ('fake-host1', 'fake-host2')]
+        self.mc_client.get_multi.return_value = {'compute:fake-host2': True}
+
+        self.assertEqual([False, True],
+                         self.servicegroup_api.services_are_up(service_refs))
+        self.mc_client.get_multi.assert_called_once_with(
+            ['compute:fake-host1', 'compute:fake-host2'])
+        self.assertFalse(self.mc_client.get.called)
+
     @mock.patch.object(objects.ServiceList, 'get_by_topic')
     def test_get_all(self, ga_mock):
         hosts = ['fake-host1', 'fake-host2', 'fake-host3']
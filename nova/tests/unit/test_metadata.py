@@ -36,6 +36,7 @@ from nova.api.metadata import handler
 from nova.api.metadata import password
 from nova import block_device
 from nova.compute import flavors
+from nova.compute import metadata_cache
 from nova.conductor import api as conductor_api
 from nova import context
 from nova import db
@@ -44,6 +45,7 @@ from nova import exception
 from nova.network import api as network_api
 from nova.network import model as network_model
 from nova import objects
+from nova.openstack.common import memorycache
 from nova import test
 from nova.tests.unit.api.openstack import fakes
 from nova.tests.unit import fake_block_device
@@ -903,6 +905,103 @@ class MetadataHandlerTestCase(test.TestCase):
         self._metadata_handler_with_remote_address(hnd)
         self.assertEqual(2, get_by_uuid.call_count)
 
+    @mock.patch.object(base, 'get_metadata_by_address')
+    def test_metadata_handler_cache_stats(self, get_by_address):
+        get_by_address.return_value = self.mdinst
+        self.flags(metadata_cache_expiration=15)
+        hnd = handler.MetadataRequestHandler()
+        self._metadata_handler_with_remote_address(hnd)
+        self._metadata_handler_with_remote_address(hnd)
+        self._metadata_handler_with_remote_address(hnd)
+        self.assertEqual({'hits': 2, 'misses': 1, 'hit_ratio': 2.0 / 3},
+                         hnd.get_cache_stats())
+
+    def _get_shared_cache(self):
+        # NOTE: all the services share one client, like with memcached
+        client = memorycache.Client()
+        self.stubs.Set(memorycache, 'get_client', lambda: client)
+        self.stubs.Set(metadata_cache, '_CACHE', None)
+        self.flags(metadata_cache_expiration=15, metadata_precompute=True)
+
+    def _fake_network_info(self, address):
+        return network_model.NetworkInfo([network_model.VIF(
+            network=network_model.Network(subnets=[network_model.Subnet(
+                ips=[network_model.FixedIP(address=address)])]))])
+
+    @mock.patch.object(base, 'get_metadata_by_address')
+    @mock.patch.object(base, 'get_metadata_by_instance_id')
+    def test_metadata_handler_precomputed(self, get_by_uuid,
+                                          get_by_address):
+        self._get_shared_cache()
+        get_by_uuid.return_value = self.mdinst
+        get_by_address.return_value = self.mdinst
+        hnd = handler.MetadataRequestHandler()
+
+        metadata_cache.update_instance_metadata(
+            self.instance, self._fake_network_info('192.192.192.2'))
+        get_by_uuid.assert_called_once_with(self.instance.uuid,
+                                            '192.192.192.2')
+        self._metadata_handler_with_remote_address(hnd)
+        self._metadata_handler_with_remote_address(hnd)
+        self.assertFalse(get_by_address.called)
+        self.assertEqual(2, hnd.get_cache_stats()['hits'])
+
+        metadata_cache.delete_instance_metadata(self.instance.uuid)
+        self._metadata_handler_with_remote_address(hnd)
+        self.assertEqual(1, get_by_address.call_count)
+
+    @mock.patch.object(base, 'get_metadata_by_instance_id')
+    def test_metadata_precompute_disabled(self, get_by_uuid):
+        self._get_shared_cache()
+        self.flags(metadata_precompute=False)
+        hnd = handler.MetadataRequestHandler()
+        hnd._cache.set(self.instance.uuid, '192.192.192.2', self.mdinst,
+                       15)
+
+        metadata_cache.update_instance_metadata(
+            self.instance, self._fake_network_info('192.192.192.2'))
+        self.assertFalse(get_by_uuid.called)
+        self.assertIsNone(hnd._cache.get_by_address('192.192.192.2'))
+
+    def test_metadata_cache_delete_keeps_reassigned_address(self):
+        self._get_shared_cache()
+        cache = metadata_cache.MetadataCache()
+        old_md = mock.sentinel.old_md
+        new_md = mock.sentinel.new_md
+        cache.set('old-uuid', '192.192.192.2', old_md, 15)
+        cache.set('old-uuid', None, old_md, 15)
+        cache.set('new-uuid', '192.192.192.2', new_md, 15)
+
+        cache.delete('old-uuid')
+        self.assertIsNone(cache.get_by_instance_id('old-uuid', None))
+        self.assertIsNone(cache.get_by_instance_id('old-uuid',
+                                                   '192.192.192.2'))
+        self.assertEqual(new_md, cache.get_by_address('192.192.192.2'))
+        self.assertEqual(new_md, cache.get_by_instance_id('new-uuid',
+                                                          '192.192.192.2'))
+
+    def test_metadata_cache_concurrent_set(self):
+        self._get_shared_cache()
+        cache = metadata_cache.MetadataCache()
+        other = metadata_cache.MetadataCache()
+        md = mock.sentinel.md
+        other_md = mock.sentinel.other_md
+        orig_add = cache._add
+
+        def racing_add(key, value, expiration):
+            # another service starts a generation first
+            other.set('uuid', '192.192.192.3', other_md, 15)
+            return orig_add(key, value, expiration)
+
+        with mock.patch.object(cache, '_add', side_effect=racing_add):
+            cache.set('uuid', '192.192.192.2', md, 15)
+        self.assertEqual(md, cache.get_by_address('192.192.192.2'))
+        self.assertEqual(other_md, cache.get_by_address('192.192.192.3'))
+
+        other.delete('uuid')
+        self.assertIsNone(cache.get_by_address('192.192.192.2'))
+        self.assertIsNone(cache.get_by_address('192.192.192.3'))
+
 
 class MetadataPasswordTestCase(test.TestCase):
     def setUp(self):
@@ -57,6 +57,25 @@ class PolicyFileTestCase(test.NoDBTestCase):
             self.assertRaises(exception.PolicyNotAuthorized, policy.enforce,
                               self.context, action, self.target)
 
+    @mock.patch('time.time')
+    @mock.patch.object(common_policy.Enforcer, 'load_rules')
+    def test_policy_files_checked_every_interval(self, mock_load, mock_time):
+        self.flags(policy_reload_interval=10)
+        policy.reset()
+        mock_time.return_value = 100
+        policy.init()
+        policy._ENFORCER.load_rules()
+        policy._ENFORCER.load_rules()
+        self.assertEqual(1, mock_load.call_count)
+
+        mock_time.return_value = 110
+        policy._ENFORCER.load_rules()
+        policy._ENFORCER.load_rules()
+        self.assertEqual(2, mock_load.call_count)
+
+        policy._ENFORCER.load_rules(True)
+        self.assertEqual(3, mock_load.call_count)
+
 
 class PolicyTestCase(test.NoDBTestCase):
     def setUp(self):
@@ -144,6 +163,79 @@ class PolicyTestCase(test.NoDBTestCase):
         policy.enforce(admin_context, lowercase_action, self.target)
         policy.enforce(admin_context, uppercase_action, self.target)
 
+    def test_compiled_rules(self):
+        enforcer = policy._ENFORCER
+        contexts = [self.context,
+                    context.RequestContext('fake', 'other', roles=['admin']),
+                    context.RequestContext('fake', 'fake', roles=[])]
+        targets = [{}, {'project_id': 'fake'}, {'project_id': 'other'}]
+        for rule in ('true', 'example:allowed', 'example:denied',
+                     'example:my_file', 'example:early_and_fail',
+                     'example:early_or_success', 'example:lowercase_admin',
+                     'example:uppercase_admin'):
+            for ctxt in contexts:
+                creds = ctxt.to_dict()
+                for target in targets:
+                    self.assertEqual(
+                        enforcer.rules[rule](target, creds, enforcer),
+                        enforcer.check(rule, target, creds),
+                        rule)
+
+    def _test_cached_results(self, action, targets):
+        real_call = common_policy.GenericCheck.__call__
+        with mock.patch.object(common_policy.GenericCheck, '__call__',
+                               autospec=True,
+                               side_effect=real_call) as mock_call:
+            for target in targets:
+                try:
+                    policy.enforce(self.context, action, target)
+                except exception.PolicyNotAuthorized:
+                    pass
+        return mock_call.call_count
+
+    def test_enforce_caches_results(self):
+        self.assertEqual(2, self._test_cached_results(
+            'example:my_file', [{'project_id': 'fake'},
+                                {'project_id': 'fake', 'foo': 'bar'},
+                                {'project_id': 'another'},
+                                {'project_id': 'another'}]))
+
+    def test_enforce_caches_results_per_context(self):
+        self._test_cached_results('example:my_file', [{'project_id': 'fake'}])
+        self.context = context.RequestContext('fake', 'fake',
+                                              roles=['member'])
+        self.assertEqual(1, self._test_cached_results(
+            'example:my_file', [{'project_id': 'fake'}]))
+
+    def test_enforce_caches_results_per_credentials(self):
+        self._test_cached_results('example:my_file', [{'project_id': 'fake'}])
+        self.context.project_id = 'another'
+        self.assertEqual(1, self._test_cached_results(
+            'example:my_file', [{'project_id': 'fake'}]))
+
+    @mock.patch.object(policy, '_MAX_CACHED_RESULTS', 2)
+    def test_enforce_caches_bounded_results(self):
+        self.assertEqual(4, self._test_cached_results(
+            'example:my_file', [{'project_id': 'fake'},
+                                {'project_id': 'another'},
+                                {'project_id': 'third'},
+                                {'project_id': 'fake'}]))
+        self.assertEqual(2, len(self.context._policy_results))
+
+    def test_set_rules_drops_cached_results(self):
+        policy.enforce(self.context, 'example:allowed', self.target)
+        policy.set_rules({'example:allowed': common_policy.parse_rule('!')})
+        self.assertRaises(exception.PolicyNotAuthorized, policy.enforce,
+                          self.context, 'example:allowed', self.target)
+
+    @mock.patch.object(urlrequest, 'urlopen')
+    def test_enforce_http_not_cached(self, mock_urlrequest):
+        mock_urlrequest.side_effect = [StringIO.StringIO("True"),
+                                       StringIO.StringIO("False")]
+        policy.enforce(self.context, 'example:get_http', self.target)
+        self.assertRaises(exception.PolicyNotAuthorized, policy.enforce,
+                          self.context, 'example:get_http', self.target)
+
 
 class DefaultPolicyTestCase(test.NoDBTestCase):
 
@@ -16,6 +16,7 @@
 
 import datetime
 
+import mock
 from oslo_config import cfg
 from oslo_utils import timeutils
 
@@ -29,6 +30,7 @@ from nova import exception
 from nova import quota
 from nova import test
 import nova.tests.unit.image.fake
+from nova import utils
 
 CONF = cfg.CONF
 CONF.import_opt('compute_driver', 'nova.virt.driver')
@@ -2309,6 +2311,31 @@ class DbQuotaDriverTestCase(test.TestCase):
                 ])
         self.assertEqual(result, ['resv-1', 'resv-2', 'resv-3'])
 
+    def test_reserve_optimistic(self):
+        self.driver = quota.OptimisticDbQuotaDriver()
+        self._stub_get_project_quotas()
+        self._stub_quota_reserve()
+
+        def fake_quota_reserve_optimistic(context, resources, quotas,
+                                          user_quotas, deltas, expire,
+                                          until_refresh, max_age,
+                                          project_id=None, user_id=None):
+            self.calls.append(('quota_reserve_optimistic', expire,
+                               until_refresh, max_age))
+            return ['resv-1']
+        self.stubs.Set(db, 'quota_reserve_optimistic',
+                       fake_quota_reserve_optimistic)
+        expire = timeutils.utcnow() + datetime.timedelta(seconds=120)
+        result = self.driver.reserve(FakeContext('test_project', 'test_class'),
+                                     quota.QUOTAS._resources,
+                                     dict(instances=2), expire=expire)
+
+        self.assertEqual(self.calls, [
+                'get_project_quotas',
+                ('quota_reserve_optimistic', expire, 0, 0),
+                ])
+        self.assertEqual(result, ['resv-1'])
+
     def test_usage_reset(self):
         calls = []
 
@@ -2340,6 +2367,94 @@ class DbQuotaDriverTestCase(test.TestCase):
         self.assertEqual(calls, exemplar)
 
 
+class CountingQuotaDriverTestCase(test.TestCase):
+    def setUp(self):
+        super(CountingQuotaDriverTestCase, self).setUp()
+        self.flags(quota_instances=3, quota_cores=8, quota_ram=4096)
+        self.context = context.RequestContext('fake_user', 'fake_project')
+        self.driver = quota.CountingQuotaDriver()
+        self.quotas = quota.QuotaEngine(quota_driver_class=self.driver)
+        self.quotas.register_resources(quota.resources)
+
+    def _create_instance(self, user_id='fake_user', vcpus=2):
+        db.instance_create(self.context, {'project_id': 'fake_project',
+                                          'user_id': user_id,
+                                          'vcpus': vcpus,
+                                          'memory_mb': 512})
+
+    def test_reserve(self):
+        self._create_instance()
+        self._create_instance(user_id='other_user')
+
+        with mock.patch.object(utils, 'synchronized',
+                               wraps=utils.synchronized) as synchronized:
+            reservations = self.quotas.reserve(self.context, instances=1,
+                                               cores=4, ram=512)
+        self.assertEqual([], reservations)
+        synchronized.assert_called_once_with('quota-fake_project')
+        usages = db.quota_usage_get_all_by_project(self.context,
+                                                   'fake_project')
+        for res in ('instances', 'cores', 'ram'):
+            self.assertNotIn(res, usages)
+
+    def test_reserve_resets_tracked_usages(self):
+        sqa_api._quota_usage_create('fake_project', 'fake_user',
+                                    'instances', 1, 0, None)
+        sqa_api._quota_usage_create('fake_project', 'fake_user',
+                                    'security_groups', 1, 0, None)
+
+        self.quotas.reserve(self.context, instances=1)
+        usages = db.quota_usage_get_all_by_project(self.context,
+                                                   'fake_project')
+        self.assertEqual(-1, usages['instances']['in_use'])
+        self.assertEqual(1, usages['security_groups']['in_use'])
+
+    def test_reserve_over_quota(self):
+        self._create_instance()
+        self._create_instance(user_id='other_user')
+
+        exc = self.assertRaises(exception.OverQuota, self.quotas.reserve,
+                                self.context, instances=2, cores=2)
+        self.assertEqual(['instances'], exc.kwargs['overs'])
+        self.assertEqual({'in_use': 2, 'reserved': 0},
+                         exc.kwargs['usages']['instances'])
+
+        # deltas below zero are always fine
+        self.quotas.reserve(self.context, instances=-1, cores=-2)
+
+    def test_reserve_over_user_quota(self):
+        db.quota_create(context.get_admin_context(), 'fake_project', 'cores',
+                        2, user_id='fake_user')
+        self._create_instance()
+
+        exc = self.assertRaises(exception.OverQuota, self.quotas.reserve,
+                                self.context, instances=1, cores=2)
+        self.assertEqual(['cores'], exc.kwargs['overs'])
+
+    def test_commit_and_rollback(self):
+        with mock.patch.object(db, 'reservation_commit') as mock_commit:
+            with mock.patch.object(db, 'reservation_rollback') as mock_rb:
+                self.quotas.commit(self.context, ['fake_reservation'])
+                self.quotas.rollback(self.context, ['fake_reservation'])
+        self.assertFalse(mock_commit.called)
+        self.assertFalse(mock_rb.called)
+
+    def test_get_project_quotas(self):
+        self._create_instance()
+        self._create_instance(user_id='other_user')
+
+        quotas = self.quotas.get_project_quotas(self.context, 'fake_project')
+        self.assertEqual({'limit': 3, 'in_use': 2, 'reserved': 0},
+                         quotas['instances'])
+        self.assertEqual({'limit': 8, 'in_use': 4, 'reserved': 0},
+                         quotas['cores'])
+
+        quotas = self.quotas.get_user_quotas(self.context, 'fake_project',
+                                             'fake_user')
+        self.assertEqual({'limit': 3, 'in_use': 1, 'reserved': 0},
+                         quotas['instances'])
+
+
 class FakeSession(object):
     def begin(self):
         return self
@@ -271,6 +271,13 @@ class TestWSGIService(test.TestCase):
         self.assertNotEqual(0, test_service.port)
         test_service.stop()
 
+    @mock.patch('nova.servicegroup.API')
+    def test_service_stop_stops_servicegroup_api(self, mock_API):
+        test_service = service.WSGIService("test_service")
+        test_service.start()
+        test_service.stop()
+        mock_API.return_value.stop.assert_called_once_with()
+
     def test_workers_set_default(self):
         test_service = service.WSGIService("osapi_compute")
         self.assertEqual(test_service.workers, processutils.get_worker_count())
@@ -15,6 +15,8 @@
 
 """Tests for the ironic driver."""
 
+import time
+
 from ironicclient import exc as ironic_exception
 import mock
 from oslo_config import cfg
@@ -30,6 +32,7 @@ from nova import objects
 from nova.openstack.common import loopingcall
 from nova import test
 from nova.tests.unit import fake_instance
+from nova.tests.unit import fake_notifier
 from nova.tests.unit import utils
 from nova.tests.unit.virt.ironic import utils as ironic_utils
 from nova.virt import configdrive
@@ -387,28 +390,35 @@ class IronicDriverTestCase(test.NoDBTestCase):
                                           self.instance_uuid)
 
     @mock.patch.object(cw.IronicClientWrapper, 'call')
-    @mock.patch.object(objects.Instance, 'get_by_uuid')
-    def test_list_instances(self, mock_inst_by_uuid, mock_call):
+    @mock.patch.object(objects.InstanceList, 'get_brief_by_uuids')
+    def test_list_instances(self, mock_inst_by_uuids, mock_call):
         nodes = []
         instances = []
         for i in range(2):
             uuid = uuidutils.generate_uuid()
-            instances.append(fake_instance.fake_instance_obj(self.ctx,
-                                                             id=i,
-                                                             uuid=uuid))
+            instances.append(objects.Instance(id=i, uuid=uuid))
             nodes.append(ironic_utils.get_test_node(instance_uuid=uuid))
 
-        mock_inst_by_uuid.side_effect = instances
+        mock_inst_by_uuids.return_value = instances
         mock_call.return_value = nodes
 
         response = self.driver.list_instances()
-        mock_call.assert_called_with("node.list", associated=True, limit=0)
-        expected_calls = [mock.call(mock.ANY, instances[0].uuid),
-                          mock.call(mock.ANY, instances[1].uuid)]
-        mock_inst_by_uuid.assert_has_calls(expected_calls)
+        mock_call.assert_called_once_with("node.list", associated=True,
+                                          limit=0)
+        mock_inst_by_uuids.assert_called_once_with(
+            mock.ANY, [n.instance_uuid for n in nodes])
         self.assertEqual(['instance-00000000', 'instance-00000001'],
                           sorted(response))
 
+    @mock.patch.object(cw.IronicClientWrapper, 'call')
+    @mock.patch.object(objects.InstanceList, 'get_brief_by_uuids')
+    def test_list_instances_no_instance(self, mock_inst_by_uuids,
+                                        mock_call):
+        mock_call.return_value = []
+
+        self.assertEqual([], self.driver.list_instances())
+        self.assertFalse(mock_inst_by_uuids.called)
+
     @mock.patch.object(cw.IronicClientWrapper, 'call')
     def test_list_instance_uuids(self, mock_call):
         num_nodes = 2
@@ -423,6 +433,22 @@ class IronicDriverTestCase(test.NoDBTestCase):
         expected = [n.instance_uuid for n in nodes]
         self.assertEqual(sorted(expected), sorted(uuids))
 
+    @mock.patch.object(cw.IronicClientWrapper, 'call')
+    def test_list_instance_power_states(self, mock_call):
+        nodes = [ironic_utils.get_test_node(
+                     instance_uuid=uuidutils.generate_uuid(),
+                     power_state=ironic_states.POWER_ON),
+                 ironic_utils.get_test_node(
+                     instance_uuid=uuidutils.generate_uuid(),
+                     power_state=ironic_states.POWER_OFF)]
+        mock_call.return_value = nodes
+        states = self.driver.list_instance_power_states()
+        mock_call.assert_called_once_with('node.list', associated=True,
+                                          limit=0)
+        self.assertEqual({nodes[0].instance_uuid: nova_states.RUNNING,
+                          nodes[1].instance_uuid: nova_states.SHUTDOWN},
+                         states)
+
     @mock.patch.object(FAKE_CLIENT.node, 'list')
     @mock.patch.object(FAKE_CLIENT.node, 'get')
     def test_node_is_available_empty_cache_empty_list(self, mock_get,
@@ -573,6 +599,89 @@ class IronicDriverTestCase(test.NoDBTestCase):
         self.assertEqual(0, mock_get.call_count)
         mock_nr.assert_called_once_with(node)
 
+    @mock.patch.object(FAKE_CLIENT.node, 'get')
+    @mock.patch.object(FAKE_CLIENT.node, 'list')
+    def test_refresh_cache_fetches_changed_nodes(self, mock_list, mock_get):
+        nodes = [ironic_utils.get_test_node(uuid=uuidutils.generate_uuid())
+                 for i in range(3)]
+        mock_list.return_value = nodes
+        self.driver.get_available_nodes()
+        mock_list.assert_called_once_with(detail=True, limit=0)
+        mock_list.reset_mock()
+
+        # the first node is unchanged, the second one is being deployed,
+        # the third one is gone and a fourth one is new
+        deployed = ironic_utils.get_test_node(
+            uuid=nodes[1].uuid, instance_uuid=self.instance_uuid,
+            provision_state=ironic_states.DEPLOYING)
+        new = ironic_utils.get_test_node(uuid=uuidutils.generate_uuid())
+        mock_list.return_value = [
+            ironic_utils.get_test_node(uuid=nodes[0].uuid), deployed, new]
+        mock_get.side_effect = [deployed, new]
+        self.driver.get_available_nodes()
+
+        mock_list.assert_called_once_with(limit=0)
+        self.assertEqual([mock.call(deployed.uuid), mock.call(new.uuid)],
+                         mock_get.call_args_list)
+        self.assertEqual({nodes[0].uuid: nodes[0], deployed.uuid: deployed,
+                          new.uuid: new}, self.driver.node_cache)
+
+    @mock.patch.object(FAKE_CLIENT.node, 'get')
+    @mock.patch.object(FAKE_CLIENT.node, 'list')
+    def test_refresh_cache_skips_nodes_gone_before_get(self, mock_list,
+                                                       mock_get):
+        mock_list.return_value = [ironic_utils.get_test_node()]
+        self.driver.get_available_nodes()
+
+        mock_list.return_value = [ironic_utils.get_test_node(
+            uuid=uuidutils.generate_uuid())]
+        mock_get.side_effect = ironic_exception.NotFound()
+        self.assertEqual([], self.driver.get_available_nodes())
+
+    @mock.patch.object(FAKE_CLIENT.node, 'get')
+    @mock.patch.object(FAKE_CLIENT.node, 'list')
+    def test_refresh_cache_full_refresh_interval(self, mock_list, mock_get):
+        self.flags(node_cache_full_refresh_interval=0, group='ironic')
+        mock_list.return_value = [ironic_utils.get_test_node()]
+
+        self.driver.get_available_nodes()
+        self.driver.get_available_nodes()
+        self.assertEqual([mock.call(detail=True, limit=0)] * 2,
+                         mock_list.call_args_list)
+        self.assertFalse(mock_get.called)
+
+    @mock.patch.object(time, 'time')
+    @mock.patch.object(FAKE_CLIENT.node, 'get')
+    @mock.patch.object(FAKE_CLIENT.node, 'list')
+    def test_refresh_cache_notifies_stats(self, mock_list, mock_get,
+                                          mock_time):
+        self.flags(node_cache_full_refresh_interval=600, group='ironic')
+        fake_notifier.stub_notifier(self.stubs)
+        self.addCleanup(fake_notifier.reset)
+        nodes = [ironic_utils.get_test_node(uuid=uuidutils.generate_uuid())
+                 for i in range(2)]
+        mock_list.return_value = nodes
+        mock_time.return_value = 1000
+        self.driver.get_available_nodes()
+
+        changed = ironic_utils.get_test_node(uuid=nodes[1].uuid,
+                                             maintenance=True)
+        mock_list.return_value = [nodes[0], changed]
+        mock_get.return_value = changed
+        mock_time.return_value = 1060
+        self.driver.get_available_nodes()
+
+        self.assertEqual(2, len(fake_notifier.NOTIFICATIONS))
+        for msg in fake_notifier.NOTIFICATIONS:
+            self.assertEqual('compute.ironic.node_cache.refresh',
+                             msg.event_type)
+        self.assertEqual({'nodes': 2, 'full_refresh': True, 'hits': 0,
+                          'misses': 2, 'age': 0},
+                         fake_notifier.NOTIFICATIONS[0].payload)
+        self.assertEqual({'nodes': 2, 'full_refresh': False, 'hits': 1,
+                          'misses': 1, 'age': 60},
+                         fake_notifier.NOTIFICATIONS[1].payload)
+
     @mock.patch.object(FAKE_CLIENT.node, 'get_by_instance_uuid')
     def test_get_info(self, mock_gbiu):
         properties = {'memory_mb': 512, 'cpus': 2}
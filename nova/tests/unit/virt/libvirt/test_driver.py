@@ -4365,6 +4365,28 @@ class LibvirtConnTestCase(test.NoDBTestCase):
         self.assertEqual(uuids[3], vm4.UUIDString())
         mock_list.assert_called_with(only_running=False)
 
+    @mock.patch.object(host.Host, "get_domain_info")
+    @mock.patch.object(host.Host, "list_instance_domains")
+    def test_list_instance_power_states(self, mock_list, mock_info):
+        vm1 = FakeVirtDomain(id=3, name="instance00000001")
+        vm2 = FakeVirtDomain(name="instance00000002")
+        vm3 = FakeVirtDomain(name="instance00000003")
+        mock_list.return_value = [vm1, vm2, vm3]
+        not_found_exc = fakelibvirt.make_libvirtError(
+            fakelibvirt.libvirtError,
+            "No such domain",
+            error_code=fakelibvirt.VIR_ERR_NO_DOMAIN)
+        mock_info.side_effect = [[fakelibvirt.VIR_DOMAIN_RUNNING],
+                                 [fakelibvirt.VIR_DOMAIN_SHUTOFF],
+                                 not_found_exc]
+
+        drvr = libvirt_driver.LibvirtDriver(fake.FakeVirtAPI(), False)
+        states = drvr.list_instance_power_states()
+        # The domain which went away since it was listed is skipped
+        self.assertEqual({vm1.UUIDString(): power_state.RUNNING,
+                          vm2.UUIDString(): power_state.SHUTDOWN}, states)
+        mock_list.assert_called_with(only_running=False)
+
     @mock.patch.object(host.Host, "list_instance_domains")
     def test_get_all_block_devices(self, mock_list):
         xml = [
@@ -7359,6 +7381,55 @@ class LibvirtConnTestCase(test.NoDBTestCase):
                                       filename=ephemeral_file_name,
                                       mkfs=True)
 
+    def test_run_image_steps_concurrently(self):
+        self.flags(image_create_concurrency=2, group='libvirt')
+        drvr = libvirt_driver.LibvirtDriver(fake.FakeVirtAPI(), False)
+        instance = objects.Instance(**self.test_instance)
+        running = []
+        concurrency = []
+
+        def step():
+            running.append(None)
+            concurrency.append(len(running))
+            greenthread.sleep(0)
+            running.pop()
+
+        drvr._run_image_steps(self.context, instance,
+                              [('step%d' % i, step) for i in range(4)])
+
+        self.assertEqual(4, len(concurrency))
+        self.assertEqual(2, max(concurrency))
+
+    def test_run_image_steps_failure(self):
+        drvr = libvirt_driver.LibvirtDriver(fake.FakeVirtAPI(), False)
+        instance = objects.Instance(**self.test_instance)
+        steps = [mock.Mock(side_effect=exception.ImageNotFound(image_id='1')),
+                 mock.Mock(),
+                 mock.Mock(side_effect=test.TestingException())]
+
+        self.assertRaises(exception.ImageNotFound, drvr._run_image_steps,
+                          self.context, instance,
+                          [('step%d' % i, step)
+                           for i, step in enumerate(steps)])
+        for step in steps:
+            step.assert_called_once_with()
+
+    @mock.patch.object(compute_utils, 'EventReporter')
+    def test_run_image_steps_events(self, mock_event):
+        drvr = libvirt_driver.LibvirtDriver(fake.FakeVirtAPI(), False)
+        instance = objects.Instance(**self.test_instance)
+        step = mock.Mock()
+
+        drvr._run_image_steps(self.context, instance, [('disk', step)])
+        self.assertFalse(mock_event.called)
+
+        self.flags(image_create_events=True, group='libvirt')
+        drvr._run_image_steps(self.context, instance, [('disk', step)])
+        mock_event.assert_called_once_with(self.context,
+                                           'libvirt_create_disk',
+                                           instance.uuid)
+        self.assertEqual(2, step.call_count)
+
     def test_create_image_with_swap(self):
         gotFiles = []
 
@@ -1456,15 +1456,24 @@ class FakeVim(object):
     def _retrieve_properties(self, method, *args, **kwargs):
         """Retrieves properties based on the type."""
         spec_set = kwargs.get("specSet")[0]
-        spec_type = spec_set.propSet[0].type
-        properties = spec_set.propSet[0].pathSet
-        if not isinstance(properties, list):
-            properties = properties.split()
+        properties_by_type = {}
+        for prop_spec in spec_set.propSet:
+            properties = prop_spec.pathSet
+            if not isinstance(properties, list):
+                properties = properties.split()
+            properties_by_type[prop_spec.type] = properties
         objs = spec_set.objectSet
         lst_ret_objs = FakeRetrieveResult()
         for obj in objs:
+            spec_type = spec_set.propSet[0].type
             try:
                 obj_ref = obj.obj
+                if (obj_ref != "RootFolder" and
+                        obj_ref.type in properties_by_type):
+                    # Objects of several types may be retrieved together,
+                    # by vim_util.get_properties_for_objects.
+                    spec_type = obj_ref.type
+                properties = properties_by_type[spec_type]
                 if obj_ref == "RootFolder":
                     # This means that we are retrieving props for all managed
                     # data objects of the specified 'type' in the entire
@@ -517,6 +517,14 @@ class VMwareAPIVMTestCase(test.NoDBTestCase):
         uuids = self.conn.list_instance_uuids()
         self.assertEqual(len(uuids), 1)
 
+    def test_list_instance_power_states(self):
+        self._create_vm()
+        states = self.conn.list_instance_power_states()
+        self.assertEqual({self.uuid: power_state.RUNNING}, states)
+        self.conn.power_off(self.instance)
+        states = self.conn.list_instance_power_states()
+        self.assertEqual({self.uuid: power_state.SHUTDOWN}, states)
+
     def test_list_instance_uuids_invalid_uuid(self):
         self._create_vm(uuid='fake_id')
         uuids = self.conn.list_instance_uuids()
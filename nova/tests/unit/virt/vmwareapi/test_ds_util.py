@@ -253,7 +253,7 @@ class DsUtilTestCase(test.NoDBTestCase):
         def fake_call_method(module, method, *args, **kwargs):
             # Mock the call which returns a list of datastores for the cluster
             if (module == ds_util.vim_util and
-                    method == 'get_dynamic_property' and
+                    method == 'get_inventory_property' and
                     args == ('fake-cluster', 'ClusterComputeResource',
                              'datastore')):
                 fake_ds_mor = fake.DataObject()
@@ -163,3 +163,34 @@ class VMwareDSUtilDatastoreSelectionTestCase(test.NoDBTestCase):
                                         best_match,
                                         datastore_regex)
         self.assertEqual(rec, best_match, "did not match datastore properly")
+
+    def _select_with_cached_image(self, image_datastores):
+        data = [
+            ['VMFS', 'spam-good', True, 'normal', 20 * units.Gi,
+             10 * units.Gi],
+            ['VMFS', 'eggs-good', True, 'normal', 40 * units.Gi,
+             108 * units.Gi / 10],
+        ]
+        datastores = self.build_result_set(data)
+        return ds_util._select_datastore(None, datastores, None,
+                                         image_datastores=image_datastores)
+
+    def test_filter_datastores_cached_image(self):
+        # the image is on a datastore with a little less free space
+        rec = self._select_with_cached_image(set(['ds-000']))
+        self.assertEqual('ds-000', rec.ref.value)
+
+        rec = self._select_with_cached_image(set(['ds-001']))
+        self.assertEqual('ds-001', rec.ref.value)
+
+        rec = self._select_with_cached_image(set())
+        self.assertEqual('ds-001', rec.ref.value)
+
+    def test_filter_datastores_cached_image_preference(self):
+        self.flags(cached_image_datastore_preference=0.05, group='vmware')
+        rec = self._select_with_cached_image(set(['ds-000']))
+        self.assertEqual('ds-001', rec.ref.value)
+
+        self.flags(cached_image_datastore_preference=0, group='vmware')
+        rec = self._select_with_cached_image(set(['ds-000']))
+        self.assertEqual('ds-001', rec.ref.value)
@@ -181,6 +181,10 @@ class ImageCacheManagerTestCase(test.NoDBTestCase):
                 cache_root_folder, "fake_image_id")
         mock_timestamp_cleanup.assert_called_once_with(
                 dc_ref, ds_browser, timestamp_folder_path)
+        self.assertEqual(set([fake_ds_ref.value]),
+                         self._imagecache.get_image_datastores(image_id))
+        self.assertEqual(set(),
+                         self._imagecache.get_image_datastores('other-image'))
 
     def test_age_cached_images(self):
         def fake_get_ds_browser(ds_ref):
@@ -225,7 +229,9 @@ class ImageCacheManagerTestCase(test.NoDBTestCase):
         ) as (_get_ds_browser, _get_timestamp, _mkdir, _file_delete,
               _timestamp_cleanup):
             timeutils.set_time_override(override_time=self._time)
-            datastore = ds_obj.Datastore(name='ds', ref='fake-ds-ref')
+            datastore = ds_obj.Datastore(
+                name='ds',
+                ref=fake.ManagedObjectReference('Datastore', 'fake-ds-ref'))
             dc_info = vmops.DcInfo(ref='dc_ref', name='name',
                                    vmFolder='vmFolder')
             self._get_timestamp_called = 0
@@ -237,6 +243,34 @@ class ImageCacheManagerTestCase(test.NoDBTestCase):
                     ds_obj.DatastorePath('fake-ds', 'fake-path'))
             self.assertEqual(3, self._get_timestamp_called)
 
+    def test_age_cached_images_updates_inventory(self):
+        datastore = ds_obj.Datastore(
+            name='ds',
+            ref=fake.ManagedObjectReference('Datastore', 'fake-ds-ref'))
+        dc_info = vmops.DcInfo(ref='dc_ref', name='name',
+                               vmFolder='vmFolder')
+        self._imagecache._cached_images = {
+            'fake-ds-ref': set(['fake-image-1', 'fake-image-2'])}
+        self._imagecache.originals = set(['fake-image-1', 'fake-image-2'])
+        self._imagecache.used_images = set(['fake-image-2'])
+        timeutils.set_time_override(override_time=self._time)
+
+        with contextlib.nested(
+            mock.patch.object(self._imagecache, '_get_ds_browser'),
+            mock.patch.object(self._imagecache, '_get_timestamp',
+                              return_value='ts-2012-11-20-12-00-00'),
+            mock.patch.object(self._imagecache, 'timestamp_cleanup'),
+            mock.patch.object(ds_util, 'file_delete'),
+        ):
+            self._imagecache._age_cached_images(
+                'fake-context', datastore, dc_info,
+                ds_obj.DatastorePath('fake-ds', 'fake-path'))
+
+        self.assertEqual(set(['fake-ds-ref']),
+                         self._imagecache.get_image_datastores('fake-image-2'))
+        self.assertEqual(set(),
+                         self._imagecache.get_image_datastores('fake-image-1'))
+
     @mock.patch.object(objects.block_device.BlockDeviceMappingList,
                        'get_by_instance_uuid')
     def test_update(self, mock_get_by_inst):
@@ -274,8 +308,12 @@ class ImageCacheManagerTestCase(test.NoDBTestCase):
             all_instances = [fake_instance.fake_instance_obj(None, **instance)
                              for instance in instances]
             self.images = set(['1', '2'])
-            datastore = ds_obj.Datastore(name='ds', ref='fake-ds-ref')
+            datastore = ds_obj.Datastore(
+                name='ds',
+                ref=fake.ManagedObjectReference('Datastore', 'fake-ds-ref'))
             dc_info = vmops.DcInfo(ref='dc_ref', name='name',
                                    vmFolder='vmFolder')
             datastores_info = [(datastore, dc_info)]
             self._imagecache.update('context', all_instances, datastores_info)
+            self.assertEqual(set(['fake-ds-ref']),
+                             self._imagecache.get_image_datastores('1'))
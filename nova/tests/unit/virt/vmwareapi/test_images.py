@@ -17,6 +17,7 @@ Test suite for images.
 
 import contextlib
 import os
+import StringIO
 import tarfile
 
 import mock
@@ -222,6 +223,56 @@ class VMwareImagesTestCase(test.NoDBTestCase):
             mock_call_method.assert_called_once_with(
                     session.vim, "UnregisterVM", mock.sentinel.vm_ref)
 
+    def _start_transfer(self, data, data_size=None):
+        read_handle = StringIO.StringIO(data)
+        write_handle = StringIO.StringIO()
+        # NOTE: start_transfer closes its handles
+        write_handle.close = mock.Mock()
+        images.start_transfer(None, read_handle,
+                              len(data) if data_size is None else data_size,
+                              write_file_handle=write_handle)
+        self.assertTrue(write_handle.close.called)
+        return write_handle.getvalue()
+
+    def test_start_transfer(self):
+        self.flags(image_transfer_chunk_size=1000,
+                   image_transfer_buffers=2, group='vmware')
+        data = os.urandom(10 * units.Ki)
+
+        with mock.patch.object(images, '_log_transfer_stats') as mock_stats:
+            self.assertEqual(data, self._start_transfer(data))
+
+        pipe = mock_stats.call_args[0][0]
+        self.assertEqual(len(data), pipe.transferred)
+
+    def test_start_transfer_unknown_size(self):
+        data = os.urandom(units.Mi)
+        self.assertEqual(data, self._start_transfer(data, data_size=0))
+
+    def test_start_transfer_chunk_size(self):
+        self.flags(image_transfer_chunk_size=4096, group='vmware')
+        read_handle = mock.Mock()
+        read_handle.read.side_effect = ['a' * 4096, 'b' * 10, '']
+        write_handle = mock.Mock()
+
+        images.start_transfer(None, read_handle, 4106,
+                              write_file_handle=write_handle)
+
+        read_handle.read.assert_has_calls([mock.call(4096)] * 3)
+        write_handle.write.assert_has_calls(
+            [mock.call('a' * 4096), mock.call('b' * 10)])
+
+    def test_start_transfer_failure(self):
+        read_handle = mock.Mock()
+        read_handle.read.side_effect = IOError()
+        write_handle = mock.Mock()
+
+        self.assertRaises(exception.NovaException, images.start_transfer,
+                          None, read_handle, 10,
+                          write_file_handle=write_handle)
+        read_handle.close.assert_called_once_with()
+        write_handle.close.assert_called_once_with()
+
     def test_from_image_with_image_ref(self):
         raw_disk_size_in_gb = 83
         raw_disk_size_in_bytes = raw_disk_size_in_gb * units.Gi
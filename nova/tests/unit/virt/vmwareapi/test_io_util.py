@@ -12,6 +12,7 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 
+from eventlet import greenthread
 import mock
 
 from nova import exception
@@ -31,3 +32,39 @@ class GlanceWriteThreadTestCase(test.NoDBTestCase):
         self.assertRaises(exception.ImageNotAuthorized, write_thread.wait)
         write_thread.stop()
         write_thread.close()
+
+
+class ThreadSafePipeTestCase(test.NoDBTestCase):
+
+    def test_read_write(self):
+        pipe = io_util.ThreadSafePipe(2, 6)
+        pipe.write('abc')
+        pipe.write('def')
+        self.assertEqual('abc', pipe.read(None))
+        self.assertEqual('def', pipe.read(None))
+        self.assertEqual('', pipe.read(None))
+        self.assertEqual(6, pipe.transferred)
+        self.assertEqual(0, pipe.read_waits)
+        self.assertEqual(0, pipe.write_waits)
+
+    def test_write_waits(self):
+        pipe = io_util.ThreadSafePipe(1, 2)
+        pipe.write('a')
+        greenthread.spawn(pipe.write, 'b')
+        greenthread.sleep(0)
+
+        self.assertEqual(1, pipe.write_waits)
+        self.assertEqual('a', pipe.read(None))
+        self.assertEqual('b', pipe.read(None))
+
+    def test_read_waits(self):
+        pipe = io_util.ThreadSafePipe(1, 0)
+        reader = mock.Mock()
+        reader.read.side_effect = ['a', 'b', '']
+        done = io_util.IOThread(reader, pipe, chunk_size=1).start()
+
+        for expected in ('a', 'b', ''):
+            self.assertEqual(expected, pipe.read(None))
+        done.wait()
+        self.assertTrue(pipe.read_waits > 0)
+        reader.read.assert_has_calls([mock.call(1)] * 3)
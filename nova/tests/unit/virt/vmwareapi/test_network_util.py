@@ -24,6 +24,7 @@ from nova.tests.unit.virt.vmwareapi import fake
 from nova.tests.unit.virt.vmwareapi import stubs
 from nova.virt.vmwareapi import driver
 from nova.virt.vmwareapi import network_util
+from nova.virt.vmwareapi import vim_util as nova_vim_util
 
 ResultSet = collections.namedtuple('ResultSet', ['objects'])
 ObjectContent = collections.namedtuple('ObjectContent', ['obj', 'propSet'])
@@ -95,10 +96,11 @@ class VMwareNetworkUtilTestCase(test.NoDBTestCase):
         def mock_call_method(module, method, *args, **kwargs):
             if method == 'get_object_properties':
                 return networks
-            if method == 'get_dynamic_property':
+            if method == 'get_properties_for_objects':
                 result = fake.DataObject()
                 result.name = 'no-match'
-                return result
+                return {'dvportgroup-135': {'config': result},
+                        'dvportgroup-136': {'config': result}}
             if method == 'continue_retrieval':
                 self._continue_retrieval_called = True
 
@@ -118,7 +120,7 @@ class VMwareNetworkUtilTestCase(test.NoDBTestCase):
         def mock_call_method(module, method, *args, **kwargs):
             if method == 'get_object_properties':
                 return networks
-            if method == 'get_dynamic_property':
+            if method == 'get_properties_for_objects':
                 result = fake.DataObject()
                 if not token or self._continue_retrieval_called:
                     result.name = name
@@ -126,7 +128,9 @@ class VMwareNetworkUtilTestCase(test.NoDBTestCase):
                     result.name = 'fake_name'
                 result.key = 'fake_key'
                 result.distributedVirtualSwitch = 'fake_dvs'
-                return result
+                return {'dvportgroup-135': {'config': result}}
+            if method == 'get_dynamic_property':
+                return 'fake_dvs_uuid'
             if method == 'continue_retrieval':
                 if token:
                     self._continue_retrieval_called = True
@@ -166,8 +170,8 @@ class VMwareNetworkUtilTestCase(test.NoDBTestCase):
         def mock_call_method(module, method, *args, **kwargs):
             if method == 'get_object_properties':
                 return networks
-            if method == 'get_dynamic_property':
-                return 'fake_net'
+            if method == 'get_properties_for_objects':
+                return {'network-54': {'summary.name': 'fake_net'}}
 
         with mock.patch.object(self._session, '_call_method',
                                mock_call_method):
@@ -175,3 +179,36 @@ class VMwareNetworkUtilTestCase(test.NoDBTestCase):
                                                         'fake_net',
                                                         'fake_cluster')
             self.assertIsNotNone(res)
+
+    @mock.patch('oslo_utils.timeutils.utcnow_ts', return_value=100)
+    def test_get_network_cached(self, mock_now):
+        self.flags(inventory_cache_ttl=60, group='vmware')
+        self.addCleanup(nova_vim_util.inventory_cache_reset)
+        net_morefs = [vim_util.get_moref("network-54", "Network")]
+        networks = self._build_cluster_networks(net_morefs)
+        calls = []
+
+        def mock_call_method(module, method, *args, **kwargs):
+            calls.append(method)
+            if method == 'get_object_properties':
+                return networks
+            if method == 'get_properties_for_objects':
+                return {'network-54': {'summary.name': 'fake_net'}}
+
+        with mock.patch.object(self._session, '_call_method',
+                               mock_call_method):
+            for i in range(2):
+                res = network_util.get_network_with_the_name(self._session,
+                                                            'fake_net',
+                                                            'fake_cluster')
+                self.assertEqual({'type': 'Network', 'name': 'fake_net'},
+                                 res)
+            self.assertEqual(['get_object_properties',
+                              'get_properties_for_objects',
+                              'cancel_retrieval'], calls)
+            # The network is looked up again once it expires
+            mock_now.return_value = 160
+            network_util.get_network_with_the_name(self._session,
+                                                  'fake_net',
+                                                  'fake_cluster')
+            self.assertEqual(6, len(calls))
@@ -13,6 +13,7 @@
 #    under the License.
 
 import collections
+import contextlib
 
 import fixtures
 import mock
@@ -115,3 +116,79 @@ class VMwareVIMUtilTestCase(test.NoDBTestCase):
             self.vim, cluster_refs[0], 'datastore', 'Datastore', property)
         datastores = [oc.obj for oc in result.objects]
         self.assertEqual(expected_ds, datastores)
+
+    def test_get_properties_for_objects(self):
+        cluster_ref = fake._get_object_refs('ClusterComputeResource')[0]
+        cluster = fake._get_object(cluster_ref)
+        ds_ref = cluster.datastore.ManagedObjectReference[0]
+        # Objects of different types are retrieved together
+        result = vim_util.get_properties_for_objects(
+            self.vim, [cluster_ref, ds_ref],
+            {'ClusterComputeResource': ['name'],
+             'Datastore': ['summary.name']})
+        self.assertEqual(
+            {cluster_ref.value: {'name': cluster.get('name')},
+             ds_ref.value: {
+                 'summary.name': fake._get_object(ds_ref).get(
+                     'summary.name')}},
+            result)
+
+    def test_get_properties_for_objects_with_token(self):
+        DynamicProperty = collections.namedtuple('Property', ['name', 'val'])
+        refs = [fake.ManagedObjectReference('HostSystem', 'host-%d' % i)
+                for i in range(2)]
+        results = []
+        for ref in refs:
+            result = fake.FakeRetrieveResult(token='fake_token')
+            result.add_object(fake.ObjectContent(
+                ref, [DynamicProperty(name='name', val=ref.value)]))
+            results.append(result)
+        del results[-1].token
+
+        with contextlib.nested(
+            mock.patch.object(self.vim, 'RetrievePropertiesEx',
+                              create=True, return_value=results[0]),
+            mock.patch.object(self.vim, 'ContinueRetrievePropertiesEx',
+                              create=True, return_value=results[1])
+        ) as (retrieve, continue_retrieve):
+            result = vim_util.get_properties_for_objects(
+                self.vim, refs, {'HostSystem': ['name']})
+        self.assertEqual({'host-0': {'name': 'host-0'},
+                          'host-1': {'name': 'host-1'}}, result)
+        self.assertEqual(1, retrieve.call_count)
+        continue_retrieve.assert_called_once_with(
+            self.vim.service_content.propertyCollector, token='fake_token')
+
+    def test_get_properties_for_objects_none(self):
+        self.assertEqual({}, vim_util.get_properties_for_objects(
+            self.vim, [], {'HostSystem': ['name']}))
+
+    @mock.patch('oslo_utils.timeutils.utcnow_ts')
+    @mock.patch.object(vim_util, 'get_dynamic_properties',
+                       return_value={'datastore': 'fake-ds'})
+    def test_get_inventory_property_cached(self, mock_get_props, mock_now):
+        self.flags(inventory_cache_ttl=60, group='vmware')
+        self.addCleanup(vim_util.inventory_cache_reset)
+        cluster_ref = fake.ManagedObjectReference('ClusterComputeResource',
+                                                  'domain-c7')
+        for now in (100, 159, 160):
+            mock_now.return_value = now
+            self.assertEqual('fake-ds', vim_util.get_inventory_property(
+                self.vim, cluster_ref, 'ClusterComputeResource',
+                'datastore'))
+        # The property is retrieved again once it expires
+        self.assertEqual(2, mock_get_props.call_count)
+        mock_get_props.assert_called_with(self.vim, cluster_ref,
+                                          'ClusterComputeResource',
+                                          ['datastore'])
+
+    @mock.patch.object(vim_util, 'get_dynamic_properties',
+                       return_value={'datastore': 'fake-ds'})
+    def test_get_inventory_property_not_cached(self, mock_get_props):
+        cluster_ref = fake.ManagedObjectReference('ClusterComputeResource',
+                                                  'domain-c7')
+        for i in range(2):
+            vim_util.get_inventory_property(self.vim, cluster_ref,
+                                            'ClusterComputeResource',
+                                            'datastore')
+        self.assertEqual(2, mock_get_props.call_count)
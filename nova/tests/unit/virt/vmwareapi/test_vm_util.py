@@ -54,12 +54,12 @@ class VMwareVMUtilTestCase(test.NoDBTestCase):
 
     def _test_get_stats_from_cluster(self, connection_state="connected",
                                      maintenance_mode=False):
-        ManagedObjectRefs = [fake.ManagedObjectReference("host1",
-                                                         "HostSystem"),
-                             fake.ManagedObjectReference("host2",
-                                                         "HostSystem")]
+        ManagedObjectRefs = [fake.ManagedObjectReference("HostSystem",
+                                                         "host1"),
+                             fake.ManagedObjectReference("HostSystem",
+                                                         "host2")]
         hosts = fake._convert_to_array_of_mor(ManagedObjectRefs)
-        respool = fake.ManagedObjectReference("resgroup-11", "ResourcePool")
+        respool = fake.ManagedObjectReference("ResourcePool", "resgroup-11")
         prop_dict = {'host': hosts, 'resourcePool': respool}
 
         hardware = fake.DataObject()
@@ -76,30 +76,25 @@ class VMwareVMUtilTestCase(test.NoDBTestCase):
         runtime_host_2.connectionState = connection_state
         runtime_host_2.inMaintenanceMode = maintenance_mode
 
-        prop_list_host_1 = [fake.Prop(name="hardware_summary", val=hardware),
-                            fake.Prop(name="runtime_summary",
-                                      val=runtime_host_1)]
-        prop_list_host_2 = [fake.Prop(name="hardware_summary", val=hardware),
-                            fake.Prop(name="runtime_summary",
-                                      val=runtime_host_2)]
-
-        fake_objects = fake.FakeRetrieveResult()
-        fake_objects.add_object(fake.ObjectContent("prop_list_host1",
-                                                   prop_list_host_1))
-        fake_objects.add_object(fake.ObjectContent("prop_list_host1",
-                                                   prop_list_host_2))
-
         respool_resource_usage = fake.DataObject()
         respool_resource_usage.maxUsage = 5368709120
         respool_resource_usage.overallUsage = 2147483648
 
-        def fake_call_method(*args):
-            if "get_dynamic_properties" in args:
+        properties = {
+            'host1': {'summary.hardware': hardware,
+                      'summary.runtime': runtime_host_1},
+            'host2': {'summary.hardware': hardware,
+                      'summary.runtime': runtime_host_2},
+            'resgroup-11': {'summary.runtime.memory': respool_resource_usage}}
+
+        def fake_call_method(module, method, *args):
+            if method == "get_inventory_properties":
                 return prop_dict
-            elif "get_properties_for_a_collection_of_objects" in args:
-                return fake_objects
-            else:
-                return respool_resource_usage
+            elif method == "get_properties_for_objects":
+                # The hosts and the resource pool are retrieved together
+                self.assertEqual(ManagedObjectRefs + [respool], args[0])
+                return properties
+            self.fail('Unexpected call %s' % method)
 
         session = fake.FakeSession()
         with mock.patch.object(session, '_call_method', fake_call_method):
@@ -151,6 +151,24 @@ class VMwareVMOpsTestCase(test.NoDBTestCase):
                                         self.pure_IPv6_network_info)
         self.assertEqual('DE:AD:BE:EF:00:00;;;;;#', result)
 
+    @mock.patch.object(vmops.VMwareVMOps, 'get_datacenter_ref_and_name')
+    @mock.patch.object(ds_util, 'get_datastore')
+    def test_get_vm_config_info_cached_image(self, mock_get_datastore,
+                                             mock_get_dc):
+        mock_get_datastore.return_value = self._ds
+        self._vmops._imagecache._cached_images = {
+            'ds-1': set([self._image_id]), 'ds-2': set(['other-image'])}
+        image_info = images.VMwareImage(image_id=self._image_id,
+                                        file_size=units.Ki)
+
+        vi = self._vmops._get_vm_config_info(self._instance, image_info)
+
+        self.assertEqual(self._ds, vi.datastore)
+        mock_get_datastore.assert_called_once_with(
+            self._session, self._cluster.obj, None, None,
+            ds_util.get_allowed_datastore_types(image_info.disk_type),
+            set(['ds-1']))
+
     def _setup_create_folder_mocks(self):
         ops = vmops.VMwareVMOps(mock.Mock(), mock.Mock(), mock.Mock())
         base_name = 'folder'
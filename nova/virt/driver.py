@@ -226,6 +226,17 @@ class ComputeDriver(object):
         """
         raise NotImplementedError()
 
+    def list_instance_power_states(self):
+        """Return the power states of all the instances known to the
+        virtualization layer, with as few hypervisor calls as possible.
+
+        This is optional. The power state sync task falls back to get_info()
+        for each instance when it is not implemented.
+
+        :returns: a dict of nova.compute.power_state values by instance UUID
+        """
+        raise NotImplementedError()
+
     def rebuild(self, context, instance, image_meta, injected_files,
                 admin_password, bdms, detach_block_devices,
                 attach_block_devices, network_info=None,
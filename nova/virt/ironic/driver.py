@@ -48,6 +48,7 @@ from nova.i18n import _LI
 from nova.i18n import _LW
 from nova import objects
 from nova.openstack.common import loopingcall
+from nova import rpc
 from nova.virt import configdrive
 from nova.virt import driver as virt_driver
 from nova.virt import firewall
@@ -90,6 +91,14 @@ opts = [
                default=2,
                help='How often to retry in seconds when a request '
                     'does conflict'),
+    cfg.IntOpt('node_cache_full_refresh_interval',
+               default=600,
+               help='Number of seconds between two full refreshes of the '
+                    'node cache. In between, only the nodes whose instance, '
+                    'power state, provision state or maintenance mode '
+                    'changed are fetched again, the changes of their other '
+                    'fields are picked up by the next full refresh. 0 makes '
+                    'every refresh a full one.'),
     ]
 
 ironic_group = cfg.OptGroup(name='ironic',
@@ -135,6 +144,12 @@ def _get_nodes_supported_instances(cpu_arch=None):
              vm_mode.HVM)]
 
 
+def _node_state_key(node):
+    """Return the fields of a node which the brief node list carries."""
+    return (node.instance_uuid, node.power_state, node.provision_state,
+            node.maintenance)
+
+
 def _log_ironic_polling(what, node, instance):
     power_state = (None if node.power_state is None else
                    '"%s"' % node.power_state)
@@ -181,6 +196,7 @@ class IronicDriver(virt_driver.ComputeDriver):
             default='nova.virt.firewall.NoopFirewallDriver')
         self.node_cache = {}
         self.node_cache_time = 0
+        self.node_cache_full_refresh_time = 0
 
         ironicclient_log_level = CONF.ironic.client_log_level
         if ironicclient_log_level:
@@ -433,10 +449,15 @@ class IronicDriver(virt_driver.ComputeDriver):
         # pagination until there're no more values to be returned.
         node_list = self.ironicclient.call("node.list", associated=True,
                                            limit=0)
+        # NOTE: the names of all the instances are looked up with a single
+        # DB query, which only loads the fields the names are built from.
+        instance_uuids = [n.instance_uuid for n in node_list]
+        if not instance_uuids:
+            return []
         context = nova_context.get_admin_context()
-        return [objects.Instance.get_by_uuid(context,
-                                             i.instance_uuid).name
-                for i in node_list]
+        instances = objects.InstanceList.get_brief_by_uuids(context,
+                                                            instance_uuids)
+        return [instance.name for instance in instances]
 
     def list_instance_uuids(self):
         """Return the UUIDs of all the instances provisioned.
@@ -450,6 +471,17 @@ class IronicDriver(virt_driver.ComputeDriver):
                                            limit=0)
         return list(n.instance_uuid for n in node_list)
 
+    def list_instance_power_states(self):
+        """Return the power states of all the instances provisioned.
+
+        :returns: a dict of power states by instance UUID.
+
+        """
+        node_list = self.ironicclient.call("node.list", associated=True,
+                                           limit=0)
+        return {n.instance_uuid: map_power_state(n.power_state)
+                for n in node_list}
+
     def node_is_available(self, nodename):
         """Confirms a Nova hypervisor node exists in the Ironic inventory.
 
@@ -478,14 +510,59 @@ class IronicDriver(virt_driver.ComputeDriver):
             return False
 
     def _refresh_cache(self):
+        now = time.time()
+        full_refresh = (not self.node_cache or
+                        now - self.node_cache_full_refresh_time >=
+                        CONF.ironic.node_cache_full_refresh_interval)
         # NOTE(lucasagomes): limit == 0 is an indicator to continue
         # pagination until there're no more values to be returned.
-        node_list = self.ironicclient.call('node.list', detail=True, limit=0)
-        node_cache = {}
-        for node in node_list:
-            node_cache[node.uuid] = node
+        if full_refresh:
+            node_list = self.ironicclient.call('node.list', detail=True,
+                                               limit=0)
+            node_cache = {}
+            for node in node_list:
+                node_cache[node.uuid] = node
+            misses = len(node_cache)
+        else:
+            # NOTE: the brief node list carries the fields of a node which
+            # change as it is deployed and used. Only the new nodes and the
+            # nodes for which one of them changed are fetched in detail.
+            node_list = self.ironicclient.call('node.list', limit=0)
+            node_cache = {}
+            misses = 0
+            for node in node_list:
+                cached = self.node_cache.get(node.uuid)
+                if (cached is None or
+                        _node_state_key(cached) != _node_state_key(node)):
+                    try:
+                        cached = self.ironicclient.call('node.get', node.uuid)
+                    except ironic.exc.NotFound:
+                        continue
+                    misses += 1
+                node_cache[node.uuid] = cached
         self.node_cache = node_cache
-        self.node_cache_time = time.time()
+        self.node_cache_time = now
+        if full_refresh:
+            self.node_cache_full_refresh_time = now
+        self._notify_node_cache_refresh(full_refresh, misses)
+
+    def _notify_node_cache_refresh(self, full_refresh, misses):
+        """Send the statistics of the last node cache refresh.
+
+        The payload holds the number of cached nodes, how many of them were
+        reused (hits) or fetched again (misses), and the age in seconds of
+        the last full refresh.
+        """
+        stats = {'nodes': len(self.node_cache),
+                 'full_refresh': full_refresh,
+                 'hits': len(self.node_cache) - misses,
+                 'misses': misses,
+                 'age': self.node_cache_time -
+                        self.node_cache_full_refresh_time}
+        LOG.debug("Refreshed the node cache: %s", stats)
+        notifier = rpc.get_notifier(service='compute')
+        notifier.info(nova_context.get_admin_context(),
+                      'compute.ironic.node_cache.refresh', stats)
 
     def get_available_nodes(self, refresh=False):
         """Returns the UUIDs of all nodes in the Ironic inventory.
@@ -35,6 +35,7 @@ import operator
 import os
 import random
 import shutil
+import sys
 import tempfile
 import time
 import uuid
@@ -223,7 +224,19 @@ libvirt_opts = [
                 default=[],
                 help='List of guid targets and ranges.'
                      'Syntax is guest-gid:host-gid:count'
-                     'Maximum of 5 allowed.')
+                     'Maximum of 5 allowed.'),
+    cfg.IntOpt('image_create_concurrency',
+               default=4,
+               help='Maximum number of the disks of an instance, like its '
+                    'root, ephemeral and swap disks or its config drive, '
+                    'created at the same time. Set to 1 to create them one '
+                    'after the other'),
+    cfg.BoolOpt('image_create_events',
+                default=False,
+                help='Whether to record the creation of each disk of an '
+                     'instance as an event of the instance action, with its '
+                     'start and finish times. Each event takes two round '
+                     'trips to the conductor'),
     ]
 
 CONF = cfg.CONF
@@ -598,6 +611,20 @@ class LibvirtDriver(driver.ComputeDriver):
 
         return uuids
 
+    def list_instance_power_states(self):
+        states = {}
+        for dom in self._host.list_instance_domains(only_running=False):
+            try:
+                dom_info = self._host.get_domain_info(dom)
+            except libvirt.libvirtError as ex:
+                # NOTE: the domain may have gone since it was listed
+                if ex.get_error_code() == libvirt.VIR_ERR_NO_DOMAIN:
+                    continue
+                raise
+            states[dom.UUIDString()] = LIBVIRT_POWER_STATE[dom_info[0]]
+
+        return states
+
     def plug_vifs(self, instance, network_info):
         """Plug VIFs into networks."""
         for vif in network_info:
@@ -2664,6 +2691,64 @@ class LibvirtDriver(driver.ComputeDriver):
                               {'img_id': img_id, 'e': e},
                               instance=instance)
 
+    def _create_config_drive(self, instance, network_info, admin_pass,
+                             files, suffix):
+        LOG.info(_LI('Using config drive'), instance=instance)
+        extra_md = {}
+        if admin_pass:
+            extra_md['admin_pass'] = admin_pass
+
+        inst_md = instance_metadata.InstanceMetadata(instance,
+            content=files, extra_md=extra_md, network_info=network_info)
+        with configdrive.ConfigDriveBuilder(instance_md=inst_md) as cdb:
+            configdrive_path = self._get_disk_config_path(instance, suffix)
+            LOG.info(_LI('Creating config drive at %(path)s'),
+                     {'path': configdrive_path}, instance=instance)
+
+            try:
+                cdb.make_drive(configdrive_path)
+            except processutils.ProcessExecutionError as e:
+                with excutils.save_and_reraise_exception():
+                    LOG.error(_LE('Creating config drive failed '
+                                  'with error: %s'),
+                              e, instance=instance)
+
+    def _run_image_step(self, context, instance, name, step):
+        """Run a step of _run_image_steps, returning the information of the
+        exception it raised if any.
+        """
+        start = time.time()
+        try:
+            if CONF.libvirt.image_create_events:
+                with compute_utils.EventReporter(
+                        context, 'libvirt_create_%s' % name, instance.uuid):
+                    step()
+            else:
+                step()
+        except Exception:
+            # NOTE: a green thread raising would have its traceback printed
+            # by the hub, the exception is raised by the caller instead.
+            return sys.exc_info()
+        LOG.debug('Created %(name)s in %(time).2f seconds',
+                  {'name': name, 'time': time.time() - start},
+                  instance=instance)
+
+    def _run_image_steps(self, context, instance, steps):
+        """Run the steps creating the disks of an instance, at most
+        CONF.libvirt.image_create_concurrency of them at a time.
+
+        All the steps are waited for, the first failure is then raised.
+        """
+        pool = eventlet.GreenPool(max(CONF.libvirt.image_create_concurrency,
+                                      1))
+        threads = [pool.spawn(self._run_image_step, context, instance,
+                              name, step)
+                   for name, step in steps]
+        errors = [thread.wait() for thread in threads]
+        for error in errors:
+            if error is not None:
+                six.reraise(*error)
+
     def _create_image(self, context, instance,
                       disk_mapping, suffix='',
                       disk_images=None, network_info=None,
@@ -2701,22 +2786,30 @@ class LibvirtDriver(driver.ComputeDriver):
                            'kernel_id': instance.kernel_id,
                            'ramdisk_id': instance.ramdisk_id}
 
+        # NOTE: the disks are independent of each other, they are created
+        # concurrently, and injection into the root disk waits for them all.
+        steps = []
+
         if disk_images['kernel_id']:
             fname = imagecache.get_cache_fname(disk_images, 'kernel_id')
-            raw('kernel').cache(fetch_func=libvirt_utils.fetch_image,
-                                context=context,
-                                filename=fname,
-                                image_id=disk_images['kernel_id'],
-                                user_id=instance.user_id,
-                                project_id=instance.project_id)
+            steps.append(('kernel', functools.partial(
+                raw('kernel').cache,
+                fetch_func=libvirt_utils.fetch_image,
+                context=context,
+                filename=fname,
+                image_id=disk_images['kernel_id'],
+                user_id=instance.user_id,
+                project_id=instance.project_id)))
             if disk_images['ramdisk_id']:
                 fname = imagecache.get_cache_fname(disk_images, 'ramdisk_id')
-                raw('ramdisk').cache(fetch_func=libvirt_utils.fetch_image,
-                                     context=context,
-                                     filename=fname,
-                                     image_id=disk_images['ramdisk_id'],
-                                     user_id=instance.user_id,
-                                     project_id=instance.project_id)
+                steps.append(('ramdisk', functools.partial(
+                    raw('ramdisk').cache,
+                    fetch_func=libvirt_utils.fetch_image,
+                    context=context,
+                    filename=fname,
+                    image_id=disk_images['ramdisk_id'],
+                    user_id=instance.user_id,
+                    project_id=instance.project_id)))
 
         inst_type = instance.get_flavor()
 
@@ -2740,9 +2833,10 @@ class LibvirtDriver(driver.ComputeDriver):
                 fetch_func = clone_fallback_to_fetch
             else:
                 fetch_func = libvirt_utils.fetch_image
-            self._try_fetch_image_cache(backend, fetch_func, context,
-                                        root_fname, disk_images['image_id'],
-                                        instance, size, fallback_from_host)
+            steps.append(('disk', functools.partial(
+                self._try_fetch_image_cache, backend, fetch_func, context,
+                root_fname, disk_images['image_id'], instance, size,
+                fallback_from_host)))
 
         # Lookup the filesystem type if required
         os_type_with_default = disk.get_fs_type_for_os_type(instance.os_type)
@@ -2760,11 +2854,13 @@ class LibvirtDriver(driver.ComputeDriver):
                                    is_block_dev=disk_image.is_block_dev)
             fname = "ephemeral_%s_%s" % (ephemeral_gb, file_extension)
             size = ephemeral_gb * units.Gi
-            disk_image.cache(fetch_func=fn,
-                             context=context,
-                             filename=fname,
-                             size=size,
-                             ephemeral_size=ephemeral_gb)
+            steps.append(('disk.local', functools.partial(
+                disk_image.cache,
+                fetch_func=fn,
+                context=context,
+                filename=fname,
+                size=size,
+                ephemeral_size=ephemeral_gb)))
 
         for idx, eph in enumerate(driver.block_device_info_get_ephemerals(
                 block_device_info)):
@@ -2781,12 +2877,14 @@ class LibvirtDriver(driver.ComputeDriver):
                                    is_block_dev=disk_image.is_block_dev)
             size = eph['size'] * units.Gi
             fname = "ephemeral_%s_%s" % (eph['size'], file_extension)
-            disk_image.cache(fetch_func=fn,
-                             context=context,
-                             filename=fname,
-                             size=size,
-                             ephemeral_size=eph['size'],
-                             specified_fs=specified_fs)
+            steps.append((blockinfo.get_eph_disk(idx), functools.partial(
+                disk_image.cache,
+                fetch_func=fn,
+                context=context,
+                filename=fname,
+                size=size,
+                ephemeral_size=eph['size'],
+                specified_fs=specified_fs)))
 
         if 'disk.swap' in disk_mapping:
             mapping = disk_mapping['disk.swap']
@@ -2802,36 +2900,26 @@ class LibvirtDriver(driver.ComputeDriver):
 
             if swap_mb > 0:
                 size = swap_mb * units.Mi
-                image('disk.swap').cache(fetch_func=self._create_swap,
-                                         context=context,
-                                         filename="swap_%s" % swap_mb,
-                                         size=size,
-                                         swap_mb=swap_mb)
+                steps.append(('disk.swap', functools.partial(
+                    image('disk.swap').cache,
+                    fetch_func=self._create_swap,
+                    context=context,
+                    filename="swap_%s" % swap_mb,
+                    size=size,
+                    swap_mb=swap_mb)))
 
         # Config drive
-        if configdrive.required_by(instance):
-            LOG.info(_LI('Using config drive'), instance=instance)
-            extra_md = {}
-            if admin_pass:
-                extra_md['admin_pass'] = admin_pass
-
-            inst_md = instance_metadata.InstanceMetadata(instance,
-                content=files, extra_md=extra_md, network_info=network_info)
-            with configdrive.ConfigDriveBuilder(instance_md=inst_md) as cdb:
-                configdrive_path = self._get_disk_config_path(instance, suffix)
-                LOG.info(_LI('Creating config drive at %(path)s'),
-                         {'path': configdrive_path}, instance=instance)
+        config_drive = configdrive.required_by(instance)
+        if config_drive:
+            steps.append(('disk.config', functools.partial(
+                self._create_config_drive, instance, network_info,
+                admin_pass, files, suffix)))
 
-                try:
-                    cdb.make_drive(configdrive_path)
-                except processutils.ProcessExecutionError as e:
-                    with excutils.save_and_reraise_exception():
-                        LOG.error(_LE('Creating config drive failed '
-                                      'with error: %s'),
-                                  e, instance=instance)
+        self._run_image_steps(context, instance, steps)
 
         # File injection only if needed
-        elif inject_files and CONF.libvirt.inject_partition != -2:
+        if (not config_drive and inject_files and
+                CONF.libvirt.inject_partition != -2):
             if booted_from_volume:
                 LOG.warn(_LW('File injection into a boot from volume '
                              'instance is not supported'), instance=instance)
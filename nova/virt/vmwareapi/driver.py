@@ -279,6 +279,14 @@ class VMwareVCDriver(driver.ComputeDriver):
             instances.extend(vmops.list_instances())
         return instances
 
+    def list_instance_power_states(self):
+        """List the power states of the VM instances from all nodes."""
+        states = {}
+        for node in self.get_available_nodes():
+            vmops = self._get_vmops_for_compute_node(node)
+            states.update(vmops.list_instance_power_states())
+        return states
+
     def migrate_disk_and_power_off(self, context, instance, dest,
                                    flavor, network_info,
                                    block_device_info=None,
@@ -16,6 +16,7 @@
 Datastore utility functions
 """
 
+from oslo_config import cfg
 from oslo_log import log as logging
 from oslo_vmware import exceptions as vexc
 from oslo_vmware.objects import datastore as ds_obj
@@ -28,15 +29,40 @@ from nova.virt.vmwareapi import constants
 from nova.virt.vmwareapi import vim_util
 from nova.virt.vmwareapi import vm_util
 
+datastore_opts = [
+    cfg.FloatOpt('cached_image_datastore_preference',
+                 default=0.1,
+                 help='When choosing the datastore of a new instance, a '
+                      'datastore which already holds the image of the '
+                      'instance in its image cache is preferred to one which '
+                      'does not, unless the latter has more than this '
+                      'fraction of additional free space. Set to 0 to only '
+                      'weigh free space'),
+]
+
+CONF = cfg.CONF
+CONF.register_opts(datastore_opts, 'vmware')
+
 LOG = logging.getLogger(__name__)
 ALL_SUPPORTED_DS_TYPES = frozenset([constants.DATASTORE_TYPE_VMFS,
                                     constants.DATASTORE_TYPE_NFS,
                                     constants.DATASTORE_TYPE_VSAN])
 
 
+def _weighed_freespace(datastore, image_datastores):
+    """Free space of a datastore, weighed up if it already holds the image
+    being spawned.
+    """
+    if image_datastores and datastore.ref.value in image_datastores:
+        return datastore.freespace * (
+            1 + CONF.vmware.cached_image_datastore_preference)
+    return datastore.freespace
+
+
 def _select_datastore(session, data_stores, best_match, datastore_regex=None,
                       storage_policy=None,
-                      allowed_ds_types=ALL_SUPPORTED_DS_TYPES):
+                      allowed_ds_types=ALL_SUPPORTED_DS_TYPES,
+                      image_datastores=None):
     """Find the most preferable datastore in a given RetrieveResult object.
 
     :param session: vmwareapi session
@@ -45,6 +71,8 @@ def _select_datastore(session, data_stores, best_match, datastore_regex=None,
     :param datastore_regex: an optional regular expression to match names
     :param storage_policy: storage policy for the datastore
     :param allowed_ds_types: a list of acceptable datastore type names
+    :param image_datastores: an optional set of the values of the references
+                             of the datastores holding the image to spawn
     :return: datastore_ref, datastore_name, capacity, freespace
     """
 
@@ -69,9 +97,10 @@ def _select_datastore(session, data_stores, best_match, datastore_regex=None,
                     name=propdict['summary.name'],
                     capacity=propdict['summary.capacity'],
                     freespace=propdict['summary.freeSpace'])
-            # favor datastores with more free space
+            # favor datastores with more free space, or holding the image
             if (best_match is None or
-                new_ds.freespace > best_match.freespace):
+                _weighed_freespace(new_ds, image_datastores) >
+                    _weighed_freespace(best_match, image_datastores)):
                 best_match = new_ds
 
     return best_match
@@ -102,11 +131,16 @@ def _is_datastore_valid(propdict, datastore_regex, ds_types):
 
 def get_datastore(session, cluster, datastore_regex=None,
                   storage_policy=None,
-                  allowed_ds_types=ALL_SUPPORTED_DS_TYPES):
-    """Get the datastore list and choose the most preferable one."""
+                  allowed_ds_types=ALL_SUPPORTED_DS_TYPES,
+                  image_datastores=None):
+    """Get the datastore list and choose the most preferable one.
+
+    Datastores in image_datastores, which already hold the image to spawn,
+    are preferred as long as their free space is close to the best one.
+    """
     datastore_ret = session._call_method(
                                 vim_util,
-                                "get_dynamic_property", cluster,
+                                "get_inventory_property", cluster,
                                 "ClusterComputeResource", "datastore")
     # If there are no hosts in the cluster then an empty string is
     # returned
@@ -129,7 +163,8 @@ def get_datastore(session, cluster, datastore_regex=None,
                                        best_match,
                                        datastore_regex,
                                        storage_policy,
-                                       allowed_ds_types)
+                                       allowed_ds_types,
+                                       image_datastores)
         data_stores = session._call_method(vutil, 'continue_retrieval',
                                            data_stores)
     if best_match:
@@ -177,7 +212,7 @@ def _get_allowed_datastores(data_stores, datastore_regex):
 
 def get_available_datastores(session, cluster=None, datastore_regex=None):
     """Get the datastore list and choose the first local storage."""
-    ds = session._call_method(vim_util, "get_dynamic_property", cluster,
+    ds = session._call_method(vim_util, "get_inventory_property", cluster,
                               "ClusterComputeResource", "datastore")
     if not ds:
         return []
@@ -62,6 +62,9 @@ class ImageCacheManager(imagecache.ImageCacheManager):
         self._session = session
         self._base_folder = base_folder
         self._ds_browser = {}
+        # NOTE: the images known to be cached, by datastore reference value.
+        # Spawns add to it, and it is refreshed when images are aged.
+        self._cached_images = {}
 
     def _folder_delete(self, ds_path, dc_ref):
         try:
@@ -76,7 +79,16 @@ class ImageCacheManager(imagecache.ImageCacheManager):
         except vexc.FileNotFoundException:
             LOG.debug("File not found: %s", ds_path)
 
+    def get_image_datastores(self, image_id):
+        """Returns the reference values of the datastores known to hold an
+        image in their cache.
+        """
+        return set(ds for ds, images in self._cached_images.items()
+                   if image_id in images)
+
     def enlist_image(self, image_id, datastore, dc_ref):
+        self._cached_images.setdefault(datastore.ref.value,
+                                       set()).add(image_id)
         ds_browser = self._get_ds_browser(datastore.ref)
         cache_root_folder = datastore.build_path(self._base_folder)
 
@@ -168,6 +180,8 @@ class ImageCacheManager(imagecache.ImageCacheManager):
                                      "Deleting!"), path)
                         # Image has aged - delete the image ID folder
                         self._folder_delete(path, dc_info.ref)
+                        self._cached_images.get(datastore.ref.value,
+                                                set()).discard(image)
 
         # If the image is used and the timestamp file exists then we delete
         # the timestamp.
@@ -193,6 +207,7 @@ class ImageCacheManager(imagecache.ImageCacheManager):
             ds_path = datastore.build_path(self._base_folder)
             images = self._list_datastore_images(ds_path, datastore)
             self.originals = images['originals']
+            self._cached_images[datastore.ref.value] = set(self.originals)
             self._age_cached_images(context, datastore, dc_info, ds_path)
 
     def get_image_cache_folder(self, datastore, image_id):
@@ -20,6 +20,7 @@ Utility functions for Image transfer and manipulation.
 import os
 import tarfile
 import tempfile
+import time
 
 from lxml import etree
 from oslo_config import cfg
@@ -44,8 +45,6 @@ CONF = cfg.CONF
 LOG = logging.getLogger(__name__)
 IMAGE_API = image.API()
 
-QUEUE_BUFFER_SIZE = 10
-
 LINKED_CLONE_PROPERTY = 'vmware_linked_clone'
 
 
@@ -153,12 +152,32 @@ class VMwareImage(object):
         return cls(**props)
 
 
+def _log_transfer_stats(pipe, elapsed):
+    # NOTE: a pipe written to while full means that the writer is the
+    # bottleneck of the transfer, read from while empty that the reader is.
+    throughput = pipe.transferred / elapsed / units.Mi if elapsed else 0
+    LOG.debug("Transferred %(size)d bytes in %(elapsed).2f seconds "
+              "(%(throughput).2f MB/s), the reader waited on the writer "
+              "%(write_waits)d times and the writer on the reader "
+              "%(read_waits)d times",
+              {'size': pipe.transferred,
+               'elapsed': elapsed,
+               'throughput': throughput,
+               'write_waits': pipe.write_waits,
+               'read_waits': pipe.read_waits})
+
+
 def start_transfer(context, read_file_handle, data_size,
         write_file_handle=None, image_id=None, image_meta=None):
     """Start the data transfer from the reader to the writer.
     Reader writes to the pipe and the writer reads from the pipe. This means
     that the total transfer time boils down to the slower of the read/write
     and not the addition of the two times.
+
+    The reader is asked for chunks of CONF.vmware.image_transfer_chunk_size
+    bytes and the pipe holds at most CONF.vmware.image_transfer_buffers of
+    them, so that a slow writer holds the reader back rather than letting
+    the image pile up in memory.
     """
 
     if not image_meta:
@@ -166,12 +185,14 @@ def start_transfer(context, read_file_handle, data_size,
 
     # The pipe that acts as an intermediate store of data for reader to write
     # to and writer to grab from.
-    thread_safe_pipe = io_util.ThreadSafePipe(QUEUE_BUFFER_SIZE, data_size)
+    thread_safe_pipe = io_util.ThreadSafePipe(
+        CONF.vmware.image_transfer_buffers, data_size)
     # The read thread. In case of glance it is the instance of the
     # GlanceFileRead class. The glance client read returns an iterator
     # and this class wraps that iterator to provide datachunks in calls
     # to read.
-    read_thread = io_util.IOThread(read_file_handle, thread_safe_pipe)
+    read_thread = io_util.IOThread(read_file_handle, thread_safe_pipe,
+                                   CONF.vmware.image_transfer_chunk_size)
 
     # In case of Glance - VMware transfer, we just need a handle to the
     # HTTP Connection that is to send transfer data to the VMware datastore.
@@ -185,12 +206,14 @@ def start_transfer(context, read_file_handle, data_size,
         write_thread = io_util.GlanceWriteThread(context, thread_safe_pipe,
                 image_id, image_meta)
     # Start the read and write threads.
+    start = time.time()
     read_event = read_thread.start()
     write_event = write_thread.start()
     try:
         # Wait on the read and write events to signal their end
         read_event.wait()
         write_event.wait()
+        _log_transfer_stats(thread_safe_pipe, time.time() - start)
     except Exception as exc:
         # In case of any of the reads or writes raising an exception,
         # stop the threads so that we un-necessarily don't keep the other one
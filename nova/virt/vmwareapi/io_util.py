@@ -22,16 +22,32 @@ to the write using a LightQueue as a Pipe between the reader and the writer.
 from eventlet import event
 from eventlet import greenthread
 from eventlet import queue
+from oslo_config import cfg
 from oslo_log import log as logging
 
 from nova import exception
 from nova.i18n import _, _LE
 from nova import image
 
+transfer_opts = [
+    cfg.IntOpt('image_transfer_chunk_size',
+               default=65536,
+               help='Size in bytes of the chunks read from the source of an '
+                    'image transfer. Sources which produce their own chunks, '
+                    'like the image service or VMDK exports, are passed on '
+                    'as they are read'),
+    cfg.IntOpt('image_transfer_buffers',
+               default=10,
+               help='Maximum number of chunks held between the reader and '
+                    'the writer of an image transfer'),
+]
+
+CONF = cfg.CONF
+CONF.register_opts(transfer_opts, 'vmware')
+
 LOG = logging.getLogger(__name__)
 IMAGE_API = image.API()
 
-IO_THREAD_SLEEP_TIME = .01
 GLANCE_POLL_INTERVAL = 5
 
 
@@ -44,6 +60,11 @@ class ThreadSafePipe(queue.LightQueue):
         queue.LightQueue.__init__(self, maxsize)
         self.transfer_size = transfer_size
         self.transferred = 0
+        # NOTE: the number of reads which found the pipe empty, waiting on
+        # the reader, and of writes which found it full, waiting on the
+        # writer. They tell which end of the transfer is the slower one.
+        self.read_waits = 0
+        self.write_waits = 0
 
     def read(self, chunk_size):
         """Read data from the pipe.
@@ -53,6 +74,8 @@ class ThreadSafePipe(queue.LightQueue):
         chunks asked for by the Writer.
         """
         if self.transfer_size == 0 or self.transferred < self.transfer_size:
+            if self.empty():
+                self.read_waits += 1
             data_item = self.get()
             self.transferred += len(data_item)
             return data_item
@@ -60,7 +83,12 @@ class ThreadSafePipe(queue.LightQueue):
             return ""
 
     def write(self, data):
-        """Put a data item in the pipe."""
+        """Put a data item in the pipe.
+
+        The item is queued as is, it is not copied.
+        """
+        if self.full():
+            self.write_waits += 1
         self.put(data)
 
     def seek(self, offset, whence=0):
@@ -156,9 +184,10 @@ class IOThread(object):
     output file till the transfer is completely done.
     """
 
-    def __init__(self, input, output):
+    def __init__(self, input, output, chunk_size=None):
         self.input = input
         self.output = output
+        self.chunk_size = chunk_size
         self._running = False
         self.got_exception = False
 
@@ -172,12 +201,14 @@ class IOThread(object):
             self._running = True
             while self._running:
                 try:
-                    data = self.input.read(None)
+                    data = self.input.read(self.chunk_size)
                     if not data:
                         self.stop()
                         self.done.send(True)
                     self.output.write(data)
-                    greenthread.sleep(IO_THREAD_SLEEP_TIME)
+                    # NOTE: the pipe blocks the faster end of the transfer,
+                    # only yield here to let the other end run.
+                    greenthread.sleep(0)
                 except Exception as exc:
                     self.stop()
                     LOG.exception(_LE('Read/Write data failed'))
@@ -55,18 +55,21 @@ def _get_network_obj(session, network_objects, network_name):
         network_refs = prop_dict.get('network')
         if network_refs:
             network_refs = network_refs.ManagedObjectReference
+            # Get the properties of all the networks at once
+            network_props = session._call_method(vim_util,
+                                "get_properties_for_objects", network_refs,
+                                {"DistributedVirtualPortgroup": ["config"],
+                                 "Network": ["summary.name"]})
             for network in network_refs:
-                # Get network properties
+                props = network_props.get(network.value, {})
                 if network._type == 'DistributedVirtualPortgroup':
-                    props = session._call_method(vim_util,
-                                "get_dynamic_property", network,
-                                "DistributedVirtualPortgroup", "config")
+                    props = props.get('config')
                     # NOTE(asomya): This only works on ESXi if the port binding
                     # is set to ephemeral
                     # For a VLAN the network name will be the UUID. For a VXLAN
                     # network this will have a VXLAN prefix and then the
                     # network name.
-                    if network_name in props.name:
+                    if props and network_name in props.name:
                         network_obj['type'] = 'DistributedVirtualPortgroup'
                         network_obj['dvpg'] = props.key
                         dvs_props = session._call_method(vim_util,
@@ -77,9 +80,7 @@ def _get_network_obj(session, network_objects, network_name):
                         network_obj['dvsw'] = dvs_props
                         return network_obj
                 else:
-                    props = session._call_method(vim_util,
-                                "get_dynamic_property", network,
-                                "Network", "summary.name")
+                    props = props.get('summary.name')
                     if props == network_name:
                         network_obj['type'] = 'Network'
                         network_obj['name'] = network_name
@@ -90,6 +91,12 @@ def get_network_with_the_name(session, network_name="vmnet0", cluster=None):
     """Gets reference to the network whose name is passed as the
     argument.
     """
+    # NOTE: only the networks which are found are cached, so that a new
+    # network is looked up again until it shows up.
+    key = ('network', getattr(cluster, 'value', cluster), network_name)
+    network_obj = vim_util.inventory_cache_get(key)
+    if network_obj:
+        return network_obj
     vm_networks = session._call_method(vim_util,
                                        'get_object_properties',
                                        None, cluster,
@@ -101,6 +108,7 @@ def get_network_with_the_name(session, network_name="vmnet0", cluster=None):
             if network_obj:
                 session._call_method(vutil, 'cancel_retrieval',
                                      vm_networks)
+                vim_util.inventory_cache_update(key, network_obj)
                 return network_obj
         vm_networks = session._call_method(vutil, 'continue_retrieval',
                                            vm_networks)
@@ -19,6 +19,7 @@ The VMware API utility module.
 
 from oslo_config import cfg
 from oslo_log import log as logging
+from oslo_utils import timeutils
 from oslo_vmware import vim_util as vutil
 import suds
 
@@ -34,10 +35,47 @@ vmware_opts = cfg.IntOpt('maximum_objects', default=100,
                               'to something less than the configured value. '
                               'Any remaining objects may be retrieved with '
                               'additional requests.')
+inventory_cache_opt = cfg.IntOpt('inventory_cache_ttl', default=0,
+                                 help='Time in seconds to cache slowly '
+                                      'changing inventory, like the '
+                                      'datastores, hosts and resource pool '
+                                      'of the cluster and the networks '
+                                      'found on it, instead of retrieving '
+                                      'it from vCenter every time it is '
+                                      'used. Changes made to the inventory '
+                                      'take at most this long to be seen. '
+                                      '0 disables the cache.')
 CONF = cfg.CONF
 CONF.register_opt(vmware_opts, 'vmware')
+CONF.register_opt(inventory_cache_opt, 'vmware')
 LOG = logging.getLogger(__name__)
 
+# A cache of slowly changing inventory. The values are (timestamp, value)
+# tuples, and expire after inventory_cache_ttl seconds.
+_INVENTORY_CACHE = {}
+
+
+def inventory_cache_reset():
+    global _INVENTORY_CACHE
+    _INVENTORY_CACHE = {}
+
+
+def inventory_cache_get(key):
+    """Gets a cached inventory value, or None if it is missing or expired."""
+    ttl = CONF.vmware.inventory_cache_ttl
+    cached = _INVENTORY_CACHE.get(key)
+    if ttl <= 0 or cached is None:
+        return None
+    if timeutils.utcnow_ts() - cached[0] >= ttl:
+        _INVENTORY_CACHE.pop(key, None)
+        return None
+    return cached[1]
+
+
+def inventory_cache_update(key, value):
+    if CONF.vmware.inventory_cache_ttl > 0:
+        _INVENTORY_CACHE[key] = (timeutils.utcnow_ts(), value)
+
 
 def object_to_dict(obj, list_depth=1):
     """Convert Suds object into serializable format.
@@ -119,6 +157,67 @@ def get_dynamic_properties(vim, mobj, type, property_names):
     return property_dict
 
 
+def get_inventory_properties(vim, mobj, type, property_names):
+    """Gets the specified properties of a slowly changing Managed Object,
+    like a cluster, from the inventory cache when possible.
+    """
+    if mobj is None:
+        return {}
+    key = ('properties', type, mobj.value, tuple(property_names))
+    property_dict = inventory_cache_get(key)
+    if property_dict is None:
+        property_dict = get_dynamic_properties(vim, mobj, type,
+                                               property_names)
+        inventory_cache_update(key, property_dict)
+    return property_dict
+
+
+def get_inventory_property(vim, mobj, type, property_name):
+    """Gets a particular property of a slowly changing Managed Object
+    from the inventory cache when possible.
+    """
+    property_dict = get_inventory_properties(vim, mobj, type,
+                                             [property_name])
+    return property_dict.get(property_name)
+
+
+def get_properties_for_objects(vim, obj_list, properties_by_type):
+    """Gets the properties of a set of Managed Objects with a single
+    property collector retrieval, following its continuation tokens.
+
+    :param obj_list: the Managed Object references, of any of the types
+                     in properties_by_type
+    :param properties_by_type: the property names to get, by Managed Object
+                               type
+    :returns: a dict of the property dicts of the objects, by Managed
+              Object reference value
+    """
+    client_factory = vim.client.factory
+    if not obj_list:
+        return {}
+    prop_specs = [get_prop_spec(client_factory, type, properties)
+                  for type, properties in properties_by_type.items()]
+    obj_specs = [get_obj_spec(client_factory, obj) for obj in obj_list]
+    prop_filter_spec = get_prop_filter_spec(client_factory,
+                                            obj_specs, prop_specs)
+    options = client_factory.create('ns0:RetrieveOptions')
+    options.maxObjects = CONF.vmware.maximum_objects
+    result = vim.RetrievePropertiesEx(
+            vim.service_content.propertyCollector,
+            specSet=[prop_filter_spec], options=options)
+    objects = {}
+    while result:
+        for obj_content in result.objects:
+            objects[obj_content.obj.value] = {
+                prop.name: prop.val
+                for prop in getattr(obj_content, 'propSet', None) or []}
+        token = getattr(result, 'token', None)
+        if not token:
+            break
+        result = continue_to_get_objects(vim, token)
+    return objects
+
+
 def get_objects(vim, type, properties_to_collect=None, all=False):
     """Gets the list of objects of the type specified."""
     return vutil.get_objects(vim, type, CONF.vmware.maximum_objects,
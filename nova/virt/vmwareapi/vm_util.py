@@ -1048,30 +1048,38 @@ def get_stats_from_cluster(session, cluster):
     vcpus = 0
     mem_info = {'total': 0, 'free': 0}
     # Get the Host and Resource Pool Managed Object Refs
-    prop_dict = session._call_method(vim_util, "get_dynamic_properties",
+    prop_dict = session._call_method(vim_util, "get_inventory_properties",
                                      cluster, "ClusterComputeResource",
                                      ["host", "resourcePool"])
     if prop_dict:
+        mors = []
         host_ret = prop_dict.get('host')
         if host_ret:
-            host_mors = host_ret.ManagedObjectReference
-            result = session._call_method(vim_util,
-                         "get_properties_for_a_collection_of_objects",
-                         "HostSystem", host_mors,
-                         ["summary.hardware", "summary.runtime"])
-            for obj in result.objects:
-                hardware_summary = obj.propSet[0].val
-                runtime_summary = obj.propSet[1].val
-                if (runtime_summary.inMaintenanceMode is False and
+            mors.extend(host_ret.ManagedObjectReference)
+        res_mor = prop_dict.get('resourcePool')
+        if res_mor:
+            mors.append(res_mor)
+        # The summaries of all the hosts and the resource pool usage are
+        # retrieved together
+        result = session._call_method(vim_util,
+                     "get_properties_for_objects", mors,
+                     {"HostSystem": ["summary.hardware", "summary.runtime"],
+                      "ResourcePool": ["summary.runtime.memory"]})
+        if host_ret:
+            for host_mor in host_ret.ManagedObjectReference:
+                props = result.get(host_mor.value, {})
+                hardware_summary = props.get('summary.hardware')
+                runtime_summary = props.get('summary.runtime')
+                if (hardware_summary and runtime_summary and
+                    runtime_summary.inMaintenanceMode is False and
                     runtime_summary.connectionState == "connected"):
                     # Total vcpus is the sum of all pCPUs of individual hosts
                     # The overcommitment ratio is factored in by the scheduler
                     vcpus += hardware_summary.numCpuThreads
 
-        res_mor = prop_dict.get('resourcePool')
         if res_mor:
-            res_usage = session._call_method(vim_util, "get_dynamic_property",
-                            res_mor, "ResourcePool", "summary.runtime.memory")
+            res_usage = result.get(res_mor.value, {}).get(
+                'summary.runtime.memory')
             if res_usage:
                 # maxUsage is the memory limit of the cluster available to VM's
                 mem_info['total'] = int(res_usage.maxUsage / units.Mi)
@@ -1091,7 +1099,7 @@ def get_host_ref(session, cluster=None):
                              results)
         host_mor = results.objects[0].obj
     else:
-        host_ret = session._call_method(vim_util, "get_dynamic_property",
+        host_ret = session._call_method(vim_util, "get_inventory_property",
                                         cluster, "ClusterComputeResource",
                                         "host")
         if not host_ret or not host_ret.ManagedObjectReference:
@@ -1148,7 +1156,7 @@ def get_res_pool_ref(session, cluster):
     """Get the resource pool."""
     # Get the root resource pool of the cluster
     res_pool_ref = session._call_method(vim_util,
-                                        "get_dynamic_property",
+                                        "get_inventory_property",
                                         cluster,
                                         "ClusterComputeResource",
                                         "resourcePool")
@@ -451,11 +451,16 @@ class VMwareVMOps(object):
                                                  reason=reason)
         allowed_ds_types = ds_util.get_allowed_datastore_types(
             image_info.disk_type)
+        image_datastores = None
+        if image_info.image_id:
+            image_datastores = self._imagecache.get_image_datastores(
+                image_info.image_id)
         datastore = ds_util.get_datastore(self._session,
                                           self._cluster,
                                           self._datastore_regex,
                                           storage_policy,
-                                          allowed_ds_types)
+                                          allowed_ds_types,
+                                          image_datastores)
         dc_info = self.get_datacenter_ref_and_name(datastore.ref)
 
         return VirtualMachineInstanceConfigInfo(instance,
@@ -1796,6 +1801,33 @@ class VMwareVMOps(object):
         LOG.debug("Got total of %s instances", str(len(lst_vm_names)))
         return lst_vm_names
 
+    def list_instance_power_states(self):
+        """Returns the power states of the VM instances of the vCenter
+        cluster by instance uuid, retrieved with one property collector
+        query rather than one query per VM.
+        """
+        properties = ['name', 'runtime.connectionState', 'runtime.powerState']
+        states = {}
+        if not self._root_resource_pool:
+            return states
+        retrieve_result = self._session._call_method(
+            vim_util, 'get_inner_objects', self._root_resource_pool, 'vm',
+            'VirtualMachine', properties)
+        while retrieve_result:
+            for vm in retrieve_result.objects:
+                props = {prop.name: prop.val for prop in vm.propSet}
+                vm_name = props.get('name')
+                # Ignoring the orphaned or inaccessible VMs
+                if (props.get('runtime.connectionState') not in
+                        ["orphaned", "inaccessible"] and
+                        uuidutils.is_uuid_like(vm_name)):
+                    states[vm_name] = VMWARE_POWER_STATES.get(
+                        props.get('runtime.powerState'), power_state.NOSTATE)
+            retrieve_result = self._session._call_method(vutil,
+                                                         'continue_retrieval',
+                                                         retrieve_result)
+        return states
+
     def get_vnc_console(self, instance):
         """Return connection info for a vnc console using vCenter logic."""
 